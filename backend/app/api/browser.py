@@ -15,6 +15,13 @@ from app.services.browser_manager import (
     is_picker_active,
     get_user_data_dir,
 )
+from app.services.browser_pool import (
+    DEFAULT_POOL_SIZE,
+    DEFAULT_MAX_USES,
+    get_browser_pool,
+    configure_browser_pool,
+    shutdown_browser_pool,
+)
 
 router = APIRouter(prefix="/api/browser", tags=["browser"])
 
@@ -27,6 +34,11 @@ class NavigateRequest(BaseModel):
     url: str
 
 
+class BrowserPoolRequest(BaseModel):
+    size: int = DEFAULT_POOL_SIZE
+    maxUses: int = DEFAULT_MAX_USES
+
+
 @router.post("/open")
 async def open_browser(request: OpenBrowserRequest = OpenBrowserRequest()):
     """打开自动化浏览器"""
@@ -119,3 +131,26 @@ async def api_get_similar_elements():
             }
         return {"selected": False, "similar": None}
     raise HTTPException(status_code=400, detail=result.get("error", "获取失败"))
+
+
+@router.get("/pool")
+async def get_pool_status():
+    """获取浏览器池状态"""
+    return get_browser_pool().stats()
+
+
+@router.post("/pool/start")
+async def start_pool(request: BrowserPoolRequest = BrowserPoolRequest()):
+    """按指定配置启动（预热）浏览器池"""
+    try:
+        pool = await configure_browser_pool(size=request.size, max_uses=request.maxUses)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"启动浏览器池失败: {e}")
+    return {"message": "浏览器池已启动", **pool.stats()}
+
+
+@router.post("/pool/stop")
+async def stop_pool():
+    """关闭浏览器池"""
+    await shutdown_browser_pool()
+    return {"message": "浏览器池已关闭"}
@@ -1,4 +1,5 @@
 """Excel文件资源API - 处理Excel文件上传和读取"""
+import asyncio
 import os
 import uuid
 from datetime import datetime
@@ -8,14 +9,24 @@ from pydantic import BaseModel
 import openpyxl
 import xlrd
 
+from app.services.asset_registry import AssetRegistry
+from app.services.excel_cache import (
+    get_excel_cache, column_index, parse_cell_address, convert_workbook, remove_columnar,
+    SheetData, WorkbookData,
+)
+
 router = APIRouter(prefix="/api/data-assets", tags=["data-assets"])
 
 # 存储上传的文件信息
 UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'uploads')
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# 内存中存储文件元数据
-data_assets: dict[str, dict] = {}
+# 文件元数据（持久化到 uploads/manifest.json）
+data_assets = AssetRegistry(UPLOAD_DIR)
+
+# 同时进行的列式转换数量
+_conversion_semaphore: Optional[asyncio.Semaphore] = None
+_conversion_tasks: set[asyncio.Task] = set()
 
 
 class ReadExcelRequest(BaseModel):
@@ -72,9 +83,15 @@ async def upload_excel(file: UploadFile = File(...)):
         'uploadedAt': datetime.now().isoformat(),
         'sheetNames': sheet_names,
         'path': file_path,
+        'columnar': 'pending',  # 列式转换状态: pending / ready / failed
     }
-    data_assets[file_id] = asset
+    data_assets.add(asset)
+    schedule_conversion(asset)
     
+    return _asset_info(asset)
+
+
+def _asset_info(asset: dict) -> dict:
     return {
         'id': asset['id'],
         'name': asset['name'],
@@ -82,23 +99,47 @@ async def upload_excel(file: UploadFile = File(...)):
         'size': asset['size'],
         'uploadedAt': asset['uploadedAt'],
         'sheetNames': asset['sheetNames'],
+        'columnar': asset.get('columnar', 'pending'),
     }
 
 
+def schedule_conversion(asset: dict):
+    """在后台把工作簿转换为列式格式，之后读取不再经过 openpyxl"""
+    task = asyncio.create_task(_convert_asset(asset['id'], asset['path']))
+    _conversion_tasks.add(task)
+    task.add_done_callback(_conversion_tasks.discard)
+
+
+async def _convert_asset(file_id: str, file_path: str):
+    global _conversion_semaphore
+    if _conversion_semaphore is None:
+        _conversion_semaphore = asyncio.Semaphore(2)
+    async with _conversion_semaphore:
+        if file_id not in data_assets:
+            return
+        try:
+            await asyncio.to_thread(convert_workbook, file_path)
+        except Exception as e:
+            print(f"Excel 列式转换失败 ({file_path}): {e}")
+            data_assets.update(file_id, columnar='failed', columnarError=str(e))
+            return
+        if file_id in data_assets:
+            data_assets.update(file_id, columnar='ready')
+        else:
+            remove_columnar(file_path)
+
+
+def resume_conversions():
+    """启动时继续未完成的列式转换"""
+    for asset in data_assets.values():
+        if asset.get('columnar', 'pending') == 'pending':
+            schedule_conversion(asset)
+
+
 @router.get("")
 async def list_assets():
     """获取所有Excel文件资源"""
-    return [
-        {
-            'id': a['id'],
-            'name': a['name'],
-            'originalName': a['originalName'],
-            'size': a['size'],
-            'uploadedAt': a['uploadedAt'],
-            'sheetNames': a['sheetNames'],
-        }
-        for a in data_assets.values()
-    ]
+    return [_asset_info(a) for a in data_assets.values()]
 
 
 @router.delete("/{file_id}")
@@ -109,16 +150,24 @@ async def delete_asset(file_id: str):
     
     asset = data_assets[file_id]
     
-    # 删除文件
+    # 删除元数据
+    data_assets.remove(file_id)
+    
+    # 删除文件及列式转换结果
+    get_excel_cache().invalidate(asset['path'])
+    remove_columnar(asset['path'])
     if os.path.exists(asset['path']):
         os.remove(asset['path'])
     
-    # 删除元数据
-    del data_assets[file_id]
-    
     return {'message': '删除成功'}
 
 
+@router.get("/cache")
+async def get_cache_stats():
+    """获取Excel解析缓存的状态"""
+    return get_excel_cache().stats()
+
+
 @router.post("/read")
 async def read_excel(request: ReadExcelRequest):
     """读取Excel数据"""
@@ -126,94 +175,27 @@ async def read_excel(request: ReadExcelRequest):
         raise HTTPException(status_code=404, detail="文件不存在")
     
     asset = data_assets[request.fileId]
-    file_path = asset['path']
-    is_xls = file_path.lower().endswith('.xls')
     
     try:
-        if is_xls:
-            # 使用xlrd读取.xls文件
-            return await _read_excel_xls(file_path, request)
-        else:
-            # 使用openpyxl读取.xlsx文件
-            return await _read_excel_xlsx(file_path, request)
+        # 工作簿解析结果有缓存，首次读取时在线程池中解析
+        workbook = await asyncio.to_thread(get_excel_cache().get, asset['path'])
+        return _read_excel(workbook, request)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"读取Excel失败: {str(e)}")
 
 
-async def _read_excel_xlsx(file_path: str, request: ReadExcelRequest):
-    """使用openpyxl读取.xlsx文件"""
-    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-    
-    # 选择工作表
-    if request.sheetName:
-        if request.sheetName not in wb.sheetnames:
-            raise HTTPException(status_code=400, detail=f"工作表 '{request.sheetName}' 不存在")
-        ws = wb[request.sheetName]
-    else:
-        ws = wb.active
-    
-    result = None
-    result_type = 'unknown'
-    
-    if request.readMode == 'cell':
-        if not request.cellAddress:
-            raise HTTPException(status_code=400, detail="单元格模式需要指定cellAddress")
-        cell = ws[request.cellAddress]
-        result = cell.value
-        result_type = 'cell'
-    
-    elif request.readMode == 'row':
-        if request.rowIndex is None:
-            raise HTTPException(status_code=400, detail="行模式需要指定rowIndex")
-        row_data = []
-        for cell in ws[request.rowIndex]:
-            row_data.append(cell.value)
-        result = row_data
-        result_type = 'array'
-    
-    elif request.readMode == 'column':
-        if request.columnIndex is None:
-            raise HTTPException(status_code=400, detail="列模式需要指定columnIndex")
-        col_data = []
-        col_idx = request.columnIndex
-        if isinstance(col_idx, str):
-            col_idx = openpyxl.utils.column_index_from_string(col_idx)
-        for row in ws.iter_rows(min_col=col_idx, max_col=col_idx):
-            col_data.append(row[0].value)
-        result = col_data
-        result_type = 'array'
-    
-    elif request.readMode == 'range':
-        if not request.startCell or not request.endCell:
-            raise HTTPException(status_code=400, detail="范围模式需要指定startCell和endCell")
-        range_data = []
-        for row in ws[f"{request.startCell}:{request.endCell}"]:
-            row_data = [cell.value for cell in row]
-            range_data.append(row_data)
-        result = range_data
-        result_type = 'matrix'
-    
-    else:
-        raise HTTPException(status_code=400, detail=f"不支持的读取模式: {request.readMode}")
-    
-    wb.close()
-    
-    return {'data': result, 'type': result_type}
+def _get_sheet(workbook: WorkbookData, sheet_name: Optional[str]) -> SheetData:
+    try:
+        return workbook.sheet(sheet_name)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"工作表 '{sheet_name}' 不存在")
 
 
-async def _read_excel_xls(file_path: str, request: ReadExcelRequest):
-    """使用xlrd读取.xls文件"""
-    wb = xlrd.open_workbook(file_path)
-    
-    # 选择工作表
-    if request.sheetName:
-        if request.sheetName not in wb.sheet_names():
-            raise HTTPException(status_code=400, detail=f"工作表 '{request.sheetName}' 不存在")
-        ws = wb.sheet_by_name(request.sheetName)
-    else:
-        ws = wb.sheet_by_index(0)
+def _read_excel(workbook: WorkbookData, request: ReadExcelRequest):
+    """从缓存的工作簿中读取数据"""
+    ws = _get_sheet(workbook, request.sheetName)
     
     result = None
     result_type = 'unknown'
@@ -221,51 +203,25 @@ async def _read_excel_xls(file_path: str, request: ReadExcelRequest):
     if request.readMode == 'cell':
         if not request.cellAddress:
             raise HTTPException(status_code=400, detail="单元格模式需要指定cellAddress")
-        # 解析单元格地址如 'A1' -> (0, 0)
-        col_str, row_str = '', ''
-        for c in request.cellAddress:
-            if c.isalpha():
-                col_str += c
-            else:
-                row_str += c
-        col_idx = _col_letter_to_index(col_str)
-        row_idx = int(row_str) - 1
-        result = ws.cell_value(row_idx, col_idx)
+        result = ws.cell(*parse_cell_address(request.cellAddress))
         result_type = 'cell'
     
     elif request.readMode == 'row':
         if request.rowIndex is None:
             raise HTTPException(status_code=400, detail="行模式需要指定rowIndex")
-        row_idx = request.rowIndex - 1  # xlrd从0开始
-        row_data = ws.row_values(row_idx)
-        result = row_data
+        result = ws.row(request.rowIndex)
         result_type = 'array'
     
     elif request.readMode == 'column':
         if request.columnIndex is None:
             raise HTTPException(status_code=400, detail="列模式需要指定columnIndex")
-        col_idx = request.columnIndex
-        if isinstance(col_idx, str):
-            col_idx = _col_letter_to_index(col_idx)
-        else:
-            col_idx = col_idx - 1  # xlrd从0开始
-        col_data = ws.col_values(col_idx)
-        result = col_data
+        result = ws.column(column_index(request.columnIndex))
         result_type = 'array'
     
     elif request.readMode == 'range':
         if not request.startCell or not request.endCell:
             raise HTTPException(status_code=400, detail="范围模式需要指定startCell和endCell")
-        # 解析范围
-        start_col, start_row = _parse_cell_address(request.startCell)
-        end_col, end_row = _parse_cell_address(request.endCell)
-        range_data = []
-        for r in range(start_row, end_row + 1):
-            row_data = []
-            for c in range(start_col, end_col + 1):
-                row_data.append(ws.cell_value(r, c))
-            range_data.append(row_data)
-        result = range_data
+        result = ws.range_by_address(request.startCell, request.endCell)
         result_type = 'matrix'
     
     else:
@@ -274,39 +230,16 @@ async def _read_excel_xls(file_path: str, request: ReadExcelRequest):
     return {'data': result, 'type': result_type}
 
 
-def _col_letter_to_index(col_str: str) -> int:
-    """将列字母转换为索引（A=0, B=1, ...）"""
-    result = 0
-    for c in col_str.upper():
-        result = result * 26 + (ord(c) - ord('A') + 1)
-    return result - 1
-
-
-def _parse_cell_address(address: str) -> tuple[int, int]:
-    """解析单元格地址，返回(col_idx, row_idx)，从0开始"""
-    col_str, row_str = '', ''
-    for c in address:
-        if c.isalpha():
-            col_str += c
-        else:
-            row_str += c
-    return _col_letter_to_index(col_str), int(row_str) - 1
-
-
 # 提供给执行器使用的函数
 def get_asset_path(file_id: str) -> Optional[str]:
     """获取文件路径"""
-    if file_id in data_assets:
-        return data_assets[file_id]['path']
-    return None
+    asset = data_assets.get(file_id)
+    return asset['path'] if asset else None
 
 
 def get_asset_by_name(name: str) -> Optional[dict]:
     """通过原始文件名获取资产"""
-    for asset in data_assets.values():
-        if asset['originalName'] == name:
-            return asset
-    return None
+    return data_assets.get_by_name(name)
 
 
 @router.get("/{file_id}/preview")
@@ -316,79 +249,20 @@ async def preview_excel(file_id: str, sheet: Optional[str] = None, max_rows: int
         raise HTTPException(status_code=404, detail="文件不存在")
     
     asset = data_assets[file_id]
-    file_path = asset['path']
-    is_xls = file_path.lower().endswith('.xls')
+    is_xls = asset['path'].lower().endswith('.xls')
     
     try:
-        if is_xls:
-            return _preview_xls(file_path, sheet, max_rows, max_cols)
-        else:
-            return _preview_xlsx(file_path, sheet, max_rows, max_cols)
+        workbook = await asyncio.to_thread(get_excel_cache().get, asset['path'])
+        ws = _get_sheet(workbook, sheet)
+        data = ws.preview(max_rows, max_cols)
+        return {
+            'data': data,
+            'totalRows': ws.nrows,
+            'totalCols': ws.ncols,
+            'previewRows': len(data),
+            'previewCols': min(max_cols, ws.ncols) if is_xls else max_cols,
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"预览失败: {str(e)}")
-
-
-def _preview_xlsx(file_path: str, sheet_name: Optional[str], max_rows: int, max_cols: int):
-    """预览xlsx文件"""
-    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-    
-    if sheet_name:
-        if sheet_name not in wb.sheetnames:
-            wb.close()
-            raise HTTPException(status_code=400, detail=f"工作表 '{sheet_name}' 不存在")
-        ws = wb[sheet_name]
-    else:
-        ws = wb.active
-    
-    data = []
-    for row_idx, row in enumerate(ws.iter_rows(max_row=max_rows, max_col=max_cols), 1):
-        row_data = []
-        for cell in row:
-            val = cell.value
-            row_data.append(str(val) if val is not None else '')
-        data.append(row_data)
-    
-    # 获取实际的行列数
-    total_rows = ws.max_row or 0
-    total_cols = ws.max_column or 0
-    
-    wb.close()
-    
-    return {
-        'data': data,
-        'totalRows': total_rows,
-        'totalCols': total_cols,
-        'previewRows': len(data),
-        'previewCols': max_cols,
-    }
-
-
-def _preview_xls(file_path: str, sheet_name: Optional[str], max_rows: int, max_cols: int):
-    """预览xls文件"""
-    wb = xlrd.open_workbook(file_path)
-    
-    if sheet_name:
-        if sheet_name not in wb.sheet_names():
-            raise HTTPException(status_code=400, detail=f"工作表 '{sheet_name}' 不存在")
-        ws = wb.sheet_by_name(sheet_name)
-    else:
-        ws = wb.sheet_by_index(0)
-    
-    data = []
-    rows_to_read = min(max_rows, ws.nrows)
-    cols_to_read = min(max_cols, ws.ncols)
-    
-    for row_idx in range(rows_to_read):
-        row_data = []
-        for col_idx in range(cols_to_read):
-            val = ws.cell_value(row_idx, col_idx)
-            row_data.append(str(val) if val is not None and val != '' else '')
-        data.append(row_data)
-    
-    return {
-        'data': data,
-        'totalRows': ws.nrows,
-        'totalCols': ws.ncols,
-        'previewRows': len(data),
-        'previewCols': cols_to_read,
-    }
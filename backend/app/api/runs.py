@@ -0,0 +1,178 @@
+"""工作流运行API路由 - 通过调度器排队执行，按 run id 查询状态、日志和数据"""
+from pathlib import Path
+from typing import Any, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from app.models.workflow import ExecutionStatus
+from app.api.workflows import workflows_store, job_scheduler, ExecuteOptions
+from app.services.data_collector import media_type
+from app.services.worker_pool import DEFAULT_WORKER_COUNT, get_worker_pool, configure_worker_pool
+
+
+router = APIRouter(prefix="/api/runs", tags=["runs"])
+
+
+class RunSubmit(BaseModel):
+    workflowId: str
+    parameters: dict[str, Any] = {}  # 作为工作流变量注入（覆盖同名变量）
+    priority: int = 0  # 数值越大越先执行
+    options: ExecuteOptions = ExecuteOptions()
+
+
+class RunParameters(BaseModel):
+    parameters: dict[str, Any] = {}
+    priority: int = 0
+
+
+class RunBatchSubmit(BaseModel):
+    workflowId: str
+    runs: list[RunParameters]
+    options: ExecuteOptions = ExecuteOptions()
+
+
+class SchedulerConfig(BaseModel):
+    maxConcurrent: Optional[int] = None
+    perWorkflowLimit: Optional[int] = None
+
+
+class WorkerPoolConfig(BaseModel):
+    size: int = DEFAULT_WORKER_COUNT  # 0 表示关闭工作进程模式
+
+
+def _get_run(run_id: str):
+    run = job_scheduler.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="运行不存在")
+    return run
+
+
+def _run_info(run) -> dict:
+    info = run.to_dict()
+    info['position'] = job_scheduler.queue_position(run)
+    return info
+
+
+@router.post("")
+async def submit_run(data: RunSubmit):
+    """提交一次工作流运行"""
+    if data.workflowId not in workflows_store:
+        raise HTTPException(status_code=404, detail="工作流不存在")
+    run = job_scheduler.submit(
+        data.workflowId,
+        parameters=data.parameters,
+        options=data.options.model_dump(),
+        priority=data.priority,
+    )
+    return _run_info(run)
+
+
+@router.post("/batch")
+async def submit_runs(data: RunBatchSubmit):
+    """批量提交同一工作流的多次运行（每次运行使用各自的参数）"""
+    if data.workflowId not in workflows_store:
+        raise HTTPException(status_code=404, detail="工作流不存在")
+    options = data.options.model_dump()
+    run_ids = [
+        job_scheduler.submit(
+            data.workflowId,
+            parameters=item.parameters,
+            options=options,
+            priority=item.priority,
+            dispatch=False,
+        ).run_id
+        for item in data.runs
+    ]
+    job_scheduler.dispatch()
+    return {"runIds": run_ids, "scheduler": job_scheduler.stats()}
+
+
+@router.get("")
+async def list_runs(workflowId: Optional[str] = None, status: Optional[str] = None):
+    """列出运行记录"""
+    try:
+        status_filter = ExecutionStatus(status) if status else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"无效的状态: {status}")
+    runs = job_scheduler.list_runs(workflow_id=workflowId, status=status_filter)
+    return {"runs": [run.to_dict() for run in runs]}
+
+
+@router.get("/scheduler")
+async def get_scheduler():
+    """获取调度器状态"""
+    return job_scheduler.stats()
+
+
+@router.put("/scheduler")
+async def update_scheduler(config: SchedulerConfig):
+    """调整并发上限"""
+    job_scheduler.configure(
+        max_concurrent=config.maxConcurrent,
+        per_workflow_limit=config.perWorkflowLimit,
+    )
+    return job_scheduler.stats()
+
+
+@router.get("/workers")
+async def get_workers():
+    """获取工作进程池状态"""
+    pool = get_worker_pool()
+    return pool.stats() if pool else {"size": 0, "workers": []}
+
+
+@router.put("/workers")
+async def update_workers(config: WorkerPoolConfig):
+    """开启、调整或关闭工作进程模式（进程在首次分发运行时启动）"""
+    pool = await configure_worker_pool(max(0, config.size))
+    return pool.stats() if pool else {"size": 0, "workers": []}
+
+
+@router.get("/{run_id}")
+async def get_run(run_id: str):
+    """获取运行状态"""
+    return _run_info(_get_run(run_id))
+
+
+@router.get("/{run_id}/logs")
+async def get_run_logs(run_id: str, offset: int = 0, limit: int = 500):
+    """获取运行日志（只保留最近的日志）"""
+    run = _get_run(run_id)
+    logs = list(run.logs)
+    return {"total": len(logs), "logs": logs[offset:offset + limit]}
+
+
+@router.get("/{run_id}/data")
+async def get_run_data(run_id: str, offset: int = 0, limit: int = 100):
+    """获取运行收集的数据"""
+    run = _get_run(run_id)
+    return {"total": len(run.data), "rows": run.data[offset:offset + limit]}
+
+
+@router.get("/{run_id}/file")
+async def download_run_data(run_id: str):
+    """下载运行导出的数据文件"""
+    run = _get_run(run_id)
+    if not run.result or not run.result.data_file:
+        raise HTTPException(status_code=404, detail="没有可下载的数据")
+    
+    file_path = Path(run.result.data_file)
+    if not file_path.is_file():
+        raise HTTPException(status_code=404, detail="数据文件不存在")
+    
+    return FileResponse(
+        path=str(file_path),
+        filename=file_path.name,
+        media_type=media_type(file_path)
+    )
+
+
+@router.post("/{run_id}/cancel")
+async def cancel_run(run_id: str):
+    """取消排队中的运行或停止执行中的运行"""
+    run = _get_run(run_id)
+    if not await job_scheduler.cancel(run.run_id):
+        raise HTTPException(status_code=400, detail="运行已结束")
+    return {"message": "已取消运行", "status": run.status.value}
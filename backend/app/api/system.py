@@ -5,9 +5,24 @@ from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional
 
+from app.services.http_client import (
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_KEEPALIVE,
+    DEFAULT_KEEPALIVE_EXPIRY,
+    get_http_manager,
+    configure_http_clients,
+)
+
 router = APIRouter(prefix="/api/system", tags=["system"])
 
 
+class HttpClientConfig(BaseModel):
+    maxConnections: int = DEFAULT_MAX_CONNECTIONS  # 每个站点的最大连接数
+    maxKeepalive: int = DEFAULT_MAX_KEEPALIVE      # 每个站点保持的空闲连接数
+    keepaliveExpiry: float = DEFAULT_KEEPALIVE_EXPIRY
+    http2: Optional[bool] = None                   # 不指定时安装了 h2 即启用
+
+
 class FolderSelectRequest(BaseModel):
     title: Optional[str] = "选择文件夹"
     initialDir: Optional[str] = None
@@ -223,3 +238,21 @@ async def select_file(request: FileSelectRequest):
     
     except Exception as e:
         return {"success": False, "path": None, "error": str(e)}
+
+
+@router.get("/http-clients")
+async def get_http_clients():
+    """获取 HTTP 连接池配置和状态"""
+    return get_http_manager().stats()
+
+
+@router.put("/http-clients")
+async def update_http_clients(config: HttpClientConfig):
+    """调整 HTTP 连接池上限（现有连接会被关闭）"""
+    manager = await configure_http_clients(
+        max_connections=config.maxConnections,
+        max_keepalive=config.maxKeepalive,
+        keepalive_expiry=config.keepaliveExpiry,
+        http2=config.http2,
+    )
+    return manager.stats()
@@ -1,17 +1,22 @@
 """工作流API路由"""
 import asyncio
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 from uuid import uuid4
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
-from app.models.workflow import Workflow, ExecutionResult, ExecutionStatus, LogEntry
+from app.models.workflow import Workflow, ExecutionResult, ExecutionStatus
 from app.services.workflow_executor import WorkflowExecutor
-from app.services.data_collector import DataExporter
+from app.services.log_pipeline import LogVerbosity
+from app.services.browser_pool import get_browser_pool, storage_state_path
+from app.services.job_scheduler import JobScheduler, WorkflowRun
+from app.services.worker_pool import RemoteExecutor, get_worker_pool
+from app.services.data_collector import DataExporter, media_type
+from app.services.data_table import DataTable
 from app.main import sio
 
 
@@ -21,7 +26,7 @@ router = APIRouter(prefix="/api/workflows", tags=["workflows"])
 workflows_store: dict[str, Workflow] = {}
 executions_store: dict[str, WorkflowExecutor] = {}
 execution_results: dict[str, ExecutionResult] = {}
-execution_data: dict[str, list[dict]] = {}
+execution_data: dict[str, DataTable] = {}
 
 
 class WorkflowCreate(BaseModel):
@@ -38,8 +43,40 @@ class WorkflowUpdate(BaseModel):
     variables: Optional[list[dict]] = None
 
 
+# 编辑器中直接执行的运行优先级（高于批量提交的默认优先级 0）
+INTERACTIVE_PRIORITY = 100
+
+
 class ExecuteOptions(BaseModel):
     headless: bool = False
+    logLevel: str = 'normal'  # 日志详细程度: quiet / normal / debug
+    branchIsolation: str = 'shared'  # 并行分支上下文: shared / variables / page
+    useBrowserPool: bool = False  # 使用预热的无头浏览器池（忽略 headless）
+    storageState: Optional[str] = None  # 用保存的登录状态初始化浏览器上下文
+    saveStorageState: Optional[str] = None  # 执行结束后把登录状态保存为该名称
+    useWorkerProcess: bool = False  # 在工作进程中执行（需先开启工作进程模式）
+    spillRows: Optional[int] = None  # 内存中保留的数据行超过该行数后溢出到磁盘（0 表示不限制）
+    spillMemoryMB: Optional[int] = None  # 内存中的数据超过该大小（MB）后溢出到磁盘（0 表示不限制）
+    # 执行结束后自动导出的格式
+    exportFormat: Literal['excel', 'csv', 'parquet', 'arrow', 'ndjson', 'ndjson_gzip', 'ndjson_zstd'] = 'excel'
+    # 增量写出：执行开始时打开输出文件，数据行提交后随即追加写入（不设置时结束后一次性导出）
+    sinkFormat: Optional[Literal['csv', 'ndjson', 'parquet']] = None
+    sinkPath: Optional[str] = None  # 输出路径（parquet 为目录），默认写入 data/stream
+    sinkFsync: Literal['none', 'batch', 'row'] = 'batch'  # 落盘策略：不主动 fsync / 每批 / 每行
+    sinkBatchRows: int = 100  # 每批写出的行数
+    
+    @field_validator('storageState', 'saveStorageState')
+    @classmethod
+    def check_storage_state(cls, value: Optional[str]) -> Optional[str]:
+        if value:
+            storage_state_path(value)
+        return value
+    
+    def sink_options(self) -> Optional[dict]:
+        if not self.sinkFormat:
+            return None
+        return {'format': self.sinkFormat, 'path': self.sinkPath,
+                'fsync': self.sinkFsync, 'batchRows': self.sinkBatchRows}
 
 
 @router.post("", response_model=dict)
@@ -205,45 +242,34 @@ async def delete_workflow(workflow_id: str):
     return {"message": "工作流删除成功"}
 
 
-@router.post("/{workflow_id}/execute")
-async def execute_workflow(workflow_id: str, background_tasks: BackgroundTasks, options: ExecuteOptions = ExecuteOptions()):
-    """执行工作流"""
+async def run_workflow_job(run: WorkflowRun):
+    """调度器执行一次运行：创建执行器、执行并导出数据
+    
+    编辑器发起的运行（interactive）按工作流 ID 推送日志、数据行和完成事件，
+    并记录到 executions_store / execution_results 中；其他运行只记录在运行记录上。
+    """
+    workflow_id = run.workflow_id
     workflow = workflows_store.get(workflow_id)
     if not workflow:
-        raise HTTPException(status_code=404, detail="工作流不存在")
-    
-    # 检查是否已在执行
-    if workflow_id in executions_store:
-        executor = executions_store[workflow_id]
-        if executor.is_running:
-            raise HTTPException(status_code=400, detail="工作流正在执行中")
-    
-    # 创建执行器
-    async def on_log(log: LogEntry):
+        run.error = "工作流不存在"
+        run.status = ExecutionStatus.FAILED
+        return
+    options = ExecuteOptions(**run.options)
+    
+    async def on_log_batch(logs: list[dict]):
+        run.logs.extend(logs)
+        if not run.interactive:
+            return
         # 检查是否有客户端启用了日志接收（延迟导入避免循环依赖）
         from app.main import is_log_enabled
         if not is_log_enabled():
             return
         
-        # 判断是否是用户日志（打印日志模块）或系统日志（流程开始/结束）
-        is_user_log = log.details.get('is_user_log', False) if log.details else False
-        is_system_log = log.details.get('is_system_log', False) if log.details else False
-        
-        # 调试：打印日志详情
-        print(f"[LOG] message={log.message}, is_user_log={is_user_log}, is_system_log={is_system_log}, details={log.details}")
-        
-        await sio.emit('execution:log', {
+        # 日志由执行器的日志管道攒批后发送，一次发送多条
+        await sio.emit('execution:logs', {
             'workflowId': workflow_id,
-            'log': {
-                'id': log.id,
-                'timestamp': log.timestamp.isoformat(),
-                'level': log.level.value,
-                'nodeId': log.node_id,
-                'message': log.message,
-                'duration': log.duration,
-                'isUserLog': is_user_log,
-                'isSystemLog': is_system_log,
-            }
+            'runId': run.run_id,
+            'logs': logs,
         })
     
     async def on_node_start(node_id: str):
@@ -261,76 +287,152 @@ async def execute_workflow(workflow_id: str, background_tasks: BackgroundTasks,
     async def on_data_row(row: dict):
         await sio.emit('execution:data_row', {
             'workflowId': workflow_id,
+            'runId': run.run_id,
             'row': row,
         })
     
-    executor = WorkflowExecutor(
-        workflow=workflow,
-        on_log=on_log,
-        on_node_start=on_node_start,
-        on_node_complete=on_node_complete,
-        on_variable_update=on_variable_update,
-        on_data_row=on_data_row,
-        headless=options.headless,
-    )
-    
-    executions_store[workflow_id] = executor
-    
-    # 在后台执行
-    async def run_execution():
-        await sio.emit('execution:started', {'workflowId': workflow_id})
-        
-        print(f"[run_execution] 开始执行工作流: {workflow_id}")
-        result = await executor.execute()
-        print(f"[run_execution] 执行完成，结果: {result.status.value}")
-        
-        execution_results[workflow_id] = result
-        execution_data[workflow_id] = executor.get_collected_data()
-        
-        # 导出数据
-        if execution_data[workflow_id]:
-            exporter = DataExporter()
-            data_file = exporter.export_to_excel(execution_data[workflow_id])
-            result.data_file = data_file
-        
-        print(f"[run_execution] 发送 execution:completed 事件")
-        # 限制发送的数据量，避免消息过大导致传输失败
-        collected_data_to_send = execution_data.get(workflow_id, [])
-        if len(collected_data_to_send) > 20:
-            collected_data_to_send = collected_data_to_send[:20]  # 只发送前20条
-        
-        await sio.emit('execution:completed', {
-            'workflowId': workflow_id,
-            'result': {
-                'status': result.status.value,
-                'executedNodes': result.executed_nodes,
-                'failedNodes': result.failed_nodes,
-                'dataFile': result.data_file,
-            },
-            'collectedData': collected_data_to_send,
-        })
-        print(f"[run_execution] execution:completed 事件已发送")
-        
-        # 等待一小段时间确保事件被传输
-        await asyncio.sleep(0.1)
+    worker_pool = get_worker_pool() if options.useWorkerProcess else None
+    if worker_pool is not None:
+        # 在工作进程中执行，日志、数据行和结果通过管道传回
+        executor = RemoteExecutor(
+            worker_pool,
+            run.run_id,
+            workflow,
+            on_log_batch=on_log_batch,
+            on_data_row=on_data_row if run.interactive else None,
+            on_node_start=on_node_start,
+            on_node_complete=on_node_complete,
+            on_variable_update=on_variable_update,
+            export_format=options.exportFormat,
+            headless=options.headless,
+            verbosity=int(LogVerbosity.parse(options.logLevel)),
+            branch_isolation=options.branchIsolation,
+            use_browser_pool=options.useBrowserPool,
+            storage_state=options.storageState,
+            save_storage_state=options.saveStorageState,
+            parameters=run.parameters,
+            spill_rows=options.spillRows,
+            spill_memory_mb=options.spillMemoryMB,
+            sink_options=options.sink_options(),
+        )
+    else:
+        executor = WorkflowExecutor(
+            workflow=workflow,
+            on_log_batch=on_log_batch,
+            on_node_start=on_node_start,
+            on_node_complete=on_node_complete,
+            on_variable_update=on_variable_update,
+            on_data_row=on_data_row if run.interactive else None,
+            headless=options.headless,
+            verbosity=LogVerbosity.parse(options.logLevel),
+            branch_isolation=options.branchIsolation,
+            browser_pool=get_browser_pool() if options.useBrowserPool else None,
+            storage_state=options.storageState,
+            save_storage_state=options.saveStorageState,
+            parameters=run.parameters,
+            spill_rows=options.spillRows,
+            spill_memory_mb=options.spillMemoryMB,
+            sink_options=options.sink_options(),
+        )
+    run.executor = executor
+    if run.interactive:
+        executions_store[workflow_id] = executor
+        await sio.emit('execution:started', {'workflowId': workflow_id, 'runId': run.run_id})
+    
+    print(f"[run_execution] 开始执行工作流: {workflow_id} (run {run.run_id})")
+    result = await executor.execute()
+    print(f"[run_execution] 执行完成，结果: {result.status.value}")
+    
+    run.data = executor.get_collected_data()
+    
+    # 导出数据（工作进程中执行时已在工作进程中导出）
+    if run.data and not result.data_file:
+        exporter = DataExporter()
+        data_file = exporter.export(run.data, options.exportFormat)
+        result.data_file = data_file
+    # 运行记录会保留一段时间，导出后把数据全部写入磁盘，不再占用内存
+    if run.data.spill_rows or run.data.spill_bytes:
+        run.data.spill_all()
+    run.result = result
+    
+    if not run.interactive:
+        return
+    
+    execution_results[workflow_id] = result
+    execution_data[workflow_id] = run.data
+    
+    print(f"[run_execution] 发送 execution:completed 事件")
+    # 限制发送的数据量，避免消息过大导致传输失败
+    collected_data_to_send = run.data[:20]  # 只发送前20条
+    
+    await sio.emit('execution:completed', {
+        'workflowId': workflow_id,
+        'runId': run.run_id,
+        'result': {
+            'status': result.status.value,
+            'executedNodes': result.executed_nodes,
+            'failedNodes': result.failed_nodes,
+            'dataFile': result.data_file,
+        },
+        'collectedData': collected_data_to_send,
+    })
+    print(f"[run_execution] execution:completed 事件已发送")
+    
+    # 等待一小段时间确保事件被传输
+    await asyncio.sleep(0.1)
+
+
+async def on_run_update(run: WorkflowRun):
+    """运行状态变化（开始、结束、取消）时通知前端"""
+    await sio.emit('run:status', run.to_dict())
+
+
+# 所有工作流运行都经过调度器排队，受全局和单工作流并发上限约束
+job_scheduler = JobScheduler(run_workflow_job, on_update=on_run_update)
+
+
+async def stop_interactive_run(workflow_id: str) -> bool:
+    """停止编辑器发起的运行（排队中的直接取消）"""
+    run = job_scheduler.find_active(workflow_id, interactive=True)
+    if run is not None:
+        return await job_scheduler.cancel(run.run_id)
+    executor = executions_store.get(workflow_id)
+    if executor and executor.is_running:
+        await executor.stop()
+        return True
+    return False
+
+
+@router.post("/{workflow_id}/execute")
+async def execute_workflow(workflow_id: str, options: ExecuteOptions = ExecuteOptions()):
+    """执行工作流（编辑器中点击执行，优先于批量运行调度）"""
+    workflow = workflows_store.get(workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="工作流不存在")
     
-    background_tasks.add_task(run_execution)
+    # 检查是否已在执行
+    if job_scheduler.find_active(workflow_id, interactive=True) is not None:
+        raise HTTPException(status_code=400, detail="工作流正在执行中")
+    
+    run = job_scheduler.submit(
+        workflow_id,
+        options=options.model_dump(),
+        priority=INTERACTIVE_PRIORITY,
+        interactive=True,
+    )
     
-    return {"message": "工作流开始执行"}
+    if run.status == ExecutionStatus.PENDING:
+        return {"message": "工作流已进入执行队列", "runId": run.run_id,
+                "position": job_scheduler.queue_position(run)}
+    return {"message": "工作流开始执行", "runId": run.run_id}
 
 
 @router.post("/{workflow_id}/stop")
 async def stop_workflow(workflow_id: str):
     """停止工作流执行"""
-    executor = executions_store.get(workflow_id)
-    if not executor:
-        raise HTTPException(status_code=404, detail="没有正在执行的工作流")
-    
-    if not executor.is_running:
+    if not await stop_interactive_run(workflow_id):
         raise HTTPException(status_code=400, detail="工作流未在执行")
     
-    await executor.stop()
-    
     await sio.emit('execution:stopped', {'workflowId': workflow_id})
     
     return {"message": "工作流已停止"}
@@ -342,6 +444,14 @@ async def get_execution_status(workflow_id: str):
     executor = executions_store.get(workflow_id)
     result = execution_results.get(workflow_id)
     
+    run = job_scheduler.find_active(workflow_id, interactive=True)
+    if run is not None and run.status == ExecutionStatus.PENDING:
+        return {
+            "status": "queued",
+            "runId": run.run_id,
+            "position": job_scheduler.queue_position(run),
+        }
+    
     if executor and executor.is_running:
         return {
             "status": "running",
@@ -368,13 +478,13 @@ async def download_data(workflow_id: str):
         raise HTTPException(status_code=404, detail="没有可下载的数据")
     
     file_path = Path(result.data_file)
-    if not file_path.exists():
+    if not file_path.is_file():
         raise HTTPException(status_code=404, detail="数据文件不存在")
     
     return FileResponse(
         path=str(file_path),
         filename=file_path.name,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        media_type=media_type(file_path)
     )
 
 
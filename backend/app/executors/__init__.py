@@ -2,6 +2,8 @@
 from .base import (
     ModuleExecutor,
     ExecutionContext,
+    VariableSnapshot,
+    VariableScope,
     ModuleResult,
     LogMessage,
     ExecutorRegistry,
@@ -26,6 +28,8 @@ print(f"[DEBUG] 已注册的执行器类型: {registry.get_all_types()}")
 __all__ = [
     "ModuleExecutor",
     "ExecutionContext",
+    "VariableSnapshot",
+    "VariableScope",
     "ModuleResult",
     "LogMessage",
     "ExecutorRegistry",
@@ -25,6 +25,7 @@ class ApiRequestExecutor(ModuleExecutor):
     
     async def execute(self, config: dict, context: ExecutionContext) -> ModuleResult:
         import httpx
+        from app.services.http_client import get_http_manager, RetryPolicy
         
         request_url = context.resolve_value(config.get('requestUrl', ''))
         request_method = config.get('requestMethod', 'GET').upper()
@@ -32,6 +33,8 @@ class ApiRequestExecutor(ModuleExecutor):
         request_body_str = context.resolve_value(config.get('requestBody', ''))
         variable_name = config.get('variableName', '')
         request_timeout = to_int(config.get('requestTimeout', 30), 30, context)
+        retry_count = to_int(config.get('retryCount', 0), 0, context)
+        retry_delay = to_float(config.get('retryDelay', 1), 1, context)
         
         if not request_url:
             return ModuleResult(success=False, error="请求地址不能为空")
@@ -51,14 +54,16 @@ class ApiRequestExecutor(ModuleExecutor):
                 except json.JSONDecodeError:
                     body = request_body_str
             
-            async with httpx.AsyncClient(timeout=request_timeout) as client:
-                response = await client.request(
-                    method=request_method,
-                    url=request_url,
-                    headers=headers,
-                    json=body if isinstance(body, dict) else None,
-                    data=body if isinstance(body, str) else None,
-                )
+            # 复用全局连接池，GET 等幂等请求失败时按配置重试
+            response = await get_http_manager().request(
+                request_method,
+                request_url,
+                retry=RetryPolicy(retries=max(0, retry_count), backoff=max(0.0, retry_delay)),
+                headers=headers,
+                json=body if isinstance(body, dict) else None,
+                data=body if isinstance(body, str) else None,
+                timeout=request_timeout,
+            )
             
             try:
                 response_data = response.json()
@@ -586,10 +591,20 @@ class DownloadFileExecutor(ModuleExecutor):
     def module_type(self) -> str:
         return "download_file"
 
-    async def execute(self, config: dict, context: ExecutionContext) -> ModuleResult:
-        import httpx
+    @staticmethod
+    def _file_name_from_url(url: str) -> str:
         import os
         from urllib.parse import urlparse, unquote
+        return unquote(os.path.basename(urlparse(url).path)) or "downloaded_file"
+
+    @staticmethod
+    def _save_dir(save_path: str) -> Path:
+        directory = Path(save_path) if save_path else Path("downloads")
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    async def execute(self, config: dict, context: ExecutionContext) -> ModuleResult:
+        from app.services.downloader import download, download_many, format_size, format_speed
         
         download_mode = config.get("downloadMode", "click")
         trigger_selector = context.resolve_value(config.get("triggerSelector", ""))
@@ -597,40 +612,91 @@ class DownloadFileExecutor(ModuleExecutor):
         save_path = context.resolve_value(config.get("savePath", ""))
         file_name = context.resolve_value(config.get("fileName", ""))
         variable_name = config.get("variableName", "")
+        resume = config.get("resumeDownload", True)
+        segments = max(1, to_int(config.get("segmentCount", 4), 4, context))
 
         try:
             if download_mode == "url":
                 if not download_url:
                     return ModuleResult(success=False, error="下载URL不能为空")
 
-                if not file_name:
-                    parsed = urlparse(download_url)
-                    file_name = unquote(os.path.basename(parsed.path)) or "downloaded_file"
-
-                if save_path:
-                    Path(save_path).mkdir(parents=True, exist_ok=True)
-                    final_path = Path(save_path) / file_name
-                else:
-                    downloads_dir = Path("downloads")
-                    downloads_dir.mkdir(exist_ok=True)
-                    final_path = downloads_dir / file_name
-
-                async with httpx.AsyncClient(timeout=60, follow_redirects=True) as client:
-                    response = await client.get(download_url)
-                    response.raise_for_status()
-
-                    with open(final_path, "wb") as f:
-                        f.write(response.content)
+                final_path = self._save_dir(save_path) / (file_name or self._file_name_from_url(download_url))
+                # 流式写盘，支持断点续传，大文件分段并行下载
+                result = await download(download_url, final_path, resume=resume, segments=segments)
 
                 if variable_name:
                     context.set_variable(variable_name, str(final_path))
 
+                detail = f"{format_size(result.size)}，{format_speed(result.speed)}"
+                if result.resumed:
+                    detail += "，断点续传"
+                if result.segments > 1:
+                    detail += f"，{result.segments} 段并行"
                 return ModuleResult(
                     success=True,
-                    message=f"已下载文件: {final_path}",
-                    data=str(final_path),
+                    message=f"已下载文件: {final_path}（{detail}）",
+                    data={
+                        'path': str(final_path),
+                        'size': result.size,
+                        'bytesPerSecond': round(result.speed),
+                        'resumed': result.resumed,
+                    },
                 )
 
+            elif download_mode == "batch":
+                url_list_variable = config.get("urlListVariable", "")
+                urls = context.get_variable(url_list_variable) if url_list_variable else None
+                if not isinstance(urls, list) or not urls:
+                    return ModuleResult(success=False, error=f"变量 {url_list_variable} 不是非空列表")
+                concurrency = max(1, to_int(config.get("concurrency", 4), 4, context))
+
+                directory = self._save_dir(save_path)
+                items: list[tuple[str, Path]] = []
+                used_names: set[str] = set()
+                for entry in urls:
+                    # 列表项可以是 URL，也可以是 {"url": ..., "fileName": ...}
+                    if isinstance(entry, dict):
+                        url, name = str(entry.get("url", "")), str(entry.get("fileName") or "")
+                    else:
+                        url, name = str(entry), ""
+                    name = name or self._file_name_from_url(url)
+                    stem, suffix, n = Path(name).stem, Path(name).suffix, 1
+                    while name in used_names:
+                        name = f"{stem}_{n}{suffix}"
+                        n += 1
+                    used_names.add(name)
+                    items.append((url, directory / name))
+
+                started = time.monotonic()
+                results = await download_many(items, concurrency=concurrency,
+                                              resume=resume, segments=segments)
+                elapsed = time.monotonic() - started
+
+                paths = [str(r.path) if not isinstance(r, BaseException) else None for r in results]
+                failures = [(url, r) for (url, _), r in zip(items, results) if isinstance(r, BaseException)]
+                total_bytes = sum(r.downloaded for r in results if not isinstance(r, BaseException))
+                speed = total_bytes / elapsed if elapsed > 0 else 0.0
+
+                if variable_name:
+                    context.set_variable(variable_name, paths)
+
+                summary = (f"成功 {len(items) - len(failures)} 个，失败 {len(failures)} 个，"
+                           f"共 {format_size(total_bytes)}，{format_speed(speed)}")
+                data = {
+                    'paths': paths,
+                    'failed': [url for url, _ in failures],
+                    'bytes': total_bytes,
+                    'bytesPerSecond': round(speed),
+                }
+                if failures:
+                    url, error = failures[0]
+                    return ModuleResult(
+                        success=False,
+                        error=f"批量下载部分失败（{summary}），{url}: {error}",
+                        data=data,
+                    )
+                return ModuleResult(success=True, message=f"批量下载完成: {summary}", data=data)
+
             else:
                 if not trigger_selector:
                     return ModuleResult(success=False, error="触发元素选择器不能为空")
@@ -787,7 +853,6 @@ class ReadExcelExecutor(ModuleExecutor):
         return "read_excel"
     
     async def execute(self, config: dict, context: ExecutionContext) -> ModuleResult:
-        import openpyxl
         from app.api.data_assets import get_asset_by_name
         
         file_name = context.resolve_value(config.get('fileName', ''))
@@ -813,21 +878,14 @@ class ReadExcelExecutor(ModuleExecutor):
             return ModuleResult(success=False, error=f"文件 '{file_name}' 不存在")
         
         file_path = asset['path']
-        is_xls = file_path.lower().endswith('.xls')
         
         try:
-            # 使用线程池执行同步Excel操作
+            # 工作簿解析结果有缓存，只有首次读取（或文件变化后）才需要解析
             loop = asyncio.get_event_loop()
-            if is_xls:
-                result, result_type = await loop.run_in_executor(
-                    None, self._read_xls, file_path, sheet_name, read_mode, 
-                    cell_address, row_index, column_index, start_cell, end_cell, start_row, start_col
-                )
-            else:
-                result, result_type = await loop.run_in_executor(
-                    None, self._read_xlsx, file_path, sheet_name, read_mode,
-                    cell_address, row_index, column_index, start_cell, end_cell, start_row, start_col
-                )
+            result, result_type = await loop.run_in_executor(
+                None, self._read, file_path, sheet_name, read_mode,
+                cell_address, row_index, column_index, start_cell, end_cell, start_row, start_col
+            )
             
             context.set_variable(variable_name, result)
             
@@ -843,89 +901,15 @@ class ReadExcelExecutor(ModuleExecutor):
         except Exception as e:
             return ModuleResult(success=False, error=f"读取Excel失败: {str(e)}")
     
-    def _read_xlsx(self, file_path, sheet_name, read_mode, cell_address, row_index, 
-                   column_index, start_cell, end_cell, start_row, start_col):
-        import openpyxl
-        
-        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-        
-        if sheet_name:
-            if sheet_name not in wb.sheetnames:
-                wb.close()
-                raise Exception(f"工作表 '{sheet_name}' 不存在")
-            ws = wb[sheet_name]
-        else:
-            ws = wb.active
-        
-        result = None
-        result_type = 'unknown'
-        
-        if read_mode == 'cell':
-            if not cell_address:
-                wb.close()
-                raise Exception("单元格模式需要指定单元格地址")
-            cell = ws[cell_address]
-            result = cell.value
-            result_type = 'cell'
-        
-        elif read_mode == 'row':
-            if row_index is None or row_index < 1:
-                wb.close()
-                raise Exception("行模式需要指定有效的行号")
-            row_data = []
-            start_col_idx = 1
-            if start_col:
-                if isinstance(start_col, str) and start_col.isalpha():
-                    start_col_idx = openpyxl.utils.column_index_from_string(start_col)
-                else:
-                    start_col_idx = int(start_col)
-            for cell in ws[row_index]:
-                if cell.column >= start_col_idx:
-                    row_data.append(cell.value)
-            result = row_data
-            result_type = 'array'
-        
-        elif read_mode == 'column':
-            if not column_index:
-                wb.close()
-                raise Exception("列模式需要指定列号或列字母")
-            col_data = []
-            col_idx = column_index
-            if isinstance(col_idx, str) and col_idx.isalpha():
-                col_idx = openpyxl.utils.column_index_from_string(col_idx)
-            else:
-                col_idx = int(col_idx)
-            for row in ws.iter_rows(min_row=start_row, min_col=col_idx, max_col=col_idx):
-                col_data.append(row[0].value)
-            result = col_data
-            result_type = 'array'
-        
-        elif read_mode == 'range':
-            if not start_cell or not end_cell:
-                wb.close()
-                raise Exception("范围模式需要指定起始和结束单元格")
-            range_data = []
-            for row in ws[f"{start_cell}:{end_cell}"]:
-                row_data = [cell.value for cell in row]
-                range_data.append(row_data)
-            result = range_data
-            result_type = 'matrix'
-        
-        wb.close()
-        return result, result_type
-    
-    def _read_xls(self, file_path, sheet_name, read_mode, cell_address, row_index,
-                  column_index, start_cell, end_cell, start_row, start_col):
-        import xlrd
+    def _read(self, file_path, sheet_name, read_mode, cell_address, row_index,
+              column_index, start_cell, end_cell, start_row, start_col):
+        from app.services.excel_cache import get_excel_cache, column_index as to_column, parse_cell_address
         
-        wb = xlrd.open_workbook(file_path)
-        
-        if sheet_name:
-            if sheet_name not in wb.sheet_names():
-                raise Exception(f"工作表 '{sheet_name}' 不存在")
-            ws = wb.sheet_by_name(sheet_name)
-        else:
-            ws = wb.sheet_by_index(0)
+        workbook = get_excel_cache().get(file_path)
+        try:
+            ws = workbook.sheet(sheet_name)
+        except KeyError:
+            raise Exception(f"工作表 '{sheet_name}' 不存在")
         
         result = None
         result_type = 'unknown'
@@ -933,66 +917,28 @@ class ReadExcelExecutor(ModuleExecutor):
         if read_mode == 'cell':
             if not cell_address:
                 raise Exception("单元格模式需要指定单元格地址")
-            col_idx, row_idx = self._parse_cell_address(cell_address)
-            result = ws.cell_value(row_idx, col_idx)
+            result = ws.cell(*parse_cell_address(cell_address))
             result_type = 'cell'
         
         elif read_mode == 'row':
             if row_index is None or row_index < 1:
                 raise Exception("行模式需要指定有效的行号")
-            row_data = ws.row_values(row_index - 1)
-            if start_col:
-                start_col_idx = 0
-                if isinstance(start_col, str) and start_col.isalpha():
-                    start_col_idx = self._col_letter_to_index(start_col)
-                else:
-                    start_col_idx = int(start_col) - 1
-                row_data = row_data[start_col_idx:]
-            result = row_data
+            result = ws.row(row_index, to_column(start_col) if start_col else 1)
             result_type = 'array'
         
         elif read_mode == 'column':
             if not column_index:
                 raise Exception("列模式需要指定列号或列字母")
-            col_idx = column_index
-            if isinstance(col_idx, str) and col_idx.isalpha():
-                col_idx = self._col_letter_to_index(col_idx)
-            else:
-                col_idx = int(col_idx) - 1
-            col_data = ws.col_values(col_idx, start_rowx=start_row - 1)
-            result = col_data
+            result = ws.column(to_column(column_index), start_row)
             result_type = 'array'
         
         elif read_mode == 'range':
             if not start_cell or not end_cell:
                 raise Exception("范围模式需要指定起始和结束单元格")
-            start_col_idx, start_row_idx = self._parse_cell_address(start_cell)
-            end_col_idx, end_row_idx = self._parse_cell_address(end_cell)
-            range_data = []
-            for r in range(start_row_idx, end_row_idx + 1):
-                row_data = []
-                for c in range(start_col_idx, end_col_idx + 1):
-                    row_data.append(ws.cell_value(r, c))
-                range_data.append(row_data)
-            result = range_data
+            result = ws.range_by_address(start_cell, end_cell)
             result_type = 'matrix'
         
         return result, result_type
-    
-    def _col_letter_to_index(self, col_str: str) -> int:
-        result = 0
-        for c in col_str.upper():
-            result = result * 26 + (ord(c) - ord('A') + 1)
-        return result - 1
-    
-    def _parse_cell_address(self, address: str) -> tuple:
-        col_str, row_str = '', ''
-        for c in address:
-            if c.isalpha():
-                col_str += c
-            else:
-                row_str += c
-        return self._col_letter_to_index(col_str), int(row_str) - 1
 
 
 @register_executor
@@ -11,6 +11,7 @@ from .base import (
     ModuleResult,
     register_executor,
 )
+from app.services.http_client import get_http_manager
 
 
 @register_executor
@@ -58,8 +59,9 @@ class AIChatExecutor(ModuleExecutor):
                 "Authorization": f"Bearer {api_key}"
             }
             
-            async with httpx.AsyncClient(timeout=120) as client:
-                response = await client.post(api_url, json=request_body, headers=headers)
+            response = await get_http_manager().request(
+                "POST", api_url, json=request_body, headers=headers, timeout=120
+            )
             
             if response.status_code != 200:
                 error_msg = response.text
@@ -229,8 +231,9 @@ class AIVisionExecutor(ModuleExecutor):
                 "Authorization": f"Bearer {api_key}"
             }
             
-            async with httpx.AsyncClient(timeout=120) as client:
-                response = await client.post(api_url, json=request_body, headers=headers)
+            response = await get_http_manager().request(
+                "POST", api_url, json=request_body, headers=headers, timeout=120
+            )
             
             if response.status_code != 200:
                 error_msg = response.text
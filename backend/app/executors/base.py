@@ -1,11 +1,166 @@
 """模块执行器基类和注册机制 - 异步版本"""
 from abc import ABC, abstractmethod
-from typing import Any, Optional, Type
+from typing import Any, Mapping, Optional, Type
 from dataclasses import dataclass, field
+from types import MappingProxyType
 from playwright.async_api import Page, Browser, BrowserContext
 import asyncio
+import copy
 
 from app.models.workflow import LogLevel
+from app.services.data_table import DataTable
+from .template import compile_template
+
+
+@dataclass(frozen=True)
+class VariableSnapshot:
+    """变量快照 - 某一版本变量表的只读深拷贝
+    
+    解析变量时直接读取实时数据，不再拷贝。需要在并行分支之间共享一份
+    不会被其他分支修改的变量视图时，使用快照；同一版本只拷贝一次，
+    之后的版本只拷贝写入过的变量，未变化的变量与上一个快照共享副本。
+    """
+    version: int
+    variables: Mapping[str, Any]
+    
+    def get_variable(self, name: str, default: Any = None) -> Any:
+        if name.startswith('${') and name.endswith('}'):
+            name = name[2:-1]
+        return self.variables.get(name, default)
+    
+    def resolve_value(self, value: Any) -> Any:
+        """基于快照解析值中的变量引用"""
+        if isinstance(value, str):
+            return compile_template(value).render(self.variables)
+        return value
+
+
+class VariableScope(dict):
+    """派生变量作用域 - 以只读快照为底的写时复制变量表
+    
+    读取时直接返回快照中的值（与其他并行作用域共享，不拷贝），只有准备原地修改
+    （mutable，如列表追加、字典设置键）时才深拷贝为本作用域私有的副本，
+    写入和修改都只影响本作用域，不会改动快照或其他并行作用域。
+    """
+    __slots__ = ('base', '_removed', '_owned')
+    
+    def __init__(self, base: Mapping[str, Any]):
+        super().__init__()
+        self.base = base
+        self._removed: set[str] = set()
+        self._owned: set[str] = set()  # 值为本作用域私有副本的变量
+    
+    def __missing__(self, key: str) -> Any:
+        if key in self._removed or key not in self.base:
+            raise KeyError(key)
+        return self.base[key]
+    
+    def mutable(self, key: str) -> Any:
+        """取得可以原地修改的值：不是本作用域私有的值先深拷贝一份"""
+        value = self[key]
+        if key not in self._owned:
+            value = copy.deepcopy(value)
+            dict.__setitem__(self, key, value)
+            self._owned.add(key)
+        return value
+    
+    def _materialize(self):
+        for key in self.base:
+            if key not in self._removed and not dict.__contains__(self, key):
+                dict.__setitem__(self, key, self.base[key])
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __contains__(self, key: object) -> bool:
+        return dict.__contains__(self, key) or (key not in self._removed and key in self.base)
+    
+    def __setitem__(self, key: str, value: Any):
+        self._removed.discard(key)
+        # 写回刚修改过的私有副本时仍是私有的，其他值可能与快照共享
+        if key in self._owned and dict.get(self, key) is not value:
+            self._owned.discard(key)
+        dict.__setitem__(self, key, value)
+    
+    def __delitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        if dict.__contains__(self, key):
+            dict.__delitem__(self, key)
+        self._owned.discard(key)
+        self._removed.add(key)
+    
+    def pop(self, key: str, *default: Any) -> Any:
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+    
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+    
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+    
+    def clear(self):
+        dict.clear(self)
+        self._owned.clear()
+        self._removed.update(self.base)
+    
+    def __iter__(self):
+        self._materialize()
+        return dict.__iter__(self)
+    
+    def __len__(self) -> int:
+        self._materialize()
+        return dict.__len__(self)
+    
+    def keys(self):
+        self._materialize()
+        return dict.keys(self)
+    
+    def values(self):
+        self._materialize()
+        return dict.values(self)
+    
+    def items(self):
+        self._materialize()
+        return dict.items(self)
+    
+    def copy(self) -> dict[str, Any]:
+        return dict(self.items())
+    
+    def __deepcopy__(self, memo: dict) -> dict[str, Any]:
+        return copy.deepcopy(dict(self.items()), memo)
+    
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
+    
+    def changes(self) -> tuple[dict[str, Any], set[str]]:
+        """相对快照的变更：(新增或修改的变量, 删除的变量名)
+        
+        非私有的值可能引用快照中的对象，合并到父上下文前复制一份。
+        """
+        updated = {}
+        for key, value in dict.items(self):
+            if key in self.base:
+                try:
+                    unchanged = value is self.base[key] or value == self.base[key]
+                except Exception:
+                    unchanged = False
+                if unchanged:
+                    continue
+            updated[key] = value if key in self._owned else copy.deepcopy(value)
+        return updated, {key for key in self._removed if key in self.base}
 
 
 @dataclass
@@ -15,7 +170,7 @@ class ExecutionContext:
     browser_context: Optional[BrowserContext] = None
     page: Optional[Page] = None
     variables: dict[str, Any] = field(default_factory=dict)
-    data_rows: list[dict[str, Any]] = field(default_factory=list)
+    data_rows: DataTable = field(default_factory=DataTable)  # 列式数据表
     current_row: dict[str, Any] = field(default_factory=dict)
     loop_stack: list[dict] = field(default_factory=list)  # 循环状态栈
     should_break: bool = False
@@ -27,6 +182,18 @@ class ExecutionContext:
     _playwright: Any = None
     _user_data_dir: Optional[str] = None
     
+    # 变量版本号，每次写入变量时递增，用于复用快照
+    _variables_version: int = 0
+    _snapshot: Optional[VariableSnapshot] = None
+    # 上一个快照之后写入过的变量名，生成新快照时只需拷贝这些变量
+    _dirty_variables: set[str] = field(default_factory=set)
+    
+    # 派生关系：fork() 出的子上下文记录父上下文，分支上下文汇合后标记为已合并
+    _parent: Optional['ExecutionContext'] = field(default=None, repr=False, compare=False)
+    _branches: list['ExecutionContext'] = field(default_factory=list, repr=False, compare=False)
+    _merged: bool = field(default=False, repr=False, compare=False)
+    _owned_page: Optional[Page] = field(default=None, repr=False, compare=False)  # 分支独占的页面
+    
     async def switch_to_latest_page(self) -> bool:
         """切换到最新的页面（处理新标签页打开的情况）
         
@@ -60,9 +227,85 @@ class ExecutionContext:
             name = name[2:-1]
         return self.variables.get(name, default)
     
+    def get_mutable_variable(self, name: str, default: Any = None) -> Any:
+        """获取准备原地修改的变量值（派生作用域中先复制为私有副本，不影响快照）"""
+        if name.startswith('${') and name.endswith('}'):
+            name = name[2:-1]
+        variables = self.variables
+        if isinstance(variables, VariableScope):
+            return variables.mutable(name) if name in variables else default
+        # 调用方会原地修改，下一个快照需要重新拷贝
+        self._dirty_variables.add(name)
+        return variables.get(name, default)
+    
     def set_variable(self, name: str, value: Any):
         """设置变量值"""
         self.variables[name] = value
+        self._dirty_variables.add(name)
+        self._variables_version += 1
+    
+    def clear_variables(self):
+        """清空所有变量"""
+        self.variables.clear()
+        self._variables_version += 1
+    
+    def merge_variables(self, updated: Mapping[str, Any], removed: Optional[set[str]] = None):
+        """批量写入/删除变量（合并分支变更时使用）"""
+        for name in removed or ():
+            self.variables.pop(name, None)
+        for name, value in updated.items():
+            self.variables[name] = value
+        self._dirty_variables.update(updated)
+        self._variables_version += 1
+    
+    def snapshot_variables(self) -> VariableSnapshot:
+        """获取当前变量表的只读快照
+        
+        写时复制：变量未变化时复用上一次的快照；变化后只深拷贝上一个快照之后写入过的变量，
+        其余变量沿用上一个快照中的副本。派生作用域中未改动的变量本身就是父快照中的值，直接引用。
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._variables_version:
+            return snapshot
+        previous = snapshot.variables if snapshot is not None else {}
+        dirty = self._dirty_variables
+        base = self.variables.base if isinstance(self.variables, VariableScope) else {}
+        variables = {}
+        for name, value in self.variables.items():
+            if name in previous and name not in dirty:
+                variables[name] = previous[name]
+            elif name in base and value is base[name]:
+                variables[name] = value
+            else:
+                variables[name] = copy.deepcopy(value)
+        snapshot = VariableSnapshot(version=self._variables_version, variables=MappingProxyType(variables))
+        self._snapshot = snapshot
+        self._dirty_variables = set()
+        return snapshot
+    
+    def fork(self, page: Optional[Page] = None,
+             browser_context: Optional[BrowserContext] = None,
+             data_rows: Optional[DataTable] = None) -> 'ExecutionContext':
+        """派生子上下文
+        
+        子上下文共享浏览器和 Playwright 实例，变量表是当前变量快照之上的
+        独立作用域，当前行从空开始，循环栈为浅拷贝。
+        传入 data_rows 时与之共享数据表，否则从空表开始。
+        """
+        child = ExecutionContext(
+            browser=self.browser,
+            browser_context=browser_context if browser_context is not None else self.browser_context,
+            page=page,
+            variables=VariableScope(self.snapshot_variables().variables),
+            data_rows=data_rows if data_rows is not None else DataTable(),
+            loop_stack=list(self.loop_stack),
+            headless=self.headless,
+        )
+        child._playwright = self._playwright
+        child._parent = self
+        if hasattr(self, '_db_connections'):
+            child._db_connections = self._db_connections
+        return child
     
     def resolve_value(self, value: Any) -> Any:
         """解析值中的变量引用
@@ -75,97 +318,8 @@ class ExecutionContext:
         - {data[0][name]} - 嵌套访问
         """
         if isinstance(value, str):
-            import re
-            
-            def resolve_access_path(var_name: str) -> Any:
-                """解析变量访问路径，支持索引和键访问"""
-                var_name = var_name.strip()
-                
-                # 解析基础变量名和访问路径
-                # 匹配: varName 或 varName[...][...]...
-                base_match = re.match(r'^([a-zA-Z_\u4e00-\u9fa5][a-zA-Z0-9_\u4e00-\u9fa5]*)((?:\[[^\]]+\])*)', var_name)
-                if not base_match:
-                    return None
-                
-                base_name = base_match.group(1)
-                access_path = base_match.group(2)
-                
-                # 获取基础变量
-                if base_name not in self.variables:
-                    return None
-                result = self.variables[base_name]
-                # 深拷贝以避免并发修改问题
-                if isinstance(result, (list, dict)):
-                    import copy
-                    result = copy.deepcopy(result)
-                
-                # 如果没有访问路径，直接返回
-                if not access_path:
-                    return result
-                
-                # 解析所有的 [xxx] 访问
-                bracket_pattern = r'\[([^\]]+)\]'
-                accessors = re.findall(bracket_pattern, access_path)
-                
-                for accessor in accessors:
-                    accessor = accessor.strip()
-                    
-                    # 移除引号（如果有）
-                    if (accessor.startswith('"') and accessor.endswith('"')) or \
-                       (accessor.startswith("'") and accessor.endswith("'")):
-                        accessor = accessor[1:-1]
-                    
-                    try:
-                        if isinstance(result, list):
-                            # 列表索引访问（支持负数索引，如 -1 表示最后一个元素）
-                            index = int(accessor)
-                            if -len(result) <= index < len(result):
-                                result = result[index]
-                            else:
-                                return None
-                        elif isinstance(result, dict):
-                            # 字典键访问 - 先尝试原始键，再尝试数字键
-                            if accessor in result:
-                                result = result[accessor]
-                            else:
-                                # 尝试将键转为数字
-                                try:
-                                    num_key = int(accessor)
-                                    if num_key in result:
-                                        result = result[num_key]
-                                    else:
-                                        return None
-                                except ValueError:
-                                    return None
-                        else:
-                            # 不支持的类型
-                            return None
-                    except (ValueError, IndexError, KeyError, TypeError):
-                        return None
-                
-                return result
-            
-            def replacer(match):
-                var_expr = match.group(1).strip()
-                resolved = resolve_access_path(var_expr)
-                if resolved is not None:
-                    # 如果是复杂类型，转为JSON字符串
-                    if isinstance(resolved, (list, dict)):
-                        import json
-                        return json.dumps(resolved, ensure_ascii=False)
-                    return str(resolved)
-                # 未找到变量，返回原始匹配
-                return match.group(0)
-            
-            # 先替换 ${varName} 格式
-            pattern1 = r'\$\{([^}]+)\}'
-            result = re.sub(pattern1, replacer, value)
-            
-            # 再替换 {varName} 格式（但不匹配已经有$的）
-            pattern2 = r'(?<!\$)\{([^}]+)\}'
-            result = re.sub(pattern2, replacer, result)
-            
-            return result
+            # 模板按原始字符串编译并缓存，渲染时只遍历预编译的片段
+            return compile_template(value).render(self.variables)
         return value
     
     def add_data_value(self, column: str, value: Any):
@@ -181,7 +335,8 @@ class ExecutionContext:
     def _commit_row_internal(self):
         """内部提交方法"""
         if self.current_row:
-            self.data_rows.append(self.current_row.copy())
+            # 当前行的值直接追加到列缓冲区，之后换一个新字典
+            self.data_rows.append(self.current_row)
             self.current_row = {}
     
     def commit_row(self):
@@ -1,5 +1,6 @@
 """基础模块执行器实现 - 异步版本"""
 import asyncio
+import json
 import time
 
 from .base import (
@@ -11,6 +12,73 @@ from .base import (
 from .type_utils import to_int, to_float
 
 
+async def launch_browser_context(context: ExecutionContext, headless: bool = False):
+    """为执行上下文启动浏览器上下文
+    
+    设置了用户数据目录时启动持久化上下文（保留登录状态，并关闭上次留下的页面），
+    否则启动普通浏览器。不创建页面，启动失败时抛出异常。
+    """
+    p = context._playwright
+    if p is None:
+        raise RuntimeError("Playwright未初始化")
+    
+    user_data_dir = context._user_data_dir
+    print(f"[OpenPage] user_data_dir={user_data_dir}")
+    
+    if not user_data_dir:
+        print(f"[OpenPage] 使用普通模式启动浏览器")
+        context.browser = await p.chromium.launch(
+            headless=headless,
+            channel='msedge'
+        )
+        context.browser_context = await context.browser.new_context()
+        return
+    
+    from pathlib import Path
+    
+    # 清理锁文件
+    user_data_path = Path(user_data_dir)
+    lock_file = user_data_path / "SingletonLock"
+    if lock_file.exists():
+        try:
+            lock_file.unlink()
+            print(f"[OpenPage] 已清理锁文件")
+        except Exception as e:
+            print(f"[OpenPage] 清理锁文件失败: {e}")
+    
+    # 多次尝试启动持久化上下文
+    max_retries = 3
+    last_error = None
+    for attempt in range(max_retries):
+        try:
+            print(f"[OpenPage] 启动持久化浏览器上下文 (尝试 {attempt + 1}/{max_retries})...")
+            context.browser_context = await p.chromium.launch_persistent_context(
+                user_data_dir=user_data_dir,
+                headless=headless,
+                channel='msedge',
+            )
+            
+            # 关闭所有已有的页面（之前的历史页面）
+            existing_pages = context.browser_context.pages[:]
+            for old_page in existing_pages:
+                try:
+                    await old_page.close()
+                except:
+                    pass
+            print(f"[OpenPage] 持久化浏览器上下文启动成功，已清理旧页面")
+            return
+        except Exception as e:
+            last_error = e
+            print(f"[OpenPage] 持久化上下文启动失败 (尝试 {attempt + 1}): {e}")
+            if lock_file.exists():
+                try:
+                    lock_file.unlink()
+                except:
+                    pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"无法启动持久化浏览器: {last_error}")
+
+
 @register_executor
 class GroupExecutor(ModuleExecutor):
     """备注分组模块执行器"""
@@ -41,72 +109,13 @@ class OpenPageExecutor(ModuleExecutor):
         try:
             # 如果没有浏览器实例，创建一个
             if context.browser_context is None:
-                p = context._playwright
-                if p is None:
+                if context._playwright is None:
                     return ModuleResult(success=False, error="Playwright未初始化")
-                
-                user_data_dir = context._user_data_dir
-                print(f"[OpenPage] user_data_dir={user_data_dir}")
-                
-                if user_data_dir:
-                    from pathlib import Path
-                    
-                    # 清理锁文件
-                    user_data_path = Path(user_data_dir)
-                    lock_file = user_data_path / "SingletonLock"
-                    if lock_file.exists():
-                        try:
-                            lock_file.unlink()
-                            print(f"[OpenPage] 已清理锁文件")
-                        except Exception as e:
-                            print(f"[OpenPage] 清理锁文件失败: {e}")
-                    
-                    # 多次尝试启动持久化上下文
-                    max_retries = 3
-                    last_error = None
-                    for attempt in range(max_retries):
-                        try:
-                            print(f"[OpenPage] 启动持久化浏览器上下文 (尝试 {attempt + 1}/{max_retries})...")
-                            context.browser_context = await p.chromium.launch_persistent_context(
-                                user_data_dir=user_data_dir,
-                                headless=False,
-                                channel='msedge',
-                            )
-                            
-                            # 关闭所有已有的页面（之前的历史页面）
-                            existing_pages = context.browser_context.pages[:]
-                            for old_page in existing_pages:
-                                try:
-                                    await old_page.close()
-                                except:
-                                    pass
-                            
-                            # 创建新页面
-                            context.page = await context.browser_context.new_page()
-                            print(f"[OpenPage] 持久化浏览器上下文启动成功，已清理旧页面并创建新页面")
-                            break
-                        except Exception as e:
-                            last_error = e
-                            print(f"[OpenPage] 持久化上下文启动失败 (尝试 {attempt + 1}): {e}")
-                            if lock_file.exists():
-                                try:
-                                    lock_file.unlink()
-                                except:
-                                    pass
-                            await asyncio.sleep(0.5)
-                    else:
-                        return ModuleResult(
-                            success=False, 
-                            error=f"无法启动持久化浏览器: {last_error}"
-                        )
-                else:
-                    print(f"[OpenPage] 使用普通模式启动浏览器")
-                    context.browser = await p.chromium.launch(
-                        headless=False,
-                        channel='msedge'
-                    )
-                    context.browser_context = await context.browser.new_context()
-                    context.page = await context.browser_context.new_page()
+                try:
+                    await launch_browser_context(context)
+                except Exception as e:
+                    return ModuleResult(success=False, error=str(e))
+                context.page = await context.browser_context.new_page()
             
             # 如果没有页面，创建一个新页面
             if context.page is None:
@@ -343,6 +352,125 @@ class GetElementInfoExecutor(ModuleExecutor):
             return ModuleResult(success=False, error=f"获取元素信息失败: {str(e)}")
 
 
+# 在页面中一次性读取所有行的各列数据
+_EXTRACT_LIST_SCRIPT = """
+(elements, [columns, maxRows]) => {
+    const rows = maxRows > 0 ? elements.slice(0, maxRows) : elements;
+    const read = (el, attribute) => {
+        if (!el) return null;
+        switch (attribute) {
+            case 'text': return el.textContent == null ? null : el.textContent.trim();
+            case 'innerText': return el.innerText;
+            case 'innerHTML': return el.innerHTML;
+            case 'outerHTML': return el.outerHTML;
+            case 'value': return el.value !== undefined ? String(el.value) : el.getAttribute('value');
+            default: return el.getAttribute(attribute);
+        }
+    };
+    return rows.map(row => {
+        const item = {};
+        for (const column of columns) {
+            let el = row;
+            if (column.selector) {
+                try { el = row.querySelector(column.selector); } catch (e) { el = null; }
+            }
+            item[column.name] = read(el, column.attribute);
+        }
+        return item;
+    });
+}
+"""
+
+
+@register_executor
+class ExtractListExecutor(ModuleExecutor):
+    """批量提取模块执行器
+    
+    按行选择器匹配所有行元素，在一次 evaluate 中读取每行各列（行内相对 CSS 选择器 + 属性），
+    避免在循环中逐个元素、逐个属性地往返浏览器。
+    """
+    
+    @property
+    def module_type(self) -> str:
+        return "extract_list"
+    
+    @staticmethod
+    def _parse_columns(raw) -> list[dict]:
+        """列配置支持 [{name, selector, attribute}] 或 {列名: {selector, attribute} | 选择器}"""
+        if isinstance(raw, str):
+            raw = json.loads(raw) if raw.strip() else []
+        if isinstance(raw, dict):
+            raw = [
+                {'name': name, **(spec if isinstance(spec, dict) else {'selector': spec})}
+                for name, spec in raw.items()
+            ]
+        columns = []
+        for column in raw or []:
+            name = str(column.get('name', '')).strip()
+            if not name:
+                continue
+            attribute = column.get('attribute') or 'text'
+            if attribute == 'custom':
+                attribute = column.get('customAttribute') or 'text'
+            columns.append({
+                'name': name,
+                'selector': str(column.get('selector') or '').strip(),
+                'attribute': attribute,
+            })
+        return columns
+    
+    async def execute(self, config: dict, context: ExecutionContext) -> ModuleResult:
+        row_selector = context.resolve_value(config.get('rowSelector', ''))
+        variable_name = config.get('variableName', '')
+        append_to_table = config.get('appendToTable', False)
+        max_rows = to_int(config.get('maxRows', 0), 0, context)
+        wait_timeout = to_int(config.get('waitTimeout', 5000), 5000, context)
+        
+        if not row_selector:
+            return ModuleResult(success=False, error="行选择器不能为空")
+        
+        try:
+            columns = self._parse_columns(config.get('columns', []))
+        except (ValueError, AttributeError, TypeError) as e:
+            return ModuleResult(success=False, error=f"列配置格式错误: {str(e)}")
+        if not columns:
+            return ModuleResult(success=False, error="至少需要配置一列")
+        for column in columns:
+            column['selector'] = context.resolve_value(column['selector'])
+        
+        if context.page is None:
+            return ModuleResult(success=False, error="没有打开的页面")
+        
+        try:
+            await context.switch_to_latest_page()
+            
+            rows_locator = context.page.locator(row_selector)
+            if wait_timeout > 0:
+                try:
+                    await rows_locator.first.wait_for(state='attached', timeout=wait_timeout)
+                except Exception:
+                    pass
+            
+            rows = await rows_locator.evaluate_all(_EXTRACT_LIST_SCRIPT, [columns, max_rows])
+            
+            if variable_name:
+                context.set_variable(variable_name, rows)
+            
+            if append_to_table and rows:
+                # 先提交正在填写的行，再按顺序追加提取到的行
+                context.commit_row()
+                context.data_rows.extend(rows)
+            
+            return ModuleResult(
+                success=True,
+                message=f"已提取 {len(rows)} 行 × {len(columns)} 列",
+                data={'rows': rows, 'count': len(rows)},
+            )
+        
+        except Exception as e:
+            return ModuleResult(success=False, error=f"批量提取失败: {str(e)}")
+
+
 @register_executor
 class WaitExecutor(ModuleExecutor):
     """等待模块执行器"""
@@ -584,8 +712,8 @@ class PlayMusicExecutor(ModuleExecutor):
 
     async def execute(self, config: dict, context: ExecutionContext) -> ModuleResult:
         import base64
-        import httpx
         from app.main import request_play_music_sync
+        from app.services.http_client import get_http_manager
 
         audio_url = context.resolve_value(config.get("audioUrl", ""))
         wait_for_end = config.get("waitForEnd", False)
@@ -604,10 +732,11 @@ class PlayMusicExecutor(ModuleExecutor):
                 "Accept": "*/*",
             }
 
-            async with httpx.AsyncClient(timeout=60, follow_redirects=True, headers=headers) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                audio_data = response.content
+            response = await get_http_manager().request(
+                "GET", url, headers=headers, timeout=60, follow_redirects=True
+            )
+            response.raise_for_status()
+            audio_data = response.content
 
             content_type = response.headers.get("content-type", "audio/mpeg")
             if ";" in content_type:
@@ -9,6 +9,7 @@ from .base import (
     register_executor,
 )
 from .type_utils import to_int
+from app.services.db_pool import DbStream
 
 
 @register_executor
@@ -188,9 +189,20 @@ class ForeachExecutor(ModuleExecutor):
         data_source = config.get('dataSource', '')
         item_variable = config.get('itemVariable', 'item')
         index_variable = config.get('indexVariable', 'index')
+        # 并行工作页数，大于 1 时由工作流执行器把迭代分发到多个隔离页面上
+        workers = max(1, to_int(config.get('parallelWorkers', 1), 1, context))
+        isolation = config.get('parallelIsolation', 'page')
         data = context.get_variable(data_source, [])
 
-        if not isinstance(data, (list, tuple)):
+        stream = None
+        if isinstance(data, DbStream):
+            # 流式查询结果：只保留当前批次，当前批次遍历完后再读取下一批
+            stream = data
+            try:
+                data = await stream.next_batch()
+            except Exception as e:
+                return ModuleResult(success=False, error=f"读取查询结果失败: {e}")
+        elif not isinstance(data, (list, tuple)):
             return ModuleResult(success=False, error=f"数据源不是数组: {data_source}")
 
         loop_state = {
@@ -199,7 +211,12 @@ class ForeachExecutor(ModuleExecutor):
             'item_variable': item_variable,
             'index_variable': index_variable,
             'current_index': 0,
+            'workers': workers,
+            'isolation': 'context' if isolation == 'context' else 'page',
         }
+        if stream is not None:
+            loop_state['stream'] = stream
+            loop_state['base_index'] = 0  # 当前批次第一项的序号
 
         context.loop_stack.append(loop_state)
 
@@ -207,9 +224,13 @@ class ForeachExecutor(ModuleExecutor):
             context.set_variable(item_variable, data[0])
             context.set_variable(index_variable, 0)
 
+        if stream is not None:
+            message = f"开始遍历流式查询结果 (每批 {stream.batch_size} 项)"
+        else:
+            message = f"开始遍历 (共 {len(data)} 项)"
         return ModuleResult(
             success=True,
-            message=f"开始遍历 (共 {len(data)} 项)",
+            message=message + (f"，{workers} 个页面并行" if workers > 1 else ""),
             data=loop_state
         )
 
@@ -28,7 +28,7 @@ class ListOperationExecutor(ModuleExecutor):
         if not list_variable:
             return ModuleResult(success=False, error="列表变量名不能为空")
         
-        list_data = context.get_variable(list_variable)
+        list_data = context.get_mutable_variable(list_variable)
         if list_data is None:
             list_data = []
         
@@ -170,7 +170,7 @@ class DictOperationExecutor(ModuleExecutor):
         if not dict_variable:
             return ModuleResult(success=False, error="字典变量名不能为空")
         
-        dict_data = context.get_variable(dict_variable)
+        dict_data = context.get_mutable_variable(dict_variable)
         if dict_data is None:
             dict_data = {}
         if not isinstance(dict_data, dict):
@@ -1,7 +1,11 @@
-"""数据库操作执行器"""
-import pymysql
-from pymysql.cursors import DictCursor
-from typing import Dict, Any, Optional
+"""数据库操作执行器
+
+数据库调用在连接池的专用线程中执行，查询期间事件循环（其他分支、日志推送、心跳）不受影响。
+支持 MySQL、SQLite 和 DuckDB，驱动之间的差异由连接池处理，各执行器的写法相同。
+"""
+import json
+import time
+from typing import Dict, Any, Iterator, Optional
 
 from .base import (
     ModuleExecutor,
@@ -9,17 +13,65 @@ from .base import (
     ModuleResult,
     register_executor,
 )
-from .type_utils import to_int
+from .type_utils import to_int, to_float
+from .sql_template import bind_sql
+from app.services.db_pool import (
+    DbPool,
+    DbStream,
+    Statement,
+    MySQLPool,
+    SQLitePool,
+    DuckDBPool,
+    DATA_TABLE_PATTERN,
+    DEFAULT_MIN_SIZE,
+    DEFAULT_MAX_SIZE,
+    DEFAULT_CONNECT_TIMEOUT,
+)
 
 
 # 全局数据库连接池（存储在context中）
-def get_db_connections(context: ExecutionContext) -> Dict[str, pymysql.Connection]:
+def get_db_connections(context: ExecutionContext) -> Dict[str, DbPool]:
     """获取数据库连接池"""
     if not hasattr(context, '_db_connections'):
         context._db_connections = {}
     return context._db_connections
 
 
+# 数据库类型：MySQL 服务器 / SQLite 文件 / DuckDB 本地分析
+DB_TYPES = ('mysql', 'sqlite', 'duckdb')
+
+# 批量插入遇到重复键时的处理方式：报错 / 忽略该行 / 更新已有行
+DUPLICATE_MODES = ('error', 'ignore', 'update')
+DEFAULT_BULK_BATCH_SIZE = 1000
+# 流式查询每次从服务器读取的行数
+DEFAULT_FETCH_SIZE = 1000
+
+
+def get_statement(config: dict, pool: DbPool, context: ExecutionContext) -> Statement:
+    """读取节点的 SQL 语句
+    
+    默认把处于值位置的变量引用绑定为参数（值由驱动转义，语句文本保持不变），
+    关闭 paramBinding 时与原先一样直接把变量值拼接进语句。
+    """
+    sql = config.get('sql', '')
+    if not config.get('paramBinding', True) or not isinstance(sql, str):
+        return context.resolve_value(sql)
+    return bind_sql(sql, context.variables, pool.dialect)
+
+
+def get_query_timeout(config: dict, context: ExecutionContext) -> Optional[float]:
+    """节点的查询超时（秒），未设置时使用连接的默认超时"""
+    timeout = to_float(config.get('queryTimeout'), 0, context)
+    return timeout if timeout > 0 else None
+
+
+async def attach_data_table(pool: DbPool, config: dict, context: ExecutionContext):
+    """DuckDB 语句中引用了 data_table 时，先把当前运行的数据表写成快照供其查询"""
+    sql = config.get('sql')
+    if isinstance(pool, DuckDBPool) and isinstance(sql, str) and DATA_TABLE_PATTERN.search(sql):
+        await pool.attach_data_table(context.data_rows)
+
+
 @register_executor
 class DbConnectExecutor(ModuleExecutor):
     """连接数据库"""
@@ -29,13 +81,23 @@ class DbConnectExecutor(ModuleExecutor):
         return "db_connect"
     
     async def execute(self, config: dict, context: ExecutionContext) -> ModuleResult:
+        db_type = config.get('dbType', 'mysql')
+        file_path = context.resolve_value(config.get('filePath', ''))
         host = context.resolve_value(config.get('host', 'localhost'))
-        port = to_int(context.resolve_value(config.get('port', 3306)))
+        port = to_int(config.get('port', 3306), 3306, context)
         user = context.resolve_value(config.get('user', 'root'))
         password = context.resolve_value(config.get('password', ''))
         database = context.resolve_value(config.get('database', ''))
         charset = context.resolve_value(config.get('charset', 'utf8mb4'))
         connection_name = context.resolve_value(config.get('connectionName', 'default'))
+        min_size = to_int(config.get('poolMinSize', DEFAULT_MIN_SIZE), DEFAULT_MIN_SIZE, context)
+        max_size = to_int(config.get('poolMaxSize', DEFAULT_MAX_SIZE), DEFAULT_MAX_SIZE, context)
+        connect_timeout = to_int(config.get('connectTimeout', DEFAULT_CONNECT_TIMEOUT), DEFAULT_CONNECT_TIMEOUT, context)
+        prepared_statements = config.get('preparedStatements', False)
+        query_timeout = get_query_timeout(config, context)
+        
+        if db_type not in DB_TYPES:
+            return ModuleResult(success=False, error=f"不支持的数据库类型: {db_type}")
         
         connections = get_db_connections(context)
         
@@ -43,28 +105,40 @@ class DbConnectExecutor(ModuleExecutor):
             # 如果已有同名连接，先关闭
             if connection_name in connections:
                 try:
-                    connections[connection_name].close()
+                    await connections[connection_name].close()
                 except:
                     pass
                 del connections[connection_name]
             
-            # 创建新连接
-            conn = pymysql.connect(
-                host=host,
-                port=port,
-                user=user,
-                password=password,
-                database=database if database else None,
-                charset=charset,
-                cursorclass=DictCursor,
-                autocommit=True
-            )
+            # 创建连接池，预先建立的连接同时用于验证连接参数
+            pool_options = dict(min_size=min_size, max_size=max_size, query_timeout=query_timeout)
+            if db_type == 'sqlite':
+                pool = SQLitePool(path=file_path, **pool_options)
+            elif db_type == 'duckdb':
+                pool = DuckDBPool(path=file_path, **pool_options)
+            else:
+                pool = MySQLPool(
+                    host=host,
+                    port=port,
+                    user=user,
+                    password=password,
+                    database=database,
+                    charset=charset,
+                    connect_timeout=connect_timeout,
+                    prepared_statements=prepared_statements,
+                    **pool_options,
+                )
+            await pool.open()
             
-            connections[connection_name] = conn
+            connections[connection_name] = pool
             
-            db_info = f"{host}:{port}"
-            if database:
-                db_info += f"/{database}"
+            if db_type == 'mysql':
+                db_info = f"{host}:{port}"
+                if database:
+                    db_info += f"/{database}"
+            else:
+                name = 'SQLite' if db_type == 'sqlite' else 'DuckDB'
+                db_info = f"{name} {file_path or '内存数据库'}"
             
             return ModuleResult(
                 success=True,
@@ -77,7 +151,11 @@ class DbConnectExecutor(ModuleExecutor):
 
 @register_executor
 class DbQueryExecutor(ModuleExecutor):
-    """查询数据（SELECT）"""
+    """查询数据（SELECT）
+    
+    流式模式下不一次性读取结果，变量中保存的是按批读取的结果流，
+    交给「遍历列表」模块逐批消费，内存占用与结果行数无关。
+    """
     
     @property
     def module_type(self) -> str:
@@ -85,33 +163,48 @@ class DbQueryExecutor(ModuleExecutor):
     
     async def execute(self, config: dict, context: ExecutionContext) -> ModuleResult:
         connection_name = context.resolve_value(config.get('connectionName', 'default'))
-        sql = context.resolve_value(config.get('sql', ''))
         variable_name = context.resolve_value(config.get('variableName', ''))
         single_row = config.get('singleRow', False)
+        streaming = config.get('streaming', False)
+        fetch_size = max(1, to_int(config.get('fetchSize', DEFAULT_FETCH_SIZE), DEFAULT_FETCH_SIZE, context))
+        query_timeout = get_query_timeout(config, context)
         
         connections = get_db_connections(context)
-        conn = connections.get(connection_name)
+        pool = connections.get(connection_name)
         
-        if not conn:
+        if not pool:
             return ModuleResult(
                 success=False, 
                 error=f"数据库连接 '{connection_name}' 不存在，请先使用「连接数据库」模块"
             )
         
-        if not sql:
+        if not config.get('sql'):
             return ModuleResult(success=False, error="SQL语句不能为空")
         
+        sql = get_statement(config, pool, context)
+        
         try:
-            with conn.cursor() as cursor:
-                cursor.execute(sql)
+            await attach_data_table(pool, config, context)
+        except Exception as e:
+            return ModuleResult(success=False, error=f"查询失败: {str(e)}")
+        
+        if streaming and not single_row:
+            return await self._execute_streaming(pool, sql, variable_name, fetch_size, query_timeout, context)
+        
+        def query(conn):
+            with pool.cursor(conn) as cursor:
+                pool.execute(cursor, sql)
                 if single_row:
-                    result = cursor.fetchone()
-                else:
-                    result = cursor.fetchall()
+                    return pool.fetchone(cursor)
+                return pool.fetchall(cursor)
+        
+        try:
+            # 查询可以安全重复执行，连接丢失时在新连接上重试一次
+            result = await pool.run(query, timeout=query_timeout, retry=True)
             
             # 保存到变量
             if variable_name:
-                context.variables[variable_name] = result
+                context.set_variable(variable_name, result)
             
             row_count = 1 if single_row and result else len(result) if result else 0
             
@@ -122,6 +215,29 @@ class DbQueryExecutor(ModuleExecutor):
             )
         except Exception as e:
             return ModuleResult(success=False, error=f"查询失败: {str(e)}")
+    
+    async def _execute_streaming(self, pool: DbPool, sql: Statement, variable_name: str, fetch_size: int,
+                                 query_timeout: Optional[float], context: ExecutionContext) -> ModuleResult:
+        if not variable_name:
+            return ModuleResult(success=False, error="流式查询必须指定保存结果的变量")
+        
+        # 循环中重复执行时，先关闭上一次未读完的结果流，归还其占用的连接
+        previous = context.get_variable(variable_name)
+        if isinstance(previous, DbStream):
+            await previous.close()
+        
+        try:
+            stream = await pool.stream(sql, fetch_size, timeout=query_timeout)
+        except Exception as e:
+            return ModuleResult(success=False, error=f"查询失败: {str(e)}")
+        
+        context.set_variable(variable_name, stream)
+        
+        return ModuleResult(
+            success=True,
+            message=f"流式查询已开始，每批读取 {fetch_size} 行，请使用「遍历列表」模块遍历变量 {variable_name}",
+            data={"streaming": True, "fetchSize": fetch_size}
+        )
 
 
 @register_executor
@@ -134,34 +250,41 @@ class DbExecuteExecutor(ModuleExecutor):
     
     async def execute(self, config: dict, context: ExecutionContext) -> ModuleResult:
         connection_name = context.resolve_value(config.get('connectionName', 'default'))
-        sql = context.resolve_value(config.get('sql', ''))
         variable_name = context.resolve_value(config.get('variableName', ''))
+        query_timeout = get_query_timeout(config, context)
         
         connections = get_db_connections(context)
-        conn = connections.get(connection_name)
+        pool = connections.get(connection_name)
         
-        if not conn:
+        if not pool:
             return ModuleResult(
                 success=False, 
                 error=f"数据库连接 '{connection_name}' 不存在，请先使用「连接数据库」模块"
             )
         
-        if not sql:
+        if not config.get('sql'):
             return ModuleResult(success=False, error="SQL语句不能为空")
         
-        try:
-            with conn.cursor() as cursor:
-                affected_rows = cursor.execute(sql)
+        sql = get_statement(config, pool, context)
+        
+        def execute_sql(conn):
+            with pool.cursor(conn) as cursor:
+                affected_rows = pool.execute(cursor, sql)
                 
                 # 尝试获取结果（如果是SELECT语句）
                 try:
-                    result = cursor.fetchall()
+                    result = pool.fetchall(cursor)
                 except:
                     result = None
+            return affected_rows, result
+        
+        try:
+            await attach_data_table(pool, config, context)
+            affected_rows, result = await pool.run(execute_sql, timeout=query_timeout)
             
             # 保存影响行数到变量
             if variable_name:
-                context.variables[variable_name] = affected_rows
+                context.set_variable(variable_name, affected_rows)
             
             return ModuleResult(
                 success=True,
@@ -187,9 +310,9 @@ class DbInsertExecutor(ModuleExecutor):
         variable_name = context.resolve_value(config.get('variableName', ''))
         
         connections = get_db_connections(context)
-        conn = connections.get(connection_name)
+        pool = connections.get(connection_name)
         
-        if not conn:
+        if not pool:
             return ModuleResult(
                 success=False, 
                 error=f"数据库连接 '{connection_name}' 不存在，请先使用「连接数据库」模块"
@@ -216,17 +339,20 @@ class DbInsertExecutor(ModuleExecutor):
                 return ModuleResult(success=False, error="插入数据不能为空")
             
             # 构建INSERT语句
-            columns = ', '.join(f'`{k}`' for k in resolved_data.keys())
-            placeholders = ', '.join(['%s'] * len(resolved_data))
-            sql = f"INSERT INTO `{table}` ({columns}) VALUES ({placeholders})"
+            columns = ', '.join(pool.quote_name(k) for k in resolved_data.keys())
+            placeholders = ', '.join([pool.placeholder] * len(resolved_data))
+            sql = f"INSERT INTO {pool.quote_name(table)} ({columns}) VALUES ({placeholders})"
+            
+            def insert(conn):
+                with pool.cursor(conn) as cursor:
+                    pool.execute_params(cursor, sql, list(resolved_data.values()))
+                    return pool.lastrowid(cursor)
             
-            with conn.cursor() as cursor:
-                cursor.execute(sql, list(resolved_data.values()))
-                last_id = cursor.lastrowid
+            last_id = await pool.run(insert)
             
             # 保存插入ID到变量
             if variable_name:
-                context.variables[variable_name] = last_id
+                context.set_variable(variable_name, last_id)
             
             return ModuleResult(
                 success=True,
@@ -237,6 +363,211 @@ class DbInsertExecutor(ModuleExecutor):
             return ModuleResult(success=False, error=f"插入失败: {str(e)}")
 
 
+def _split_names(value: Any) -> list[str]:
+    """逗号分隔的名称列表"""
+    if isinstance(value, (list, tuple)):
+        names = [str(name) for name in value]
+    else:
+        names = str(value or '').split(',')
+    return [name.strip() for name in names if name.strip()]
+
+
+def _db_value(value: Any) -> Any:
+    """列表、字典写成 JSON 文本，其他值交给驱动转义"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+def _list_row(row: Any, columns: list[str]) -> tuple:
+    """列表变量中的一行：字典按列名取值，列表/元组按位置对应各列，其他值（字符串、数字等）作为单列的值"""
+    if isinstance(row, dict):
+        return tuple(row.get(c) for c in columns)
+    if isinstance(row, (list, tuple)):
+        return tuple(row)
+    return (row,)
+
+
+def _check_list_rows(rows: list, columns: list[str]) -> Optional[str]:
+    """检查按位置取值的行与列数是否一致，不一致时返回错误信息"""
+    for index, row in enumerate(rows):
+        if isinstance(row, dict):
+            continue
+        width = len(row) if isinstance(row, (list, tuple)) else 1
+        if width != len(columns):
+            return f"第 {index + 1} 行有 {width} 个值，与列数 {len(columns)}（{', '.join(columns)}）不一致"
+    return None
+
+
+def _iter_list_batches(rows: list, columns: list[str], batch_size: int) -> Iterator[list[tuple]]:
+    for start in range(0, len(rows), batch_size):
+        yield [_list_row(row, columns) for row in rows[start:start + batch_size]]
+
+
+def _iter_table_batches(frames: Iterator, columns: list[str], batch_size: int) -> Iterator[list[tuple]]:
+    for frame in frames:
+        frame = frame.select(columns)
+        for start in range(0, frame.height, batch_size):
+            yield frame.slice(start, batch_size).rows()
+
+
+def build_bulk_insert_sql(pool: DbPool, table: str, columns: list[str], on_duplicate: str = 'error',
+                          update_columns: Optional[list[str]] = None) -> str:
+    """构建批量插入语句（pymysql 的 executemany 会把多组参数合并为多行 VALUES）
+    
+    重复键处理：MySQL 使用 INSERT IGNORE / ON DUPLICATE KEY UPDATE，
+    SQLite 和 DuckDB 使用 INSERT OR IGNORE / ON CONFLICT DO UPDATE。
+    """
+    quote = pool.quote_name
+    column_list = ', '.join(quote(c) for c in columns)
+    placeholders = ', '.join([pool.placeholder] * len(columns))
+    mysql = pool.dialect == 'mysql'
+    verb = 'INSERT'
+    if on_duplicate == 'ignore':
+        verb = 'INSERT IGNORE' if mysql else 'INSERT OR IGNORE'
+    sql = f"{verb} INTO {quote(table)} ({column_list}) VALUES ({placeholders})"
+    if on_duplicate == 'update':
+        updates = update_columns or columns
+        if mysql:
+            sql += ' ON DUPLICATE KEY UPDATE ' + ', '.join(f"{quote(c)} = VALUES({quote(c)})" for c in updates)
+        else:
+            sql += ' ON CONFLICT DO UPDATE SET ' + ', '.join(f"{quote(c)} = excluded.{quote(c)}" for c in updates)
+    return sql
+
+
+@register_executor
+class DbBulkInsertExecutor(ModuleExecutor):
+    """批量插入数据
+    
+    把列表变量或数据表按批写入数据库，每批一条多行 INSERT 语句。
+    启用事务时全部批次在同一事务中提交，任一批失败则全部回滚。
+    """
+    
+    @property
+    def module_type(self) -> str:
+        return "db_bulk_insert"
+    
+    async def execute(self, config: dict, context: ExecutionContext) -> ModuleResult:
+        connection_name = context.resolve_value(config.get('connectionName', 'default'))
+        table = context.resolve_value(config.get('table', ''))
+        source = config.get('source', 'table')
+        source_variable = context.resolve_value(config.get('sourceVariable', ''))
+        columns = _split_names(context.resolve_value(config.get('columns', '')))
+        batch_size = max(1, to_int(config.get('batchSize', DEFAULT_BULK_BATCH_SIZE), DEFAULT_BULK_BATCH_SIZE, context))
+        on_duplicate = config.get('onDuplicate', 'error')
+        update_columns = _split_names(context.resolve_value(config.get('updateColumns', '')))
+        use_transaction = config.get('useTransaction', True)
+        variable_name = context.resolve_value(config.get('variableName', ''))
+        query_timeout = get_query_timeout(config, context)
+        
+        connections = get_db_connections(context)
+        pool = connections.get(connection_name)
+        
+        if not pool:
+            return ModuleResult(
+                success=False, 
+                error=f"数据库连接 '{connection_name}' 不存在，请先使用「连接数据库」模块"
+            )
+        
+        if not table:
+            return ModuleResult(success=False, error="请指定表名")
+        
+        if on_duplicate not in DUPLICATE_MODES:
+            return ModuleResult(success=False, error=f"不支持的重复键处理方式: {on_duplicate}")
+        
+        # 准备数据来源
+        if source == 'variable':
+            if not source_variable:
+                return ModuleResult(success=False, error="请指定数据来源变量")
+            rows = context.get_variable(source_variable)
+            if not isinstance(rows, (list, tuple)):
+                return ModuleResult(success=False, error=f"变量 '{source_variable}' 不是列表")
+            if not columns:
+                if not all(isinstance(row, dict) for row in rows):
+                    return ModuleResult(success=False, error="列表元素不是字典时必须指定列名")
+                column_set: dict[str, None] = {}
+                for row in rows:
+                    column_set.update(dict.fromkeys(row))
+                columns = list(column_set)
+            # 写入前检查全部行，避免写到一半才发现列数不对
+            error = _check_list_rows(rows, columns)
+            if error:
+                return ModuleResult(success=False, error=error)
+            batches = _iter_list_batches(list(rows), columns, batch_size)
+        else:
+            data_table = context.data_rows
+            missing = [c for c in columns if c not in data_table.columns]
+            if missing:
+                return ModuleResult(success=False, error=f"数据表中不存在列: {', '.join(missing)}")
+            columns = columns or data_table.columns
+            # 冻结当前块并取得块列表的快照必须在事件循环中完成（iter_frames 调用时即执行），
+            # 池线程只逐块读取这份快照，不会与执行中对数据表的追加同时修改表的内部状态
+            frames = data_table.iter_frames()
+            batches = _iter_table_batches(frames, columns, batch_size)
+        
+        if not columns:
+            return ModuleResult(success=True, message="没有需要写入的数据", data={"rowCount": 0})
+        
+        sql = build_bulk_insert_sql(pool, table, columns, on_duplicate, update_columns)
+        
+        def insert_next_batch(conn):
+            # 在池线程中取下一批，读取溢出到磁盘的数据块不会阻塞事件循环
+            batch = next(batches, None)
+            if batch is None:
+                return None
+            with pool.cursor(conn) as cursor:
+                affected = pool.executemany(cursor, sql, [tuple(_db_value(v) for v in row) for row in batch])
+            return len(batch), affected
+        
+        row_count = affected_rows = batch_count = 0
+        start_time = time.monotonic()
+        try:
+            async with pool.acquire() as lease:
+                if use_transaction:
+                    await lease.run(pool.begin)
+                try:
+                    while True:
+                        written = await lease.run(insert_next_batch, timeout=query_timeout)
+                        if written is None:
+                            break
+                        row_count += written[0]
+                        affected_rows += written[1]
+                        batch_count += 1
+                    if use_transaction:
+                        await lease.run(pool.commit)
+                except BaseException:
+                    # 被丢弃的连接关闭时服务器会自动回滚未提交的事务
+                    if use_transaction and not lease.discarded:
+                        try:
+                            await lease.run(pool.rollback)
+                        except Exception:
+                            pass
+                    raise
+        except Exception as e:
+            if use_transaction:
+                return ModuleResult(success=False, error=f"批量插入失败，已回滚: {str(e)}")
+            return ModuleResult(success=False, error=f"批量插入失败（已写入 {row_count} 行）: {str(e)}")
+        
+        elapsed = time.monotonic() - start_time
+        rows_per_second = row_count / elapsed if elapsed > 0 else 0.0
+        
+        # 保存写入行数到变量
+        if variable_name:
+            context.set_variable(variable_name, row_count)
+        
+        return ModuleResult(
+            success=True,
+            message=f"批量写入 {row_count} 行（{batch_count} 批），耗时 {elapsed:.2f} 秒，{rows_per_second:.0f} 行/秒",
+            data={
+                "rowCount": row_count,
+                "affectedRows": affected_rows,
+                "batches": batch_count,
+                "elapsed": round(elapsed, 3),
+                "rowsPerSecond": round(rows_per_second, 1),
+            }
+        )
+
+
 @register_executor
 class DbUpdateExecutor(ModuleExecutor):
     """更新数据"""
@@ -253,9 +584,9 @@ class DbUpdateExecutor(ModuleExecutor):
         variable_name = context.resolve_value(config.get('variableName', ''))
         
         connections = get_db_connections(context)
-        conn = connections.get(connection_name)
+        pool = connections.get(connection_name)
         
-        if not conn:
+        if not pool:
             return ModuleResult(
                 success=False, 
                 error=f"数据库连接 '{connection_name}' 不存在，请先使用「连接数据库」模块"
@@ -282,17 +613,20 @@ class DbUpdateExecutor(ModuleExecutor):
                 return ModuleResult(success=False, error="更新数据不能为空")
             
             # 构建UPDATE语句
-            set_clause = ', '.join(f'`{k}` = %s' for k in resolved_data.keys())
-            sql = f"UPDATE `{table}` SET {set_clause}"
+            set_clause = ', '.join(f'{pool.quote_name(k)} = {pool.placeholder}' for k in resolved_data.keys())
+            sql = f"UPDATE {pool.quote_name(table)} SET {set_clause}"
             if where:
                 sql += f" WHERE {where}"
             
-            with conn.cursor() as cursor:
-                affected_rows = cursor.execute(sql, list(resolved_data.values()))
+            def update(conn):
+                with pool.cursor(conn) as cursor:
+                    return pool.execute_params(cursor, sql, list(resolved_data.values()))
+            
+            affected_rows = await pool.run(update)
             
             # 保存影响行数到变量
             if variable_name:
-                context.variables[variable_name] = affected_rows
+                context.set_variable(variable_name, affected_rows)
             
             return ModuleResult(
                 success=True,
@@ -318,9 +652,9 @@ class DbDeleteExecutor(ModuleExecutor):
         variable_name = context.resolve_value(config.get('variableName', ''))
         
         connections = get_db_connections(context)
-        conn = connections.get(connection_name)
+        pool = connections.get(connection_name)
         
-        if not conn:
+        if not pool:
             return ModuleResult(
                 success=False, 
                 error=f"数据库连接 '{connection_name}' 不存在，请先使用「连接数据库」模块"
@@ -333,14 +667,17 @@ class DbDeleteExecutor(ModuleExecutor):
             return ModuleResult(success=False, error="删除操作必须指定WHERE条件，防止误删全表数据")
         
         try:
-            sql = f"DELETE FROM `{table}` WHERE {where}"
+            sql = f"DELETE FROM {pool.quote_name(table)} WHERE {where}"
+            
+            def delete(conn):
+                with pool.cursor(conn) as cursor:
+                    return pool.execute(cursor, sql)
             
-            with conn.cursor() as cursor:
-                affected_rows = cursor.execute(sql)
+            affected_rows = await pool.run(delete)
             
             # 保存影响行数到变量
             if variable_name:
-                context.variables[variable_name] = affected_rows
+                context.set_variable(variable_name, affected_rows)
             
             return ModuleResult(
                 success=True,
@@ -363,14 +700,14 @@ class DbCloseExecutor(ModuleExecutor):
         connection_name = context.resolve_value(config.get('connectionName', 'default'))
         
         connections = get_db_connections(context)
-        conn = connections.get(connection_name)
+        pool = connections.get(connection_name)
         
-        if not conn:
+        if not pool:
             return ModuleResult(success=True, message=f"连接 '{connection_name}' 不存在或已关闭")
         
         try:
-            conn.close()
             del connections[connection_name]
+            await pool.close()
             
             return ModuleResult(
                 success=True,
@@ -0,0 +1,252 @@
+"""SQL 变量绑定 - 把 SQL 中的变量引用转换为参数占位符
+
+原先 SQL 经过 resolve_value 直接把变量值拼接进语句文本：每次循环都生成不同的语句，
+服务器每次都要重新解析；抓取的文本中带有引号时语句会出错（甚至被注入）。
+这里按 SQL 词法切分语句，只把处于「值」位置的变量引用改为参数，值单独交给驱动转义：
+
+- 字符串字面量中含有变量引用时，整个字面量作为一个参数，如 '%{keyword}%'
+- 紧跟在比较运算符（= <> != < > <= >= <=> LIKE REGEXP）之后的变量引用作为参数，如 id = {id}
+
+其他位置（表名、列名、IN 列表、LIMIT、反引号和注释中）的变量引用仍按原样拼接，
+已有工作流的语义不变。变量不存在或值为空时与 resolve_value 一样保留原始文本。
+
+字符串字面量并不总是值：FROM/JOIN/INTO/TO 等之后的字面量和表函数的参数是文件或表名
+（如 DuckDB 的 FROM '{path}'、FROM read_parquet('{path}')、COPY ... TO '{file}'），DDL、PRAGMA、COPY 等语句也不接受参数，
+这些位置和语句中的变量引用同样按原样拼接。
+"""
+import bisect
+import json
+import re
+from functools import lru_cache
+from typing import Any, Optional, Union
+
+from .template import TEMPLATE_CACHE_SIZE, VariableRef, parse_reference, _MISSING
+
+# 方言：mysql 的双引号表示字符串、支持反斜杠转义和 # 注释；
+# standard（SQLite、DuckDB）的双引号表示标识符，字符串中只有两个单引号表示一个单引号
+SQL_DIALECTS = ('mysql', 'standard')
+
+_REF_PATTERN = re.compile(r'\$\{([^}]+)\}|\{([^}]+)\}')
+_OPERATOR_TAIL = re.compile(r'(?:[=<>]|\b(?:LIKE|REGEXP|RLIKE))\s*$', re.IGNORECASE)
+# 之后的字符串字面量是文件名或表名而不是值（包括 FROM read_parquet('...') 这样的表函数参数）
+_NAME_TAIL = re.compile(r'\b(?:(?:FROM|JOIN|INTO|TO|TABLE|UPDATE)|(?:FROM|JOIN)\s+\w+\s*\(\s*)\s*$',
+                        re.IGNORECASE)
+# 不接受参数的语句（开头的空白和注释之后的第一个关键字）
+_UNBOUND_STATEMENT = re.compile(
+    r'(?:\s+|--[^\n]*(?:\n|$)|/\*.*?\*/)*'
+    r'(?:CREATE|ALTER|DROP|TRUNCATE|RENAME|PRAGMA|COPY|ATTACH|DETACH|INSTALL|LOAD|'
+    r'EXPORT|IMPORT|SET|USE|VACUUM|GRANT|REVOKE)\b',
+    re.IGNORECASE | re.DOTALL,
+)
+
+_MYSQL_ESCAPES = {
+    '0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a',
+    # \% 和 \_ 在 LIKE 模式中表示字面量，保留反斜杠
+    '%': '\\%', '_': '\\_',
+}
+
+
+def _unescape(text: str, quote: str, backslash_escapes: bool) -> str:
+    """字符串字面量内容 -> 实际字符"""
+    text = text.replace(quote * 2, quote)
+    if not backslash_escapes or '\\' not in text:
+        return text
+    return re.sub(r'\\(.)', lambda m: _MYSQL_ESCAPES.get(m.group(1), m.group(1)), text, flags=re.DOTALL)
+
+
+class SqlParam:
+    """按参数绑定的值：单独的变量引用，或含变量引用的字符串字面量（片段列表）"""
+    __slots__ = ('source', 'ref', 'pieces')
+
+    def __init__(self, source: str, ref: Optional[VariableRef] = None,
+                 pieces: Optional[tuple[Union[str, VariableRef], ...]] = None):
+        self.source = source  # 无法绑定时原样输出的文本
+        self.ref = ref
+        self.pieces = pieces
+
+    def value(self, variables: dict[str, Any]) -> Any:
+        """参数值，变量不存在或为空时返回 _MISSING"""
+        if self.pieces is not None:
+            return ''.join(p if p.__class__ is str else p.render(variables) for p in self.pieces)
+        value = self.ref.lookup(variables)
+        if value is _MISSING or value is None:
+            return _MISSING
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+
+Segment = Union[str, VariableRef, SqlParam]
+
+
+class BoundSql:
+    """绑定后的语句：文本片段之间是参数占位符（None），参数值按顺序单独传给驱动"""
+    __slots__ = ('parts', 'params')
+
+    def __init__(self, parts: list[Optional[str]], params: list[Any]):
+        self.parts = parts
+        self.params = params
+
+    def text(self, placeholder: Optional[str] = None) -> str:
+        """生成语句文本
+
+        placeholder 为驱动的占位符（pymysql 为 %s，SQLite/DuckDB 为 ?）；
+        使用 %s 时文本中的 % 需要写成 %%。没有参数时返回原始文本。
+        """
+        if not self.params:
+            return ''.join(self.parts)
+        escape = placeholder == '%s'
+        return ''.join(
+            placeholder if part is None else (part.replace('%', '%%') if escape else part)
+            for part in self.parts
+        )
+
+    def __repr__(self) -> str:
+        return f"BoundSql({self.text('?')!r}, {self.params!r})"
+
+
+def _refs_in(text: str) -> list[tuple[re.Match, VariableRef]]:
+    refs = []
+    for match in _REF_PATTERN.finditer(text):
+        parsed = parse_reference(match.group(1) or match.group(2))
+        if parsed is not None:
+            refs.append((match, VariableRef(match.group(0), parsed[0], parsed[1])))
+    return refs
+
+
+def _scan_quoted(source: str, start: int, quote: str, backslash_escapes: bool) -> int:
+    """返回引号区域结束后的位置（未闭合时到末尾）"""
+    i = start + 1
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c == '\\' and backslash_escapes:
+            i += 2
+        elif c == quote:
+            if i + 1 < n and source[i + 1] == quote:
+                i += 2
+            else:
+                return i + 1
+        else:
+            i += 1
+    return n
+
+
+class SqlTemplate:
+    """编译后的 SQL 模板"""
+    __slots__ = ('source', 'segments')
+
+    def __init__(self, source: str, dialect: str = 'mysql'):
+        self.source = source
+        self.segments = self._compile(source, dialect)
+
+    @staticmethod
+    def _compile(source: str, dialect: str) -> tuple[Segment, ...]:
+        mysql = dialect == 'mysql'
+        segments: list[Segment] = []
+        code_start = 0
+        statements = [0]  # 各条语句的起始位置（分号之后）
+
+        def bindable(pos: int) -> bool:
+            start = statements[bisect.bisect_right(statements, pos) - 1]
+            return not _UNBOUND_STATEMENT.match(source, start)
+
+        def add_code(end: int, binding: bool = True):
+            # 普通代码区域：比较运算符之后的引用绑定为参数，其他引用原样拼接
+            text = source[code_start:end]
+            pos = 0
+            for match, ref in _refs_in(text):
+                if match.start() > pos:
+                    segments.append(text[pos:match.start()])
+                at = code_start + match.start()
+                if binding and _OPERATOR_TAIL.search(source, 0, at) and bindable(at):
+                    segments.append(SqlParam(match.group(0), ref=ref))
+                else:
+                    segments.append(ref)
+                pos = match.end()
+            if pos < len(text):
+                segments.append(text[pos:])
+
+        i = 0
+        n = len(source)
+        while i < n:
+            c = source[i]
+            if c == "'" or (c == '"' and mysql):
+                end = _scan_quoted(source, i, c, mysql)
+                literal = source[i:end]
+                closed = end - i >= 2 and literal.endswith(c)
+                content = literal[1:-1] if closed else ''
+                refs = _refs_in(content) if closed else []
+                if refs and (_NAME_TAIL.search(source, 0, i) or not bindable(i)):
+                    # 文件名、表名或不接受参数的语句：字面量中的引用原样拼接
+                    add_code(i)
+                    code_start = i
+                    add_code(end, binding=False)
+                    code_start = end
+                elif refs:
+                    add_code(i)
+                    pieces: list[Union[str, VariableRef]] = []
+                    pos = 0
+                    for match, ref in refs:
+                        if match.start() > pos:
+                            pieces.append(_unescape(content[pos:match.start()], c, mysql))
+                        pieces.append(ref)
+                        pos = match.end()
+                    if pos < len(content):
+                        pieces.append(_unescape(content[pos:], c, mysql))
+                    segments.append(SqlParam(literal, pieces=tuple(pieces)))
+                    code_start = end
+                i = end
+            elif c == '`' or c == '"':
+                # 标识符：其中的引用原样拼接（与代码区域中非值位置的引用相同）
+                i = _scan_quoted(source, i, c, False)
+            elif source.startswith('/*', i):
+                close = source.find('*/', i + 2)
+                i = n if close < 0 else close + 2
+            elif source.startswith('--', i) or (c == '#' and mysql):
+                close = source.find('\n', i)
+                i = n if close < 0 else close + 1
+            else:
+                if c == ';':
+                    statements.append(i + 1)
+                i += 1
+        add_code(n)
+        return tuple(segments)
+
+    @property
+    def has_params(self) -> bool:
+        return any(seg.__class__ is SqlParam for seg in self.segments)
+
+    def bind(self, variables: dict[str, Any]) -> BoundSql:
+        """按当前变量生成语句片段和参数"""
+        parts: list[Optional[str]] = []
+        params: list[Any] = []
+        text: list[str] = []
+        for seg in self.segments:
+            cls = seg.__class__
+            if cls is str:
+                text.append(seg)
+            elif cls is VariableRef:
+                text.append(seg.render(variables))
+            else:
+                value = seg.value(variables)
+                if value is _MISSING:
+                    text.append(seg.source)
+                    continue
+                parts.append(''.join(text))
+                text = []
+                parts.append(None)
+                params.append(value)
+        parts.append(''.join(text))
+        return BoundSql(parts, params)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_sql(source: str, dialect: str = 'mysql') -> SqlTemplate:
+    """编译 SQL 模板（按原始字符串和方言 LRU 缓存）"""
+    return SqlTemplate(source, dialect)
+
+
+def bind_sql(source: str, variables: dict[str, Any], dialect: str = 'mysql') -> BoundSql:
+    """把 SQL 中处于值位置的变量引用绑定为参数"""
+    return compile_sql(source, dialect).bind(variables)
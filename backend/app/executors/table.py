@@ -63,9 +63,7 @@ class TableAddColumnExecutor(ModuleExecutor):
             return ModuleResult(success=False, error="列名不能为空")
         
         try:
-            for row in context.data_rows:
-                if column_name not in row:
-                    row[column_name] = default_value
+            context.data_rows.add_column(column_name, default_value)
             
             if not context.data_rows:
                 context.data_rows.append({column_name: default_value})
@@ -111,7 +109,7 @@ class TableSetCellExecutor(ModuleExecutor):
             return ModuleResult(success=False, error=f"行索引 {row_index} 超出范围")
         
         try:
-            context.data_rows[row_index][column_name] = cell_value
+            context.data_rows.set_cell(row_index, column_name, cell_value)
             
             return ModuleResult(
                 success=True,
@@ -155,12 +153,10 @@ class TableGetCellExecutor(ModuleExecutor):
         if row_index < 0 or row_index >= len(context.data_rows):
             return ModuleResult(success=False, error=f"行索引 {row_index} 超出范围")
         
-        row = context.data_rows[row_index]
-        
-        if column_name not in row:
+        if column_name not in context.data_rows.columns:
             return ModuleResult(success=False, error=f"列 '{column_name}' 不存在")
         
-        value = row[column_name]
+        value = context.data_rows.row(row_index)[column_name]
         context.set_variable(variable_name, value)
         
         return ModuleResult(
@@ -250,6 +246,8 @@ class TableExportExecutor(ModuleExecutor):
         if not context.data_rows:
             return ModuleResult(success=False, error="数据表格为空，无法导出")
         
+        from app.services.data_collector import DataCollector, export_extension
+        
         try:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             
@@ -258,7 +256,7 @@ class TableExportExecutor(ModuleExecutor):
             else:
                 file_name = f"data_{timestamp}"
             
-            ext = '.xlsx' if export_format == 'excel' else '.csv'
+            ext = export_extension(export_format)
             if not file_name.endswith(ext):
                 file_name += ext
             
@@ -275,18 +273,14 @@ class TableExportExecutor(ModuleExecutor):
             
             os.makedirs(os.path.dirname(final_path), exist_ok=True)
             
-            from app.services.data_collector import DataCollector
             
-            collector = DataCollector()
-            for row in context.data_rows:
-                collector.add_row(row)
+            # 直接在列式数据表上导出，不再逐行复制
+            collector = DataCollector(context.data_rows)
             
             # 使用线程池执行同步导出操作
+            # 超过 Excel 行数上限时会改为导出 CSV，以实际写入的路径为准
             loop = asyncio.get_event_loop()
-            if export_format == 'excel':
-                await loop.run_in_executor(None, collector.to_excel, final_path)
-            else:
-                await loop.run_in_executor(None, collector.to_csv, final_path)
+            final_path = await loop.run_in_executor(None, collector.to_file, final_path, export_format)
             
             if variable_name:
                 context.set_variable(variable_name, final_path)
@@ -0,0 +1,176 @@
+"""变量模板编译器 - 将配置字符串预编译为可重复渲染的片段计划
+
+resolve_value 在每个节点、每次循环中都会被多次调用，而配置字符串本身是固定的。
+这里把每个原始字符串只解析一次，缓存为「字面量 + 变量引用」的片段列表，
+渲染时只需遍历片段即可，不再重复执行正则匹配。
+
+语义与原先的两遍 re.sub 实现保持一致：
+- 第一遍替换 ${varName}
+- 第二遍在第一遍结果上替换 {varName}（前面紧跟 $ 的不匹配）
+- 变量不存在或访问路径无效时保留原始文本
+"""
+import json
+import re
+from functools import lru_cache
+from typing import Any, Optional, Union
+
+# 模板缓存容量（按原始字符串计）
+TEMPLATE_CACHE_SIZE = 4096
+
+_DOLLAR_PATTERN = re.compile(r'\$\{([^}]+)\}')
+_BRACE_PATTERN = re.compile(r'(?<!\$)\{([^}]+)\}')
+_BASE_PATTERN = re.compile(r'^([a-zA-Z_\u4e00-\u9fa5][a-zA-Z0-9_\u4e00-\u9fa5]*)((?:\[[^\]]+\])*)')
+_ACCESSOR_PATTERN = re.compile(r'\[([^\]]+)\]')
+
+_MISSING = object()
+
+
+class Accessor:
+    """预解析的 [xxx] 访问器"""
+    __slots__ = ('key', 'index')
+
+    def __init__(self, raw: str):
+        raw = raw.strip()
+        # 移除引号（如果有）
+        if (raw.startswith('"') and raw.endswith('"')) or \
+           (raw.startswith("'") and raw.endswith("'")):
+            raw = raw[1:-1]
+        self.key = raw
+        try:
+            self.index: Optional[int] = int(raw)
+        except ValueError:
+            self.index = None
+
+
+class VariableRef:
+    """预解析的变量引用，如 {data[0][name]}"""
+    __slots__ = ('source', 'base', 'accessors')
+
+    def __init__(self, source: str, base: str, accessors: tuple[Accessor, ...]):
+        self.source = source  # 原始匹配文本，未解析时原样输出
+        self.base = base
+        self.accessors = accessors
+
+    def lookup(self, variables: dict[str, Any]) -> Any:
+        """按访问路径取值，失败返回 _MISSING
+
+        直接在原始数据结构上逐级索引，不做任何拷贝，只有最终取到的值才会被序列化。
+        """
+        result = variables.get(self.base, _MISSING)
+        if result is _MISSING:
+            return _MISSING
+
+        for accessor in self.accessors:
+            if isinstance(result, list):
+                # 列表索引访问（支持负数索引，如 -1 表示最后一个元素）
+                index = accessor.index
+                if index is None or not -len(result) <= index < len(result):
+                    return _MISSING
+                result = result[index]
+            elif isinstance(result, dict):
+                # 字典键访问 - 先尝试原始键，再尝试数字键
+                try:
+                    if accessor.key in result:
+                        result = result[accessor.key]
+                    elif accessor.index is not None and accessor.index in result:
+                        result = result[accessor.index]
+                    else:
+                        return _MISSING
+                except TypeError:
+                    return _MISSING
+            else:
+                return _MISSING
+        return result
+
+    def render(self, variables: dict[str, Any]) -> str:
+        value = self.lookup(variables)
+        if value is _MISSING or value is None:
+            return self.source
+        # 如果是复杂类型，转为JSON字符串
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, ensure_ascii=False)
+        return str(value)
+
+
+Segment = Union[str, VariableRef]
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def parse_reference(expr: str) -> Optional[tuple[str, tuple[Accessor, ...]]]:
+    """解析变量表达式为 (基础变量名, 访问器元组)，无法解析时返回 None"""
+    base_match = _BASE_PATTERN.match(expr.strip())
+    if not base_match:
+        return None
+    accessors = tuple(Accessor(a) for a in _ACCESSOR_PATTERN.findall(base_match.group(2)))
+    return base_match.group(1), accessors
+
+
+def _tokenize(text: str, pattern: re.Pattern) -> Optional[tuple[Segment, ...]]:
+    """按模式切分字符串，没有任何可解析引用时返回 None"""
+    segments: list[Segment] = []
+    has_ref = False
+    pos = 0
+    for match in pattern.finditer(text):
+        parsed = parse_reference(match.group(1))
+        if parsed is None:
+            # 不可能解析成功的引用（如 JSON 花括号），直接当作字面量
+            continue
+        if match.start() > pos:
+            segments.append(text[pos:match.start()])
+        segments.append(VariableRef(match.group(0), parsed[0], parsed[1]))
+        has_ref = True
+        pos = match.end()
+    if not has_ref:
+        return None
+    if pos < len(text):
+        segments.append(text[pos:])
+    return tuple(segments)
+
+
+def _render(segments: tuple[Segment, ...], variables: dict[str, Any]) -> str:
+    return ''.join(
+        seg if seg.__class__ is str else seg.render(variables)
+        for seg in segments
+    )
+
+
+class CompiledTemplate:
+    """编译后的模板"""
+    __slots__ = ('source', 'dollar_plan', 'brace_plan')
+
+    def __init__(self, source: str):
+        self.source = source
+        self.dollar_plan = _tokenize(source, _DOLLAR_PATTERN)
+        self.brace_plan = _tokenize(source, _BRACE_PATTERN)
+
+    @property
+    def is_static(self) -> bool:
+        """不包含任何变量引用"""
+        return self.dollar_plan is None and self.brace_plan is None
+
+    def render(self, variables: dict[str, Any]) -> str:
+        if self.dollar_plan is None:
+            if self.brace_plan is None:
+                return self.source
+            return _render(self.brace_plan, variables)
+
+        text = _render(self.dollar_plan, variables)
+        if text == self.source:
+            brace_plan = self.brace_plan
+        else:
+            # ${} 的替换结果可能引入新的 {} 引用，需在替换后的文本上再切分一次
+            brace_plan = _tokenize(text, _BRACE_PATTERN)
+        if brace_plan is None:
+            return text
+        return _render(brace_plan, variables)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(source: str) -> CompiledTemplate:
+    """编译模板字符串（按原始字符串 LRU 缓存）"""
+    return CompiledTemplate(source)
+
+
+def render_template(source: str, variables: dict[str, Any]) -> str:
+    """渲染模板字符串中的变量引用"""
+    return compile_template(source).render(variables)
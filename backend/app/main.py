@@ -42,12 +42,14 @@ from app.api.data_assets import router as data_assets_router
 from app.api.browser import router as browser_router
 from app.api.system import router as system_router
 from app.api.local_workflows import router as local_workflows_router
+from app.api.runs import router as runs_router
 app.include_router(workflows_router)
 app.include_router(element_picker_router)
 app.include_router(data_assets_router)
 app.include_router(browser_router)
 app.include_router(system_router)
 app.include_router(local_workflows_router)
+app.include_router(runs_router)
 
 # 将Socket.IO挂载到FastAPI
 socket_app = socketio.ASGIApp(sio, app)
@@ -68,6 +70,23 @@ async def startup_event():
     """应用启动时设置主事件循环"""
     loop = asyncio.get_event_loop()
     set_main_loop(loop)
+    # 清理上次运行遗留的数据溢出文件
+    from app.services.data_table import cleanup_spill_dir
+    cleanup_spill_dir()
+    # 继续上次未完成的Excel列式转换
+    from app.api.data_assets import resume_conversions
+    resume_conversions()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """应用关闭时释放浏览器池、工作进程和 HTTP 连接"""
+    from app.services.browser_pool import shutdown_browser_pool
+    from app.services.worker_pool import shutdown_worker_pool
+    from app.services.http_client import shutdown_http_clients
+    await shutdown_browser_pool()
+    await shutdown_worker_pool()
+    await shutdown_http_clients()
 
 
 # Socket.IO事件处理
@@ -92,10 +111,8 @@ async def execution_stop(sid, data):
         # 先清理所有等待中的事件，让阻塞的线程能够退出
         clear_all_pending_events()
         
-        from app.api.workflows import executions_store
-        executor = executions_store.get(workflow_id)
-        if executor and executor.is_running:
-            await executor.stop()
+        from app.api.workflows import stop_interactive_run
+        await stop_interactive_run(workflow_id)
 
 
 # 全局日志开关状态
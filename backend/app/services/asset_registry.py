@@ -0,0 +1,93 @@
+"""数据资源登记表 - 上传文件的元数据持久化到 JSON 清单
+
+上传的 Excel 文件元数据原先只保存在内存字典中，重启后文件虽然还在 uploads 目录，
+工作流却找不到它们。登记表把元数据写入 uploads/manifest.json（先写临时文件再替换，
+写入过程中崩溃不会损坏清单），启动时重新加载，并维护按原始文件名的索引。
+"""
+import json
+import os
+import threading
+from typing import Optional
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class AssetRegistry:
+    """数据资源登记表（线程安全，后台转换任务也会更新）"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        self._assets: dict[str, dict] = {}
+        self._by_name: dict[str, str] = {}  # 原始文件名 -> 最早上传的同名文件 ID
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        """从清单加载，文件已不存在的记录会被丢弃"""
+        with self._lock:
+            self._assets = {}
+            if os.path.exists(self.manifest_path):
+                try:
+                    with open(self.manifest_path, encoding='utf-8') as f:
+                        assets = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"读取数据资源清单失败: {e}")
+                    assets = []
+                for asset in assets:
+                    # 路径按当前目录重新计算，程序目录移动后仍然有效
+                    asset['path'] = os.path.join(self.directory, asset['name'])
+                    if os.path.exists(asset['path']):
+                        self._assets[asset['id']] = asset
+            self._reindex()
+
+    def _reindex(self):
+        self._by_name = {}
+        for asset in self._assets.values():
+            self._by_name.setdefault(asset['originalName'], asset['id'])
+
+    def _save(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(list(self._assets.values()), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def __contains__(self, file_id: str) -> bool:
+        return file_id in self._assets
+
+    def __getitem__(self, file_id: str) -> dict:
+        return self._assets[file_id]
+
+    def get(self, file_id: str) -> Optional[dict]:
+        return self._assets.get(file_id)
+
+    def get_by_name(self, name: str) -> Optional[dict]:
+        """通过原始文件名查找（同名时返回最早上传的）"""
+        file_id = self._by_name.get(name)
+        return self._assets.get(file_id) if file_id else None
+
+    def values(self) -> list[dict]:
+        return list(self._assets.values())
+
+    def add(self, asset: dict):
+        with self._lock:
+            self._assets[asset['id']] = asset
+            self._by_name.setdefault(asset['originalName'], asset['id'])
+            self._save()
+
+    def update(self, file_id: str, **fields):
+        with self._lock:
+            asset = self._assets.get(file_id)
+            if asset is None:
+                return
+            asset.update(fields)
+            self._save()
+
+    def remove(self, file_id: str) -> Optional[dict]:
+        with self._lock:
+            asset = self._assets.pop(file_id, None)
+            if asset is not None:
+                if self._by_name.get(asset['originalName']) == file_id:
+                    self._reindex()
+                self._save()
+            return asset
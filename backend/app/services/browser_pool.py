@@ -0,0 +1,245 @@
+"""浏览器池 - 在多次工作流执行之间复用预先启动的无头浏览器
+
+每次执行都启动 Playwright 和浏览器要花 2~5 秒。浏览器池在进程内常驻一个
+Playwright 实例和 N 个无头 Chromium，执行时只需从中新建一个隔离的浏览器上下文
+（可用保存的登录状态初始化），执行结束关闭上下文即可。
+每个浏览器被使用指定次数后退役，由新启动的浏览器替换，避免长期运行导致内存膨胀。
+"""
+import asyncio
+import json
+import re
+from pathlib import Path
+from typing import Any, Optional
+
+# 预启动的浏览器数量
+DEFAULT_POOL_SIZE = 2
+# 每个浏览器最多创建多少个上下文后回收
+DEFAULT_MAX_USES = 50
+
+# 保存登录状态（Cookie、localStorage）的目录
+STORAGE_STATE_DIR = Path(__file__).parent.parent.parent / "browser_states"
+# 登录状态名称只能包含字母、数字、下划线、点和短横线，不能借助路径读写目录之外的文件
+_STORAGE_STATE_NAME = re.compile(r'[\w.-]+')
+
+
+def storage_state_path(name: str) -> Path:
+    """登录状态名称对应的文件路径，名称不合法（含路径分隔符、..、绝对路径）时抛出 ValueError"""
+    if not _STORAGE_STATE_NAME.fullmatch(name) or '..' in name:
+        raise ValueError(f"登录状态名称不合法: {name}（只能包含字母、数字、下划线、点和短横线）")
+    return STORAGE_STATE_DIR / f"{name}.json"
+
+
+def resolve_storage_state(name: Optional[str]) -> Optional[str]:
+    """把登录状态名称解析为文件路径，不存在时返回 None"""
+    if not name:
+        return None
+    path = storage_state_path(name)
+    if path.is_file():
+        return str(path)
+    return None
+
+
+class PooledBrowser:
+    """池中的一个浏览器"""
+
+    def __init__(self, browser: Any):
+        self.browser = browser
+        self.uses = 0      # 已创建的上下文数
+        self.active = 0    # 正在使用的上下文数
+        self.retiring = False
+
+    @property
+    def available(self) -> bool:
+        return not self.retiring and self.browser.is_connected()
+
+
+class BrowserLease:
+    """从浏览器池借出的隔离浏览器上下文"""
+
+    def __init__(self, pool: 'BrowserPool', pooled: PooledBrowser, context: Any):
+        self.pool = pool
+        self.pooled = pooled
+        self.context = context
+        self.released = False
+
+    @property
+    def browser(self) -> Any:
+        return self.pooled.browser
+
+    async def save_storage_state(self, name: str) -> Optional[str]:
+        """把当前上下文的登录状态保存为指定名称，返回文件路径"""
+        path = storage_state_path(name)
+        STORAGE_STATE_DIR.mkdir(exist_ok=True)
+        state = await self.context.storage_state()
+        path.write_text(json.dumps(state, ensure_ascii=False), encoding='utf-8')
+        return str(path)
+
+    async def release(self):
+        """归还上下文（关闭上下文，浏览器留在池中）"""
+        if self.released:
+            return
+        self.released = True
+        await self.pool._release(self)
+
+
+class BrowserPool:
+    """预热的无头浏览器池"""
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, max_uses: int = DEFAULT_MAX_USES):
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self._playwright: Any = None
+        self._browsers: list[PooledBrowser] = []
+        self._lock = asyncio.Lock()
+        self._replacements: set[asyncio.Task] = set()
+        self.total_leases = 0
+
+    @property
+    def is_started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        """启动 Playwright 并预先启动浏览器"""
+        async with self._lock:
+            await self._fill()
+
+    async def _fill(self):
+        """补足可用浏览器（需持有锁）"""
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+
+        # 移除已断开连接的浏览器
+        self._browsers = [b for b in self._browsers if b.browser.is_connected()]
+        missing = self.size - sum(1 for b in self._browsers if b.available)
+        if missing <= 0:
+            return
+        browsers = await asyncio.gather(*(self._launch() for _ in range(missing)))
+        self._browsers.extend(PooledBrowser(browser) for browser in browsers)
+        print(f"[BrowserPool] 已预启动 {missing} 个浏览器，当前共 {len(self._browsers)} 个")
+
+    async def _launch(self) -> Any:
+        return await self._playwright.chromium.launch(headless=True)
+
+    async def acquire(self, storage_state: Optional[str] = None) -> BrowserLease:
+        """借出一个隔离的浏览器上下文
+
+        Args:
+            storage_state: 登录状态名称（保存在 browser_states 目录），用于初始化 Cookie 和 localStorage
+        """
+        async with self._lock:
+            if not any(b.available for b in self._browsers):
+                await self._fill()
+            pooled = min((b for b in self._browsers if b.available), key=lambda b: b.active)
+            pooled.uses += 1
+            pooled.active += 1
+            if pooled.uses >= self.max_uses:
+                # 达到使用次数上限：不再分配新上下文，后台启动替换的浏览器
+                pooled.retiring = True
+                self._schedule_refill()
+
+        try:
+            state_path = resolve_storage_state(storage_state)
+            if storage_state and state_path is None:
+                print(f"[BrowserPool] 找不到登录状态: {storage_state}，将使用空白上下文")
+            context = await pooled.browser.new_context(storage_state=state_path)
+        except Exception:
+            pooled.active -= 1
+            await self._retire_if_idle(pooled)
+            raise
+
+        self.total_leases += 1
+        return BrowserLease(self, pooled, context)
+
+    async def _release(self, lease: BrowserLease):
+        try:
+            await lease.context.close()
+        except Exception:
+            pass
+        pooled = lease.pooled
+        pooled.active -= 1
+        await self._retire_if_idle(pooled)
+
+    async def _retire_if_idle(self, pooled: PooledBrowser):
+        """退役的浏览器在最后一个上下文归还后关闭"""
+        if not pooled.retiring or pooled.active > 0:
+            return
+        if pooled in self._browsers:
+            self._browsers.remove(pooled)
+        try:
+            await pooled.browser.close()
+        except Exception:
+            pass
+
+    def _schedule_refill(self):
+        async def refill():
+            async with self._lock:
+                await self._fill()
+
+        task = asyncio.create_task(refill())
+        self._replacements.add(task)
+        task.add_done_callback(self._replacements.discard)
+
+    def stats(self) -> dict:
+        return {
+            'started': self.is_started,
+            'size': self.size,
+            'maxUses': self.max_uses,
+            'totalLeases': self.total_leases,
+            'browsers': [
+                {'uses': b.uses, 'active': b.active, 'retiring': b.retiring,
+                 'connected': b.browser.is_connected()}
+                for b in self._browsers
+            ],
+        }
+
+    async def close(self):
+        """关闭所有浏览器和 Playwright"""
+        for task in list(self._replacements):
+            task.cancel()
+        async with self._lock:
+            for pooled in self._browsers:
+                try:
+                    await pooled.browser.close()
+                except Exception:
+                    pass
+            self._browsers.clear()
+            if self._playwright is not None:
+                try:
+                    await self._playwright.stop()
+                except Exception:
+                    pass
+                self._playwright = None
+
+
+# 进程内唯一的浏览器池
+_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """获取全局浏览器池（首次借出上下文时才启动浏览器）"""
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+    return _pool
+
+
+async def configure_browser_pool(size: int = DEFAULT_POOL_SIZE, max_uses: int = DEFAULT_MAX_USES,
+                                 warm: bool = True) -> BrowserPool:
+    """重新配置全局浏览器池，旧池中的浏览器会被关闭"""
+    global _pool
+    old_pool = _pool
+    _pool = BrowserPool(size=size, max_uses=max_uses)
+    if old_pool is not None:
+        await old_pool.close()
+    if warm:
+        await _pool.start()
+    return _pool
+
+
+async def shutdown_browser_pool():
+    """关闭全局浏览器池"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
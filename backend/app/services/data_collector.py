@@ -1,164 +1,329 @@
 """数据收集器 - 使用Polars管理和导出数据"""
+import gzip
+import json
+import mimetypes
 import os
 from pathlib import Path
-from typing import Any, Optional
-from datetime import datetime
+from typing import Any, Iterator, Optional, Union
+from datetime import date, datetime, time
 
 import polars as pl
 
+from app.services.data_table import DataTable
+
+# Excel 单个工作表最多 1,048,576 行（含表头）
+EXCEL_MAX_ROWS = 1048575
+# 估算列宽时采样的行数
+WIDTH_SAMPLE_ROWS = 2000
+# Parquet 每个行组的行数
+PARQUET_ROW_GROUP_SIZE = 100000
+
+# 支持的导出格式及对应的文件扩展名
+EXPORT_FORMATS = {
+    'excel': '.xlsx',
+    'csv': '.csv',
+    'parquet': '.parquet',          # zstd 压缩
+    'arrow': '.arrow',              # Arrow IPC / Feather v2，lz4 压缩
+    'ndjson': '.ndjson',
+    'ndjson_gzip': '.ndjson.gz',
+    'ndjson_zstd': '.ndjson.zst',
+}
+
+
+def export_extension(export_format: str) -> str:
+    """导出格式对应的文件扩展名"""
+    ext = EXPORT_FORMATS.get(export_format)
+    if ext is None:
+        raise ValueError(f"不支持的导出格式: {export_format}，可选: {', '.join(EXPORT_FORMATS)}")
+    return ext
+
+
+def media_type(path: Union[str, Path]) -> str:
+    """按文件扩展名确定下载时的 Content-Type，无法识别时为 application/octet-stream"""
+    return mimetypes.guess_type(str(path))[0] or 'application/octet-stream'
+
+
+def _to_frame(data: Union[DataTable, list[dict]]) -> pl.DataFrame:
+    """数据表直接转为 DataFrame，字典列表按原方式构建"""
+    if isinstance(data, DataTable):
+        return data.to_frame()
+    return pl.DataFrame(data)
+
+
+def _json_text(value: Any) -> str:
+    if isinstance(value, pl.Series):
+        value = value.to_list()
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _flatten_nested(frame: Union[pl.DataFrame, pl.LazyFrame]) -> Union[pl.DataFrame, pl.LazyFrame]:
+    """CSV 不支持列表、结构体列，这些列按 JSON 文本写出"""
+    nested = [name for name, dtype in frame.collect_schema().items() if dtype.is_nested()]
+    if not nested:
+        return frame
+    return frame.with_columns(
+        pl.col(name).map_elements(_json_text, return_dtype=pl.String) for name in nested)
+
+
+def _write_csv(data: Union[DataTable, pl.DataFrame, list[dict]], filepath: str):
+    """写入CSV：数据表以流式方式写出，溢出到磁盘的部分不必全部读回内存"""
+    if isinstance(data, DataTable):
+        _flatten_nested(data.to_lazy()).sink_csv(filepath)
+    else:
+        _flatten_nested(data if isinstance(data, pl.DataFrame) else pl.DataFrame(data)).write_csv(filepath)
+
+
+def _to_lazy(data: Union[DataTable, pl.DataFrame, list[dict]]) -> pl.LazyFrame:
+    if isinstance(data, DataTable):
+        return data.to_lazy()
+    return (data if isinstance(data, pl.DataFrame) else pl.DataFrame(data)).lazy()
+
+
+def _write_parquet(data: Union[DataTable, pl.DataFrame, list[dict]], filepath: str):
+    """写入Parquet（zstd 压缩），数据表按块流式写出"""
+    _to_lazy(data).sink_parquet(filepath, compression='zstd', row_group_size=PARQUET_ROW_GROUP_SIZE)
+
+
+def _write_arrow(data: Union[DataTable, pl.DataFrame, list[dict]], filepath: str):
+    """写入Arrow IPC（Feather v2）文件"""
+    _to_lazy(data).sink_ipc(filepath, compression='lz4')
+
+
+def _open_compressed(filepath: str, compression: Optional[str]):
+    if compression == 'gzip':
+        return gzip.open(filepath, 'wb', compresslevel=6)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd 压缩需要安装 zstandard: pip install zstandard")
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(filepath, 'wb'))
+    return open(filepath, 'wb')
+
+
+def _ndjson_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _write_ndjson(data: Union[DataTable, pl.DataFrame, list[dict]], filepath: str,
+                  compression: Optional[str] = None):
+    """写入NDJSON（每行一个JSON对象），可选 gzip / zstd 压缩，逐块写入"""
+    if isinstance(data, list):
+        data = pl.DataFrame(data)
+    with _open_compressed(filepath, compression) as f:
+        if isinstance(data, DataTable) and data.json_columns:
+            # 类型混杂的列按原始值写出（同一列中数字仍是数字、字符串仍是字符串）
+            for row in data:
+                line = json.dumps(row, ensure_ascii=False, separators=(',', ':'), default=_ndjson_default)
+                f.write((line + '\n').encode('utf-8'))
+            return
+        for frame in _iter_frames(data):
+            frame.write_ndjson(f)
+
+
+def write_table(data: Union[DataTable, pl.DataFrame, list[dict]], filepath: str,
+                export_format: str = 'excel') -> str:
+    """按指定格式写出数据，返回实际写入的文件路径（Excel 超过行数上限时改为CSV）"""
+    export_extension(export_format)
+    if export_format == 'excel':
+        if isinstance(data, list):
+            data = pl.DataFrame(data)
+        return _write_styled_excel(data, filepath)
+    if export_format == 'csv':
+        _write_csv(data, filepath)
+    elif export_format == 'parquet':
+        _write_parquet(data, filepath)
+    elif export_format == 'arrow':
+        _write_arrow(data, filepath)
+    else:
+        _write_ndjson(data, filepath, export_format.partition('_')[2] or None)
+    return filepath
+
 
 class DataCollector:
     """数据收集器"""
     
-    def __init__(self):
-        self.data: list[dict[str, Any]] = []
-        self.columns: list[str] = []
+    def __init__(self, table: Optional[DataTable] = None):
+        # 传入数据表时直接在其上导出，不复制数据
+        self.table = table if table is not None else DataTable()
         self._current_row: dict[str, Any] = {}
     
+    @property
+    def columns(self) -> list[str]:
+        return self.table.columns
+    
     def add_value(self, column: str, value: Any):
         """添加单个值到当前行"""
-        if column not in self.columns:
-            self.columns.append(column)
         self._current_row[column] = value
     
     def add_row(self, row: dict[str, Any]):
         """添加一行数据"""
-        for key in row:
-            if key not in self.columns:
-                self.columns.append(key)
-        self.data.append(row)
+        self.table.append(row)
     
     def commit_row(self):
         """提交当前行"""
         if self._current_row:
-            self.add_row(self._current_row.copy())
+            self.add_row(self._current_row)
             self._current_row = {}
     
     def clear(self):
         """清空数据"""
-        self.data = []
-        self.columns = []
+        self.table.clear()
         self._current_row = {}
     
     def to_dataframe(self) -> pl.DataFrame:
         """转换为Polars DataFrame"""
-        if not self.data:
-            return pl.DataFrame()
-        
-        # 确保所有行都有相同的列
-        normalized_data = []
-        for row in self.data:
-            normalized_row = {col: row.get(col, None) for col in self.columns}
-            normalized_data.append(normalized_row)
-        
-        return pl.DataFrame(normalized_data)
+        return self.table.to_frame()
     
     def to_excel(self, filepath: str) -> str:
-        """导出为Excel文件（带样式）"""
-        df = self.to_dataframe()
-        
+        """导出为Excel文件（带样式），返回实际写入的文件路径"""
         # 确保目录存在
         Path(filepath).parent.mkdir(parents=True, exist_ok=True)
         
         # 导出Excel（带样式）
-        _write_styled_excel(df, filepath)
-        
-        return filepath
+        return _write_styled_excel(self.table, filepath)
     
     def to_csv(self, filepath: str) -> str:
         """导出为CSV文件"""
-        df = self.to_dataframe()
-        
         # 确保目录存在
         Path(filepath).parent.mkdir(parents=True, exist_ok=True)
         
         # 导出CSV
-        df.write_csv(filepath)
+        _write_csv(self.table, filepath)
         
         return filepath
     
+    def to_file(self, filepath: str, export_format: str = 'excel') -> str:
+        """按指定格式导出（见 EXPORT_FORMATS），返回实际写入的文件路径"""
+        # 确保目录存在
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        
+        return write_table(self.table, filepath, export_format)
+    
     @property
     def row_count(self) -> int:
         """获取行数"""
-        return len(self.data)
+        return len(self.table)
     
     @property
     def column_count(self) -> int:
         """获取列数"""
-        return len(self.columns)
+        return len(self.table.columns)
+
+
+def _iter_frames(data: Union[DataTable, pl.DataFrame]) -> Iterator[pl.DataFrame]:
+    if isinstance(data, DataTable):
+        yield from data.iter_frames()
+    else:
+        yield data
+
+
+def _excel_value(value: Any) -> Any:
+    """xlsxwriter 不支持的值（列表、字典等）转为文本"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', errors='replace')
+    return value
+
+
+def _estimate_widths(data: Union[DataTable, pl.DataFrame], columns: list[str]) -> list[int]:
+    """根据表头和前 WIDTH_SAMPLE_ROWS 行估算列宽"""
+    widths = [len(str(column)) for column in columns]
+    sampled = 0
+    for frame in _iter_frames(data):
+        for row in frame.head(WIDTH_SAMPLE_ROWS - sampled).iter_rows():
+            for col_idx, value in enumerate(row):
+                if value is not None:
+                    widths[col_idx] = max(widths[col_idx], len(str(value)))
+        sampled += min(frame.height, WIDTH_SAMPLE_ROWS - sampled)
+        if sampled >= WIDTH_SAMPLE_ROWS:
+            break
+    return [min(width + 4, 50) for width in widths]
+
 
+def _write_styled_excel(data: Union[DataTable, pl.DataFrame], filepath: str) -> str:
+    """写入带样式的Excel文件，返回实际写入的文件路径
 
-def _write_styled_excel(df: pl.DataFrame, filepath: str):
-    """写入带样式的Excel文件"""
+    使用 xlsxwriter 的 constant_memory 模式逐行写入，写完的行立即落盘，
+    内存占用与行数无关；列宽根据前几千行估算，不再对整表做第二遍扫描。
+    超过 Excel 行数上限的数据改为导出同名的 CSV 文件。
+    """
+    columns = data.columns
+    if len(data) > EXCEL_MAX_ROWS:
+        csv_path = str(Path(filepath).with_suffix('.csv'))
+        _write_csv(data, csv_path)
+        return csv_path
+    
     try:
         from xlsxwriter import Workbook
-        
-        # 创建工作簿
-        workbook = Workbook(filepath)
-        worksheet = workbook.add_worksheet('数据')
-        
-        # 定义样式
-        header_format = workbook.add_format({
-            'bold': True,
-            'font_size': 11,
-            'font_color': 'white',
-            'bg_color': '#4472C4',
-            'border': 1,
-            'border_color': '#2F5496',
-            'align': 'center',
-            'valign': 'vcenter',
-            'text_wrap': True,
-        })
-        
-        cell_format = workbook.add_format({
-            'font_size': 10,
-            'border': 1,
-            'border_color': '#D9D9D9',
-            'align': 'left',
-            'valign': 'vcenter',
-        })
-        
-        alt_cell_format = workbook.add_format({
-            'font_size': 10,
-            'border': 1,
-            'border_color': '#D9D9D9',
-            'bg_color': '#F2F2F2',
-            'align': 'left',
-            'valign': 'vcenter',
-        })
+    except ImportError:
+        # 如果没有xlsxwriter，使用polars默认导出
+        (data.to_frame() if isinstance(data, DataTable) else data).write_excel(filepath)
+        return filepath
+    
+    # 创建工作簿（constant_memory：每写完一行就写入临时文件）
+    workbook = Workbook(filepath, {'constant_memory': True, 'nan_inf_to_errors': True})
+    worksheet = workbook.add_worksheet('数据')
+    
+    # 定义样式
+    header_format = workbook.add_format({
+        'bold': True,
+        'font_size': 11,
+        'font_color': 'white',
+        'bg_color': '#4472C4',
+        'border': 1,
+        'border_color': '#2F5496',
+        'align': 'center',
+        'valign': 'vcenter',
+        'text_wrap': True,
+    })
+    
+    cell_format = workbook.add_format({
+        'font_size': 10,
+        'border': 1,
+        'border_color': '#D9D9D9',
+        'align': 'left',
+        'valign': 'vcenter',
+    })
+    
+    alt_cell_format = workbook.add_format({
+        'font_size': 10,
+        'border': 1,
+        'border_color': '#D9D9D9',
+        'bg_color': '#F2F2F2',
+        'align': 'left',
+        'valign': 'vcenter',
+    })
+    
+    try:
+        # 列宽和冻结首行需要在写入数据之前设置
+        for col_idx, width in enumerate(_estimate_widths(data, columns)):
+            worksheet.set_column(col_idx, col_idx, width)
+        worksheet.freeze_panes(1, 0)
         
         # 写入表头
-        columns = df.columns
-        for col_idx, col_name in enumerate(columns):
-            worksheet.write(0, col_idx, col_name, header_format)
-        
-        # 写入数据
-        for row_idx, row in enumerate(df.iter_rows()):
-            row_format = alt_cell_format if row_idx % 2 == 1 else cell_format
-            for col_idx, value in enumerate(row):
-                worksheet.write(row_idx + 1, col_idx, value, row_format)
-        
-        # 自动调整列宽
-        for col_idx, col_name in enumerate(columns):
-            # 计算列宽（取表头和数据中最长的）
-            max_len = len(str(col_name))
-            for row in df.iter_rows():
-                cell_len = len(str(row[col_idx])) if row[col_idx] is not None else 0
-                max_len = max(max_len, cell_len)
-            # 设置列宽（加一些padding）
-            worksheet.set_column(col_idx, col_idx, min(max_len + 4, 50))
-        
-        # 设置行高
         worksheet.set_row(0, 25)  # 表头行高
+        worksheet.write_row(0, 0, columns, header_format)
         
-        # 冻结首行
-        worksheet.freeze_panes(1, 0)
-        
+        # 逐行写入数据
+        row_idx = 1
+        for frame in _iter_frames(data):
+            nested = [i for i, dtype in enumerate(frame.dtypes) if dtype.is_nested() or dtype == pl.Binary]
+            for row in frame.iter_rows():
+                if nested:
+                    row = list(row)
+                    for col_idx in nested:
+                        row[col_idx] = _excel_value(row[col_idx])
+                row_format = alt_cell_format if row_idx % 2 == 0 else cell_format
+                worksheet.write_row(row_idx, 0, row, row_format)
+                row_idx += 1
+    finally:
         workbook.close()
-        
-    except ImportError:
-        # 如果没有xlsxwriter，使用polars默认导出
-        df.write_excel(filepath)
+    
+    return filepath
 
 
 class DataExporter:
@@ -168,8 +333,8 @@ class DataExporter:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
     
-    def export_to_excel(self, data: list[dict], filename: Optional[str] = None) -> str:
-        """导出数据到Excel（带样式）"""
+    def export_to_excel(self, data: Union[DataTable, list[dict]], filename: Optional[str] = None) -> str:
+        """导出数据到Excel（带样式），超过 Excel 行数上限时导出为CSV，返回实际的文件路径"""
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"data_{timestamp}.xlsx"
@@ -180,12 +345,12 @@ class DataExporter:
             # 创建空文件
             pl.DataFrame().write_excel(str(filepath))
         else:
-            df = pl.DataFrame(data)
-            _write_styled_excel(df, str(filepath))
+            table = data if isinstance(data, DataTable) else _to_frame(data)
+            return _write_styled_excel(table, str(filepath))
         
         return str(filepath)
     
-    def export_to_csv(self, data: list[dict], filename: Optional[str] = None) -> str:
+    def export_to_csv(self, data: Union[DataTable, list[dict]], filename: Optional[str] = None) -> str:
         """导出数据到CSV"""
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -197,7 +362,18 @@ class DataExporter:
             # 创建空文件
             pl.DataFrame().write_csv(str(filepath))
         else:
-            df = pl.DataFrame(data)
-            df.write_csv(str(filepath))
+            _write_csv(data, str(filepath))
         
         return str(filepath)
+    
+    def export(self, data: Union[DataTable, list[dict]], export_format: str = 'excel',
+               filename: Optional[str] = None) -> str:
+        """按指定格式导出数据，返回实际写入的文件路径"""
+        if export_format == 'excel':
+            return self.export_to_excel(data, filename)
+        ext = export_extension(export_format)
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"data_{timestamp}{ext}"
+        
+        return write_table(data if data else pl.DataFrame(), str(self.output_dir / filename), export_format)
@@ -0,0 +1,404 @@
+"""增量数据写出 - 执行过程中把提交的数据行持续追加到文件
+
+默认情况下数据在执行结束后才一次性导出，运行中途崩溃或被终止时已采集的数据全部丢失，
+下游也无法在运行期间读取结果。开启增量写出后，执行开始时打开输出文件，
+数据表每追加一批行就写入文件：
+
+- csv：第一次写出时根据已缓冲的行确定表头。为了不只凭第一行确定表头，首次写出最多等到
+  100 行；但距开始超过写出间隔或 fsync 为 row 时立即按已有的行写出，崩溃时不会丢失。
+  之后出现的新列不写入，并在日志中提示被丢弃的列（列会变化时建议用 ndjson）
+- ndjson：每行一个 JSON 对象，列可以随时变化，适合 tail -f 实时读取
+- parquet：输出为目录，每批数据写成一个独立的 Parquet 文件（part-00000.parquet ...），
+  已写完的部分即使进程崩溃也可以读取。已写出的部分不会再改写：之后的批次能转换为之前的
+  列类型时按之前的类型写出，出现新列或类型冲突（如整数列出现字符串）时该部分保留自己的表结构。
+  各部分表结构可能不同，请用 scan_parquet_parts("目录") 读取（按列合并，类型冲突的列
+  放宽为字符串）；列类型没有冲突时也可用 pl.scan_parquet("目录/*.parquet", missing_columns='insert')。
+  为避免产生大量小文件，每个部分至少 1000 行，或距上次写出超过 60 秒
+
+写文件在单独的写出线程中进行，调用方（事件循环中的数据表监听器）只负责复制数据行并放入队列，
+不会因为磁盘 I/O 或 fsync 阻塞执行；写出失败在下一次写入或关闭时抛出。
+
+fsync 策略：
+- none：每批写入后只交给操作系统，由系统决定何时落盘
+- batch：每批写入后调用 fsync
+- row：每一行都立即写入并 fsync（最安全，最慢；parquet 仍按上面的部分大小写出）
+
+开启增量写出的运行结束时不再另外导出，运行结果中的数据文件即为该输出文件
+（parquet 目录打包为同名的 .zip 文件供下载）。
+已写出的行在之后被修改或删除时不会同步到文件，需要最终结果时可在流程末尾使用导出数据表节点。
+"""
+import csv
+import json
+import os
+import queue
+import threading
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping, Optional
+from uuid import uuid4
+
+import polars as pl
+
+# 支持的增量写出格式及对应的文件扩展名（parquet 为目录）
+SINK_FORMATS = {
+    'csv': '.csv',
+    'ndjson': '.ndjson',
+    'parquet': '.parquet',
+}
+FSYNC_POLICIES = ('none', 'batch', 'row')
+
+# 每批写出的行数
+DEFAULT_BATCH_ROWS = 100
+# 距上次写出超过该秒数时，新到的行立即写出
+DEFAULT_FLUSH_INTERVAL = 1.0
+# csv 首次写出前最多缓冲的行数（用这些行确定表头）
+CSV_HEADER_ROWS = 100
+# parquet 每个部分的最少行数和最短写出间隔
+PARQUET_MIN_PART_ROWS = 1000
+PARQUET_FLUSH_INTERVAL = 60.0
+
+# 未指定输出路径时的默认目录
+SINK_DIR = Path(__file__).parent.parent.parent / "data" / "stream"
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+def _common_type(a: pl.DataType, b: pl.DataType) -> pl.DataType:
+    """两个列类型的公共类型：空列取另一方，数值取整数/浮点，其余冲突放宽为字符串"""
+    if a == b or b == pl.Null:
+        return a
+    if a == pl.Null:
+        return b
+    if a.is_numeric() and b.is_numeric():
+        return pl.Float64 if a.is_float() or b.is_float() else pl.Int64
+    return pl.String
+
+
+def _cast_series(series: pl.Series, dtype: pl.DataType) -> pl.Series:
+    if series.dtype == dtype:
+        return series
+    if dtype == pl.String and series.dtype.is_nested():
+        return pl.Series(series.name, [None if v is None else json.dumps(v, ensure_ascii=False, default=str)
+                                       for v in series.to_list()], dtype=pl.String)
+    return series.cast(dtype)
+
+
+def _conform(frame: pl.DataFrame, schema: dict) -> pl.DataFrame:
+    """按表结构转换列类型，补齐缺少的列并统一列顺序"""
+    return pl.DataFrame([
+        _cast_series(frame[name], dtype) if name in frame.columns
+        else pl.Series(name, [None] * frame.height, dtype=dtype)
+        for name, dtype in schema.items()
+    ])
+
+
+def _merge_schema(schema: dict, other: Mapping[str, pl.DataType]) -> dict:
+    """合并两个表结构：新列追加在后面，同名列取公共类型"""
+    merged = dict(schema)
+    for name, dtype in other.items():
+        merged[name] = _common_type(merged[name], dtype) if name in merged else dtype
+    return merged
+
+
+def _part_paths(path: str) -> list[Path]:
+    return sorted(Path(path).glob('part-*.parquet'))
+
+
+def scan_parquet_parts(path: str) -> pl.LazyFrame:
+    """读取增量写出的 parquet 目录：按列名合并各部分，缺少的列补空值，类型不同的列转换为公共类型"""
+    parts = _part_paths(path)
+    if not parts:
+        return pl.LazyFrame()
+    part_schemas = [dict(pl.read_parquet_schema(part_path)) for part_path in parts]
+    schema: dict = {}
+    for part_schema in part_schemas:
+        schema = _merge_schema(schema, part_schema)
+    frames = []
+    for part_path, part_schema in zip(parts, part_schemas):
+        if any(dtype.is_nested() and schema[name] == pl.String for name, dtype in part_schema.items()):
+            # 列表/对象列与字符串列冲突时转为 JSON 文本，cast 不支持，需要读入后逐个转换
+            frames.append(_conform(pl.read_parquet(part_path), schema).lazy())
+        else:
+            frames.append(pl.scan_parquet(part_path).with_columns(
+                pl.col(name).cast(schema[name]) for name, dtype in part_schema.items() if dtype != schema[name]
+            ))
+    return pl.concat(frames, how='diagonal').select(list(schema))
+
+
+# 写出线程的控制消息
+_CLOSE = object()
+
+
+class DataSink:
+    """增量写出器基类：数据行经队列交给写出线程，由写出线程缓冲并按批次写入文件"""
+
+    format = ''
+
+    def __init__(self, path: str, fsync: str = 'batch', batch_rows: int = DEFAULT_BATCH_ROWS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 on_warning: Optional[Callable[[str], None]] = None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"不支持的 fsync 策略: {fsync}，可选: {', '.join(FSYNC_POLICIES)}")
+        self.path = str(path)
+        self.fsync = fsync
+        self.batch_rows = 1 if fsync == 'row' else max(1, batch_rows)
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self.on_warning = on_warning
+        # 以下状态只在写出线程中访问
+        self._buffer: list[dict] = []
+        self._last_flush = time.monotonic()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[Exception] = None
+        self._closed = False
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, rows: Iterable[Mapping[str, Any]]):
+        """把数据行交给写出线程，达到批次大小或距上次写出超过间隔时写入文件"""
+        if self._closed:
+            return
+        self._raise_error()
+        # 调用方之后可能继续修改传入的字典，这里复制一份
+        self._submit([dict(row) for row in rows])
+
+    def flush(self):
+        """等待写出线程把已提交的行全部写入文件"""
+        if self._closed:
+            return
+        done = threading.Event()
+        self._submit(done)
+        done.wait()
+        self._raise_error()
+
+    def close(self):
+        """写出剩余的行并关闭文件（会等待写出线程结束，事件循环中请放到线程池调用）"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is None:
+            self._close()
+        else:
+            self._queue.put(_CLOSE)
+            self._thread.join()
+        self._raise_error()
+
+    def _submit(self, item):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"DataSink-{Path(self.path).name}", daemon=True)
+            self._thread.start()
+        self._queue.put(item)
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        """写出线程：从队列取数据行写入文件，没有新行时也按间隔写出缓冲的行"""
+        while True:
+            timeout = None
+            if self._buffer:
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - self._last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if isinstance(item, list):
+                # 出错后不再写入，错误留给调用方在下一次写入或关闭时抛出
+                if self._error is not None:
+                    continue
+                self._buffer.extend(item)
+                if not self._ready():
+                    continue
+            if self._error is None:
+                try:
+                    self._flush()
+                except Exception as e:
+                    self._error = e
+                    self._buffer = []
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _CLOSE:
+                try:
+                    self._close()
+                except Exception as e:
+                    self._error = self._error or e
+                return
+
+    def _ready(self) -> bool:
+        return (len(self._buffer) >= self.batch_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval)
+
+    def _flush(self):
+        if self._buffer:
+            rows, self._buffer = self._buffer, []
+            self._write_batch(rows)
+            self.rows_written += len(rows)
+        self._last_flush = time.monotonic()
+
+    @property
+    def data_file(self) -> str:
+        """运行结果中供下载的数据文件"""
+        return self.path
+
+    def _warn(self, message: str):
+        # 在写出线程中调用，on_warning 需要自行切换到所属的线程或事件循环
+        if self.on_warning:
+            self.on_warning(message)
+        else:
+            print(f"[DataSink] {message}")
+
+    def _write_batch(self, rows: list[dict]):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class _TextSink(DataSink):
+    """逐行追加的文本文件"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._file = open(self.path, 'a', encoding='utf-8', newline='')
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync != 'none':
+            os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._file.close()
+
+
+class CsvSink(_TextSink):
+    format = 'csv'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._writer: Optional[csv.DictWriter] = None
+        self._dropped: set[str] = set()
+        if self._file.tell() > 0:
+            # 追加到已有文件时沿用其表头
+            with open(self.path, 'r', encoding='utf-8', newline='') as f:
+                header = next(csv.reader(f), None)
+            if header:
+                self._writer = csv.DictWriter(self._file, fieldnames=header, extrasaction='ignore')
+
+    def _ready(self) -> bool:
+        # 表头确定之前不按批次大小写出，尽量多攒一些样本；fsync=row 时每行都要立即落盘，
+        # 距上次写出超过间隔时也按已缓冲的行确定表头并写出
+        if self._writer is None and self.fsync != 'row' and len(self._buffer) < CSV_HEADER_ROWS:
+            return time.monotonic() - self._last_flush >= self.flush_interval
+        return super()._ready()
+
+    def _write_batch(self, rows: list[dict]):
+        if self._writer is None:
+            columns: dict[str, None] = {}
+            for row in rows:
+                columns.update(dict.fromkeys(row))
+            self._writer = csv.DictWriter(self._file, fieldnames=list(columns), extrasaction='ignore')
+            if self._file.tell() == 0:
+                self._writer.writeheader()
+        fieldnames = set(self._writer.fieldnames)
+        dropped = {k for row in rows for k in row if k not in fieldnames} - self._dropped
+        if dropped:
+            self._dropped |= dropped
+            self._warn(f"CSV 表头确定后出现的列不会写入 {self.path}: {', '.join(sorted(dropped))}"
+                       f"（列会变化时请使用 ndjson 或 parquet）")
+        self._writer.writerows({k: _json_value(v) for k, v in row.items()} for row in rows)
+        self._sync()
+
+
+class NdjsonSink(_TextSink):
+    format = 'ndjson'
+
+    def _write_batch(self, rows: list[dict]):
+        self._file.write(''.join(json.dumps(row, ensure_ascii=False, default=str) + '\n' for row in rows))
+        self._sync()
+
+
+class ParquetSink(DataSink):
+    """每批写成目录中的一个 Parquet 文件，已写出的部分不再改写"""
+    format = 'parquet'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 每批一个文件，批次太小会产生大量小文件
+        self.batch_rows = max(self.batch_rows, PARQUET_MIN_PART_ROWS)
+        self.flush_interval = max(self.flush_interval, PARQUET_FLUSH_INTERVAL)
+        Path(self.path).mkdir(parents=True, exist_ok=True)
+        parts = _part_paths(self.path)
+        self._part = len(parts)
+        # 已写出各部分合并后的列类型，之后的批次尽量转换为这些类型
+        self._schema: dict = {}
+        for part_path in parts:
+            self._schema = _merge_schema(self._schema, pl.read_parquet_schema(part_path))
+
+    @property
+    def data_file(self) -> str:
+        return self.path + '.zip'
+
+    def _write_part(self, frame: pl.DataFrame, part_path: Path):
+        # 先写临时文件再改名，读取方不会看到写了一半的文件
+        tmp_path = part_path.with_suffix('.parquet.tmp')
+        frame.write_parquet(tmp_path, compression='zstd')
+        if self.fsync != 'none':
+            with open(tmp_path, 'rb') as f:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, part_path)
+
+    def _write_batch(self, rows: list[dict]):
+        from app.services.data_table import DataTable
+        frame = DataTable(rows, spill_rows=0, spill_bytes=0).to_frame()
+        columns = []
+        changed = []
+        for name, dtype in frame.schema.items():
+            known = self._schema.get(name)
+            if known is not None and _common_type(known, dtype) == known:
+                columns.append(_cast_series(frame[name], known))
+            else:
+                # 新列或与之前的类型冲突：该部分保留自己的类型，由读取方合并
+                columns.append(frame[name])
+                if known is not None and known != pl.Null:
+                    changed.append(name)
+        if changed:
+            self._warn(f"Parquet 第 {self._part} 部分的列类型与之前不同: {', '.join(changed)}，"
+                       f"请用 scan_parquet_parts 读取 {self.path}")
+        self._schema = _merge_schema(self._schema, frame.schema)
+        self._write_part(pl.DataFrame(columns), Path(self.path) / f"part-{self._part:05d}.parquet")
+        self._part += 1
+
+    def _close(self):
+        # 目录无法直接下载，打包为 zip（parquet 已压缩，只存储不再压缩）
+        with zipfile.ZipFile(self.data_file, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for part_path in _part_paths(self.path):
+                archive.write(part_path, f"{Path(self.path).name}/{part_path.name}")
+
+
+_SINK_CLASSES = {
+    'csv': CsvSink,
+    'ndjson': NdjsonSink,
+    'parquet': ParquetSink,
+}
+
+
+def open_sink(sink_format: str, path: Optional[str] = None, fsync: str = 'batch',
+              batch_rows: int = DEFAULT_BATCH_ROWS,
+              flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+              on_warning: Optional[Callable[[str], None]] = None) -> DataSink:
+    """打开增量写出器，未指定路径时写入 data/stream 目录"""
+    sink_class = _SINK_CLASSES.get(sink_format)
+    if sink_class is None:
+        raise ValueError(f"不支持的增量写出格式: {sink_format}，可选: {', '.join(SINK_FORMATS)}")
+    if not path:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = str(SINK_DIR / f"data_{timestamp}_{uuid4().hex[:6]}{SINK_FORMATS[sink_format]}")
+    return sink_class(path, fsync=fsync, batch_rows=batch_rows, flush_interval=flush_interval,
+                      on_warning=on_warning)
@@ -0,0 +1,660 @@
+"""数据表格 - 按列存储、分块冻结、可溢出到磁盘的执行数据表
+
+执行过程中收集的数据行原先以字典列表保存，导出时还要再规范化成一份字典列表
+才能构建 DataFrame，百万行的数据在导出时同时存在三份完整拷贝。
+DataTable 按列追加：新行的各列值追加到当前块的列缓冲区中，缓冲区满
+CHUNK_ROWS 行后冻结为 Polars DataFrame（Arrow 列式内存），后续出现的新列
+只影响之后的块，拼接时自动补空。导出、预览和数据表格节点直接在其上操作。
+
+内存中冻结块的行数或字节数超过溢出阈值后，最早的块写入磁盘上的 Arrow IPC
+分段文件（SPILL_DIR 下），内存中只保留最近的一段数据，长时间运行的采集
+不会无限占用内存。读取、修改和导出对溢出的块同样有效；分段文件在不再被
+任何数据表引用时自动删除。
+
+冻结不能改变数据：一列的值能用 Polars 原生类型无损表示时按原生类型保存；
+类型混杂（如 1 和 "a"、True 和 2）、字典键不一致等情况下，该列在整个表中改为
+JSON 文本保存并记录在表的列元数据中，读取行和单元格时还原为原来的值，
+导出为列式格式时按文本写出（字符串原样，其他值为 JSON）。
+
+为了兼容现有代码，DataTable 提供与列表相似的接口（len、索引、切片、迭代、
+append、extend、pop、clear），读取的行是新建的字典，修改单元格需调用 set_cell。
+"""
+import bisect
+import json
+import os
+import shutil
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional, Union
+from uuid import uuid4
+
+import polars as pl
+
+# 每个冻结块的行数
+CHUNK_ROWS = 10000
+# 内存中冻结块超过该行数后溢出到磁盘（0 表示不限制）
+DEFAULT_SPILL_ROWS = 200000
+# 内存中冻结块超过该字节数后溢出到磁盘（0 表示不限制）
+DEFAULT_SPILL_BYTES = 256 * 1024 * 1024
+
+# 溢出分段文件目录
+SPILL_DIR = Path(__file__).parent.parent.parent / "data" / "spill"
+
+
+# Polars 原生类型可以无损表示的标量类型，只含其中一种类型的列不必逐个校验
+_NATIVE_SCALARS = (str, int, float, bool)
+
+
+def _identical(a: Any, b: Any) -> bool:
+    """值和类型都相同（True 与 1 不同，字典键集合必须一致）"""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_identical(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(map(_identical, a, b))
+    return a == b or (a != a and b != b)  # NaN
+
+
+def _json_dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _json_series(name: str, values: Iterable[Any]) -> pl.Series:
+    return pl.Series(name, [None if v is None else _json_dumps(v) for v in values], dtype=pl.String)
+
+
+def _to_series(name: str, values: list, as_json: bool = False) -> tuple[pl.Series, bool]:
+    """把一列 Python 值转换为 Series，返回 (Series, 是否按 JSON 文本保存)
+
+    只有能无损还原时才使用原生类型，否则（或 as_json=True 时）按 JSON 文本保存。
+    """
+    if not as_json:
+        kinds = {type(v) for v in values if v is not None}
+        if len(kinds) <= 1:
+            try:
+                series = pl.Series(name, values, strict=True)
+                if series.dtype != pl.Object and (
+                        not kinds or kinds.pop() in _NATIVE_SCALARS
+                        or all(map(_identical, series.to_list(), values))):
+                    return series, False
+            except Exception:
+                pass
+    return _json_series(name, values), True
+
+
+def _decode(text: Optional[str]) -> Any:
+    return None if text is None else json.loads(text)
+
+
+def _display_text(text: str) -> str:
+    """JSON 文本 -> 导出时显示的文本（字符串原样，其他值保持 JSON）"""
+    return json.loads(text) if text.startswith('"') else text
+
+
+def _display_columns(frame: Union[pl.DataFrame, pl.LazyFrame], columns: Iterable[str]):
+    """把 JSON 编码的列转换为显示文本"""
+    present = set(frame.collect_schema().names())
+    exprs = [pl.col(name).map_elements(_display_text, return_dtype=pl.String, skip_nulls=True)
+             for name in columns if name in present]
+    return frame.with_columns(exprs) if exprs else frame
+
+
+# 当前进程中各分段文件的引用数，降为 0 时删除文件
+_spill_refs: dict[str, int] = {}
+_spill_lock = threading.Lock()
+
+
+def _acquire_spill_file(path: str):
+    with _spill_lock:
+        _spill_refs[path] = _spill_refs.get(path, 0) + 1
+
+
+def _release_spill_file(path: str):
+    with _spill_lock:
+        count = _spill_refs.get(path)
+        if count is None:
+            # 已移交给其他进程
+            return
+        if count > 1:
+            _spill_refs[path] = count - 1
+            return
+        del _spill_refs[path]
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _release_spill_files(paths: list[str]):
+    for path in paths:
+        _release_spill_file(path)
+
+
+def cleanup_spill_dir():
+    """删除上次进程遗留的分段文件（应用启动时调用）"""
+    if SPILL_DIR.exists():
+        shutil.rmtree(SPILL_DIR, ignore_errors=True)
+
+
+class SpilledChunk:
+    """写入磁盘的冻结块
+
+    分段文件按引用计数共享：同一进程中引用该文件的对象（包括 pickle 得到的副本）
+    全部回收后才删除文件。跨进程发送时由发送方调用 disown() 把文件交给接收方。
+    """
+
+    def __init__(self, frame: pl.DataFrame):
+        SPILL_DIR.mkdir(parents=True, exist_ok=True)
+        self.path = str(SPILL_DIR / f"{uuid4().hex}.arrow")
+        frame.write_ipc(self.path, compression='lz4')
+        self.height = frame.height
+        self.columns = list(frame.columns)
+        self.schema = dict(frame.schema)
+        _acquire_spill_file(self.path)
+
+    def load(self) -> pl.DataFrame:
+        return pl.read_ipc(self.path)
+
+    def scan(self) -> pl.LazyFrame:
+        return pl.scan_ipc(self.path)
+
+    def disown(self):
+        """当前进程不再负责删除分段文件（文件已随数据发送给其他进程）"""
+        with _spill_lock:
+            _spill_refs.pop(self.path, None)
+
+    def __getstate__(self) -> dict:
+        return {'path': self.path, 'height': self.height, 'columns': self.columns, 'schema': self.schema}
+
+    def __setstate__(self, state: dict):
+        self.path = state['path']
+        self.height = state['height']
+        self.columns = state['columns']
+        self.schema = state['schema']
+        _acquire_spill_file(self.path)
+
+    def __del__(self):
+        if hasattr(self, 'path'):
+            _release_spill_file(self.path)
+
+
+Chunk = Union[pl.DataFrame, SpilledChunk]
+
+
+class DataTable:
+    """列式、追加优化的数据表"""
+
+    def __init__(self, rows: Optional[Iterable[Mapping[str, Any]]] = None, chunk_rows: int = CHUNK_ROWS,
+                 spill_rows: int = DEFAULT_SPILL_ROWS, spill_bytes: int = DEFAULT_SPILL_BYTES):
+        self.chunk_rows = max(1, chunk_rows)
+        self.spill_rows = spill_rows
+        self.spill_bytes = spill_bytes
+        self._columns: list[str] = []           # 所有列（按首次出现的顺序）
+        self._column_set: set[str] = set()
+        self._json_columns: set[str] = set()    # 按 JSON 文本保存的列
+        self._dtypes: dict[str, pl.DataType] = {}  # 其他列在冻结块中的类型
+        self._chunks: list[Chunk] = []          # 已冻结的块（内存中或已溢出到磁盘）
+        self._starts: list[int] = []            # 各块第一行的行号
+        self._frozen_rows = 0
+        self._memory_rows = 0                   # 内存中冻结块的行数
+        self._memory_bytes = 0                  # 内存中冻结块的字节数（估算）
+        self._builders: dict[str, list] = {}    # 当前块的列缓冲区
+        self._open_rows = 0
+        self._loaded: Optional[tuple[SpilledChunk, pl.DataFrame]] = None  # 最近读取的溢出块
+        self._listeners: list[Callable[[Iterable[Mapping[str, Any]]], None]] = []  # 追加行时的回调
+        self.version = 0                        # 每次修改递增，用于判断整表快照是否过期
+        if rows is not None:
+            self.extend(rows)
+
+    # ==================== 基本信息 ====================
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self._columns)
+
+    @property
+    def json_columns(self) -> set[str]:
+        """按 JSON 文本保存的列（iter_frames(display=False) 中这些列是 JSON 文本）"""
+        return set(self._json_columns)
+
+    @property
+    def spilled_rows(self) -> int:
+        return sum(chunk.height for chunk in self._chunks if isinstance(chunk, SpilledChunk))
+
+    def __len__(self) -> int:
+        return self._frozen_rows + self._open_rows
+
+    def __repr__(self) -> str:
+        return f"DataTable(rows={len(self)}, spilled={self.spilled_rows}, columns={self._columns})"
+
+    def _add_column(self, column: str):
+        if column not in self._column_set:
+            self._column_set.add(column)
+            self._columns.append(column)
+
+    def configure_spill(self, spill_rows: Optional[int] = None, spill_bytes: Optional[int] = None):
+        """调整溢出阈值（0 表示不限制）"""
+        if spill_rows is not None:
+            self.spill_rows = max(0, spill_rows)
+        if spill_bytes is not None:
+            self.spill_bytes = max(0, spill_bytes)
+        self._maybe_spill()
+
+    def add_listener(self, listener: Callable[[Iterable[Mapping[str, Any]]], None]):
+        """注册追加回调：每次追加行（或合并另一个数据表）时以新增的行调用"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Iterable[Mapping[str, Any]]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    # ==================== 追加 ====================
+
+    def append(self, row: Mapping[str, Any]):
+        """追加一行（新列自动加入表结构）"""
+        builders = self._builders
+        for column in row:
+            if column not in builders:
+                self._add_column(column)
+                builders[column] = [None] * self._open_rows
+        for column, values in builders.items():
+            values.append(row.get(column))
+        self._open_rows += 1
+        self.version += 1
+        if self._open_rows >= self.chunk_rows:
+            self._freeze()
+        for listener in self._listeners:
+            listener((row,))
+
+    def extend(self, rows: Union['DataTable', Iterable[Mapping[str, Any]]]):
+        """追加多行；传入 DataTable 时直接接上它的冻结块，不逐行转换"""
+        if isinstance(rows, DataTable):
+            if rows is self:
+                rows = rows.copy()
+            rows._freeze()
+            for column in rows._columns:
+                self._add_column(column)
+            self._freeze()
+            for chunk in rows._chunks:
+                self._append_chunk(self._adopt(chunk, rows._json_columns))
+            self.version += 1
+            for listener in self._listeners:
+                listener(rows)
+            return
+        for row in rows:
+            self.append(row)
+
+    def _freeze(self):
+        """把当前块的列缓冲区冻结为 DataFrame"""
+        if not self._open_rows:
+            return
+        chunk = self._build_frame(self._builders)
+        self._builders = {}
+        self._open_rows = 0
+        self._append_chunk(chunk)
+
+    # ==================== 列类型 ====================
+
+    def _build_frame(self, data: Mapping[str, list]) -> pl.DataFrame:
+        """由各列的 Python 值构建块，列类型与表中其他块保持一致"""
+        columns = []
+        encoded = set()
+        for name, values in data.items():
+            series, as_json = _to_series(name, values, name in self._json_columns)
+            columns.append(series)
+            if as_json:
+                encoded.add(name)
+        return self._reconcile(pl.DataFrame(columns), encoded)
+
+    def _adopt(self, chunk: Chunk, encoded: set[str]) -> Chunk:
+        """接入另一个数据表的块，按本表的列类型调整（不需要调整时直接共享）"""
+        return self._reconcile(chunk, encoded & set(chunk.columns))
+
+    def _reconcile(self, chunk: Chunk, encoded: set[str]) -> Chunk:
+        """登记块中各列的类型；同一列在不同块中类型不同时改为 JSON 文本保存
+
+        encoded 为块中已经是 JSON 文本的列。需要转换时返回新的块。
+        """
+        convert = []
+        for name, dtype in chunk.schema.items():
+            if name in encoded:
+                if name not in self._json_columns:
+                    self._convert_to_json(name)
+            elif dtype == pl.Null:
+                continue
+            elif name in self._json_columns:
+                convert.append(name)
+            elif self._dtypes.setdefault(name, dtype) != dtype:
+                self._convert_to_json(name)
+                convert.append(name)
+        if not convert:
+            return chunk
+        frame = self._frame(chunk)
+        return frame.with_columns(_json_series(name, frame[name].to_list()) for name in convert)
+
+    def _convert_to_json(self, column: str):
+        """把一列改为 JSON 文本保存，已冻结的块随之改写"""
+        self._json_columns.add(column)
+        self._dtypes.pop(column, None)
+        changed = False
+        for index, chunk in enumerate(self._chunks):
+            dtype = chunk.schema.get(column)
+            if dtype is None or dtype == pl.Null:
+                continue
+            frame = self._frame(chunk)
+            frame = frame.with_columns(_json_series(column, frame[column].to_list()))
+            if isinstance(chunk, SpilledChunk):
+                self._loaded = None
+                frame = SpilledChunk(frame)
+            self._chunks[index] = frame
+            changed = True
+        if changed:
+            self._reindex()
+
+    def _decode_row(self, row: dict[str, Any]) -> dict[str, Any]:
+        for column in self._json_columns:
+            value = row.get(column)
+            if value is not None:
+                row[column] = json.loads(value)
+        return row
+
+    def _append_chunk(self, chunk: Chunk):
+        if chunk.height == 0:
+            return
+        self._starts.append(self._frozen_rows)
+        self._chunks.append(chunk)
+        self._frozen_rows += chunk.height
+        if isinstance(chunk, pl.DataFrame):
+            self._memory_rows += chunk.height
+            self._memory_bytes += chunk.estimated_size()
+            self._maybe_spill()
+
+    def _over_threshold(self) -> bool:
+        return ((self.spill_rows > 0 and self._memory_rows > self.spill_rows)
+                or (self.spill_bytes > 0 and self._memory_bytes > self.spill_bytes))
+
+    def _maybe_spill(self):
+        """内存中的冻结块超过阈值时，从最早的块开始写入磁盘（始终保留最新的一块）"""
+        if not self._over_threshold():
+            return
+        in_memory = [i for i, chunk in enumerate(self._chunks) if isinstance(chunk, pl.DataFrame)]
+        for index in in_memory[:-1]:
+            if not self._over_threshold():
+                break
+            self._spill_chunk(index)
+
+    def _spill_chunk(self, index: int):
+        chunk = self._chunks[index]
+        self._chunks[index] = SpilledChunk(chunk)
+        self._memory_rows -= chunk.height
+        self._memory_bytes -= chunk.estimated_size()
+
+    def spill_all(self):
+        """把所有数据写入磁盘（运行结束后保留结果但不占用内存）"""
+        self._freeze()
+        for index, chunk in enumerate(self._chunks):
+            if isinstance(chunk, pl.DataFrame):
+                self._spill_chunk(index)
+        self._memory_rows = 0
+        self._memory_bytes = 0
+        self._loaded = None
+
+    def _reindex(self):
+        """块被修改后重新计算各块的起始行号和内存占用"""
+        self._chunks = [chunk for chunk in self._chunks if chunk.height > 0]
+        self._starts = []
+        total = 0
+        self._memory_rows = 0
+        self._memory_bytes = 0
+        for chunk in self._chunks:
+            self._starts.append(total)
+            total += chunk.height
+            if isinstance(chunk, pl.DataFrame):
+                self._memory_rows += chunk.height
+                self._memory_bytes += chunk.estimated_size()
+        self._frozen_rows = total
+        self._maybe_spill()
+
+    # ==================== 读取 ====================
+
+    def _frame(self, chunk: Chunk) -> pl.DataFrame:
+        """取得块的 DataFrame（溢出的块从磁盘读取，缓存最近一块）"""
+        if isinstance(chunk, pl.DataFrame):
+            return chunk
+        if self._loaded is None or self._loaded[0] is not chunk:
+            self._loaded = (chunk, chunk.load())
+        return self._loaded[1]
+
+    def _conform(self, frame: pl.DataFrame, columns: Optional[list[str]] = None) -> pl.DataFrame:
+        """补齐缺少的列并按表结构排列"""
+        columns = self._columns if columns is None else columns
+        missing = [column for column in columns if column not in frame.columns]
+        if missing:
+            frame = frame.with_columns(pl.lit(None).alias(column) for column in missing)
+        return frame.select(columns)
+
+    def _normalize_index(self, index: int) -> int:
+        length = len(self)
+        if index < 0:
+            index += length
+        if index < 0 or index >= length:
+            raise IndexError(f"行索引 {index} 超出范围")
+        return index
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        """行号 -> (块序号, 块内行号)，块序号为 -1 表示在当前未冻结的块中"""
+        if index >= self._frozen_rows:
+            return -1, index - self._frozen_rows
+        chunk_index = bisect.bisect_right(self._starts, index) - 1
+        return chunk_index, index - self._starts[chunk_index]
+
+    def row(self, index: int) -> dict[str, Any]:
+        """读取一行（返回新字典，包含所有列）"""
+        chunk_index, local = self._locate(self._normalize_index(index))
+        if chunk_index < 0:
+            builders = self._builders
+            return {column: (builders[column][local] if column in builders else None)
+                    for column in self._columns}
+        values = self._frame(self._chunks[chunk_index]).row(local, named=True)
+        return self._decode_row({column: values.get(column) for column in self._columns})
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self.row(i) for i in range(start, stop, step)]
+            return self.rows(start, stop)
+        return self.row(index)
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> list[dict[str, Any]]:
+        """读取连续的多行"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return []
+        result: list[dict[str, Any]] = []
+        columns = self._columns
+        for chunk, chunk_start in zip(self._chunks, self._starts):
+            chunk_stop = chunk_start + chunk.height
+            if chunk_stop <= start or chunk_start >= stop:
+                continue
+            lo, hi = max(start, chunk_start) - chunk_start, min(stop, chunk_stop) - chunk_start
+            for values in self._frame(chunk).slice(lo, hi - lo).iter_rows(named=True):
+                row = {column: values.get(column) for column in columns}
+                result.append(self._decode_row(row) if self._json_columns else row)
+        if stop > self._frozen_rows:
+            builders = self._builders
+            for local in range(max(start, self._frozen_rows) - self._frozen_rows, stop - self._frozen_rows):
+                result.append({column: (builders[column][local] if column in builders else None)
+                               for column in columns})
+        return result
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for start in range(0, len(self), self.chunk_rows):
+            yield from self.rows(start, start + self.chunk_rows)
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        return self.rows()
+
+    def iter_frames(self, display: bool = True) -> Iterator[pl.DataFrame]:
+        """逐块产出 DataFrame（列已按表结构补齐），导出大表时内存中只有一块
+
+        调用时即取得块列表和列的快照，之后对表的追加不影响遍历，可以在其他线程中逐块读取。
+        JSON 编码的列默认转换为显示文本，display=False 时保留 JSON 文本（见 json_columns）。
+        """
+        # 不能放进下面的生成器：生成器第一次取值可能发生在其他线程
+        self._freeze()
+        chunks, columns = list(self._chunks), list(self._columns)
+        json_columns = list(self._json_columns) if display else []
+
+        def frames() -> Iterator[pl.DataFrame]:
+            for chunk in chunks:
+                frame = chunk.load() if isinstance(chunk, SpilledChunk) else chunk
+                yield _display_columns(self._conform(frame, columns), json_columns)
+
+        return frames()
+
+    def to_lazy(self) -> pl.LazyFrame:
+        """整表的 LazyFrame（溢出的块按需从磁盘扫描），可用于流式导出"""
+        self._freeze()
+        if not self._chunks:
+            return pl.LazyFrame()
+        parts = [chunk.scan() if isinstance(chunk, SpilledChunk) else chunk.lazy() for chunk in self._chunks]
+        lazy = pl.concat(parts, how='diagonal_relaxed').select(self._columns)
+        lazy = _display_columns(lazy, self._json_columns)
+        # 返回的 LazyFrame 可能比数据表活得更久，由它持有所扫描分段文件的引用
+        paths = [chunk.path for chunk in self._chunks if isinstance(chunk, SpilledChunk)]
+        if paths:
+            for path in paths:
+                _acquire_spill_file(path)
+            weakref.finalize(lazy, _release_spill_files, paths)
+        return lazy
+
+    def to_frame(self) -> pl.DataFrame:
+        """转换为 DataFrame（内存中的块共享内存，不复制数据；溢出的块会被读回内存）"""
+        self._freeze()
+        if not self._chunks:
+            return pl.DataFrame()
+        if any(isinstance(chunk, SpilledChunk) for chunk in self._chunks):
+            return self.to_lazy().collect()
+        if len(self._chunks) > 1:
+            # 拼接结果替换原来的各块，之后再导出不必重复拼接
+            frame = pl.concat(self._chunks, how='diagonal_relaxed')
+            self._chunks = [frame]
+            self._reindex()
+        return _display_columns(self._conform(self._chunks[0]), self._json_columns)
+
+    # ==================== 修改 ====================
+
+    def _thaw_chunk(self, chunk_index: int) -> dict[str, list]:
+        data = self._frame(self._chunks[chunk_index]).to_dict(as_series=False)
+        for column in self._json_columns & data.keys():
+            data[column] = [_decode(v) for v in data[column]]
+        return data
+
+    def _replace_chunk(self, chunk_index: int, frame: pl.DataFrame):
+        """替换一个块，原来已溢出的块改写后仍写回磁盘"""
+        if isinstance(self._chunks[chunk_index], SpilledChunk):
+            self._loaded = None
+            self._chunks[chunk_index] = SpilledChunk(frame) if frame.height else frame
+        else:
+            self._chunks[chunk_index] = frame
+        self._reindex()
+
+    def _refreeze_chunk(self, chunk_index: int, data: dict[str, list]):
+        self._replace_chunk(chunk_index, self._build_frame(data))
+
+    def set_cell(self, index: int, column: str, value: Any):
+        """设置单元格（列不存在时自动添加）"""
+        chunk_index, local = self._locate(self._normalize_index(index))
+        self._add_column(column)
+        self.version += 1
+        if chunk_index < 0:
+            if column not in self._builders:
+                self._builders[column] = [None] * self._open_rows
+            self._builders[column][local] = value
+            return
+        data = self._thaw_chunk(chunk_index)
+        if column not in data:
+            data[column] = [None] * self._chunks[chunk_index].height
+        data[column][local] = value
+        self._refreeze_chunk(chunk_index, data)
+
+    def add_column(self, column: str, default: Any = None):
+        """添加一列，已有行中该列为空的单元格填入默认值"""
+        self._add_column(column)
+        self.version += 1
+        if self._open_rows:
+            values = self._builders.setdefault(column, [None] * self._open_rows)
+            self._builders[column] = [default if v is None else v for v in values]
+        for chunk_index, chunk in enumerate(self._chunks):
+            if column in chunk.columns:
+                data = self._thaw_chunk(chunk_index)
+                data[column] = [default if v is None else v for v in data[column]]
+                self._refreeze_chunk(chunk_index, data)
+            else:
+                series, as_json = _to_series(column, [default] * chunk.height, column in self._json_columns)
+                frame = self._frame(chunk).with_columns(series)
+                encoded = (self._json_columns & set(chunk.columns)) | ({column} if as_json else set())
+                self._replace_chunk(chunk_index, self._reconcile(frame, encoded))
+
+    def pop(self, index: int = -1) -> dict[str, Any]:
+        """删除并返回一行"""
+        index = self._normalize_index(index)
+        row = self.row(index)
+        chunk_index, local = self._locate(index)
+        self.version += 1
+        if chunk_index < 0:
+            for values in self._builders.values():
+                del values[local]
+            self._open_rows -= 1
+        else:
+            frame = self._frame(self._chunks[chunk_index])
+            self._replace_chunk(chunk_index, pl.concat([frame.slice(0, local), frame.slice(local + 1)]))
+        return row
+
+    def clear(self):
+        self._columns = []
+        self._column_set = set()
+        self._json_columns = set()
+        self._dtypes = {}
+        self._chunks = []
+        self._starts = []
+        self._frozen_rows = 0
+        self._memory_rows = 0
+        self._memory_bytes = 0
+        self._builders = {}
+        self._open_rows = 0
+        self._loaded = None
+        self.version += 1
+
+    def copy(self) -> 'DataTable':
+        """复制数据表（冻结块不可变，直接共享）"""
+        table = DataTable(chunk_rows=self.chunk_rows, spill_rows=self.spill_rows, spill_bytes=self.spill_bytes)
+        table._columns = list(self._columns)
+        table._column_set = set(self._column_set)
+        table._json_columns = set(self._json_columns)
+        table._dtypes = dict(self._dtypes)
+        table._chunks = list(self._chunks)
+        table._starts = list(self._starts)
+        table._frozen_rows = self._frozen_rows
+        table._memory_rows = self._memory_rows
+        table._memory_bytes = self._memory_bytes
+        table._builders = {column: list(values) for column, values in self._builders.items()}
+        table._open_rows = self._open_rows
+        table.version = self.version
+        return table
+
+    def disown_files(self):
+        """把分段文件交给接收方：跨进程发送数据表后调用，当前进程不再删除这些文件"""
+        for chunk in self._chunks:
+            if isinstance(chunk, SpilledChunk):
+                chunk.disown()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_loaded'] = None
+        # 回调只在当前进程内有效
+        state['_listeners'] = []
+        return state
@@ -0,0 +1,772 @@
+"""数据库连接池 - 在专用线程中执行阻塞的数据库驱动调用
+
+pymysql、sqlite3 和 duckdb 都是同步驱动，原先查询直接在事件循环中执行，一条 3 秒的查询
+会让所有分支、日志推送和 Socket.IO 心跳一起停顿 3 秒。连接池把每次数据库调用放到池自己的线程中执行，
+事件循环只等待结果：
+
+- 最小/最大连接数：连接时预先建立最小数量的连接，同时执行的调用超过最大连接数时排队等待
+- 健康检查：空闲超过一定时间的连接在取出时先 ping，已断开的连接自动重连
+- 连接丢失：执行中断开的连接会被丢弃，只读查询会在新连接上重试一次
+- 查询超时：超时或执行被停止时在服务器上终止正在执行的语句，连接随后丢弃
+- 流式查询：结果集留在服务器端，按批读取，内存中最多只有一批数据
+- 预处理语句：可选，绑定了参数的语句在每个连接上 PREPARE 一次，之后只发送参数执行
+
+各驱动的游标、结果行、事务和标识符写法不同，由连接池统一（结果行总是字典），
+执行器中的语句只依赖连接池的接口：MySQLPool、SQLitePool（本地文件，WAL 模式）、
+DuckDBPool（本地分析，可直接查询当前运行的数据表和 Parquet 文件）。
+"""
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, closing, nullcontext
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Optional, TypeVar, Union
+from uuid import uuid4
+
+import pymysql
+from pymysql.cursors import DictCursor, SSDictCursor
+
+from .data_table import SPILL_DIR, DataTable
+
+if TYPE_CHECKING:
+    from app.executors.sql_template import BoundSql
+
+T = TypeVar('T')
+
+# SQL 语句：原始文本或绑定了参数的语句
+Statement = Union[str, 'BoundSql']
+
+DEFAULT_MIN_SIZE = 1
+DEFAULT_MAX_SIZE = 5
+# 空闲超过该秒数的连接在取出时先做健康检查
+DEFAULT_HEALTH_CHECK_INTERVAL = 30.0
+# 建立连接的超时（秒）
+DEFAULT_CONNECT_TIMEOUT = 10
+# 每个连接缓存的预处理语句数量
+PREPARED_CACHE_SIZE = 64
+
+# 表示连接已断开的 MySQL 客户端错误码
+# 2006: server has gone away, 2013: lost connection during query, 2055: lost connection at ...
+MYSQL_LOST_CONNECTION_CODES = frozenset({2006, 2013, 2014, 2045, 2055})
+
+# 本地数据库文件为空时使用内存数据库
+MEMORY_DATABASE = ':memory:'
+# SQLite 等待其他连接释放写锁的秒数
+DEFAULT_BUSY_TIMEOUT = 5.0
+# DuckDB 中代表当前运行数据表的视图名
+DATA_TABLE_VIEW = 'data_table'
+DATA_TABLE_PATTERN = re.compile(rf'\b{DATA_TABLE_VIEW}\b', re.IGNORECASE)
+
+
+class DbTimeoutError(Exception):
+    """数据库调用超时"""
+
+
+class DbLease:
+    """借出的连接，同一时间只执行一个调用"""
+
+    def __init__(self, pool: 'DbPool', conn: Any):
+        self.pool = pool
+        self.conn = conn
+        self._pending: Optional[asyncio.Future] = None
+        self._discard = False
+
+    @property
+    def discarded(self) -> bool:
+        """连接是否将被丢弃（超时、被取消或已断开），此时不能再在该连接上执行调用"""
+        return self._discard
+
+    async def run(self, fn: Callable[[Any], T], timeout: Optional[float] = None) -> T:
+        """在池线程中执行 fn(conn)，timeout 为 None 时使用连接池的默认超时，0 表示不限制"""
+        if timeout is None:
+            timeout = self.pool.query_timeout
+        future = asyncio.get_running_loop().run_in_executor(self.pool._executor, fn, self.conn)
+        self._pending = future
+        try:
+            # shield 保证超时只取消等待，不影响仍在线程中执行的调用
+            return await asyncio.wait_for(asyncio.shield(future), timeout or None)
+        except asyncio.TimeoutError:
+            self._discard = True
+            await self.pool._cancel_safely(self.conn)
+            raise DbTimeoutError(f"执行超过 {timeout:g} 秒，已取消") from None
+        except asyncio.CancelledError:
+            # 工作流被停止：通知服务器终止语句，不等待结果
+            self._discard = True
+            self.pool._spawn(self.pool._cancel_safely(self.conn))
+            raise
+        except Exception as e:
+            if self.pool._is_lost(e):
+                self._discard = True
+            raise
+
+    def release(self, discard: bool = False):
+        """归还连接（只能调用一次），discard=True 时关闭连接而不放回池中"""
+        discard = discard or self._discard
+        pending = self._pending
+        if pending is not None and not pending.done():
+            # 线程仍在使用该连接，等调用结束后再丢弃
+            def on_done(future: asyncio.Future):
+                if not future.cancelled():
+                    future.exception()
+                self.pool._release(self.conn, discard=True)
+            pending.add_done_callback(on_done)
+        else:
+            self.pool._release(self.conn, discard=discard)
+
+
+class DbStream:
+    """流式查询结果
+
+    结果集留在服务器端（非缓冲游标），每次读取一批；消费方取完当前批次才读取下一批，
+    内存占用只与批次大小有关。读取期间独占一个连接，读完或关闭后归还，只能遍历一次。
+
+    只有一个连接的池（如 SQLite 内存数据库）若被结果流占住，遍历中执行的其他语句
+    会一直等待连接，因此这种池一次读出全部结果并立即归还连接（rows），再按批返回。
+    """
+
+    def __init__(self, pool: 'DbPool', lease: Optional[DbLease], cursor: Any, batch_size: int,
+                 timeout: Optional[float] = None, rows: Optional[list] = None):
+        self.pool = pool
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.rows_read = 0
+        self._lease = lease
+        self._cursor = cursor
+        self._rows = deque(rows) if rows is not None else None
+        self._lock = asyncio.Lock()
+        self._exhausted = False
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def next_batch(self) -> list:
+        """读取下一批，结果读完或已关闭时返回空列表"""
+        async with self._lock:
+            if self._closed:
+                return []
+            if self._rows is not None:
+                rows = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+                if not rows:
+                    self._exhausted = True
+                    self._finish()
+                self.rows_read += len(rows)
+                return rows
+            cursor, size = self._cursor, self.batch_size
+            try:
+                rows = await self._lease.run(lambda conn: self.pool.fetchmany(cursor, size), self.timeout)
+            except BaseException:
+                self._finish()
+                raise
+            if not rows:
+                self._exhausted = True
+                self._finish()
+                return []
+            self.rows_read += len(rows)
+            return rows
+
+    def _finish(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.pool._streams.discard(self)
+        if self._lease is not None:
+            # 未读完的结果集要读完剩余数据才能复用连接，直接丢弃连接代价更小
+            self._lease.release(discard=not self._exhausted)
+        self._cursor = None
+        self._rows = None
+
+    async def close(self):
+        """停止读取并归还连接"""
+        self._finish()
+
+    # 作为变量值时会随变量表复制，复制后仍指向同一个结果流
+    def __copy__(self) -> 'DbStream':
+        return self
+
+    def __deepcopy__(self, memo: dict) -> 'DbStream':
+        return self
+
+    def __repr__(self) -> str:
+        state = '已结束' if self._closed else '读取中'
+        return f"<流式查询结果 {state}，已读取 {self.rows_read} 行>"
+
+
+class DbPool:
+    """连接池基类，子类实现具体驱动的连接、健康检查和取消操作
+
+    连接只在池的专用线程中使用，线程数等于最大连接数，借出的连接总能立即拿到线程。
+    """
+
+    kind = ''
+    dialect = 'standard'  # 绑定变量时使用的 SQL 方言（见 sql_template）
+    placeholder = '?'     # 驱动的参数占位符
+
+    def __init__(self, min_size: int = DEFAULT_MIN_SIZE, max_size: int = DEFAULT_MAX_SIZE,
+                 query_timeout: Optional[float] = None,
+                 health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL):
+        self.max_size = max(1, max_size)
+        self.min_size = max(0, min(min_size, self.max_size))
+        self.query_timeout = query_timeout or None
+        self.health_check_interval = health_check_interval
+        self._executor = ThreadPoolExecutor(max_workers=self.max_size, thread_name_prefix=f'db-{self.kind}')
+        self._idle: deque = deque()  # (连接, 归还时间)
+        self._slots = asyncio.Semaphore(self.max_size)
+        self._background: set[asyncio.Task] = set()
+        self._streams: set[DbStream] = set()
+        self._closed = False
+
+    # ---- 子类实现（除 _cancel 外都在池线程中调用） ----
+
+    def _connect(self) -> Any:
+        raise NotImplementedError
+
+    def _ping(self, conn: Any):
+        """检查连接是否可用，必要时重连；不可用时抛出异常"""
+
+    def _close_conn(self, conn: Any):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_lost(self, error: BaseException) -> bool:
+        """异常是否表示连接已断开"""
+        return False
+
+    async def _cancel(self, conn: Any):
+        """终止连接上正在执行的语句（在事件循环中调用）"""
+
+    def _streaming_cursor(self, conn: Any) -> Any:
+        """逐行从服务器读取结果的游标"""
+        return conn.cursor()
+
+    def _close_pool(self):
+        """所有空闲连接关闭后释放连接池自身的资源"""
+
+    # ---- 驱动差异（在池线程中调用） ----
+
+    def cursor(self, conn: Any):
+        """游标的上下文管理器，退出时关闭游标"""
+        return closing(conn.cursor())
+
+    def quote_name(self, name: str) -> str:
+        """表名、列名加引号"""
+        return '"' + str(name).replace('"', '""') + '"'
+
+    def execute(self, cursor: Any, statement: Statement) -> int:
+        """在池线程中执行语句，绑定的参数交给驱动转义；返回影响的行数"""
+        if isinstance(statement, str):
+            cursor.execute(statement)
+        elif not statement.params:
+            cursor.execute(statement.text())
+        else:
+            cursor.execute(statement.text(self.placeholder), statement.params)
+        return max(cursor.rowcount, 0)
+
+    def execute_params(self, cursor: Any, sql: str, params: list) -> int:
+        """执行使用本驱动占位符的语句"""
+        cursor.execute(sql, params)
+        return max(cursor.rowcount, 0)
+
+    def executemany(self, cursor: Any, sql: str, rows: list) -> int:
+        cursor.executemany(sql, rows)
+        return max(cursor.rowcount, 0)
+
+    def _dicts(self, cursor: Any, rows: list) -> list[dict]:
+        if not rows or isinstance(rows[0], dict):
+            return list(rows)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in rows]
+
+    def fetchall(self, cursor: Any) -> list[dict]:
+        return self._dicts(cursor, cursor.fetchall())
+
+    def fetchmany(self, cursor: Any, size: int) -> list[dict]:
+        return self._dicts(cursor, cursor.fetchmany(size))
+
+    def fetchone(self, cursor: Any) -> Optional[dict]:
+        row = cursor.fetchone()
+        return None if row is None else self._dicts(cursor, [row])[0]
+
+    def lastrowid(self, cursor: Any) -> Any:
+        return getattr(cursor, 'lastrowid', None)
+
+    def begin(self, conn: Any):
+        conn.execute('BEGIN')
+
+    def commit(self, conn: Any):
+        conn.commit()
+
+    def rollback(self, conn: Any):
+        conn.rollback()
+
+    # ---- 公共接口 ----
+
+    async def _call(self, fn: Callable[..., T], *args) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def open(self):
+        """预先建立连接（至少一个，用于尽早发现连接参数错误）"""
+        results = await asyncio.gather(
+            *(self._call(self._connect) for _ in range(max(1, self.min_size))),
+            return_exceptions=True,
+        )
+        now = time.monotonic()
+        error = None
+        for result in results:
+            if isinstance(result, BaseException):
+                error = error or result
+            else:
+                self._idle.append((result, now))
+        if error is not None:
+            await self.close()
+            raise error
+
+    async def _checkout(self) -> Any:
+        while self._idle:
+            # 后进先出：最近归还的连接最可能仍然有效，多余的连接留在队首自然老化
+            conn, idle_since = self._idle.pop()
+            if time.monotonic() - idle_since < self.health_check_interval:
+                return conn
+            try:
+                await self._call(self._ping, conn)
+                return conn
+            except Exception:
+                await self._call(self._close_conn, conn)
+        return await self._call(self._connect)
+
+    def _release(self, conn: Any, discard: bool = False):
+        self._slots.release()
+        if discard or self._closed:
+            asyncio.get_running_loop().run_in_executor(None, self._close_conn, conn)
+        else:
+            self._idle.append((conn, time.monotonic()))
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _cancel_safely(self, conn: Any):
+        try:
+            await self._cancel(conn)
+        except Exception as e:
+            print(f"取消数据库语句失败: {e}")
+
+    async def lease(self) -> DbLease:
+        """借出一个连接，用完后必须调用 release() 归还"""
+        if self._closed:
+            raise RuntimeError("数据库连接已关闭")
+        if self._slots.locked() and len(self._streams) >= self.max_size:
+            # 所有连接都被未读完的结果流占用，等待只会卡住（通常是在遍历结果流的循环中执行语句）
+            raise RuntimeError(f"连接池的 {self.max_size} 个连接都被未读完的流式查询占用，"
+                               f"请先读完或关闭结果流，或增大最大连接数")
+        await self._slots.acquire()
+        try:
+            return DbLease(self, await self._checkout())
+        except BaseException:
+            self._slots.release()
+            raise
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[DbLease]:
+        """借出一个连接，退出时归还"""
+        lease = await self.lease()
+        try:
+            yield lease
+        finally:
+            lease.release()
+
+    async def run(self, fn: Callable[[Any], T], timeout: Optional[float] = None, retry: bool = False) -> T:
+        """借出一个连接执行 fn(conn)
+
+        retry=True 时执行中连接丢失会在新连接上重试一次，只能用于可以安全重复执行的操作。
+        """
+        attempts = 2 if retry else 1
+        for attempt in range(attempts):
+            async with self.acquire() as lease:
+                try:
+                    return await lease.run(fn, timeout)
+                except Exception as e:
+                    if attempt + 1 >= attempts or not self._is_lost(e):
+                        raise
+
+    async def stream(self, sql: Statement, batch_size: int, timeout: Optional[float] = None) -> DbStream:
+        """执行流式查询，返回按批读取的结果流（占用一个连接直到读完或关闭）"""
+        if self.max_size == 1:
+            def fetch(conn):
+                with self.cursor(conn) as cursor:
+                    self.execute(cursor, sql)
+                    return self.fetchall(cursor)
+
+            rows = await self.run(fetch, timeout)
+            return DbStream(self, None, None, batch_size, timeout, rows=rows)
+
+        lease = await self.lease()
+
+        def start(conn):
+            cursor = self._streaming_cursor(conn)
+            self.execute(cursor, sql)
+            return cursor
+
+        try:
+            cursor = await lease.run(start, timeout)
+        except BaseException:
+            lease.release()
+            raise
+        stream = DbStream(self, lease, cursor, batch_size, timeout)
+        self._streams.add(stream)
+        return stream
+
+    async def close(self):
+        """关闭空闲连接和未读完的结果流；借出中的连接在归还时关闭"""
+        if self._closed:
+            return
+        for stream in list(self._streams):
+            await stream.close()
+        self._closed = True
+        idle = [conn for conn, _ in self._idle]
+        self._idle.clear()
+        for conn in idle:
+            await self._call(self._close_conn, conn)
+        await self._call(self._close_pool)
+        self._executor.shutdown(wait=False)
+
+
+class PreparedCache:
+    """单个连接上已 PREPARE 的语句（LRU）
+
+    服务器端的预处理语句属于连接会话，连接重连后全部失效，因此同时记录会话 ID。
+    """
+
+    def __init__(self, session_id: int, size: int = PREPARED_CACHE_SIZE):
+        self.session_id = session_id
+        self.size = size
+        self._names: OrderedDict[str, str] = OrderedDict()
+        self._counter = 0
+
+    def get(self, sql: str) -> Optional[str]:
+        name = self._names.get(sql)
+        if name is not None:
+            self._names.move_to_end(sql)
+        return name
+
+    def add(self, sql: str) -> tuple[str, Optional[str]]:
+        """登记新语句，返回 (语句名, 被淘汰的语句名)"""
+        self._counter += 1
+        name = f"webrpa_stmt_{self._counter}"
+        self._names[sql] = name
+        evicted = None
+        if len(self._names) > self.size:
+            evicted = self._names.popitem(last=False)[1]
+        return name, evicted
+
+    def discard(self, sql: str):
+        self._names.pop(sql, None)
+
+
+class MySQLPool(DbPool):
+    """MySQL 连接池（pymysql）
+
+    pymysql 只支持文本协议，预处理语句通过 SQL 层的 PREPARE / EXECUTE ... USING 实现：
+    参数先用一条 SET 语句写入会话变量，每次执行比直接执行多一次往返，
+    适合在循环中反复执行同一条较复杂的语句，因此默认关闭。
+    """
+
+    kind = 'mysql'
+    dialect = 'mysql'
+    placeholder = '%s'
+
+    def __init__(self, host: str, port: int, user: str, password: str, database: Optional[str] = None,
+                 charset: str = 'utf8mb4', connect_timeout: int = DEFAULT_CONNECT_TIMEOUT,
+                 prepared_statements: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.prepared_statements = prepared_statements
+        self._prepared: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._prepared_lock = threading.Lock()
+        self.connect_args = dict(
+            host=host,
+            port=port,
+            user=user,
+            password=password,
+            database=database or None,
+            charset=charset,
+            cursorclass=DictCursor,
+            autocommit=True,
+            connect_timeout=connect_timeout,
+        )
+
+    def _connect(self):
+        return pymysql.connect(**self.connect_args)
+
+    def _ping(self, conn):
+        conn.ping(reconnect=True)
+
+    def _streaming_cursor(self, conn):
+        return conn.cursor(SSDictCursor)
+
+    def quote_name(self, name: str) -> str:
+        return '`' + str(name).replace('`', '``') + '`'
+
+    # pymysql 的 execute/executemany 直接返回影响的行数（SELECT 时为结果行数）
+    def execute(self, cursor, statement: Statement) -> int:
+        if isinstance(statement, str):
+            return cursor.execute(statement)
+        if not statement.params:
+            return cursor.execute(statement.text())
+        if self.prepared_statements:
+            return self._execute_prepared(cursor, statement)
+        return cursor.execute(statement.text(self.placeholder), statement.params)
+
+    def execute_params(self, cursor, sql: str, params: list) -> int:
+        return cursor.execute(sql, params)
+
+    def executemany(self, cursor, sql: str, rows: list) -> int:
+        return cursor.executemany(sql, rows) or 0
+
+    def begin(self, conn):
+        conn.begin()
+
+    def _prepared_cache(self, conn) -> PreparedCache:
+        session_id = conn.thread_id()
+        with self._prepared_lock:
+            cache = self._prepared.get(conn)
+            if cache is None or cache.session_id != session_id:
+                cache = PreparedCache(session_id)
+                self._prepared[conn] = cache
+            return cache
+
+    def _execute_prepared(self, cursor, statement: 'BoundSql'):
+        cache = self._prepared_cache(cursor.connection)
+        sql = statement.text('?')
+        name = cache.get(sql)
+        if name is None:
+            name, evicted = cache.add(sql)
+            if evicted is not None:
+                cursor.execute(f"DEALLOCATE PREPARE {evicted}")
+            try:
+                cursor.execute(f"PREPARE {name} FROM %s", (sql,))
+            except Exception:
+                cache.discard(sql)
+                raise
+        variables = [f"@{name}_{i}" for i in range(len(statement.params))]
+        cursor.execute("SET " + ", ".join(f"{v} = %s" for v in variables), statement.params)
+        return cursor.execute(f"EXECUTE {name} USING {', '.join(variables)}")
+
+    def _is_lost(self, error: BaseException) -> bool:
+        if isinstance(error, pymysql.err.InterfaceError):
+            return True
+        return (isinstance(error, pymysql.err.OperationalError)
+                and bool(error.args) and error.args[0] in MYSQL_LOST_CONNECTION_CODES)
+
+    async def _cancel(self, conn):
+        thread_id = conn.thread_id()
+
+        def kill_query():
+            # 必须通过另一个连接发送 KILL QUERY，原连接正阻塞在读取结果上
+            killer = pymysql.connect(**self.connect_args)
+            try:
+                with killer.cursor() as cursor:
+                    cursor.execute(f"KILL QUERY {int(thread_id)}")
+            finally:
+                killer.close()
+
+        await asyncio.get_running_loop().run_in_executor(None, kill_query)
+
+
+def _local_path(path: Optional[str]) -> str:
+    """本地数据库文件路径，为空时使用内存数据库，文件所在目录不存在时自动创建"""
+    path = (path or '').strip() or MEMORY_DATABASE
+    if path != MEMORY_DATABASE:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+    return path
+
+
+class SQLitePool(DbPool):
+    """SQLite 连接池
+    
+    文件数据库使用 WAL 日志模式：读取不阻塞写入，多个连接可以并发查询；
+    synchronous=NORMAL 时每次提交只追加日志，不等待数据同步到磁盘，
+    逐条插入（自动提交）的开销大幅降低，批量插入则在一个事务中成批写入。
+    内存数据库属于单个连接，因此只使用一个连接。
+    """
+
+    kind = 'sqlite'
+
+    def __init__(self, path: Optional[str] = None, busy_timeout: float = DEFAULT_BUSY_TIMEOUT, **kwargs):
+        self.path = _local_path(path)
+        if self.path == MEMORY_DATABASE:
+            kwargs['min_size'] = kwargs['max_size'] = 1
+        super().__init__(**kwargs)
+        self.busy_timeout = busy_timeout
+
+    def _connect(self):
+        # isolation_level=None：自动提交，与 MySQL 连接一致，事务由 BEGIN 显式开始
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               check_same_thread=False)
+        if self.path != MEMORY_DATABASE:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    async def _cancel(self, conn):
+        # interrupt 可以在其他线程调用，正在执行的语句以 OperationalError 结束
+        conn.interrupt()
+
+
+class DuckDBPool(DbPool):
+    """DuckDB 连接池（需要安装 duckdb）
+    
+    同一个数据库文件在进程内只能打开一次，池中的连接都由同一个数据库实例派生，
+    共享数据（内存数据库也一样）。DuckDB 是列式分析引擎，适合在本地对采集结果做关联和聚合：
+    语句中出现 data_table 时，它指向当前运行的数据表（执行前写成 Parquet 快照），
+    Parquet 导出文件可以直接用 read_parquet('路径') 查询。
+
+    数据表没有变化时沿用上一次的快照。每个连接的临时视图持有它所指快照的引用，
+    换成新快照后，旧快照要等所有连接都不再使用（视图切换或连接关闭）才删除。
+    """
+
+    kind = 'duckdb'
+
+    def __init__(self, path: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = _local_path(path)
+        self._root = None
+        self._root_lock = threading.Lock()
+        # 当前快照 (数据表的弱引用, 数据表版本, 文件路径)
+        self._snapshot: Optional[tuple[weakref.ref, int, str]] = None
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_refs: dict[str, int] = {}
+        self._views: dict[int, str] = {}  # 连接 id -> 其临时视图指向的快照
+
+    def _connect(self):
+        with self._root_lock:
+            if self._root is None:
+                try:
+                    import duckdb
+                except ImportError:
+                    raise RuntimeError("DuckDB 需要安装 duckdb: pip install duckdb") from None
+                self._root = duckdb.connect(self.path)
+            return self._root.cursor()
+
+    def _close_pool(self):
+        with self._root_lock:
+            if self._root is not None:
+                self._close_conn(self._root)
+                self._root = None
+        with self._snapshot_lock:
+            snapshot, self._snapshot = self._snapshot, None
+        if snapshot:
+            self._unref_snapshot(snapshot[2])
+
+    def _close_conn(self, conn):
+        with self._snapshot_lock:
+            path = self._views.pop(id(conn), None)
+        if path:
+            self._unref_snapshot(path)
+        super()._close_conn(conn)
+
+    async def _cancel(self, conn):
+        conn.interrupt()
+
+    # DuckDB 的连接本身就是游标，conn.cursor() 会派生新连接（不在同一事务中）
+    def cursor(self, conn):
+        return nullcontext(conn)
+
+    def _streaming_cursor(self, conn):
+        return conn
+
+    def execute(self, cursor, statement: Statement) -> int:
+        text = statement if isinstance(statement, str) else statement.text()
+        if self._snapshot and DATA_TABLE_PATTERN.search(text):
+            self._use_snapshot(cursor)
+        if isinstance(statement, str) or not statement.params:
+            cursor.execute(text)
+        else:
+            cursor.execute(statement.text(self.placeholder), statement.params)
+        return self._affected(cursor, text)
+
+    def execute_params(self, cursor, sql: str, params: list) -> int:
+        cursor.execute(sql, params)
+        return self._affected(cursor, sql)
+
+    def executemany(self, cursor, sql: str, rows: list) -> int:
+        cursor.executemany(sql, rows)
+        return len(rows)
+
+    @staticmethod
+    def _affected(cursor, sql: str) -> int:
+        # DuckDB 不提供 rowcount，INSERT/UPDATE/DELETE 的结果是一行影响行数（Count 列）
+        if (re.match(r'\s*(INSERT|UPDATE|DELETE)\b', sql, re.IGNORECASE)
+                and not re.search(r'\bRETURNING\b', sql, re.IGNORECASE)):
+            row = cursor.fetchone()
+            return int(row[0]) if row else 0
+        return 0
+
+    def begin(self, conn):
+        conn.begin()
+
+    async def attach_data_table(self, table: DataTable):
+        """把当前运行的数据表写成 Parquet 快照，之后语句中的 data_table 指向该快照"""
+        if not table.columns:
+            raise ValueError("数据表为空，无法查询 data_table")
+        snapshot = self._snapshot
+        if snapshot and snapshot[0]() is table and snapshot[1] == table.version:
+            return
+        SPILL_DIR.mkdir(parents=True, exist_ok=True)
+        path = str(SPILL_DIR / f"data_table_{uuid4().hex}.parquet")
+        version = table.version
+        lazy = table.to_lazy()  # 在事件循环中取得快照，写文件在池线程中进行
+        await self._call(lazy.sink_parquet, path)
+        with self._snapshot_lock:
+            old, self._snapshot = self._snapshot, (weakref.ref(table), version, path)
+            self._snapshot_refs[path] = 1  # 作为当前快照的引用
+        if old:
+            self._unref_snapshot(old[2])
+
+    def _use_snapshot(self, conn):
+        """让连接的临时视图指向当前快照（临时视图只在当前连接可见）"""
+        with self._snapshot_lock:
+            if self._snapshot is None:
+                return
+            path = self._snapshot[2]
+            old = self._views.get(id(conn))
+            if old == path:
+                return
+            self._snapshot_refs[path] += 1
+            self._views[id(conn)] = path
+        quoted = path.replace("'", "''")
+        conn.execute(f"CREATE OR REPLACE TEMP VIEW {DATA_TABLE_VIEW} AS SELECT * FROM read_parquet('{quoted}')")
+        if old:
+            self._unref_snapshot(old)
+
+    def _unref_snapshot(self, path: str):
+        with self._snapshot_lock:
+            count = self._snapshot_refs.get(path, 0) - 1
+            if count > 0:
+                self._snapshot_refs[path] = count
+                return
+            self._snapshot_refs.pop(path, None)
+        try:
+            os.remove(path)
+        except OSError:
+            # Windows 上文件仍被打开时无法删除，启动时会清理溢出目录
+            pass
+
+
+async def close_pools(pools: dict):
+    """关闭并移除所有连接池"""
+    for pool in list(pools.values()):
+        try:
+            await pool.close()
+        except Exception as e:
+            print(f"关闭数据库连接失败: {e}")
+    pools.clear()
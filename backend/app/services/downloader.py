@@ -0,0 +1,331 @@
+"""文件下载 - 流式写盘、断点续传、分段并行和批量下载
+
+响应体按块读取并通过 aiofiles 在线程中写入磁盘，内存占用与文件大小无关。
+下载过程中先写入 "<文件名>.part"，完成后再改名；再次下载同一文件时
+用 HTTP Range 从已下载的位置继续。大文件在服务器支持 Range 时拆成多段并行下载，
+各段进度记录在 "<文件名>.part.json" 中，中断后同样可以续传。
+
+续传前要确认 .part 与服务器上的文件是同一版本：首次响应的 ETag（或 Last-Modified）
+和下载地址记录在 "<文件名>.part.json" 中，续传和分段请求都带 If-Range；
+服务器上的文件变化时返回完整文件（200），已下载的部分作废。没有记录校验值的 .part
+（服务器不提供校验值，或是其他下载遗留的同名文件）不续传，直接重新下载。
+
+Range 的偏移量按传输的字节计算，因此下载请求一律带 Accept-Encoding: identity，
+并按原始字节（aiter_raw）写盘，文件大小、续传位置和分段进度都与服务器上的文件一致。
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import aiofiles
+
+from app.services.http_client import get_http_manager, RetryPolicy
+
+# 每次读取/写入的块大小
+CHUNK_SIZE = 1024 * 1024
+# 超过该大小且服务器支持 Range 时分段并行下载
+SEGMENT_THRESHOLD = 16 * 1024 * 1024
+# 分段下载时每写入多少字节保存一次进度
+PROGRESS_SAVE_INTERVAL = 8 * 1024 * 1024
+# 连接失败、超时和 429/5xx 的默认重试
+DEFAULT_RETRY = RetryPolicy(retries=3, backoff=1.0)
+
+_CONTENT_RANGE_TOTAL = re.compile(r'/\s*(\d+)\s*$')
+
+
+@dataclass
+class DownloadResult:
+    """一次下载的结果"""
+    path: Path
+    size: int           # 文件总大小（字节）
+    downloaded: int     # 本次实际传输的字节数（续传时小于 size）
+    elapsed: float      # 耗时（秒）
+    resumed: bool = False
+    segments: int = 1
+
+    @property
+    def speed(self) -> float:
+        """本次下载的平均速度（字节/秒）"""
+        return self.downloaded / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def format_size(num_bytes: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024 or unit == 'GB':
+            return f"{num_bytes:.0f}{unit}" if unit == 'B' else f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}GB"
+
+
+def format_speed(bytes_per_second: float) -> str:
+    return f"{format_size(bytes_per_second)}/s"
+
+
+def _part_paths(path: Path) -> tuple[Path, Path]:
+    return path.with_name(path.name + '.part'), path.with_name(path.name + '.part.json')
+
+
+def _total_size(response) -> Optional[int]:
+    """从响应头解析文件总大小"""
+    content_range = response.headers.get('content-range', '')
+    match = _CONTENT_RANGE_TOTAL.search(content_range)
+    if match:
+        return int(match.group(1))
+    length = response.headers.get('content-length')
+    if length and length.isdigit() and response.status_code == 200:
+        return int(length)
+    return None
+
+
+def _encoded(response) -> bool:
+    """服务器忽略 identity 仍然压缩传输时，字节偏移与文件内容对不上"""
+    return response.headers.get('content-encoding', 'identity').lower() not in ('', 'identity')
+
+
+def _finish(part_path: Path, final_path: Path, progress_path: Optional[Path] = None):
+    os.replace(part_path, final_path)
+    if progress_path is not None and progress_path.exists():
+        progress_path.unlink()
+
+
+class _RemoteChanged(Exception):
+    """服务器上的文件与已下载的部分不是同一版本（If-Range 不匹配时返回了 200）"""
+
+
+def _validator(response) -> Optional[str]:
+    """用于 If-Range 的校验值：强 ETag，没有时用 Last-Modified"""
+    etag = response.headers.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('last-modified')
+
+
+def _read_progress(progress_path: Path, url: str) -> Optional[dict]:
+    """读取续传信息，不是本次下载的地址或没有校验值时返回 None"""
+    try:
+        progress = json.loads(progress_path.read_text(encoding='utf-8'))
+    except (ValueError, OSError):
+        return None
+    if not isinstance(progress, dict) or progress.get('url') != url or not progress.get('validator'):
+        return None
+    return progress
+
+
+def _save_progress(progress_path: Path, progress: dict):
+    progress_path.write_text(json.dumps(progress), encoding='utf-8')
+
+
+def _discard_partial(part_path: Path, progress_path: Path):
+    part_path.unlink(missing_ok=True)
+    progress_path.unlink(missing_ok=True)
+
+
+async def download(
+    url: str,
+    path: Path,
+    headers: Optional[dict] = None,
+    resume: bool = True,
+    segments: int = 4,
+    timeout: float = 60,
+    retry: RetryPolicy = DEFAULT_RETRY,
+) -> DownloadResult:
+    """把 url 流式下载到 path
+
+    Args:
+        resume: 存在未完成的 .part 文件时从断点继续下载
+        segments: 大文件分段并行下载的段数（1 表示不分段）
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    part_path, progress_path = _part_paths(path)
+    started = time.monotonic()
+    manager = get_http_manager()
+    request_headers = {**(headers or {}), 'Accept-Encoding': 'identity'}
+
+    progress = None
+    if resume and part_path.exists():
+        progress = _read_progress(progress_path, url)
+        if progress is not None and 'ranges' in progress and segments <= 1:
+            progress = None
+        if progress is None:
+            # 无法确认 .part 与服务器上的文件是同一版本（没有记录校验值或来自其他地址），重新下载
+            _discard_partial(part_path, progress_path)
+
+    # 已有分段进度时直接按分段续传
+    if progress is not None and 'ranges' in progress:
+        try:
+            return await _download_segments(url, path, progress['size'], progress['ranges'], progress['validator'],
+                                             headers, request_headers, timeout, retry, started, resumed=True)
+        except (KeyError, TypeError):
+            _discard_partial(part_path, progress_path)
+            progress = None
+
+    offset = part_path.stat().st_size if progress is not None else 0
+    if offset:
+        # 服务器上的文件已变化时 If-Range 不匹配，服务器返回完整文件（200）
+        request_headers['Range'] = f"bytes={offset}-"
+        request_headers['If-Range'] = progress['validator']
+
+    downloaded = 0
+    async with manager.stream('GET', url, retry=retry, headers=request_headers,
+                              timeout=timeout, follow_redirects=True) as response:
+        if response.status_code == 416 and offset:
+            # 请求的起点超出文件大小：.part 已经是完整文件，否则说明服务器上的文件变了
+            if _total_size(response) == offset:
+                _finish(part_path, path, progress_path)
+                return DownloadResult(path, offset, 0, time.monotonic() - started, resumed=True)
+            restart = True
+        else:
+            restart = False
+            response.raise_for_status()
+
+            resumed = offset > 0 and response.status_code == 206
+            if not resumed:
+                offset = 0
+            encoded = _encoded(response)
+            total = _total_size(response)
+            validator = progress['validator'] if resumed else _validator(response)
+
+            accepts_ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
+            if (not resumed and not encoded and segments > 1 and accepts_ranges
+                    and total and total >= SEGMENT_THRESHOLD):
+                # 大文件：放弃这个连接，改为分段并行下载
+                await response.aclose()
+                step = -(-total // segments)
+                ranges = [[start, min(start + step, total) - 1, 0] for start in range(0, total, step)]
+                return await _download_segments(url, path, total, ranges, validator, headers, request_headers,
+                                                timeout, retry, started)
+
+            if encoded and resumed:
+                # 续传的位置对应不上压缩后的字节，只能重新下载
+                restart = True
+            else:
+                if not resumed:
+                    # 记下校验值，之后续传时确认服务器上仍是同一个文件；没有校验值的下载不续传
+                    if validator and not encoded:
+                        await asyncio.to_thread(_save_progress, progress_path, {'url': url, 'validator': validator})
+                    else:
+                        progress_path.unlink(missing_ok=True)
+                try:
+                    async with aiofiles.open(part_path, 'ab' if resumed else 'wb') as f:
+                        # 压缩传输时写入解压后的内容，这样的 .part 无法续传
+                        chunks = response.aiter_bytes(CHUNK_SIZE) if encoded else response.aiter_raw(CHUNK_SIZE)
+                        async for chunk in chunks:
+                            await f.write(chunk)
+                            downloaded += len(chunk)
+                except BaseException:
+                    if encoded:
+                        part_path.unlink(missing_ok=True)
+                    raise
+
+    if restart:
+        _discard_partial(part_path, progress_path)
+        return await download(url, path, headers, False, segments, timeout, retry)
+
+    _finish(part_path, path, progress_path)
+    return DownloadResult(path, offset + downloaded, downloaded, time.monotonic() - started,
+                          resumed=resumed)
+
+
+async def _download_segments(url: str, path: Path, total: int, ranges: list[list[int]],
+                             validator: Optional[str], headers: Optional[dict], request_headers: dict,
+                             timeout: float, retry: RetryPolicy,
+                             started: float, resumed: bool = False) -> DownloadResult:
+    """分段并行下载：ranges 的每一项为 [起始位置, 结束位置, 已下载字节数]
+
+    validator 为首次响应的校验值，每个分段请求都带 If-Range，服务器上的文件变化时
+    已下载的部分作废并重新下载（headers 为调用方传入的原始请求头）。
+    """
+    part_path, progress_path = _part_paths(path)
+    manager = get_http_manager()
+
+    if not part_path.exists() or part_path.stat().st_size != total:
+        # 预分配文件，各段直接写入各自的位置
+        async with aiofiles.open(part_path, 'wb') as f:
+            await f.truncate(total)
+        for item in ranges:
+            item[2] = 0
+
+    # 各段正在写入的文件
+    open_files = set()
+
+    async def checkpoint():
+        # 先记下进度再刷新所有段的文件，保存的进度不会超过已写入磁盘的数据
+        snapshot = [list(item) for item in ranges]
+        for f in list(open_files):
+            await f.flush()
+        await asyncio.to_thread(_save_progress, progress_path,
+                                {'url': url, 'validator': validator, 'size': total, 'ranges': snapshot})
+
+    await checkpoint()
+    transferred = 0
+
+    async def fetch(item: list[int]):
+        nonlocal transferred
+        start, end, done = item
+        if start + done > end:
+            return
+        segment_headers = {**request_headers, 'Range': f"bytes={start + done}-{end}"}
+        if validator:
+            segment_headers['If-Range'] = validator
+        unsaved = 0
+        async with manager.stream('GET', url, retry=retry, headers=segment_headers,
+                                  timeout=timeout, follow_redirects=True) as response:
+            if response.status_code == 200 and validator:
+                raise _RemoteChanged()
+            if response.status_code != 206:
+                response.raise_for_status()
+                raise RuntimeError(f"服务器不支持分段下载 (HTTP {response.status_code})")
+            if _encoded(response):
+                raise RuntimeError("服务器对分段请求使用了压缩传输，无法分段下载")
+            async with aiofiles.open(part_path, 'r+b') as f:
+                open_files.add(f)
+                try:
+                    await f.seek(start + done)
+                    async for chunk in response.aiter_raw(CHUNK_SIZE):
+                        await f.write(chunk)
+                        item[2] += len(chunk)
+                        transferred += len(chunk)
+                        unsaved += len(chunk)
+                        if unsaved >= PROGRESS_SAVE_INTERVAL:
+                            await checkpoint()
+                            unsaved = 0
+                finally:
+                    open_files.discard(f)
+
+    tasks = [asyncio.create_task(fetch(item)) for item in ranges]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException as e:
+        # 任一段失败时停止其余各段
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if not isinstance(e, _RemoteChanged):
+            # 各段的文件此时都已关闭，保留进度以便下次续传
+            await checkpoint()
+            raise
+        # 服务器上的文件已经变化，已下载的部分作废
+        _discard_partial(part_path, progress_path)
+        return await download(url, path, headers, False, len(ranges), timeout, retry)
+
+    _finish(part_path, path, progress_path)
+    return DownloadResult(path, total, transferred, time.monotonic() - started,
+                          resumed=resumed, segments=len(ranges))
+
+
+async def download_many(items: list[tuple[str, Path]], concurrency: int = 4,
+                        **kwargs) -> list:
+    """并发下载多个文件，返回与 items 对应的 DownloadResult 或异常"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(url: str, path: Path):
+        async with semaphore:
+            return await download(url, path, **kwargs)
+
+    return await asyncio.gather(*(run(url, path) for url, path in items), return_exceptions=True)
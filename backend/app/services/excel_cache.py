@@ -0,0 +1,431 @@
+"""Excel 资源缓存 - 工作簿只解析一次，按列保存在内存中
+
+读取Excel节点和数据资源 API 原先每次调用都重新用 openpyxl / xlrd 解析整个工作簿，
+在循环中逐个读取单元格时，一万次迭代就要解析一万次。这里按 (文件路径, 修改时间)
+缓存解析结果：每个工作表按列保存为 Python 列表，单元格、行、列、范围读取和预览
+都直接从缓存取值。文件被替换（修改时间变化）后自动重新解析。
+缓存按估算的内存占用做 LRU 淘汰，单个超过缓存上限的工作簿不缓存。
+
+上传的工作簿还会在后台转换为列式格式（convert_workbook）：每个工作表保存为
+一个未压缩的 Arrow IPC 文件，存放在 "<文件名>.columns" 目录中。转换完成后
+解析缓存直接从 Arrow 文件加载（可内存映射），不再经过 openpyxl；工作表保持为
+DataFrame（FrameSheetData），读取单元格、行、列和范围时才取出对应的值，
+不会把整张表转换为 Python 列表。
+类型混杂的列（如表头文字 + 数字）按带类型标记的 JSON 文本保存，读取时还原。
+"""
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time
+from typing import Any, Optional, Union
+
+import polars as pl
+
+# 缓存占用的内存上限（估算值）
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+# 估算内存时每个单元格的固定开销（列表槽位 + 对象头）
+_CELL_OVERHEAD = 16
+_VALUE_OVERHEAD = 32
+
+
+def column_index(value: Union[str, int]) -> int:
+    """列字母或列号 -> 列号（从1开始）"""
+    if isinstance(value, str):
+        value = value.strip()
+        if value.isalpha():
+            result = 0
+            for c in value.upper():
+                result = result * 26 + (ord(c) - ord('A') + 1)
+            return result
+    return int(value)
+
+
+def parse_cell_address(address: str) -> tuple[int, int]:
+    """解析单元格地址如 'B3'（允许 $ 绝对引用），返回 (行号, 列号)，从1开始"""
+    address = address.strip().replace('$', '')
+    col_str = ''.join(c for c in address if c.isalpha())
+    row_str = address[len(col_str):]
+    if not col_str or not row_str.isdigit() or address[:len(col_str)] != col_str:
+        raise ValueError(f"无效的单元格地址: {address}")
+    return int(row_str), column_index(col_str)
+
+
+class SheetData:
+    """按列保存的工作表数据"""
+
+    def __init__(self, name: str, rows: list[list[Any]], fill: Any = None):
+        self.name = name
+        self.fill = fill  # 空单元格和超出范围的单元格的值
+        self.nrows = len(rows)
+        self.ncols = max((len(row) for row in rows), default=0)
+        self.columns: list[list[Any]] = [
+            [row[c] if c < len(row) else fill for row in rows] for c in range(self.ncols)
+        ]
+        self.nbytes = self._estimate_bytes()
+
+    def _estimate_bytes(self) -> int:
+        total = 64 * self.ncols
+        for column in self.columns:
+            total += _CELL_OVERHEAD * len(column)
+            for value in column:
+                if value is not None:
+                    total += _VALUE_OVERHEAD + (len(value) if isinstance(value, str) else 0)
+        return total
+
+    def cell(self, row: int, col: int) -> Any:
+        """读取单元格（行号、列号从1开始）"""
+        if 1 <= row <= self.nrows and 1 <= col <= self.ncols:
+            return self.columns[col - 1][row - 1]
+        return self.fill
+
+    def row(self, row: int, start_col: int = 1) -> list[Any]:
+        """读取一行（从 start_col 列到最后一列），超出行数时返回空列表"""
+        if not 1 <= row <= self.nrows:
+            return []
+        return [column[row - 1] for column in self.columns[max(start_col, 1) - 1:]]
+
+    def column(self, col: int, start_row: int = 1) -> list[Any]:
+        """读取一列（从 start_row 行到最后一行）"""
+        start = max(start_row, 1) - 1
+        if 1 <= col <= self.ncols:
+            return self.columns[col - 1][start:]
+        return [self.fill] * max(self.nrows - start, 0)
+
+    def range(self, start_row: int, start_col: int, end_row: int, end_col: int) -> list[list[Any]]:
+        """读取矩形范围（行不超过最后一行，超出列数的部分用空值填充）"""
+        start_row, end_row = sorted((start_row, end_row))
+        start_col, end_col = sorted((start_col, end_col))
+        return [
+            [self.cell(r, c) for c in range(start_col, end_col + 1)]
+            for r in range(max(start_row, 1), min(end_row, self.nrows) + 1)
+        ]
+
+    def range_by_address(self, start_cell: str, end_cell: str) -> list[list[Any]]:
+        start_row, start_col = parse_cell_address(start_cell)
+        end_row, end_col = parse_cell_address(end_cell)
+        return self.range(start_row, start_col, end_row, end_col)
+
+    def preview(self, max_rows: int, max_cols: int) -> list[list[str]]:
+        """预览左上角的数据，值转为字符串"""
+        cols = self.columns[:max_cols]
+        return [
+            ['' if column[r] is None or column[r] == '' else str(column[r]) for column in cols]
+            for r in range(min(max_rows, self.nrows))
+        ]
+
+
+class FrameSheetData(SheetData):
+    """列式转换结果中的工作表：保留 Arrow 文件读出的 DataFrame，按需取值"""
+
+    def __init__(self, name: str, frame: pl.DataFrame, nrows: int, json_columns: set[int], fill: Any = None):
+        self.name = name
+        self.fill = fill
+        self.nrows = nrows
+        self.ncols = frame.width
+        self.frame = frame
+        self.json_columns = json_columns
+        self._series = [frame.get_column(str(c)) for c in range(self.ncols)]
+        self.nbytes = 64 * self.ncols + frame.estimated_size()
+
+    def _decode(self, col: int, values: list[Any]) -> list[Any]:
+        """col 为列下标（从0开始）"""
+        if col in self.json_columns:
+            return [None if v is None else json.loads(v, object_hook=_decode_hook) for v in values]
+        return values
+
+    def cell(self, row: int, col: int) -> Any:
+        if 1 <= row <= self.nrows and 1 <= col <= self.ncols:
+            return self._decode(col - 1, [self._series[col - 1][row - 1]])[0]
+        return self.fill
+
+    def row(self, row: int, start_col: int = 1) -> list[Any]:
+        if not 1 <= row <= self.nrows:
+            return []
+        return [self.cell(row, c) for c in range(max(start_col, 1), self.ncols + 1)]
+
+    def column(self, col: int, start_row: int = 1) -> list[Any]:
+        start = max(start_row, 1) - 1
+        if 1 <= col <= self.ncols:
+            return self._decode(col - 1, self._series[col - 1].slice(start).to_list())
+        return [self.fill] * max(self.nrows - start, 0)
+
+    def _block(self, start: int, length: int, cols: range) -> list[list[Any]]:
+        """取出若干行、若干列（下标从0开始）的值，超出列数的部分用空值填充"""
+        columns = [
+            self._decode(c, self._series[c].slice(start, length).to_list()) if c < self.ncols
+            else [self.fill] * length
+            for c in cols
+        ]
+        return [list(row) for row in zip(*columns)] if columns else [[] for _ in range(length)]
+
+    def range(self, start_row: int, start_col: int, end_row: int, end_col: int) -> list[list[Any]]:
+        start_row, end_row = sorted((start_row, end_row))
+        start_col, end_col = sorted((start_col, end_col))
+        start = max(start_row, 1) - 1
+        length = max(min(end_row, self.nrows) - start, 0)
+        # 列号小于 1 的部分与 cell() 一样取空值
+        block = self._block(start, length, range(max(start_col, 1) - 1, end_col))
+        padding = [self.fill] * max(min(end_col, 0) - start_col + 1, 0)
+        return [padding + row for row in block] if padding else block
+
+    def preview(self, max_rows: int, max_cols: int) -> list[list[str]]:
+        block = self._block(0, min(max_rows, self.nrows), range(min(max_cols, self.ncols)))
+        return [['' if v is None or v == '' else str(v) for v in row] for row in block]
+
+
+class WorkbookData:
+    """解析后的工作簿"""
+
+    def __init__(self, sheets: list[SheetData], active: str):
+        self.sheet_names = [sheet.name for sheet in sheets]
+        self.sheets = {sheet.name: sheet for sheet in sheets}
+        self.active = active
+        self.nbytes = sum(sheet.nbytes for sheet in sheets)
+
+    def sheet(self, name: Optional[str] = None) -> SheetData:
+        """获取工作表，未指定名称时返回活动工作表"""
+        if not name:
+            return self.sheets[self.active]
+        sheet = self.sheets.get(name)
+        if sheet is None:
+            raise KeyError(name)
+        return sheet
+
+
+def _load_xlsx(path: str) -> WorkbookData:
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheets = []
+        for ws in wb.worksheets:
+            # 从 A1 开始读取，保证行列号与工作表中的位置一致
+            rows = [list(row) for row in ws.iter_rows(min_row=1, min_col=1, values_only=True)]
+            sheets.append(SheetData(ws.title, rows))
+        return WorkbookData(sheets, wb.active.title if wb.active is not None else sheets[0].name)
+    finally:
+        wb.close()
+
+
+def _load_xls(path: str) -> WorkbookData:
+    import xlrd
+    wb = xlrd.open_workbook(path, on_demand=True)
+    try:
+        sheets = []
+        for index, name in enumerate(wb.sheet_names()):
+            ws = wb.sheet_by_index(index)
+            rows = [ws.row_values(r) for r in range(ws.nrows)]
+            sheets.append(SheetData(name, rows, fill=''))
+            wb.unload_sheet(index)
+        return WorkbookData(sheets, sheets[0].name)
+    finally:
+        wb.release_resources()
+
+
+def _parse_workbook(path: str) -> WorkbookData:
+    return _load_xls(path) if path.lower().endswith('.xls') else _load_xlsx(path)
+
+
+def load_workbook(path: str) -> WorkbookData:
+    """读取工作簿（不经过缓存）：已转换为列式格式时从 Arrow 文件加载，否则解析原文件"""
+    workbook = _load_columnar(path)
+    return workbook if workbook is not None else _parse_workbook(path)
+
+
+# ==================== 列式格式转换 ====================
+
+COLUMNAR_META = 'workbook.json'
+
+
+def columnar_dir(path: str) -> str:
+    """工作簿转换结果的目录"""
+    return f"{path}.columns"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, date):
+        return {'$date': value.isoformat()}
+    if isinstance(value, time):
+        return {'$time': value.isoformat()}
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _decode_hook(obj: dict) -> Any:
+    if len(obj) == 1:
+        (tag, text), = obj.items()
+        if tag == '$datetime':
+            return datetime.fromisoformat(text)
+        if tag == '$date':
+            return date.fromisoformat(text)
+        if tag == '$time':
+            return time.fromisoformat(text)
+    return obj
+
+
+def _column_series(name: str, values: list[Any]) -> tuple[pl.Series, bool]:
+    """一列值 -> (Series, 是否按 JSON 保存)；同一类型的列直接保存为对应类型"""
+    kinds = {type(v) for v in values if v is not None}
+    if len(kinds) <= 1 and kinds <= {str, int, float, bool, datetime, date, time}:
+        try:
+            return pl.Series(name, values, strict=True), False
+        except Exception:
+            pass
+    encoded = [None if v is None else json.dumps(_encode_value(v), ensure_ascii=False) for v in values]
+    return pl.Series(name, encoded, dtype=pl.String), True
+
+
+def convert_workbook(path: str) -> dict:
+    """把工作簿的每个工作表转换为 Arrow IPC 文件，返回转换信息"""
+    workbook = _parse_workbook(path)
+    target = columnar_dir(path)
+    shutil.rmtree(target, ignore_errors=True)
+    os.makedirs(target)
+    sheets = []
+    for index, name in enumerate(workbook.sheet_names):
+        sheet = workbook.sheets[name]
+        json_columns = []
+        series = []
+        for c, values in enumerate(sheet.columns):
+            column, is_json = _column_series(str(c), values)
+            series.append(column)
+            if is_json:
+                json_columns.append(c)
+        file_name = f"sheet{index}.arrow"
+        # 不压缩，读取时可以直接内存映射
+        pl.DataFrame(series).write_ipc(os.path.join(target, file_name), compression='uncompressed')
+        sheets.append({'name': name, 'file': file_name, 'nrows': sheet.nrows,
+                       'ncols': sheet.ncols, 'jsonColumns': json_columns})
+    meta = {
+        'sourceMtime': os.stat(path).st_mtime_ns,
+        'active': workbook.active,
+        'fill': next(iter(workbook.sheets.values())).fill if workbook.sheets else None,
+        'sheets': sheets,
+    }
+    # 最后写入描述文件，转换中断时不会被当作已完成
+    tmp_path = os.path.join(target, COLUMNAR_META + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(target, COLUMNAR_META))
+    return meta
+
+
+def _load_columnar(path: str) -> Optional[WorkbookData]:
+    """从转换结果加载工作簿，没有转换结果或原文件已变化时返回 None"""
+    target = columnar_dir(path)
+    meta_path = os.path.join(target, COLUMNAR_META)
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['sourceMtime'] != os.stat(path).st_mtime_ns:
+            return None
+        sheets = []
+        for info in meta['sheets']:
+            # 未压缩的 IPC 文件可以直接映射，数据留在 DataFrame 中按需读取
+            frame = pl.read_ipc(os.path.join(target, info['file']))
+            sheets.append(FrameSheetData(info['name'], frame, info['nrows'], set(info['jsonColumns']), meta['fill']))
+        return WorkbookData(sheets, meta['active'])
+    except Exception as e:
+        print(f"读取列式转换结果失败，改为解析原文件: {e}")
+        return None
+
+
+def remove_columnar(path: str):
+    shutil.rmtree(columnar_dir(path), ignore_errors=True)
+
+
+class ExcelCache:
+    """按 (路径, 修改时间) 缓存解析后的工作簿，按内存占用 LRU 淘汰"""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, int], WorkbookData] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading: dict[tuple[str, int], threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> WorkbookData:
+        """获取工作簿（同步，可能需要解析文件，应在线程池中调用）"""
+        path = os.path.abspath(path)
+        key = (path, os.stat(path).st_mtime_ns)
+        with self._lock:
+            workbook = self._entries.get(key)
+            if workbook is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return workbook
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        # 同一文件只解析一次，并发的读取等待解析完成
+        with load_lock:
+            try:
+                with self._lock:
+                    workbook = self._entries.get(key)
+                    if workbook is not None:
+                        self.hits += 1
+                        return workbook
+                workbook = load_workbook(path)
+                with self._lock:
+                    self.misses += 1
+                    self._discard_path(path)
+                    if workbook.nbytes > self.max_bytes:
+                        # 放进缓存会把其他工作簿全部挤出，自身又超出上限，直接返回不缓存
+                        return workbook
+                    self._entries[key] = workbook
+                    self._bytes += workbook.nbytes
+                    self._evict()
+            finally:
+                # 解析失败时也要移除，否则每个失败的文件都会留下一把锁
+                with self._lock:
+                    if self._loading.get(key) is load_lock:
+                        del self._loading[key]
+        return workbook
+
+    def _discard_path(self, path: str):
+        for key in [key for key in self._entries if key[0] == path]:
+            self._bytes -= self._entries.pop(key).nbytes
+
+    def _evict(self):
+        # 超过上限的工作簿不会放入缓存，淘汰到最后至少保留最近使用的一个
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, workbook = self._entries.popitem(last=False)
+            self._bytes -= workbook.nbytes
+
+    def invalidate(self, path: str):
+        """移除文件的缓存（文件被删除或替换时调用）"""
+        with self._lock:
+            self._discard_path(os.path.abspath(path))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'workbooks': len(self._entries),
+                'bytes': self._bytes,
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# 进程内唯一的Excel缓存
+_cache: Optional[ExcelCache] = None
+
+
+def get_excel_cache() -> ExcelCache:
+    global _cache
+    if _cache is None:
+        _cache = ExcelCache()
+    return _cache
@@ -0,0 +1,332 @@
+"""HTTP 客户端管理 - 在节点执行之间复用连接池
+
+API 请求、下载文件、AI 对话等节点原先每次调用都新建 httpx.AsyncClient，
+循环中每次请求都要重新建立 TCP/TLS 连接。这里按目标站点（协议+主机+端口）
+各维护一个常驻客户端，连接保持复用；安装了 h2 时同时启用 HTTP/2 多路复用。
+访问过的站点很多时客户端不会无限累积：空闲超过 5 分钟的客户端会被关闭，
+站点数超过上限时关闭最久未使用的客户端（正在请求中的客户端不会被关闭）。
+请求可附带重试策略：连接失败、超时和 429/5xx 响应按指数退避重试。
+
+常驻客户端在所有运行之间共享，因此不保存响应中的 Cookie，否则一次运行登录得到的会话
+会被之后无关的运行（包括并发的定时任务）带上；只发送调用方显式设置的 Cookie。
+"""
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from http.cookiejar import CookieJar, CookiePolicy
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+# 每个站点的最大连接数
+DEFAULT_MAX_CONNECTIONS = 20
+# 每个站点保持的空闲连接数
+DEFAULT_MAX_KEEPALIVE = 10
+# 空闲连接保留时间（秒）
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+# 最多保留多少个站点的客户端，超出时关闭最久未使用的
+DEFAULT_MAX_HOSTS = 64
+# 客户端空闲超过该秒数后关闭
+DEFAULT_CLIENT_IDLE = 300.0
+
+# 可以安全重试的请求方法
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+# 需要重试的响应状态码
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@dataclass
+class RetryPolicy:
+    """重试策略"""
+    retries: int = 0            # 失败后最多重试次数
+    backoff: float = 0.5        # 首次重试前等待的秒数，之后每次翻倍
+    max_backoff: float = 30.0   # 单次等待上限
+    retry_statuses: frozenset = field(default_factory=lambda: RETRY_STATUS_CODES)
+    retry_non_idempotent: bool = False  # POST 等非幂等请求是否也重试
+
+    def allows(self, method: str) -> bool:
+        return self.retries > 0 and (self.retry_non_idempotent or method.upper() in IDEMPOTENT_METHODS)
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """第 attempt 次重试前的等待时间（优先使用 Retry-After 响应头）"""
+        if response is not None:
+            retry_after = response.headers.get('retry-after', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        wait = min(self.backoff * (2 ** attempt), self.max_backoff)
+        # 加入随机抖动，避免大量循环同时重试
+        return wait * random.uniform(0.5, 1.0)
+
+
+NO_RETRY = RetryPolicy()
+
+
+class RejectAllCookies(CookiePolicy):
+    """拒绝保存和自动发送任何 Cookie 的策略
+
+    请求参数中显式传入的 Cookie 由 httpx 合并到新的 Cookie 容器中，不受此策略影响。
+    """
+    netscape = True
+    rfc2965 = False
+    hide_cookie2 = False
+
+    def set_ok(self, cookie, request) -> bool:
+        return False
+
+    def return_ok(self, cookie, request) -> bool:
+        return False
+
+    def domain_return_ok(self, domain, request) -> bool:
+        return False
+
+    def path_return_ok(self, path, request) -> bool:
+        return False
+
+
+class HttpClientManager:
+    """按站点维护常驻 httpx 客户端"""
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_keepalive: int = DEFAULT_MAX_KEEPALIVE,
+        keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+        http2: Optional[bool] = None,
+        max_hosts: int = DEFAULT_MAX_HOSTS,
+        client_idle: float = DEFAULT_CLIENT_IDLE,
+    ):
+        self.max_connections = max(1, max_connections)
+        self.max_keepalive = max(0, min(max_keepalive, self.max_connections))
+        self.keepalive_expiry = keepalive_expiry
+        # 未指定时只要安装了 h2 就启用 HTTP/2
+        self.http2 = _http2_available() if http2 is None else (http2 and _http2_available())
+        self.max_hosts = max(1, max_hosts)
+        self.client_idle = client_idle
+        # 按最近使用排序，最久未使用的在前
+        self._clients: OrderedDict[str, httpx.AsyncClient] = OrderedDict()
+        self._last_used: dict[str, float] = {}
+        self._active: dict[str, int] = {}  # 各站点正在进行的请求数
+        self._closing: set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.total_requests = 0
+        self.total_retries = 0
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def client(self, url: str) -> httpx.AsyncClient:
+        """获取目标站点的客户端（不存在时创建）"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # 连接绑定在事件循环上，换了事件循环的旧客户端不能再用，交给原来的事件循环关闭
+            self._close_later(list(self._clients.values()), self._loop)
+            self._clients = OrderedDict()
+            self._last_used = {}
+            self._active = {}
+            self._loop = loop
+        origin = self._origin(url)
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                cookies=CookieJar(policy=RejectAllCookies()),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+            self._clients[origin] = client
+        self._clients.move_to_end(origin)
+        self._last_used[origin] = time.monotonic()
+        self._evict(keep=origin)
+        return client
+
+    def _evict(self, keep: str):
+        """关闭空闲过久的客户端，站点数超过上限时关闭最久未使用的客户端"""
+        now = time.monotonic()
+        excess = len(self._clients) - self.max_hosts
+        evicted = []
+        for origin in list(self._clients):
+            if excess <= 0 and now - self._last_used[origin] < self.client_idle:
+                break
+            if origin == keep or self._active.get(origin):
+                continue
+            evicted.append(self._clients.pop(origin))
+            del self._last_used[origin]
+            excess -= 1
+        self._close_later(evicted, self._loop)
+
+    def _close_later(self, clients: list[httpx.AsyncClient],
+                     loop: Optional[asyncio.AbstractEventLoop]):
+        """在客户端所属的事件循环上关闭客户端"""
+        if not clients or loop is None or loop.is_closed():
+            # 所属事件循环已经关闭，连接随之失效，只能丢弃
+            return
+        if loop is asyncio.get_running_loop():
+            task = loop.create_task(self._close_clients(clients))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        else:
+            asyncio.run_coroutine_threadsafe(self._close_clients(clients), loop)
+
+    @staticmethod
+    async def _close_clients(clients: list[httpx.AsyncClient]):
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+
+    def _acquire(self, origin: str):
+        self._active[origin] = self._active.get(origin, 0) + 1
+
+    def _release(self, origin: str):
+        count = self._active.get(origin, 0) - 1
+        if count > 0:
+            self._active[origin] = count
+        else:
+            self._active.pop(origin, None)
+
+    async def request(self, method: str, url: str, retry: RetryPolicy = NO_RETRY,
+                      **kwargs) -> httpx.Response:
+        """发送请求并读取完整响应，参数与 httpx.AsyncClient.request 相同"""
+        method = method.upper()
+        can_retry = retry.allows(method)
+        origin = self._origin(url)
+        attempt = 0
+        while True:
+            self.total_requests += 1
+            client = self.client(url)
+            self._acquire(origin)
+            try:
+                response = await client.request(method, url, **kwargs)
+            except (httpx.TimeoutException, httpx.NetworkError):
+                if not can_retry or attempt >= retry.retries:
+                    raise
+                await asyncio.sleep(retry.delay(attempt))
+            else:
+                if not can_retry or attempt >= retry.retries or response.status_code not in retry.retry_statuses:
+                    return response
+                await asyncio.sleep(retry.delay(attempt, response))
+            finally:
+                self._release(origin)
+            attempt += 1
+            self.total_retries += 1
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, retry: RetryPolicy = NO_RETRY,
+                     **request_kwargs) -> AsyncIterator[httpx.Response]:
+        """以流式方式发送请求（响应体按需读取），收到响应前的失败按重试策略重试"""
+        method = method.upper()
+        can_retry = retry.allows(method)
+        follow_redirects = request_kwargs.pop('follow_redirects', False)
+        origin = self._origin(url)
+        attempt = 0
+        while True:
+            self.total_requests += 1
+            client = self.client(url)
+            self._acquire(origin)
+            try:
+                response = await client.send(
+                    client.build_request(method, url, **request_kwargs),
+                    stream=True,
+                    follow_redirects=follow_redirects,
+                )
+            except (httpx.TimeoutException, httpx.NetworkError):
+                self._release(origin)
+                if not can_retry or attempt >= retry.retries:
+                    raise
+                await asyncio.sleep(retry.delay(attempt))
+            except BaseException:
+                self._release(origin)
+                raise
+            else:
+                if not can_retry or attempt >= retry.retries or response.status_code not in retry.retry_statuses:
+                    break
+                try:
+                    await response.aclose()
+                finally:
+                    self._release(origin)
+                await asyncio.sleep(retry.delay(attempt, response))
+            attempt += 1
+            self.total_retries += 1
+        # 读取响应体期间客户端保持占用，不会被淘汰
+        try:
+            yield response
+        finally:
+            try:
+                await response.aclose()
+            finally:
+                self._release(origin)
+
+    def stats(self) -> dict:
+        return {
+            'maxConnections': self.max_connections,
+            'maxKeepalive': self.max_keepalive,
+            'keepaliveExpiry': self.keepalive_expiry,
+            'http2': self.http2,
+            'maxHosts': self.max_hosts,
+            'clientIdle': self.client_idle,
+            'totalRequests': self.total_requests,
+            'totalRetries': self.total_retries,
+            'hosts': sorted(origin for origin, client in self._clients.items() if not client.is_closed),
+        }
+
+    async def close(self):
+        clients = list(self._clients.values())
+        self._clients = OrderedDict()
+        self._last_used = {}
+        if self._loop is asyncio.get_running_loop():
+            await self._close_clients(clients)
+            if self._closing:
+                await asyncio.gather(*self._closing)
+        else:
+            self._close_later(clients, self._loop)
+
+
+# 进程内唯一的客户端管理器
+_manager: Optional[HttpClientManager] = None
+
+
+def get_http_manager() -> HttpClientManager:
+    """获取全局 HTTP 客户端管理器"""
+    global _manager
+    if _manager is None:
+        _manager = HttpClientManager()
+    return _manager
+
+
+async def configure_http_clients(max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                                 max_keepalive: int = DEFAULT_MAX_KEEPALIVE,
+                                 keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+                                 http2: Optional[bool] = None) -> HttpClientManager:
+    """按新的连接上限重建全局客户端管理器，旧的连接会被关闭"""
+    global _manager
+    old_manager = _manager
+    _manager = HttpClientManager(max_connections, max_keepalive, keepalive_expiry, http2)
+    if old_manager is not None:
+        await old_manager.close()
+    return _manager
+
+
+async def shutdown_http_clients():
+    """关闭全局客户端管理器的所有连接"""
+    global _manager
+    if _manager is not None:
+        await _manager.close()
+        _manager = None
@@ -0,0 +1,248 @@
+"""作业调度器 - 带优先级队列和并发上限的工作流运行调度
+
+每次提交生成一个独立的运行（run id），同一个工作流可以带不同参数同时排队多次。
+运行按优先级（数值越大越先执行）和提交顺序出队，同时受全局并发上限和
+单个工作流并发上限约束；状态、日志和数据都按 run id 查询。
+"""
+import asyncio
+import heapq
+import itertools
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+from uuid import uuid4
+
+from app.models.workflow import ExecutionResult, ExecutionStatus
+from app.services.data_table import DataTable
+
+# 全局同时执行的运行数上限
+DEFAULT_MAX_CONCURRENT = 4
+# 单个工作流同时执行的运行数上限
+DEFAULT_PER_WORKFLOW_LIMIT = 2
+# 保留多少条已结束的运行记录
+MAX_FINISHED_RUNS = 500
+# 每个运行保留的日志条数
+MAX_RUN_LOGS = 2000
+
+_FINISHED_STATUSES = (ExecutionStatus.COMPLETED, ExecutionStatus.FAILED, ExecutionStatus.STOPPED)
+
+
+@dataclass
+class WorkflowRun:
+    """一次工作流运行"""
+    run_id: str
+    workflow_id: str
+    parameters: dict[str, Any] = field(default_factory=dict)
+    options: dict[str, Any] = field(default_factory=dict)
+    priority: int = 0
+    interactive: bool = False  # 编辑器中点击执行发起的运行（日志和数据实时推送到编辑器）
+    status: ExecutionStatus = ExecutionStatus.PENDING
+    submitted_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    executor: Any = None
+    result: Optional[ExecutionResult] = None
+    data: DataTable = field(default_factory=DataTable)
+    logs: deque = field(default_factory=lambda: deque(maxlen=MAX_RUN_LOGS))
+    error: Optional[str] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in _FINISHED_STATUSES
+
+    def to_dict(self) -> dict:
+        executor = self.executor
+        running = self.status == ExecutionStatus.RUNNING and executor is not None
+        result = self.result
+        return {
+            'runId': self.run_id,
+            'workflowId': self.workflow_id,
+            'status': self.status.value,
+            'priority': self.priority,
+            'parameters': self.parameters,
+            'submittedAt': self.submitted_at.isoformat(),
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None,
+            'executedNodes': executor.executed_nodes if running else (result.executed_nodes if result else 0),
+            'failedNodes': executor.failed_nodes if running else (result.failed_nodes if result else 0),
+            'dataRows': len(self.data),
+            'dataFile': result.data_file if result else None,
+            'error': self.error or (result.error_message if result else None),
+        }
+
+
+class JobScheduler:
+    """工作流运行调度器"""
+
+    def __init__(
+        self,
+        runner: Callable[[WorkflowRun], Awaitable[None]],
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        per_workflow_limit: int = DEFAULT_PER_WORKFLOW_LIMIT,
+        on_update: Optional[Callable[[WorkflowRun], Awaitable[None]]] = None,
+    ):
+        self.runner = runner
+        self.max_concurrent = max(1, max_concurrent)
+        self.per_workflow_limit = max(1, per_workflow_limit)
+        self.on_update = on_update
+
+        self._runs: dict[str, WorkflowRun] = {}
+        self._queue: list[tuple[int, int, WorkflowRun]] = []  # (-优先级, 提交序号, 运行)
+        self._seq = itertools.count()
+        self._running: dict[str, asyncio.Task] = {}
+        self._running_per_workflow: dict[str, int] = {}
+        self._finished: deque[str] = deque()
+
+    def submit(self, workflow_id: str, parameters: Optional[dict] = None,
+               options: Optional[dict] = None, priority: int = 0,
+               interactive: bool = False, dispatch: bool = True) -> WorkflowRun:
+        """提交一次运行（进入队列，有空闲名额时立即开始）
+        
+        批量提交时传入 dispatch=False，全部入队后再调用 dispatch()，保证按优先级出队。
+        """
+        run = WorkflowRun(
+            run_id=str(uuid4()),
+            workflow_id=workflow_id,
+            parameters=dict(parameters or {}),
+            options=dict(options or {}),
+            priority=priority,
+            interactive=interactive,
+        )
+        self._runs[run.run_id] = run
+        heapq.heappush(self._queue, (-priority, next(self._seq), run))
+        if dispatch:
+            self.dispatch()
+        return run
+
+    def get(self, run_id: str) -> Optional[WorkflowRun]:
+        return self._runs.get(run_id)
+
+    def list_runs(self, workflow_id: Optional[str] = None,
+                  status: Optional[ExecutionStatus] = None) -> list[WorkflowRun]:
+        return [
+            run for run in self._runs.values()
+            if (workflow_id is None or run.workflow_id == workflow_id)
+            and (status is None or run.status == status)
+        ]
+
+    def find_active(self, workflow_id: str, interactive: Optional[bool] = None) -> Optional[WorkflowRun]:
+        """查找指定工作流排队中或执行中的运行"""
+        for run in self._runs.values():
+            if run.workflow_id != workflow_id or run.is_finished:
+                continue
+            if interactive is None or run.interactive == interactive:
+                return run
+        return None
+
+    def queue_position(self, run: WorkflowRun) -> Optional[int]:
+        """运行在队列中的位置（从 1 开始），不在队列中返回 None"""
+        if run.status != ExecutionStatus.PENDING:
+            return None
+        key = next(((priority, seq) for priority, seq, queued in self._queue if queued is run), None)
+        if key is None:
+            return None
+        ahead = 0
+        for priority, seq, queued in self._queue:
+            if queued.status == ExecutionStatus.PENDING and (priority, seq) < key:
+                ahead += 1
+        return ahead + 1
+
+    async def cancel(self, run_id: str) -> bool:
+        """取消排队中的运行或停止执行中的运行"""
+        run = self._runs.get(run_id)
+        if run is None or run.is_finished:
+            return False
+        if run.status == ExecutionStatus.PENDING:
+            # 队列中的条目在出队时跳过
+            run.status = ExecutionStatus.STOPPED
+            run.finished_at = datetime.now()
+            self._mark_finished(run)
+            await self._notify(run)
+            return True
+        if run.executor is not None:
+            await run.executor.stop()
+        else:
+            task = self._running.get(run_id)
+            if task is not None:
+                task.cancel()
+        return True
+
+    def configure(self, max_concurrent: Optional[int] = None, per_workflow_limit: Optional[int] = None):
+        """调整并发上限（放宽上限时立即调度排队的运行）"""
+        if max_concurrent is not None:
+            self.max_concurrent = max(1, max_concurrent)
+        if per_workflow_limit is not None:
+            self.per_workflow_limit = max(1, per_workflow_limit)
+        self.dispatch()
+
+    def stats(self) -> dict:
+        return {
+            'maxConcurrent': self.max_concurrent,
+            'perWorkflowLimit': self.per_workflow_limit,
+            'running': len(self._running),
+            'queued': sum(1 for _, _, run in self._queue if run.status == ExecutionStatus.PENDING),
+            'runningPerWorkflow': dict(self._running_per_workflow),
+        }
+
+    def dispatch(self):
+        """在并发上限内按优先级启动排队的运行"""
+        skipped = []
+        while self._queue and len(self._running) < self.max_concurrent:
+            entry = heapq.heappop(self._queue)
+            run = entry[2]
+            if run.status != ExecutionStatus.PENDING:
+                continue
+            if self._running_per_workflow.get(run.workflow_id, 0) >= self.per_workflow_limit:
+                skipped.append(entry)
+                continue
+            self._start(run)
+        for entry in skipped:
+            heapq.heappush(self._queue, entry)
+
+    def _start(self, run: WorkflowRun):
+        run.status = ExecutionStatus.RUNNING
+        run.started_at = datetime.now()
+        self._running_per_workflow[run.workflow_id] = self._running_per_workflow.get(run.workflow_id, 0) + 1
+        self._running[run.run_id] = asyncio.create_task(self._run(run))
+
+    async def _run(self, run: WorkflowRun):
+        try:
+            await self._notify(run)
+            await self.runner(run)
+            if run.result is not None:
+                run.status = run.result.status
+            elif not run.is_finished:
+                run.status = ExecutionStatus.COMPLETED
+        except asyncio.CancelledError:
+            run.status = ExecutionStatus.STOPPED
+        except Exception as e:
+            print(f"[JobScheduler] 运行 {run.run_id} 异常: {e}")
+            run.status = ExecutionStatus.FAILED
+            run.error = str(e)
+        finally:
+            run.finished_at = datetime.now()
+            run.executor = None
+            self._running.pop(run.run_id, None)
+            remaining = self._running_per_workflow.get(run.workflow_id, 1) - 1
+            if remaining > 0:
+                self._running_per_workflow[run.workflow_id] = remaining
+            else:
+                self._running_per_workflow.pop(run.workflow_id, None)
+            self._mark_finished(run)
+            self.dispatch()
+        await self._notify(run)
+
+    def _mark_finished(self, run: WorkflowRun):
+        """记录已结束的运行，超过保留数量时删除最早的记录"""
+        self._finished.append(run.run_id)
+        while len(self._finished) > MAX_FINISHED_RUNS:
+            self._runs.pop(self._finished.popleft(), None)
+
+    async def _notify(self, run: WorkflowRun):
+        if self.on_update is None:
+            return
+        try:
+            await self.on_update(run)
+        except Exception as e:
+            print(f"通知运行状态失败: {e}")
@@ -0,0 +1,167 @@
+"""日志管道 - 分级过滤、环形缓冲、批量发送执行日志
+
+节点执行时只把日志放进内存缓冲区（同步、不等待网络），由后台任务按
+时间窗口或批大小把日志批量交给发送回调（如 Socket.IO）。
+客户端消费过慢时缓冲区写满，优先丢弃最旧的低优先级日志。
+"""
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from enum import IntEnum
+from typing import Awaitable, Callable, Optional
+from uuid import uuid4
+
+from app.models.workflow import LogLevel
+
+
+class LogVerbosity(IntEnum):
+    """日志详细程度"""
+    QUIET = 0   # 只发送系统日志、用户日志、警告、错误和成功日志
+    NORMAL = 1  # 发送所有节点日志
+    DEBUG = 2   # 额外在控制台打印调度和节点配置等调试信息
+
+    @classmethod
+    def parse(cls, value: str, default: 'LogVerbosity' = None) -> 'LogVerbosity':
+        try:
+            return cls[str(value).upper()]
+        except KeyError:
+            return default if default is not None else cls.NORMAL
+
+
+# 缓冲区容量（高/低优先级各自独立计算）
+DEFAULT_CAPACITY = 5000
+# 单批最多发送的日志条数
+DEFAULT_BATCH_SIZE = 200
+# 最长攒批时间（秒）
+DEFAULT_FLUSH_INTERVAL = 0.2
+
+
+class LogPipeline:
+    """执行日志管道"""
+
+    def __init__(
+        self,
+        on_batch: Optional[Callable[[list[dict]], Awaitable[None]]] = None,
+        verbosity: LogVerbosity = LogVerbosity.NORMAL,
+        capacity: int = DEFAULT_CAPACITY,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        self.on_batch = on_batch
+        self.verbosity = verbosity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # 条目格式: (seq, timestamp, level, message, node_id, duration, is_user_log, is_system_log)
+        self._high: deque[tuple] = deque(maxlen=capacity)
+        self._low: deque[tuple] = deque(maxlen=capacity)
+        self._seq = 0
+        self._dropped = 0
+        self._id_prefix = uuid4().hex[:12]
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def debug_enabled(self) -> bool:
+        return self.verbosity >= LogVerbosity.DEBUG
+
+    def debug(self, message: str):
+        """调试信息只在 DEBUG 级别打印到控制台，不发送到前端"""
+        if self.verbosity >= LogVerbosity.DEBUG:
+            print(f"[DEBUG] {message}")
+
+    def submit(self, level: LogLevel, message: str, node_id: Optional[str] = None,
+               duration: Optional[float] = None, is_user_log: bool = False,
+               is_system_log: bool = False):
+        """提交一条日志（同步，不会等待发送）"""
+        high_priority = is_user_log or is_system_log or level != LogLevel.INFO
+        if not high_priority and self.verbosity <= LogVerbosity.QUIET:
+            return
+
+        self._seq += 1
+        entry = (self._seq, time.time(), level, message, node_id, duration, is_user_log, is_system_log)
+        queue = self._high if high_priority else self._low
+        if len(queue) == queue.maxlen:
+            self._dropped += 1
+        queue.append(entry)
+
+        if self._wakeup is not None and len(self._high) + len(self._low) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self):
+        """启动后台发送任务（需在事件循环中调用）"""
+        if self._task is not None or self.on_batch is None:
+            return
+        self._closed = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """停止后台任务并发送剩余日志"""
+        self._closed = True
+        task = self._task
+        self._task = None
+        if task is not None:
+            self._wakeup.set()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        self._wakeup = None
+
+    async def flush(self):
+        """立即发送缓冲区内的所有日志"""
+        while self._high or self._low or self._dropped:
+            batch = self._drain()
+            if not batch or self.on_batch is None:
+                return
+            try:
+                await self.on_batch(batch)
+            except Exception as e:
+                print(f"发送日志失败: {e}")
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _drain(self) -> list[dict]:
+        """按提交顺序取出一批日志并转为前端格式"""
+        batch: list[dict] = []
+        if self._dropped:
+            self._seq += 1
+            batch.append(self._format((
+                self._seq, time.time(), LogLevel.WARNING,
+                f"⚠️ 日志输出过快，已丢弃 {self._dropped} 条日志",
+                None, None, False, True,
+            )))
+            self._dropped = 0
+
+        high, low = self._high, self._low
+        while len(batch) < self.batch_size and (high or low):
+            if not low or (high and high[0][0] < low[0][0]):
+                batch.append(self._format(high.popleft()))
+            else:
+                batch.append(self._format(low.popleft()))
+        return batch
+
+    def _format(self, entry: tuple) -> dict:
+        seq, timestamp, level, message, node_id, duration, is_user_log, is_system_log = entry
+        return {
+            'id': f"{self._id_prefix}-{seq}",
+            'timestamp': datetime.fromtimestamp(timestamp).isoformat(),
+            'level': level.value,
+            'nodeId': node_id,
+            'message': message,
+            'duration': duration,
+            'isUserLog': is_user_log,
+            'isSystemLog': is_system_log,
+        }
@@ -0,0 +1,430 @@
+"""多进程工作池 - 在独立的工作进程中执行工作流
+
+所有执行默认共用 uvicorn 的单个事件循环，OCR、Excel 导出、正则等 CPU 密集的节点
+会和 API / Socket.IO 抢占同一个 GIL。开启工作进程模式后，运行被分发到工作进程中
+执行，日志、数据行、节点/变量事件和执行结果通过本地管道（multiprocessing Pipe）传回 API 进程。
+管道写入（包括序列化）是阻塞的，两端都由独立的发送线程完成，不占用事件循环。
+
+注意：需要在 API 进程中弹出对话框的节点（如用户输入）不适合在工作进程中执行。
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from app.executors.base import ModuleResult
+from app.models.workflow import Workflow, ExecutionResult, ExecutionStatus
+from app.services.data_table import DataTable
+
+# 默认工作进程数：保留一个核心给 API 进程
+DEFAULT_WORKER_COUNT = max(1, (os.cpu_count() or 2) - 1)
+
+
+def _portable(value: Any) -> Any:
+    """转换为可以通过管道发送的值（变量中可能有页面等无法序列化的对象，转为字符串）"""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=str))
+
+
+class _Sender:
+    """管道发送线程：消息按提交顺序发送，发送失败时调用 on_error(message, error)"""
+
+    def __init__(self, conn, on_error: Callable[[tuple, Exception], None]):
+        self.conn = conn
+        self.on_error = on_error
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def send(self, message: tuple, on_sent: Optional[Callable[[], None]] = None):
+        """提交消息（立即返回），on_sent 在消息成功发送后于发送线程中调用"""
+        self._queue.put((message, on_sent))
+
+    def close(self, timeout: Optional[float] = None):
+        """发送完已提交的消息后结束发送线程"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            message, on_sent = item
+            try:
+                self.conn.send(message)
+            except Exception as e:
+                self.on_error(message, e)
+                continue
+            if on_sent is not None:
+                on_sent()
+
+
+# ==================== 工作进程端 ====================
+
+def _worker_main(conn):
+    """工作进程入口"""
+    # Windows 上需要设置事件循环策略以支持 Playwright
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    try:
+        asyncio.run(_worker_loop(conn))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _worker_loop(conn):
+    from app.services.workflow_executor import WorkflowExecutor
+    from app.services.browser_pool import get_browser_pool, shutdown_browser_pool
+    from app.services.http_client import shutdown_http_clients
+    from app.services.log_pipeline import LogVerbosity
+    from app.services.data_collector import DataExporter
+
+    loop = asyncio.get_running_loop()
+    inbox: asyncio.Queue = asyncio.Queue()
+
+    def on_send_error(message: tuple, error: Exception):
+        print(f"[WorkerPool] 发送消息失败: {message[0]} {error}")
+        if message[0] == 'result':
+            # 结果无法发送（如数据无法序列化）时，让 API 进程端的运行失败而不是一直等待
+            try:
+                conn.send(('error', message[1], f"发送执行结果失败: {error}"))
+            except Exception:
+                pass
+
+    sender = _Sender(conn, on_send_error)
+    send = sender.send
+
+    def read_commands():
+        # 管道读取是阻塞的，放在独立线程中，收到的命令转交给事件循环
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                message = None
+            loop.call_soon_threadsafe(inbox.put_nowait, message)
+            if message is None:
+                return
+
+    threading.Thread(target=read_commands, daemon=True).start()
+
+    executors: dict[str, WorkflowExecutor] = {}
+    tasks: set[asyncio.Task] = set()
+
+    async def run(run_id: str, payload: dict):
+        workflow = Workflow.model_validate(payload['workflow'])
+        options = payload['options']
+
+        async def on_log_batch(logs: list[dict]):
+            send(('logs', run_id, logs, executor.executed_nodes, executor.failed_nodes))
+
+        async def on_data_row(row: dict):
+            send(('data_row', run_id, row))
+
+        async def on_node_start(node_id: str):
+            send(('node_start', run_id, node_id))
+
+        async def on_node_complete(node_id: str, result: ModuleResult):
+            send(('node_complete', run_id, node_id, {**vars(result), 'data': _portable(result.data)}))
+
+        async def on_variable_update(name: str, value: Any):
+            # 转换时同时复制了一份，之后流程继续修改变量不会影响待发送的消息
+            send(('variable_update', run_id, name, _portable(value)))
+
+        # 只转发 API 进程端注册了回调的事件，避免无用的管道流量
+        events = payload.get('events', ())
+        executor = WorkflowExecutor(
+            workflow=workflow,
+            on_log_batch=on_log_batch,
+            on_data_row=on_data_row,
+            on_node_start=on_node_start if 'node_start' in events else None,
+            on_node_complete=on_node_complete if 'node_complete' in events else None,
+            on_variable_update=on_variable_update if 'variable_update' in events else None,
+            headless=options.get('headless', False),
+            verbosity=LogVerbosity(options.get('verbosity', LogVerbosity.NORMAL)),
+            branch_isolation=options.get('branch_isolation', 'shared'),
+            browser_pool=get_browser_pool() if options.get('use_browser_pool') else None,
+            storage_state=options.get('storage_state'),
+            save_storage_state=options.get('save_storage_state'),
+            parameters=options.get('parameters'),
+            spill_rows=options.get('spill_rows'),
+            spill_memory_mb=options.get('spill_memory_mb'),
+            sink_options=options.get('sink_options'),
+        )
+        executors[run_id] = executor
+        try:
+            result = await executor.execute()
+            data = executor.get_collected_data()
+            # 数据导出同样在工作进程中完成
+            if data and payload.get('export_data', True) and not result.data_file:
+                result.data_file = DataExporter().export(data, payload.get('export_format', 'excel'))
+            # 分段文件随数据表发送成功后由 API 进程负责删除
+            send(('result', run_id, result.model_dump(), data),
+                 on_sent=data.disown_files if data is not None else None)
+        except Exception as e:
+            send(('error', run_id, str(e)))
+        finally:
+            executors.pop(run_id, None)
+
+    while True:
+        message = await inbox.get()
+        if message is None or message[0] == 'shutdown':
+            break
+        kind = message[0]
+        if kind == 'run':
+            task = asyncio.create_task(run(message[1], message[2]))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        elif kind == 'stop':
+            executor = executors.get(message[1])
+            if executor is not None:
+                await executor.stop()
+
+    for executor in list(executors.values()):
+        await executor.stop()
+    if tasks:
+        await asyncio.wait(list(tasks), timeout=5)
+    await shutdown_browser_pool()
+    await shutdown_http_clients()
+    await asyncio.to_thread(sender.close, 5)
+
+
+# ==================== API 进程端 ====================
+
+class WorkerProcess:
+    """一个工作进程及其通信管道"""
+
+    def __init__(self, index: int, loop: asyncio.AbstractEventLoop):
+        mp_context = multiprocessing.get_context('spawn')
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(
+            target=_worker_main,
+            args=(child_conn,),
+            name=f"workflow-worker-{index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+        self.loop = loop
+        self.active: dict[str, 'RemoteExecutor'] = {}
+        self._sender = _Sender(self.conn, self._on_send_error)
+        self._reader = threading.Thread(target=self._read_messages, daemon=True)
+        self._reader.start()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def send(self, message: tuple):
+        """提交发给工作进程的消息（由发送线程写入管道，不阻塞事件循环）"""
+        self._sender.send(message)
+
+    def _on_send_error(self, message: tuple, error: Exception):
+        print(f"[WorkerPool] 发送消息失败: {message[0]} {error}")
+        if message[0] == 'run':
+            # 运行没有发出去（如工作流无法序列化），对应的运行直接失败
+            self.loop.call_soon_threadsafe(self._dispatch, ('error', message[1], f"分发运行失败: {error}"))
+
+    def _read_messages(self):
+        while True:
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            self.loop.call_soon_threadsafe(self._dispatch, message)
+        self.loop.call_soon_threadsafe(self._on_exit)
+
+    def _dispatch(self, message: tuple):
+        remote = self.active.get(message[1])
+        if remote is not None:
+            remote._inbox.put_nowait(message)
+
+    def _on_exit(self):
+        """工作进程退出：未完成的运行全部失败"""
+        for run_id, remote in list(self.active.items()):
+            remote._inbox.put_nowait(('error', run_id, "工作进程已退出"))
+        self.active.clear()
+
+    def close(self):
+        self.send(('shutdown',))
+        self._sender.close(timeout=10)
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.terminate()
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class WorkerPool:
+    """工作进程池（首次分发运行时才启动进程）"""
+
+    def __init__(self, size: int = DEFAULT_WORKER_COUNT):
+        self.size = max(1, size)
+        self._workers: list[WorkerProcess] = []
+        self._next_index = 0
+
+    def acquire(self) -> WorkerProcess:
+        """选择正在执行的运行最少的工作进程，已退出的进程会被替换"""
+        loop = asyncio.get_running_loop()
+        self._workers = [w for w in self._workers if w.alive]
+        while len(self._workers) < self.size:
+            self._next_index += 1
+            self._workers.append(WorkerProcess(self._next_index, loop))
+        return min(self._workers, key=lambda w: len(w.active))
+
+    def stats(self) -> dict:
+        return {
+            'size': self.size,
+            'workers': [
+                {'pid': w.process.pid, 'alive': w.alive, 'activeRuns': len(w.active)}
+                for w in self._workers
+            ],
+        }
+
+    def close(self):
+        for worker in self._workers:
+            worker.close()
+        self._workers.clear()
+
+
+class RemoteExecutor:
+    """在工作进程中执行工作流，对外提供与 WorkflowExecutor 相同的执行、停止和查询接口"""
+
+    def __init__(
+        self,
+        pool: WorkerPool,
+        run_id: str,
+        workflow: Workflow,
+        on_log_batch: Optional[Callable[[list[dict]], Awaitable[None]]] = None,
+        on_data_row: Optional[Callable[[dict], Awaitable[None]]] = None,
+        on_node_start: Optional[Callable[[str], Awaitable[None]]] = None,
+        on_node_complete: Optional[Callable[[str, ModuleResult], Awaitable[None]]] = None,
+        on_variable_update: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+        export_data: bool = True,
+        export_format: str = 'excel',
+        **options: Any,
+    ):
+        self.pool = pool
+        self.run_id = run_id
+        self.workflow = workflow
+        self.on_log_batch = on_log_batch
+        self.on_data_row = on_data_row
+        self.on_node_start = on_node_start
+        self.on_node_complete = on_node_complete
+        self.on_variable_update = on_variable_update
+        self.export_data = export_data
+        self.export_format = export_format
+        self.options = options
+
+        self.is_running = False
+        self.should_stop = False
+        self.executed_nodes = 0
+        self.failed_nodes = 0
+        self._worker: Optional[WorkerProcess] = None
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._data = DataTable()
+
+    async def execute(self) -> ExecutionResult:
+        self.is_running = True
+        started_at = datetime.now()
+        worker = self.pool.acquire()
+        self._worker = worker
+        worker.active[self.run_id] = self
+        payload = {
+            'workflow': self.workflow.model_dump(mode='json'),
+            'options': self.options,
+            'export_data': self.export_data,
+            'export_format': self.export_format,
+            'events': [name for name, callback in (('node_start', self.on_node_start),
+                                                   ('node_complete', self.on_node_complete),
+                                                   ('variable_update', self.on_variable_update))
+                       if callback],
+        }
+        try:
+            worker.send(('run', self.run_id, payload))
+            while True:
+                message = await self._inbox.get()
+                kind = message[0]
+                if kind == 'logs':
+                    self.executed_nodes, self.failed_nodes = message[3], message[4]
+                    if self.on_log_batch:
+                        await self.on_log_batch(message[2])
+                elif kind == 'data_row':
+                    if self.on_data_row:
+                        await self.on_data_row(message[2])
+                elif kind in ('node_start', 'node_complete', 'variable_update'):
+                    await self._notify(kind, message)
+                elif kind == 'result':
+                    result = ExecutionResult.model_validate(message[2])
+                    self._data = message[3]
+                    break
+                elif kind == 'error':
+                    result = ExecutionResult(
+                        workflow_id=self.workflow.id,
+                        status=ExecutionStatus.FAILED,
+                        started_at=started_at,
+                        completed_at=datetime.now(),
+                        total_nodes=len(self.workflow.nodes),
+                        executed_nodes=self.executed_nodes,
+                        failed_nodes=self.failed_nodes,
+                        error_message=message[2],
+                    )
+                    break
+        finally:
+            worker.active.pop(self.run_id, None)
+            self.is_running = False
+        self.executed_nodes = result.executed_nodes
+        self.failed_nodes = result.failed_nodes
+        return result
+
+    async def _notify(self, kind: str, message: tuple):
+        """调用节点/变量事件回调（与 WorkflowExecutor 一样，回调出错不影响执行）"""
+        try:
+            if kind == 'node_start':
+                await self.on_node_start(message[2])
+            elif kind == 'node_complete':
+                await self.on_node_complete(message[2], ModuleResult(**message[3]))
+            else:
+                await self.on_variable_update(message[2], message[3])
+        except Exception as e:
+            print(f"通知{kind}失败: {e}")
+
+    async def stop(self):
+        self.should_stop = True
+        if self._worker is not None and self.is_running:
+            try:
+                self._worker.send(('stop', self.run_id))
+            except Exception as e:
+                print(f"发送停止命令失败: {e}")
+
+    def get_collected_data(self) -> DataTable:
+        return self._data
+
+
+# 进程内唯一的工作进程池（未开启时为 None）
+_pool: Optional[WorkerPool] = None
+
+
+def get_worker_pool() -> Optional[WorkerPool]:
+    return _pool
+
+
+async def configure_worker_pool(size: int) -> Optional[WorkerPool]:
+    """开启（size > 0）或关闭（size = 0）工作进程模式，旧的工作进程在后台线程中关闭"""
+    global _pool
+    old_pool = _pool
+    _pool = WorkerPool(size) if size > 0 else None
+    if old_pool is not None:
+        await asyncio.get_running_loop().run_in_executor(None, old_pool.close)
+    return _pool
+
+
+async def shutdown_worker_pool():
+    await configure_worker_pool(0)
@@ -1,9 +1,9 @@
 """工作流执行器 - 异步版本，支持真正的并行执行"""
 import asyncio
+import copy
 import time
 from datetime import datetime
 from typing import Optional, Callable, Awaitable
-from uuid import uuid4
 
 from app.models.workflow import (
     Workflow,
@@ -11,10 +11,55 @@ from app.models.workflow import (
     ExecutionResult,
     ExecutionStatus,
     LogLevel,
-    LogEntry,
 )
 from app.executors import ExecutionContext, ModuleResult, registry
-from app.services.workflow_parser import WorkflowParser, ExecutionGraph
+from app.executors.basic import launch_browser_context
+from app.services.workflow_parser import WorkflowParser, ExecutionGraph, ExecutionPlan
+from app.services.log_pipeline import LogPipeline, LogVerbosity
+from app.services.browser_pool import BrowserPool, BrowserLease
+from app.services.data_table import DataTable
+from app.services.data_sink import DataSink, open_sink, DEFAULT_BATCH_ROWS
+from app.services.db_pool import close_pools
+
+
+# 调度状态（按节点索引存放在 bytearray 中）
+NODE_IDLE = 0
+NODE_EXECUTING = 1
+NODE_EXECUTED = 2
+
+# 并行分支的上下文隔离方式
+BRANCH_SHARED = 'shared'        # 所有分支共享同一个执行上下文
+BRANCH_VARIABLES = 'variables'  # 每个分支使用独立的变量作用域和当前行，共享页面
+BRANCH_PAGE = 'page'            # 在 variables 基础上每个分支再使用独立页面
+
+# 汇合节点合并分支变量的策略（节点配置 mergePolicy）
+MERGE_LAST = 'last'        # 按分支完成顺序合并，后完成的覆盖先完成的
+MERGE_ORDERED = 'ordered'  # 按连线顺序合并，排在后面的分支覆盖前面的
+MERGE_COLLECT = 'collect'  # 多个分支修改了同一变量时，合并为按连线顺序排列的列表
+
+# 执行过程中推送到前端预览的最大数据行数
+MAX_PREVIEW_ROWS = 20
+
+# 需要浏览器页面的模块（并行遍历的循环体中没有这些模块时不为工作协程打开页面）
+PAGE_MODULE_TYPES = frozenset({
+    'open_page', 'click_element', 'hover_element', 'input_text', 'get_element_info', 'extract_list',
+    'wait_element', 'close_page', 'screenshot', 'refresh_page', 'go_back', 'go_forward', 'handle_dialog',
+    'select_dropdown', 'set_checkbox', 'drag_element', 'scroll_page', 'upload_file', 'download_file',
+    'save_image', 'keyboard_action', 'ocr_captcha', 'slider_captcha', 'ai_vision',
+    # 子流程中的节点不在循环体内，无法判断，按需要页面处理
+    'subflow',
+})
+
+
+def _node_needs_page(node: WorkflowNode) -> bool:
+    """节点执行时是否需要浏览器页面"""
+    if node.type in PAGE_MODULE_TYPES:
+        return True
+    if node.type == 'condition':
+        return node.data.get('conditionType', 'variable') in ('element_exists', 'element_visible')
+    if node.type == 'wait':
+        return node.data.get('waitType', 'time') != 'time'
+    return False
 
 
 class WorkflowExecutor:
@@ -23,23 +68,49 @@ class WorkflowExecutor:
     def __init__(
         self,
         workflow: Workflow,
-        on_log: Optional[Callable[[LogEntry], Awaitable[None]]] = None,
+        on_log_batch: Optional[Callable[[list[dict]], Awaitable[None]]] = None,
         on_node_start: Optional[Callable[[str], Awaitable[None]]] = None,
         on_node_complete: Optional[Callable[[str, ModuleResult], Awaitable[None]]] = None,
         on_variable_update: Optional[Callable[[str, any], Awaitable[None]]] = None,
         on_data_row: Optional[Callable[[dict], Awaitable[None]]] = None,
         headless: bool = False,
+        verbosity: LogVerbosity = LogVerbosity.NORMAL,
+        branch_isolation: str = BRANCH_SHARED,
+        browser_pool: Optional[BrowserPool] = None,
+        storage_state: Optional[str] = None,
+        save_storage_state: Optional[str] = None,
+        parameters: Optional[dict] = None,
+        spill_rows: Optional[int] = None,
+        spill_memory_mb: Optional[int] = None,
+        sink_options: Optional[dict] = None,
     ):
         self.workflow = workflow
-        self.on_log = on_log
+        self.parameters = parameters or {}  # 运行参数，覆盖同名的工作流变量
+        self.logs = LogPipeline(on_log_batch, verbosity=verbosity)
         self.on_node_start = on_node_start
         self.on_node_complete = on_node_complete
         self.on_variable_update = on_variable_update
         self.on_data_row = on_data_row
         self.headless = headless
+        self.branch_isolation = branch_isolation if branch_isolation in (
+            BRANCH_SHARED, BRANCH_VARIABLES, BRANCH_PAGE) else BRANCH_SHARED
+        
+        # 使用浏览器池时从池中借用隔离的无头浏览器上下文，不再为每次执行启动浏览器
+        self.browser_pool = browser_pool
+        self.storage_state = storage_state
+        self.save_storage_state = save_storage_state
+        self._browser_lease: Optional[BrowserLease] = None
         
         self.context = ExecutionContext(headless=headless)
+        # 增量写出：{'format', 'path', 'fsync', 'batchRows'}，执行开始时打开输出文件
+        self.sink_options = sink_options
+        self._sink: Optional[DataSink] = None
+        self._sink_failed = False
+        # 收集的数据超过阈值后溢出到磁盘（None 使用默认值，0 表示不限制）
+        self.context.data_rows.configure_spill(
+            spill_rows, spill_memory_mb * 1024 * 1024 if spill_memory_mb is not None else None)
         self.graph: Optional[ExecutionGraph] = None
+        self.plan: Optional[ExecutionPlan] = None
         self.is_running = False
         self.should_stop = False
         
@@ -49,42 +120,31 @@ class WorkflowExecutor:
         
         self._result: Optional[ExecutionResult] = None
         
-        # 并行执行相关
-        self._executed_node_ids: set[str] = set()
-        self._executing_node_ids: set[str] = set()
-        self._node_lock = asyncio.Lock()
-        self._pending_nodes: dict[str, set[str]] = {}
+        # 并行执行相关（按执行计划中的节点索引记录状态）
+        # 调度状态的读写都是同步完成的，在单个事件循环内不需要加锁
+        self._node_state = bytearray()
+        # 循环迭代纪元：每轮迭代开始时递增并记到循环节点上，
+        # 状态戳早于所在循环当前纪元的节点视为未执行，无需逐个清理
+        self._epoch = 0
+        self._node_stamp: list[int] = []
+        self._loop_epoch: list[int] = []
+        # 汇合节点 -> (纪元, 尚未完成的前驱数, 已到达的 (前驱, 分支上下文) 列表)
+        self._pending_nodes: dict[int, tuple[int, int, Optional[list]]] = {}
         self._last_data_rows_count = 0
         self._sent_data_rows_count = 0
         self._running_tasks: set[asyncio.Task] = set()  # 跟踪所有运行中的任务
+        self._children: set['WorkflowExecutor'] = set()  # 并行遍历中正在运行的子执行器
 
 
-    async def _log(self, level: LogLevel, message: str, node_id: Optional[str] = None, 
-                   details: Optional[dict] = None, duration: Optional[float] = None,
-                   is_user_log: bool = False, is_system_log: bool = False):
-        """记录日志"""
-        log_details = details.copy() if details else {}
-        log_details['is_user_log'] = is_user_log
-        log_details['is_system_log'] = is_system_log
-        
-        entry = LogEntry(
-            id=str(uuid4()),
-            timestamp=datetime.now(),
-            level=level,
-            node_id=node_id,
-            message=message,
-            details=log_details,
-            duration=duration,
-        )
-        if self.on_log:
-            try:
-                await self.on_log(entry)
-            except Exception as e:
-                print(f"发送日志失败: {e}")
+    def _log(self, level: LogLevel, message: str, node_id: Optional[str] = None, 
+             duration: Optional[float] = None,
+             is_user_log: bool = False, is_system_log: bool = False):
+        """记录日志（只写入日志管道缓冲区，由后台任务批量发送）"""
+        self.logs.submit(level, message, node_id=node_id, duration=duration,
+                         is_user_log=is_user_log, is_system_log=is_system_log)
     
     async def _send_data_row(self, row_data: dict):
         """发送数据行到前端"""
-        MAX_PREVIEW_ROWS = 20
         if self._sent_data_rows_count >= MAX_PREVIEW_ROWS:
             return
         if self.on_data_row:
@@ -94,6 +154,62 @@ class WorkflowExecutor:
                 print(f"发送数据行失败: {e}")
         self._sent_data_rows_count += 1
     
+    async def _flush_data_rows(self):
+        """把新增的数据行发送到前端预览"""
+        current_rows_count = len(self.context.data_rows)
+        if current_rows_count > self._last_data_rows_count:
+            # 只读取还需要预览的行，超出预览行数的部分不做行转换
+            remaining = MAX_PREVIEW_ROWS - self._sent_data_rows_count
+            if remaining > 0:
+                start = self._last_data_rows_count
+                for row in self.context.data_rows.rows(start, min(current_rows_count, start + remaining)):
+                    await self._send_data_row(row)
+            self._last_data_rows_count = current_rows_count
+    
+    def _open_sink(self):
+        """打开增量写出器，之后数据表追加的行随即写入文件"""
+        options = self.sink_options
+        # 警告在写出线程中产生，日志管道不是线程安全的，需要切回事件循环记录
+        loop = asyncio.get_running_loop()
+        self._sink = open_sink(
+            options['format'],
+            options.get('path') or None,
+            fsync=options.get('fsync') or 'batch',
+            batch_rows=int(options.get('batchRows') or DEFAULT_BATCH_ROWS),
+            on_warning=lambda message: loop.call_soon_threadsafe(
+                lambda: self._log(LogLevel.WARNING, message, is_system_log=True)),
+        )
+        self.context.data_rows.add_listener(self._write_sink)
+        self._log(LogLevel.INFO, f"📄 数据将实时写入: {self._sink.path}", is_system_log=True)
+    
+    def _write_sink(self, rows):
+        try:
+            self._sink.write(rows)
+        except Exception as e:
+            # 写出失败不影响执行，数据仍保留在数据表中，结束时照常导出；
+            # 写出器留到结束时关闭，由写出线程关闭文件
+            self.context.data_rows.remove_listener(self._write_sink)
+            self._sink_failed = True
+            self._log(LogLevel.ERROR, f"数据实时写入失败，已停止写入: {e}", is_system_log=True)
+    
+    async def _close_sink(self) -> Optional[str]:
+        """关闭增量写出器，返回供下载的数据文件（写出失败时返回 None）"""
+        sink, self._sink = self._sink, None
+        if sink is None:
+            return None
+        self.context.data_rows.remove_listener(self._write_sink)
+        try:
+            # 等待写出线程写完剩余的行（parquet 还要打包），不阻塞事件循环
+            await asyncio.to_thread(sink.close)
+        except Exception as e:
+            if not self._sink_failed:
+                self._log(LogLevel.ERROR, f"数据实时写入失败: {e}", is_system_log=True)
+            return None
+        if self._sink_failed:
+            return None
+        self._log(LogLevel.INFO, f"📄 已实时写入 {sink.rows_written} 行数据: {sink.path}", is_system_log=True)
+        return sink.data_file
+    
     async def _notify_node_start(self, node_id: str):
         """通知节点开始执行"""
         if self.on_node_start:
@@ -118,32 +234,51 @@ class WorkflowExecutor:
             except Exception as e:
                 print(f"通知变量更新失败: {e}")
 
-    async def _execute_parallel(self, node_ids: list[str]):
+    def _reset_epoch(self, idx: int) -> int:
+        """节点状态的失效纪元（所在各层循环中最近一次迭代开始的纪元）"""
+        loops = self.plan.enclosing_loops[idx]
+        if not loops:
+            return 0
+        if len(loops) == 1:
+            return self._loop_epoch[loops[0]]
+        return max(self._loop_epoch[loop_idx] for loop_idx in loops)
+    
+    def _get_state(self, idx: int) -> int:
+        if self._node_stamp[idx] < self._reset_epoch(idx):
+            return NODE_IDLE
+        return self._node_state[idx]
+    
+    def _set_state(self, idx: int, value: int):
+        self._node_state[idx] = value
+        self._node_stamp[idx] = self._epoch
+    
+    def _begin_loop_iteration(self, loop_idx: int):
+        """开始新一轮迭代：循环体内的节点状态和汇合计数随纪元一并失效"""
+        self._epoch += 1
+        self._loop_epoch[loop_idx] = self._epoch
+    
+    async def _execute_parallel(self, node_ids: list[int], context: Optional[ExecutionContext] = None):
         """并行执行多个节点分支"""
         if not node_ids or self.should_stop:
             return
+        context = context or self.context
         
-        async with self._node_lock:
-            nodes_to_execute = [
-                nid for nid in node_ids 
-                if nid not in self._executed_node_ids and nid not in self._executing_node_ids
-            ]
-            if not nodes_to_execute:
-                return
-            for nid in nodes_to_execute:
-                self._executing_node_ids.add(nid)
+        nodes_to_execute = [idx for idx in node_ids if self._get_state(idx) == NODE_IDLE]
+        if not nodes_to_execute:
+            return
+        for idx in nodes_to_execute:
+            self._set_state(idx, NODE_EXECUTING)
         
-        # 调试：打印要执行的节点
-        for nid in nodes_to_execute:
-            node = self.graph.get_node(nid)
-            if node:
+        if self.logs.debug_enabled:
+            for idx in nodes_to_execute:
+                node = self.plan.nodes[idx]
                 label = node.data.get('label', node.type)
-                print(f"[DEBUG] 准备执行节点: {nid} ({node.type}: {label})")
+                self.logs.debug(f"准备执行节点: {node.id} ({node.type}: {label})")
         
         if len(nodes_to_execute) == 1:
             if self.should_stop:
                 return
-            task = asyncio.create_task(self._execute_from_node(nodes_to_execute[0]))
+            task = asyncio.create_task(self._execute_from_node(nodes_to_execute[0], context))
             self._running_tasks.add(task)
             try:
                 await task
@@ -152,12 +287,20 @@ class WorkflowExecutor:
             finally:
                 self._running_tasks.discard(task)
         else:
-            await self._log(LogLevel.INFO, f"🔀 检测到 {len(nodes_to_execute)} 个分支，并行执行...")
+            self._log(LogLevel.INFO, f"🔀 检测到 {len(nodes_to_execute)} 个分支，并行执行...")
+            isolated = self.branch_isolation != BRANCH_SHARED
+            if self.branch_isolation == BRANCH_PAGE:
+                try:
+                    await self._ensure_shared_browser(context)
+                except Exception as e:
+                    self._log(LogLevel.WARNING, f"启动浏览器失败，分支将共享当前页面: {e}")
+            
             tasks = []
-            for node_id in nodes_to_execute:
+            for idx in nodes_to_execute:
                 if self.should_stop:
                     break
-                task = asyncio.create_task(self._execute_from_node(node_id))
+                branch_context = await self._fork_branch(context) if isolated else context
+                task = asyncio.create_task(self._execute_from_node(idx, branch_context))
                 self._running_tasks.add(task)
                 tasks.append(task)
             
@@ -170,96 +313,237 @@ class WorkflowExecutor:
                     for task in tasks:
                         self._running_tasks.discard(task)
             
+            if isolated:
+                # 没有在汇合节点合并的分支（包括汇合后派生的上下文），结束后合并回当前上下文
+                await self._merge_branches(context)
+            
             if not self.should_stop:
-                await self._log(LogLevel.INFO, f"🔀 {len(nodes_to_execute)} 个分支执行完成")
+                self._log(LogLevel.INFO, f"🔀 {len(nodes_to_execute)} 个分支执行完成")
     
-    async def _execute_from_node(self, node_id: str):
+    async def _execute_from_node(self, idx: int, context: ExecutionContext):
         """从指定节点开始执行"""
         if self.should_stop:
             return
         
-        async with self._node_lock:
-            if node_id in self._executed_node_ids:
-                return
-            self._executing_node_ids.add(node_id)
-        
-        node = self.graph.get_node(node_id)
-        if not node:
-            async with self._node_lock:
-                self._executing_node_ids.discard(node_id)
+        if self._get_state(idx) == NODE_EXECUTED:
             return
+        self._set_state(idx, NODE_EXECUTING)
         
-        result = await self._execute_node(node)
+        node = self.plan.nodes[idx]
+        result = await self._execute_node(node, context)
         
-        async with self._node_lock:
-            self._executed_node_ids.add(node_id)
-            self._executing_node_ids.discard(node_id)
+        self._set_state(idx, NODE_EXECUTED)
         
         if self.should_stop:
             return
         
-        if self.context.should_break:
+        if context.should_break:
             return
         
-        if self.context.should_continue:
+        if context.should_continue:
             return
         
-        if result and result.branch:
-            next_nodes = self.graph.get_next_nodes(node_id, result.branch)
-        else:
-            next_nodes = self.graph.get_next_nodes(node_id)
-        
         # 如果节点执行失败，不继续执行后续节点（除非是非关键节点）
         if result and not result.success:
             # 对于浏览器相关的关键节点，失败后不继续
             if node.type in ('open_page', 'click_element', 'input_text', 'wait_element', 'select_dropdown'):
-                print(f"[DEBUG] 关键节点 {node.type} 失败，停止后续执行")
+                self.logs.debug(f"关键节点 {node.type} 失败，停止后续执行")
                 return
         
         if node.type in ('loop', 'foreach'):
-            body_nodes = self.graph.get_loop_body_nodes(node_id)
-            done_nodes = self.graph.get_loop_done_nodes(node_id)
-            await self._handle_loop(node, body_nodes, done_nodes)
+            await self._handle_loop(node, self.plan.loop_body(idx), self.plan.loop_done(idx), context)
         else:
-            await self._notify_successors(next_nodes, node_id)
+            next_nodes = self.plan.next_nodes(idx, result.branch if result else None)
+            await self._notify_successors(next_nodes, idx, context)
 
 
-    async def _notify_successors(self, next_nodes: list[str], completed_node_id: str):
+    async def _notify_successors(self, next_nodes: tuple[int, ...], completed_idx: int,
+                                 context: ExecutionContext):
         """通知后继节点当前节点已完成"""
         if not next_nodes or self.should_stop:
             return
         
-        nodes_ready_to_execute = []
+        # 按执行上下文分组的就绪节点：id(上下文) -> (上下文, 节点列表)
+        ready_groups: dict[int, tuple[ExecutionContext, list[int]]] = {}
+        waiting_counts = []
+        in_degree = self.plan.in_degree
+        isolated = self.branch_isolation != BRANCH_SHARED
         
-        async with self._node_lock:
-            for next_id in next_nodes:
-                if next_id in self._executed_node_ids or next_id in self._executing_node_ids:
-                    continue
-                
-                prev_nodes = self.graph.get_prev_nodes(next_id)
-                
-                if len(prev_nodes) <= 1:
-                    nodes_ready_to_execute.append(next_id)
-                    continue
-                
-                if next_id not in self._pending_nodes:
-                    self._pending_nodes[next_id] = set(
-                        pid for pid in prev_nodes if pid not in self._executed_node_ids
-                    )
-                
-                self._pending_nodes[next_id].discard(completed_node_id)
-                
-                if len(self._pending_nodes[next_id]) == 0:
-                    nodes_ready_to_execute.append(next_id)
-                    del self._pending_nodes[next_id]
-                else:
-                    remaining = len(self._pending_nodes[next_id])
-                    await self._log(LogLevel.INFO, f"⏳ 等待汇合: 还有 {remaining} 个前驱分支未完成")
-        
-        if nodes_ready_to_execute:
-            await self._execute_parallel(nodes_ready_to_execute)
+        for next_idx in next_nodes:
+            if self._get_state(next_idx) != NODE_IDLE:
+                continue
+            
+            if in_degree[next_idx] <= 1:
+                ready_groups.setdefault(id(context), (context, []))[1].append(next_idx)
+                continue
+            
+            pending = self._pending_nodes.get(next_idx)
+            if pending is None or pending[0] < self._reset_epoch(next_idx):
+                # 本轮首次到达汇合点：统计尚未完成的前驱（当前节点已标记为完成，不计入）
+                remaining = sum(
+                    1 for pid in self.plan.predecessors[next_idx]
+                    if self._get_state(pid) != NODE_EXECUTED
+                )
+                arrivals = [] if isolated else None
+            else:
+                remaining = pending[1] - 1
+                arrivals = pending[2]
+            if arrivals is not None:
+                arrivals.append((completed_idx, context))
+            
+            if remaining <= 0:
+                self._pending_nodes.pop(next_idx, None)
+                join_context = self._merge_join(next_idx, arrivals) if arrivals else context
+                ready_groups.setdefault(id(join_context), (join_context, []))[1].append(next_idx)
+            else:
+                self._pending_nodes[next_idx] = (self._epoch, remaining, arrivals)
+                waiting_counts.append(remaining)
+        
+        for remaining in waiting_counts:
+            self._log(LogLevel.INFO, f"⏳ 等待汇合: 还有 {remaining} 个前驱分支未完成")
+        
+        if len(ready_groups) == 1:
+            ready_context, ready_nodes = next(iter(ready_groups.values()))
+            await self._execute_parallel(ready_nodes, ready_context)
+        elif ready_groups:
+            await asyncio.gather(*(
+                self._execute_parallel(ready_nodes, ready_context)
+                for ready_context, ready_nodes in ready_groups.values()
+            ))
+    
+    async def _fork_branch(self, parent: ExecutionContext) -> ExecutionContext:
+        """为并行分支派生执行上下文（共享数据行列表，BRANCH_PAGE 模式下打开独占页面）"""
+        page = parent.page
+        owned_page = None
+        if self.branch_isolation == BRANCH_PAGE and parent.browser_context is not None:
+            try:
+                owned_page = page = await parent.browser_context.new_page()
+            except Exception as e:
+                self._log(LogLevel.WARNING, f"为分支打开页面失败，将共享当前页面: {e}")
+        branch = parent.fork(page=page, data_rows=parent.data_rows)
+        branch._owned_page = owned_page
+        parent._branches.append(branch)
+        return branch
+    
+    @staticmethod
+    def _branch_changes(branch: ExecutionContext, target: ExecutionContext) -> tuple[dict, set]:
+        """分支相对祖先上下文 target 的变量变更（沿派生链自上而下叠加）"""
+        chain = []
+        current = branch
+        while current is not None and current is not target:
+            chain.append(current)
+            current = current._parent
+        updated: dict = {}
+        removed: set = set()
+        for ctx in reversed(chain):
+            changes = getattr(ctx.variables, 'changes', None)
+            if changes is None:
+                continue
+            ctx_updated, ctx_removed = changes()
+            for name in ctx_removed:
+                updated.pop(name, None)
+            removed -= ctx_updated.keys()
+            removed |= ctx_removed
+            updated.update(ctx_updated)
+        return updated, removed
+    
+    @staticmethod
+    def _common_ancestor(contexts: list[ExecutionContext]) -> Optional[ExecutionContext]:
+        """多个分支上下文的最近公共祖先（包括自身）"""
+        chain = []
+        current = contexts[0]
+        while current is not None:
+            chain.append(current)
+            current = current._parent
+        for other in contexts[1:]:
+            ancestors = set()
+            current = other
+            while current is not None:
+                ancestors.add(id(current))
+                current = current._parent
+            chain = [ctx for ctx in chain if id(ctx) in ancestors]
+        return chain[0] if chain else None
+    
+    def _merge_join(self, join_idx: int, arrivals: list[tuple[int, ExecutionContext]]) -> ExecutionContext:
+        """汇合节点就绪：按节点的合并策略把各分支的变更合并到一个新的汇合上下文"""
+        contexts = {id(ctx): ctx for _, ctx in arrivals}
+        if len(contexts) == 1:
+            return arrivals[0][1]
+        
+        target = self._common_ancestor(list(contexts.values())) or self.context
+        join_node = self.plan.nodes[join_idx]
+        policy = join_node.data.get('mergePolicy') or MERGE_LAST
+        if policy != MERGE_LAST:
+            order = {pid: i for i, pid in enumerate(self.plan.predecessors[join_idx])}
+            arrivals = sorted(arrivals, key=lambda arrival: order.get(arrival[0], len(order)))
+        
+        join_context = target.fork(page=target.page, data_rows=target.data_rows)
+        target._branches.append(join_context)
+        
+        merged: list[ExecutionContext] = []
+        for _, ctx in arrivals:
+            if ctx is not target and not ctx._merged and all(ctx is not m for m in merged):
+                merged.append(ctx)
+        
+        if policy == MERGE_COLLECT:
+            values: dict[str, list] = {}
+            removed: set = set()
+            for ctx in merged:
+                ctx_updated, ctx_removed = self._branch_changes(ctx, target)
+                for name, value in ctx_updated.items():
+                    values.setdefault(name, []).append(value)
+                removed |= ctx_removed
+            join_context.merge_variables(
+                {name: vals[0] if len(vals) == 1 else vals for name, vals in values.items()},
+                removed - values.keys(),
+            )
+        else:
+            for ctx in merged:
+                join_context.merge_variables(*self._branch_changes(ctx, target))
+        
+        for ctx in merged:
+            self._release_branch(join_context, ctx)
+        
+        self._log(LogLevel.INFO, f"🔗 汇合 {len(merged)} 个分支的变量（策略: {policy}）", node_id=join_node.id)
+        return join_context
+    
+    def _release_branch(self, target: ExecutionContext, branch: ExecutionContext):
+        """分支合并后：把当前行、跳出标志和浏览器交还给目标上下文"""
+        branch._merged = True
+        for column, value in branch.current_row.items():
+            target.add_data_value(column, value)
+        branch.current_row = {}
+        if branch.should_break:
+            target.should_break = True
+        
+        if target.browser_context is None and branch.browser_context is not None:
+            # 分支中才打开的浏览器
+            target.browser = branch.browser
+            target.browser_context = branch.browser_context
+            target.page = branch.page
+        elif branch._owned_page is None and branch.page is not None:
+            # 共享页面模式下分支可能切换了标签页
+            target.page = branch.page
+        
+        if branch._owned_page is not None:
+            pages = {branch._owned_page, branch.page} - {target.page, None}
+            branch._owned_page = None
+            for page in pages:
+                task = asyncio.create_task(page.close())
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    
+    async def _merge_branches(self, parent: ExecutionContext):
+        """把尚未合并的分支上下文按派生顺序合并回父上下文"""
+        branches, parent._branches = parent._branches, []
+        for branch in branches:
+            if branch._merged:
+                continue
+            updated, removed = self._branch_changes(branch, parent)
+            if updated or removed:
+                parent.merge_variables(updated, removed)
+            self._release_branch(parent, branch)
 
-    async def _execute_node(self, node: WorkflowNode) -> Optional[ModuleResult]:
+    async def _execute_node(self, node: WorkflowNode, context: ExecutionContext) -> Optional[ModuleResult]:
         """执行单个节点"""
         if self.should_stop:
             return None
@@ -273,35 +557,36 @@ class WorkflowExecutor:
             return ModuleResult(success=True, message=f"已跳过（禁用）")
         
         label = node.data.get('label', node.type)
-        print(f"[DEBUG] 开始执行节点: {node.id} ({node.type}: {label})")
+        if self.logs.debug_enabled:
+            self.logs.debug(f"开始执行节点: {node.id} ({node.type}: {label})")
         
         await self._notify_node_start(node.id)
         
         executor = registry.get(node.type)
         if not executor:
-            print(f"[DEBUG] 未找到执行器: {node.type}")
-            await self._log(LogLevel.WARNING, f"未知的模块类型: {node.type}", node_id=node.id)
+            self._log(LogLevel.WARNING, f"未知的模块类型: {node.type}", node_id=node.id)
             return ModuleResult(success=True, message=f"跳过未知模块: {node.type}")
         
         config = node.data.get('config', None)
         if config is None:
             # 配置直接在 node.data 中，而不是在 config 子字段
             config = node.data
-        print(f"[DEBUG] 节点配置: {config}")
+        if self.logs.debug_enabled:
+            self.logs.debug(f"节点配置: {config}")
         
         start_time = time.time()
         
         try:
-            print(f"[DEBUG] 调用执行器: {node.type}")
-            result = await executor.execute(config, self.context)
-            print(f"[DEBUG] 执行器返回: success={result.success}, message={result.message}, error={result.error}")
+            result = await executor.execute(config, context)
+            if self.logs.debug_enabled:
+                self.logs.debug(f"执行器返回: success={result.success}, message={result.message}, error={result.error}")
             
             # 处理子流程调用
             if node.type == 'subflow' and result.success and result.data:
                 subflow_group_id = result.data.get('subflow_group_id')
                 subflow_name = config.get('subflowName', '')
                 if subflow_group_id:
-                    subflow_result = await self._execute_subflow_group(subflow_group_id, subflow_name)
+                    subflow_result = await self._execute_subflow_group(subflow_group_id, subflow_name, context)
                     if not subflow_result.success:
                         result = subflow_result
             
@@ -318,19 +603,14 @@ class WorkflowExecutor:
                                  'error': LogLevel.ERROR, 'success': LogLevel.SUCCESS}
                     log_level = level_map.get(result.log_level, LogLevel.INFO)
                 
-                await self._log(log_level, f"[{label}] {result.message}", 
+                self._log(log_level, f"[{label}] {result.message}", 
                                node_id=node.id, duration=duration, is_user_log=is_user_log)
             else:
                 self.failed_nodes += 1
-                print(f"[ERROR] 节点失败: {label} - {result.error}")
-                await self._log(LogLevel.ERROR, f"[{label}] {result.error}", 
+                self._log(LogLevel.ERROR, f"[{label}] {result.error}", 
                                node_id=node.id, duration=duration)
             
-            current_rows_count = len(self.context.data_rows)
-            if current_rows_count > self._last_data_rows_count:
-                for i in range(self._last_data_rows_count, current_rows_count):
-                    await self._send_data_row(self.context.data_rows[i])
-                self._last_data_rows_count = current_rows_count
+            await self._flush_data_rows()
             
             await self._notify_node_complete(node.id, result)
             return result
@@ -342,7 +622,7 @@ class WorkflowExecutor:
             error_msg = f"执行异常: {str(e)}"
             print(f"[ERROR] 节点 {node.id} ({label}) 执行失败: {e}")
             traceback.print_exc()
-            await self._log(LogLevel.ERROR, f"[{label}] {error_msg}", node_id=node.id, duration=duration)
+            self._log(LogLevel.ERROR, f"[{label}] {error_msg}", node_id=node.id, duration=duration)
             result = ModuleResult(success=False, error=error_msg, duration=duration)
             await self._notify_node_complete(node.id, result)
             return result
@@ -400,7 +680,8 @@ class WorkflowExecutor:
         
         return subflow_node_ids
 
-    async def _execute_subflow_group(self, group_id: str, subflow_name: str = None) -> ModuleResult:
+    async def _execute_subflow_group(self, group_id: str, subflow_name: str = None,
+                                     context: Optional[ExecutionContext] = None) -> ModuleResult:
         """执行子流程分组内的模块"""
         # 找到子流程分组 - 优先通过名称查找（因为导入后 ID 会变），ID 作为备用
         group_node = None
@@ -426,7 +707,7 @@ class WorkflowExecutor:
             return ModuleResult(success=False, error=error_msg)
         
         subflow_name = group_node.data.get('subflowName', '子流程')
-        await self._log(LogLevel.INFO, f"📦 开始执行子流程 [{subflow_name}]", is_system_log=True)
+        self._log(LogLevel.INFO, f"📦 开始执行子流程 [{subflow_name}]", is_system_log=True)
         
         # 获取分组的位置和大小
         # 优先从 data 属性获取宽高（前端 NodeResizer 保存的），其次从 style 属性获取
@@ -442,9 +723,7 @@ class WorkflowExecutor:
         group_width = self._parse_dimension(group_width, 300)
         group_height = self._parse_dimension(group_height, 200)
         
-        # 调试：打印分组范围
-        print(f"[DEBUG] 子流程分组范围: x={group_x}, y={group_y}, width={group_width}, height={group_height}")
-        print(f"[DEBUG] 分组 data.width={group_node.data.get('width')}, data.height={group_node.data.get('height')}")
+        self.logs.debug(f"子流程分组范围: x={group_x}, y={group_y}, width={group_width}, height={group_height}")
         
         # 找出在分组范围内的所有节点
         nodes_in_group = []
@@ -460,12 +739,9 @@ class WorkflowExecutor:
             if (group_x <= node_x <= group_x + group_width and
                 group_y <= node_y <= group_y + group_height):
                 nodes_in_group.append(node)
-                print(f"[DEBUG] 节点在分组内: {node.id} ({node.type}) at ({node_x}, {node_y})")
-            else:
-                print(f"[DEBUG] 节点不在分组内: {node.id} ({node.type}) at ({node_x}, {node_y})")
         
         if not nodes_in_group:
-            await self._log(LogLevel.WARNING, f"📦 子流程 [{subflow_name}] 为空", is_system_log=True)
+            self._log(LogLevel.WARNING, f"📦 子流程 [{subflow_name}] 为空", is_system_log=True)
             return ModuleResult(success=True, message=f"子流程 [{subflow_name}] 为空")
         
         # 找出子流程内的起始节点（没有入边的节点）
@@ -499,12 +775,12 @@ class WorkflowExecutor:
                 continue
             
             # 执行节点
-            result = await self._execute_node(node)
+            result = await self._execute_node(node, context or self.context)
             executed_ids.add(node_id)
             executed_count += 1
             
             if result and not result.success:
-                await self._log(LogLevel.ERROR, f"📦 子流程 [{subflow_name}] 执行失败", is_system_log=True)
+                self._log(LogLevel.ERROR, f"📦 子流程 [{subflow_name}] 执行失败", is_system_log=True)
                 return ModuleResult(success=False, error=f"子流程执行失败: {result.error}")
             
             # 获取下一个节点（只在子流程范围内）
@@ -517,19 +793,26 @@ class WorkflowExecutor:
                 if next_id in node_ids_in_group and next_id not in executed_ids:
                     to_execute.append(next_id)
         
-        await self._log(LogLevel.INFO, f"📦 子流程 [{subflow_name}] 执行完成，共执行 {executed_count} 个节点", is_system_log=True)
+        self._log(LogLevel.INFO, f"📦 子流程 [{subflow_name}] 执行完成，共执行 {executed_count} 个节点", is_system_log=True)
         return ModuleResult(success=True, message=f"子流程 [{subflow_name}] 执行完成")
 
 
-    async def _handle_loop(self, loop_node: WorkflowNode, body_nodes: list[str], done_nodes: list[str]):
+    async def _handle_loop(self, loop_node: WorkflowNode, body_nodes: tuple[int, ...], done_nodes: tuple[int, ...],
+                           context: ExecutionContext):
         """处理循环执行"""
-        if not self.context.loop_stack:
-            await self._notify_successors(done_nodes, loop_node.id)
+        loop_idx = self.plan.index[loop_node.id]
+        if not context.loop_stack:
+            await self._notify_successors(done_nodes, loop_idx, context)
             return
         
-        loop_state = self.context.loop_stack[-1]
+        loop_state = context.loop_stack[-1]
         loop_type = loop_state['type']
         
+        if (loop_type == 'foreach' and loop_state.get('workers', 1) > 1
+                and (len(loop_state['data']) > 1 or 'stream' in loop_state)):
+            # 并行遍历结束后 current_index 已指向末尾，下面的顺序循环不会再执行
+            await self._run_parallel_foreach(loop_idx, body_nodes, loop_state, context)
+        
         while not self.should_stop:
             should_continue = False
             
@@ -541,98 +824,302 @@ class WorkflowExecutor:
                 step_value = loop_state['step_value']
                 should_continue = current <= end_value if step_value > 0 else current >= end_value
             elif loop_type == 'while':
-                condition_value = self.context.get_variable(loop_state['condition'], False)
+                condition_value = context.get_variable(loop_state['condition'], False)
                 should_continue = bool(condition_value)
             elif loop_type == 'foreach':
-                should_continue = loop_state['current_index'] < len(loop_state['data'])
+                should_continue = await self._foreach_has_item(loop_state)
             
             if not should_continue:
                 break
             
-            self.context.should_continue = False
+            context.should_continue = False
             
             if body_nodes:
-                async with self._node_lock:
-                    for nid in body_nodes:
-                        self._executed_node_ids.discard(nid)
-                        self._executing_node_ids.discard(nid)
-                
-                all_body_nodes = await self._collect_loop_body_nodes(body_nodes)
-                async with self._node_lock:
-                    for nid in all_body_nodes:
-                        self._executed_node_ids.discard(nid)
-                        self._executing_node_ids.discard(nid)
-                        # 清除待处理节点的前驱等待状态
-                        if nid in self._pending_nodes:
-                            del self._pending_nodes[nid]
-                
-                await self._execute_parallel(body_nodes)
+                self._begin_loop_iteration(loop_idx)
+                await self._execute_parallel(body_nodes, context)
             
-            if self.context.should_break:
-                self.context.should_break = False
+            if context.should_break:
+                context.should_break = False
                 break
             
             if loop_type == 'count':
                 loop_state['current_index'] += 1
-                self.context.set_variable(loop_state['index_variable'], loop_state['current_index'])
+                context.set_variable(loop_state['index_variable'], loop_state['current_index'])
             elif loop_type == 'range':
                 loop_state['current_index'] += loop_state['step_value']
-                self.context.set_variable(loop_state['index_variable'], loop_state['current_index'])
+                context.set_variable(loop_state['index_variable'], loop_state['current_index'])
             elif loop_type == 'foreach':
                 loop_state['current_index'] += 1
-                if loop_state['current_index'] < len(loop_state['data']):
-                    self.context.set_variable(loop_state['item_variable'], 
-                                              loop_state['data'][loop_state['current_index']])
-                    self.context.set_variable(loop_state['index_variable'], loop_state['current_index'])
+                if await self._foreach_has_item(loop_state):
+                    offset = loop_state['current_index'] - loop_state.get('base_index', 0)
+                    context.set_variable(loop_state['item_variable'], loop_state['data'][offset])
+                    context.set_variable(loop_state['index_variable'], loop_state['current_index'])
         
-        if self.context.loop_stack:
-            self.context.loop_stack.pop()
+        if context.loop_stack:
+            finished_state = context.loop_stack.pop()
+            # 提前跳出或被停止时流式结果没有读完，关闭以归还数据库连接
+            stream = finished_state.get('stream')
+            if stream is not None:
+                await stream.close()
         
         if done_nodes and not self.should_stop:
-            await self._execute_parallel(done_nodes)
+            await self._execute_parallel(done_nodes, context)
 
-    async def _collect_loop_body_nodes(self, start_nodes: list[str]) -> set[str]:
-        """收集循环体内的所有节点（包括条件分支的所有路径）"""
-        collected = set()
-        to_visit = list(start_nodes)
-        
-        while to_visit:
-            node_id = to_visit.pop(0)
-            if node_id in collected:
-                continue
-            collected.add(node_id)
-            
-            node = self.graph.get_node(node_id)
-            if not node:
-                continue
-            
-            # 获取所有后继节点
-            next_nodes = []
-            
-            # 如果是条件节点，获取所有分支
-            if node.type == 'condition':
-                if node_id in self.graph.condition_branches:
-                    for branch_target in self.graph.condition_branches[node_id].values():
-                        if branch_target:
-                            next_nodes.append(branch_target)
-            # 如果是循环节点，获取循环体和完成分支
-            elif node.type in ('loop', 'foreach'):
-                if node_id in self.graph.loop_branches:
-                    for branch_targets in self.graph.loop_branches[node_id].values():
-                        next_nodes.extend(branch_targets)
-            else:
-                # 普通节点，获取默认后继
-                next_nodes = self.graph.get_next_nodes(node_id)
-            
-            for next_id in next_nodes:
-                if next_id not in collected:
-                    to_visit.append(next_id)
-        
-        return collected
+    async def _next_foreach_batch(self, loop_state: dict) -> bool:
+        """流式遍历：当前批次用完后读取下一批（只保留一批），返回是否还有数据"""
+        stream = loop_state.get('stream')
+        if stream is None:
+            return False
+        loop_state['base_index'] += len(loop_state['data'])
+        loop_state['data'] = []
+        try:
+            loop_state['data'] = await stream.next_batch()
+        except Exception as e:
+            self.failed_nodes += 1
+            self._log(LogLevel.ERROR, f"读取查询结果失败: {e}")
+        return len(loop_state['data']) > 0
+    
+    async def _foreach_has_item(self, loop_state: dict) -> bool:
+        """遍历的当前项是否存在"""
+        offset = loop_state['current_index'] - loop_state.get('base_index', 0)
+        if offset < len(loop_state['data']):
+            return True
+        return await self._next_foreach_batch(loop_state)
 
+    def _spawn_child(self, context: ExecutionContext) -> 'WorkflowExecutor':
+        """创建子执行器：共享工作流、执行计划、回调和日志管道，调度状态独立
+        
+        每次迭代都要创建，不走完整的构造函数（会新建日志管道、执行上下文和数据表），
+        浅拷贝当前执行器后重置执行状态即可。
+        """
+        child = copy.copy(self)
+        child.context = context
+        # 数据行由父执行器合并和推送，浏览器租借、增量写出和登录状态也归父执行器管理
+        child.on_data_row = None
+        child.browser_pool = None
+        child._browser_lease = None
+        child.save_storage_state = None
+        child.sink_options = None
+        child._sink = None
+        child._sink_failed = False
+        child._result = None
+        child.is_running = True
+        child.should_stop = False
+        child.executed_nodes = 0
+        child.failed_nodes = 0
+        child._node_state = bytearray(len(self.plan))
+        child._epoch = 0
+        child._node_stamp = [0] * len(self.plan)
+        child._loop_epoch = [0] * len(self.plan)
+        child._pending_nodes = {}
+        child._last_data_rows_count = 0
+        child._sent_data_rows_count = 0
+        child._running_tasks = set()
+        child._children = set()
+        return child
+    
+    async def _ensure_shared_browser(self, context: ExecutionContext):
+        """派生工作页面前确保有可以打开新页面的浏览器上下文
+        
+        与打开网页模块一样启动浏览器（有用户数据目录时为持久化上下文），并设置到主上下文上，
+        之后的节点和执行结束时的清理都使用同一个浏览器。
+        """
+        if context.browser_context is not None or context._playwright is None:
+            return
+        root = context
+        while root._parent is not None:
+            root = root._parent
+        if root.browser_context is None:
+            await launch_browser_context(root, headless=self.headless)
+        context.browser = root.browser
+        context.browser_context = root.browser_context
+    
+    async def _open_worker_page(self, isolation: str, context: ExecutionContext):
+        """为并行遍历的工作协程打开页面，返回 (页面, 独占的浏览器上下文)
+        
+        isolation 为 'context' 时每个工作协程使用独立的浏览器上下文（Cookie、存储互不影响），
+        持久化浏览器无法派生新上下文，此时退化为在共享上下文中新开页面。
+        """
+        if isolation == 'context' and context.browser is not None:
+            browser_context = await context.browser.new_context()
+            return await browser_context.new_page(), browser_context
+        if context.browser_context is not None:
+            return await context.browser_context.new_page(), None
+        return None, None
+    
+    async def _run_parallel_foreach(self, loop_idx: int, body_nodes: tuple[int, ...], loop_state: dict,
+                                    context: ExecutionContext):
+        """数据并行遍历：多个工作页面同时执行循环体
+        
+        每个工作协程持有一个独立页面，依次领取下一项数据；每次迭代都在派生的子上下文中
+        执行（独立变量作用域和数据行），迭代中收集的数据行按数据顺序合并回主上下文。
+        迭代中修改的变量不会写回主上下文。数据源为流式查询结果时，当前批次领完后才读取下一批。
+        """
+        data = loop_state['data']
+        total = len(data)
+        stream = loop_state.get('stream')
+        workers = loop_state['workers'] if stream is not None else min(loop_state['workers'], total)
+        isolation = loop_state.get('isolation', 'page')
+        item_variable = loop_state['item_variable']
+        index_variable = loop_state['index_variable']
+        
+        # 循环体不操作页面时（如只调用接口、处理数据）不启动浏览器，也不为工作协程打开页面
+        needs_page = any(_node_needs_page(self.plan.nodes[idx])
+                         for idx in self.plan.loop_closures.get(loop_idx, body_nodes))
+        if needs_page:
+            try:
+                await self._ensure_shared_browser(context)
+            except Exception as e:
+                self._log(LogLevel.WARNING, f"启动浏览器失败，并行遍历将不使用页面: {e}")
+        
+        if not needs_page:
+            unit = '工作协程'
+        elif isolation == 'context':
+            unit = '浏览器上下文'
+        else:
+            unit = '页面'
+        if stream is not None:
+            self._log(LogLevel.INFO, f"⚡ 并行遍历流式查询结果，使用 {workers} 个{unit}")
+        else:
+            self._log(LogLevel.INFO, f"⚡ 并行遍历 {total} 项，使用 {workers} 个{unit}")
+        
+        next_index = 0
+        merged_index = 0
+        finished: dict[int, DataTable] = {}
+        stop_dispatch = False
+        last_item = data[0] if data else None
+        take_lock = asyncio.Lock()
+        
+        async def take_next():
+            """领取下一项，返回 (序号, 数据)，没有更多数据时返回 None"""
+            nonlocal next_index, last_item
+            async with take_lock:
+                if stop_dispatch or self.should_stop:
+                    return None
+                offset = next_index - loop_state.get('base_index', 0)
+                if offset >= len(loop_state['data']):
+                    if not await self._next_foreach_batch(loop_state):
+                        return None
+                    offset = 0
+                index = next_index
+                next_index += 1
+                last_item = loop_state['data'][offset]
+                return index, last_item
+        
+        def merge_finished():
+            nonlocal merged_index
+            while merged_index in finished:
+                context.data_rows.extend(finished.pop(merged_index))
+                merged_index += 1
+        
+        async def run_worker():
+            nonlocal next_index, stop_dispatch
+            page, owned_context = None, None
+            if needs_page:
+                page, owned_context = await self._open_worker_page(isolation, context)
+            pages = {page} if page is not None else set()
+            try:
+                while True:
+                    taken = await take_next()
+                    if taken is None:
+                        break
+                    index, item = taken
+                    
+                    iteration_context = context.fork(page=page, browser_context=owned_context)
+                    iteration_context.set_variable(item_variable, item)
+                    iteration_context.set_variable(index_variable, index)
+                    child = self._spawn_child(iteration_context)
+                    self._children.add(child)
+                    try:
+                        if body_nodes:
+                            child._begin_loop_iteration(loop_idx)
+                            await child._execute_parallel(body_nodes)
+                    finally:
+                        self._children.discard(child)
+                        self.executed_nodes += child.executed_nodes
+                        self.failed_nodes += child.failed_nodes
+                    
+                    iteration_context.commit_row()
+                    finished[index] = iteration_context.data_rows
+                    merge_finished()
+                    await self._flush_data_rows()
+                    
+                    if iteration_context.should_break:
+                        stop_dispatch = True
+                    # 循环体可能切换到了新标签页，下一次迭代沿用当前页面
+                    page = iteration_context.page
+                    if page is not None:
+                        pages.add(page)
+            finally:
+                for p in pages:
+                    try:
+                        await p.close()
+                    except Exception:
+                        pass
+                if owned_context is not None:
+                    try:
+                        await owned_context.close()
+                    except Exception:
+                        pass
+        
+        tasks = [asyncio.create_task(run_worker()) for _ in range(workers)]
+        self._running_tasks.update(tasks)
+        try:
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            self._running_tasks.difference_update(tasks)
+        
+        for result in results:
+            if isinstance(result, Exception):
+                self.failed_nodes += 1
+                self._log(LogLevel.ERROR, f"并行遍历工作页面异常: {result}")
+        
+        # 被停止时可能有迭代未完成，剩余结果按顺序合并
+        for index in sorted(finished):
+            context.data_rows.extend(finished[index])
+        finished.clear()
+        await self._flush_data_rows()
+        
+        last_index = max(next_index - 1, 0)
+        if stream is not None:
+            # 结果流不再读取，清空当前批次使后面的顺序循环直接结束
+            await stream.close()
+            loop_state['data'] = []
+            loop_state['base_index'] = loop_state['current_index'] = next_index
+        else:
+            loop_state['current_index'] = total
+        if last_item is not None or total:
+            context.set_variable(item_variable, last_item)
+            context.set_variable(index_variable, last_index)
+        
+        if not self.should_stop:
+            self._log(LogLevel.INFO, f"⚡ 并行遍历完成，共执行 {next_index} 项")
+    
+    async def _release_browser_lease(self):
+        """归还浏览器池中借用的上下文（浏览器本身留在池中）"""
+        lease, self._browser_lease = self._browser_lease, None
+        if lease is None:
+            return
+        if self.save_storage_state:
+            try:
+                await lease.save_storage_state(self.save_storage_state)
+            except Exception as e:
+                print(f"保存登录状态失败: {e}")
+        await lease.release()
+        self.context.page = None
+        self.context.browser_context = None
+        self.context.browser = None
+    
     async def _cleanup(self):
         """清理资源"""
         try:
+            await self._release_browser_lease()
+            
+            # 关闭数据库连接池（子上下文共享同一个连接表）
+            db_connections = getattr(self.context, '_db_connections', None)
+            if db_connections:
+                await close_pools(db_connections)
+            
             if self.context.page:
                 try:
                     await self.context.page.close()
@@ -674,37 +1161,53 @@ class WorkflowExecutor:
         self.start_time = datetime.now()
         self.executed_nodes = 0
         self.failed_nodes = 0
-        self._executed_node_ids.clear()
-        self._executing_node_ids.clear()
         self._pending_nodes.clear()
         self._last_data_rows_count = 0
         self._sent_data_rows_count = 0
         self._running_tasks.clear()
+        self._children.clear()
         
-        self.context.variables.clear()
+        self.context.clear_variables()
         self.context.data_rows.clear()
         self.context.current_row.clear()
         self.context.loop_stack.clear()
+        self.context._branches.clear()
         self.context.should_break = False
         self.context.should_continue = False
         
         for var in self.workflow.variables:
             self.context.set_variable(var.name, var.value)
+        for name, value in self.parameters.items():
+            self.context.set_variable(name, value)
         
-        await self._log(LogLevel.INFO, "🚀 工作流开始执行", is_system_log=True)
+        self.logs.start()
+        self._log(LogLevel.INFO, "🚀 工作流开始执行", is_system_log=True)
         
         try:
             parser = WorkflowParser(self.workflow)
             self.graph = parser.parse()
+            self.plan = self.graph.plan
+            self._node_state = bytearray(len(self.plan))
+            self._epoch = 0
+            self._node_stamp = [0] * len(self.plan)
+            self._loop_epoch = [0] * len(self.plan)
             
-            playwright = await async_playwright().start()
-            self.context._playwright = playwright
+            if self.sink_options and self.sink_options.get('format'):
+                self._open_sink()
             
-            backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-            user_data_dir = os.path.join(backend_dir, 'browser_data')
-            # 确保目录存在
-            os.makedirs(user_data_dir, exist_ok=True)
-            self.context._user_data_dir = user_data_dir
+            if self.browser_pool is not None:
+                self._browser_lease = await self.browser_pool.acquire(self.storage_state)
+                self.context.browser = self._browser_lease.browser
+                self.context.browser_context = self._browser_lease.context
+            else:
+                playwright = await async_playwright().start()
+                self.context._playwright = playwright
+                
+                backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+                user_data_dir = os.path.join(backend_dir, 'browser_data')
+                # 确保目录存在
+                os.makedirs(user_data_dir, exist_ok=True)
+                self.context._user_data_dir = user_data_dir
             
             # 收集所有子流程分组内的节点ID（这些节点不应该被主流程直接执行）
             subflow_node_ids = self._get_subflow_node_ids()
@@ -713,45 +1216,32 @@ class WorkflowExecutor:
             # 过滤掉子流程内的起始节点
             start_nodes = [nid for nid in start_nodes if nid not in subflow_node_ids]
             
-            # 调试：打印起始节点信息
-            print(f"[DEBUG] 找到 {len(start_nodes)} 个起始节点:")
-            for nid in start_nodes:
-                node = self.graph.get_node(nid)
-                if node:
+            if self.logs.debug_enabled:
+                self.logs.debug(f"找到 {len(start_nodes)} 个起始节点: {start_nodes}")
+                for nid, node in self.graph.nodes.items():
                     label = node.data.get('label', node.type)
-                    print(f"  - {nid}: {node.type} ({label})")
-            
-            # 调试：打印所有节点和边的信息
-            print(f"[DEBUG] 工作流共有 {len(self.graph.nodes)} 个节点:")
-            for nid, node in self.graph.nodes.items():
-                label = node.data.get('label', node.type)
-                prev_nodes = self.graph.get_prev_nodes(nid)
-                next_nodes = self.graph.get_next_nodes(nid)
-                print(f"  - {nid}: {node.type} ({label})")
-                print(f"    前驱: {prev_nodes}")
-                print(f"    后继: {next_nodes}")
+                    self.logs.debug(f"  - {nid}: {node.type} ({label}) "
+                                    f"前驱: {self.graph.get_prev_nodes(nid)} 后继: {self.graph.get_next_nodes(nid)}")
             
             if not start_nodes:
-                await self._log(LogLevel.WARNING, "没有找到起始节点")
+                self._log(LogLevel.WARNING, "没有找到起始节点")
             else:
-                await self._execute_parallel(start_nodes)
+                await self._execute_parallel([self.plan.index[nid] for nid in start_nodes])
             
             if self.context.current_row:
                 self.context.commit_row()
-                if len(self.context.data_rows) > self._last_data_rows_count:
-                    for i in range(self._last_data_rows_count, len(self.context.data_rows)):
-                        await self._send_data_row(self.context.data_rows[i])
+                await self._flush_data_rows()
             
             if self.should_stop:
                 status = ExecutionStatus.STOPPED
-                await self._log(LogLevel.WARNING, "⏹️ 工作流已停止", is_system_log=True)
+                self._log(LogLevel.WARNING, "⏹️ 工作流已停止", is_system_log=True)
             elif self.failed_nodes > 0:
                 status = ExecutionStatus.FAILED
-                await self._log(LogLevel.ERROR, f"❌ 工作流执行完成，有 {self.failed_nodes} 个节点失败", is_system_log=True)
+                self._log(LogLevel.ERROR, f"❌ 工作流执行完成，有 {self.failed_nodes} 个节点失败", is_system_log=True)
             else:
                 status = ExecutionStatus.COMPLETED
                 duration = (datetime.now() - self.start_time).total_seconds()
-                await self._log(LogLevel.SUCCESS, f"✅ 工作流执行完成，共执行 {self.executed_nodes} 个节点，耗时 {duration:.2f}秒", is_system_log=True)
+                self._log(LogLevel.SUCCESS, f"✅ 工作流执行完成，共执行 {self.executed_nodes} 个节点，耗时 {duration:.2f}秒", is_system_log=True)
             
             self._result = ExecutionResult(
                 workflow_id=self.workflow.id,
@@ -766,7 +1256,7 @@ class WorkflowExecutor:
         except Exception as e:
             import traceback
             traceback.print_exc()
-            await self._log(LogLevel.ERROR, f"💥 工作流执行异常: {str(e)}", is_system_log=True)
+            self._log(LogLevel.ERROR, f"💥 工作流执行异常: {str(e)}", is_system_log=True)
             self._result = ExecutionResult(
                 workflow_id=self.workflow.id,
                 status=ExecutionStatus.FAILED,
@@ -778,20 +1268,32 @@ class WorkflowExecutor:
                 error_message=str(e),
             )
         finally:
+            sink_path = await self._close_sink()
+            if sink_path and self._result is not None:
+                # 数据已经写入文件，结束时不再另外导出
+                self._result.data_file = sink_path
             await self._cleanup()
+            # 发送剩余日志，保证日志先于执行完成事件到达前端
+            await self.logs.close()
             self.is_running = False
         
         return self._result
 
-    async def stop(self):
-        """停止工作流执行 - 立即强制停止所有操作"""
+    def _cancel_running_tasks(self):
         self.should_stop = True
-        await self._log(LogLevel.WARNING, "正在停止工作流...", is_system_log=True)
-        
-        # 1. 取消所有正在运行的任务
+        for child in list(self._children):
+            child._cancel_running_tasks()
         for task in list(self._running_tasks):
             if not task.done():
                 task.cancel()
+
+    async def stop(self):
+        """停止工作流执行 - 立即强制停止所有操作"""
+        self.should_stop = True
+        self._log(LogLevel.WARNING, "正在停止工作流...", is_system_log=True)
+        
+        # 1. 取消所有正在运行的任务（包括并行遍历子执行器中的任务）
+        self._cancel_running_tasks()
         
         # 等待任务取消完成（最多1秒）
         if self._running_tasks:
@@ -801,8 +1303,10 @@ class WorkflowExecutor:
                 pass
         self._running_tasks.clear()
         
-        # 2. 强制关闭浏览器以中断正在进行的操作
+        # 2. 强制关闭浏览器以中断正在进行的操作（浏览器池中的浏览器只关闭借用的上下文）
         try:
+            await self._release_browser_lease()
+            
             if self.context.page:
                 try:
                     await self.context.page.close()
@@ -835,8 +1339,8 @@ class WorkflowExecutor:
         
         self.is_running = False
 
-    def get_collected_data(self) -> list[dict]:
-        """获取收集的数据"""
+    def get_collected_data(self) -> DataTable:
+        """获取收集的数据（列式数据表的副本，冻结块共享不复制）"""
         if self.context.current_row:
             self.context.commit_row()
         return self.context.data_rows.copy()
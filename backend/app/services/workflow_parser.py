@@ -16,6 +16,7 @@ class ExecutionGraph:
         self.start_nodes: list[str] = []  # 没有入边的节点
         self.condition_branches: dict[str, dict[str, str]] = {}  # condition_node_id -> {handle: target_node_id}
         self.loop_branches: dict[str, dict[str, list[str]]] = {}  # loop_node_id -> {handle: [target_node_ids]}
+        self.plan: Optional['ExecutionPlan'] = None  # 编译后的执行计划（整数索引）
     
     def get_node(self, node_id: str) -> Optional[WorkflowNode]:
         return self.nodes.get(node_id)
@@ -52,6 +53,107 @@ class ExecutionGraph:
         return self.start_nodes.copy()
 
 
+class ExecutionPlan:
+    """编译后的执行计划 - 调度器使用的整数索引结构
+    
+    节点按出现顺序编号为 0..n-1，后继/前驱关系存为元组数组，
+    入度和循环体闭包在解析时一次性计算，执行期间只读。
+    不在节点表中的边端点（如已删除的节点）会被忽略。
+    """
+    
+    def __init__(self, graph: ExecutionGraph):
+        self.node_ids: list[str] = list(graph.nodes.keys())
+        self.index: dict[str, int] = {nid: i for i, nid in enumerate(self.node_ids)}
+        self.nodes: list[WorkflowNode] = [graph.nodes[nid] for nid in self.node_ids]
+        
+        size = len(self.node_ids)
+        # 默认后继（普通连线）
+        self.successors: list[tuple[int, ...]] = [
+            self._to_indices(graph.adjacency.get(nid, [])) for nid in self.node_ids
+        ]
+        # 带分支句柄的后继：condition 的 true/false，loop/foreach 的 loop/done
+        self.branch_successors: list[Optional[dict[str, tuple[int, ...]]]] = [None] * size
+        for nid, branches in graph.condition_branches.items():
+            self.branch_successors[self.index[nid]] = {
+                handle: self._to_indices([target]) for handle, target in branches.items()
+            }
+        for nid, branches in graph.loop_branches.items():
+            self.branch_successors[self.index[nid]] = {
+                handle: self._to_indices(targets) for handle, targets in branches.items()
+            }
+        # 前驱（去重）与入度
+        self.predecessors: list[tuple[int, ...]] = [
+            self._to_indices(graph.reverse_adjacency.get(nid, [])) for nid in self.node_ids
+        ]
+        self.in_degree: list[int] = [len(preds) for preds in self.predecessors]
+        self.start_nodes: tuple[int, ...] = self._to_indices(graph.start_nodes)
+        
+        # 循环体闭包：loop_node -> 循环体内所有节点（包括条件分支的所有路径）
+        self.loop_closures: dict[int, frozenset[int]] = {}
+        for nid in graph.loop_branches:
+            idx = self.index[nid]
+            self.loop_closures[idx] = self._collect_closure(self.loop_body(idx))
+        # 反向索引：节点 -> 包含它的所有循环节点（每轮迭代开始时这些节点的状态失效）
+        enclosing: list[list[int]] = [[] for _ in range(size)]
+        for loop_idx, closure in self.loop_closures.items():
+            for idx in closure:
+                enclosing[idx].append(loop_idx)
+        self.enclosing_loops: list[tuple[int, ...]] = [tuple(loops) for loops in enclosing]
+    
+    def _to_indices(self, node_ids: list[str]) -> tuple[int, ...]:
+        """节点ID列表转为去重后的索引元组（保持顺序）"""
+        result: list[int] = []
+        seen: set[int] = set()
+        for nid in node_ids:
+            idx = self.index.get(nid)
+            if idx is not None and idx not in seen:
+                seen.add(idx)
+                result.append(idx)
+        return tuple(result)
+    
+    def _closure_successors(self, idx: int) -> tuple[int, ...]:
+        """收集循环体时使用的后继：分支节点取全部分支，普通节点取默认后继"""
+        node_type = self.nodes[idx].type
+        branches = self.branch_successors[idx]
+        if node_type == 'condition' or node_type in ('loop', 'foreach'):
+            if not branches:
+                return ()
+            return tuple(t for targets in branches.values() for t in targets)
+        return self.successors[idx]
+    
+    def _collect_closure(self, start_nodes: tuple[int, ...]) -> frozenset[int]:
+        collected: set[int] = set()
+        stack = list(start_nodes)
+        while stack:
+            idx = stack.pop()
+            if idx in collected:
+                continue
+            collected.add(idx)
+            stack.extend(t for t in self._closure_successors(idx) if t not in collected)
+        return frozenset(collected)
+    
+    def __len__(self) -> int:
+        return len(self.node_ids)
+    
+    def next_nodes(self, idx: int, handle: Optional[str] = None) -> tuple[int, ...]:
+        """获取下一个要执行的节点索引，语义同 ExecutionGraph.get_next_nodes"""
+        if handle:
+            branches = self.branch_successors[idx]
+            if branches is not None:
+                return branches.get(handle, ())
+        return self.successors[idx]
+    
+    def loop_body(self, idx: int) -> tuple[int, ...]:
+        """获取循环体起始节点（loop handle）"""
+        branches = self.branch_successors[idx]
+        return branches.get('loop', ()) if branches else ()
+    
+    def loop_done(self, idx: int) -> tuple[int, ...]:
+        """获取循环结束后的节点（done handle）"""
+        branches = self.branch_successors[idx]
+        return branches.get('done', ()) if branches else ()
+
+
 class WorkflowParser:
     """工作流解析器"""
     
@@ -110,6 +212,8 @@ class WorkflowParser:
             if node_id not in nodes_with_incoming:
                 graph.start_nodes.append(node_id)
         
+        graph.plan = ExecutionPlan(graph)
+        
         return graph
     
     def validate(self, workflow: Workflow) -> tuple[bool, list[str]]:
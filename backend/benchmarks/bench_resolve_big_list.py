@@ -0,0 +1,40 @@
+"""大列表变量解析基准 - 解析 {big[0][x]} 的耗时与列表规模的关系
+
+旧版实现在索引前会深拷贝整个变量，耗时随列表长度线性增长；
+现在直接在原始数据上索引，耗时与列表长度无关。
+
+运行方式（在 backend 目录下）:
+    python -m benchmarks.bench_resolve_big_list
+"""
+import timeit
+
+from app.executors.template import compile_template
+from benchmarks.bench_resolve_value import legacy_resolve_value
+
+TEMPLATE = '{big[0][x]}'
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def _per_call(func, budget: float = 1.0) -> float:
+    """在大约 budget 秒内尽量多跑几次，返回单次耗时（秒）"""
+    number = 1
+    while True:
+        elapsed = timeit.timeit(func, number=number)
+        if elapsed >= budget or number >= 100_000:
+            return elapsed / number
+        number *= 10 if elapsed < budget / 10 else 2
+
+
+def main():
+    print(f"{'元素数':>10} {'旧版(深拷贝)':>16} {'新版(直接索引)':>16} {'加速比':>10}")
+    for size in SIZES:
+        variables = {'big': [{'x': i, 'y': f'row{i}'} for i in range(size)]}
+        assert compile_template(TEMPLATE).render(variables) == legacy_resolve_value(variables, TEMPLATE)
+
+        legacy = _per_call(lambda: legacy_resolve_value(variables, TEMPLATE))
+        compiled = _per_call(lambda: compile_template(TEMPLATE).render(variables))
+        print(f"{size:>10} {legacy * 1e3:>14.3f}ms {compiled * 1e6:>14.3f}µs {legacy / compiled:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
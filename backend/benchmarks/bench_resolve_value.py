@@ -0,0 +1,118 @@
+"""变量解析微基准 - 对比旧版两遍 re.sub 实现与预编译模板
+
+运行方式（在 backend 目录下）:
+    python -m benchmarks.bench_resolve_value
+"""
+import copy
+import json
+import re
+import timeit
+
+from app.executors.template import compile_template
+
+
+def legacy_resolve_value(variables: dict, value):
+    """旧版 ExecutionContext.resolve_value 实现（每次调用都重新匹配正则）"""
+    if not isinstance(value, str):
+        return value
+
+    def resolve_access_path(var_name: str):
+        var_name = var_name.strip()
+        base_match = re.match(r'^([a-zA-Z_一-龥][a-zA-Z0-9_一-龥]*)((?:\[[^\]]+\])*)', var_name)
+        if not base_match:
+            return None
+        base_name = base_match.group(1)
+        access_path = base_match.group(2)
+        if base_name not in variables:
+            return None
+        result = variables[base_name]
+        if isinstance(result, (list, dict)):
+            result = copy.deepcopy(result)
+        if not access_path:
+            return result
+        for accessor in re.findall(r'\[([^\]]+)\]', access_path):
+            accessor = accessor.strip()
+            if (accessor.startswith('"') and accessor.endswith('"')) or \
+               (accessor.startswith("'") and accessor.endswith("'")):
+                accessor = accessor[1:-1]
+            try:
+                if isinstance(result, list):
+                    index = int(accessor)
+                    if -len(result) <= index < len(result):
+                        result = result[index]
+                    else:
+                        return None
+                elif isinstance(result, dict):
+                    if accessor in result:
+                        result = result[accessor]
+                    else:
+                        try:
+                            num_key = int(accessor)
+                            if num_key in result:
+                                result = result[num_key]
+                            else:
+                                return None
+                        except ValueError:
+                            return None
+                else:
+                    return None
+            except (ValueError, IndexError, KeyError, TypeError):
+                return None
+        return result
+
+    def replacer(match):
+        resolved = resolve_access_path(match.group(1).strip())
+        if resolved is not None:
+            if isinstance(resolved, (list, dict)):
+                return json.dumps(resolved, ensure_ascii=False)
+            return str(resolved)
+        return match.group(0)
+
+    result = re.sub(r'\$\{([^}]+)\}', replacer, value)
+    return re.sub(r'(?<!\$)\{([^}]+)\}', replacer, result)
+
+
+VARIABLES = {
+    'url': 'https://example.com/list',
+    'page': 3,
+    'loop_index': 17,
+    'item': {'name': '商品A', 'price': 12.5, 'tags': ['a', 'b']},
+    'rows': [{'id': i, 'name': f'row{i}'} for i in range(20)],
+}
+
+TEMPLATES = [
+    'https://example.com/list?page={page}',
+    '#list > li:nth-child({loop_index}) .title',
+    '{item[name]} - ￥{item[price]}',
+    '${url}?p=${page}&i={loop_index}',
+    '{rows[3][name]}',
+    'plain selector without variables',
+    '{"json": "literal", "value": {page}}',
+]
+
+
+def main(number: int = 20000):
+    for template in TEMPLATES:
+        expected = legacy_resolve_value(VARIABLES, template)
+        actual = compile_template(template).render(VARIABLES)
+        assert actual == expected, (template, expected, actual)
+
+    def run_legacy():
+        for template in TEMPLATES:
+            legacy_resolve_value(VARIABLES, template)
+
+    def run_compiled():
+        for template in TEMPLATES:
+            compile_template(template).render(VARIABLES)
+
+    calls = number * len(TEMPLATES)
+    legacy = timeit.timeit(run_legacy, number=number)
+    compiled = timeit.timeit(run_compiled, number=number)
+    print(f"调用次数: {calls}")
+    print(f"旧版实现:   {legacy:.3f}s ({legacy / calls * 1e6:.2f}µs/次)")
+    print(f"预编译模板: {compiled:.3f}s ({compiled / calls * 1e6:.2f}µs/次)")
+    print(f"加速比: {legacy / compiled:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
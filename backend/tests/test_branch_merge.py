@@ -0,0 +1,58 @@
+"""分支隔离：汇合节点按 mergePolicy 合并各分支的变量"""
+import asyncio
+
+from app.models.workflow import Position, Variable, Workflow, WorkflowEdge, WorkflowNode
+from app.services.workflow_executor import BRANCH_SHARED, BRANCH_VARIABLES, WorkflowExecutor
+
+
+def _node(node_id, node_type, **data):
+    return WorkflowNode(id=node_id, type=node_type, position=Position(x=0, y=0), data=data)
+
+
+def _edge(source, target, handle=None):
+    return WorkflowEdge(id=f'{source}-{target}-{handle}', source=source, target=target, sourceHandle=handle)
+
+
+def _run(merge_policy=None, branch_isolation=BRANCH_VARIABLES):
+    join = {'logMessage': 'v={v} w={w}'}
+    if merge_policy:
+        join['mergePolicy'] = merge_policy
+    workflow = Workflow(
+        id='w', name='w',
+        nodes=[
+            _node('a', 'print_log', logMessage='start'),
+            _node('b', 'set_variable', variableName='v', variableValue='b'),
+            _node('c', 'set_variable', variableName='v', variableValue='c'),
+            _node('c2', 'set_variable', variableName='w', variableValue='c2'),
+            _node('d', 'print_log', **join),
+        ],
+        edges=[
+            _edge('a', 'c'), _edge('a', 'b'), _edge('c', 'c2'),
+            _edge('b', 'd'), _edge('c2', 'd'),
+        ],
+        variables=[Variable(name='v', value='0', type='string'), Variable(name='w', value='0', type='string')],
+    )
+    logs = []
+
+    async def on_log(batch):
+        logs.extend(log['message'] for log in batch)
+
+    executor = WorkflowExecutor(workflow, on_log_batch=on_log, headless=True, branch_isolation=branch_isolation)
+    result = asyncio.run(executor.execute())
+    assert result.failed_nodes == 0
+    return [m for m in logs if m.startswith('[print_log] v=')]
+
+
+def test_ordered_policy_follows_edge_order():
+    # 汇合节点的连线顺序为 b、c2：c 分支的 v 覆盖 b 分支的 v
+    assert _run('ordered') == ['[print_log] v=c w=c2']
+
+
+def test_collect_policy_gathers_conflicting_values():
+    assert _run('collect') == ['[print_log] v=["b", "c"] w=c2']
+
+
+def test_join_runs_once_per_policy():
+    for policy in (None, 'last', 'ordered', 'collect'):
+        assert len(_run(policy)) == 1
+    assert len(_run(branch_isolation=BRANCH_SHARED)) == 1
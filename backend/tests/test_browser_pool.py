@@ -0,0 +1,21 @@
+"""登录状态名称：只能解析到 browser_states 目录中的文件"""
+import pytest
+
+from app.services.browser_pool import STORAGE_STATE_DIR, resolve_storage_state, storage_state_path
+
+
+def test_storage_state_name_maps_into_directory():
+    assert storage_state_path('shop-1.login') == STORAGE_STATE_DIR / 'shop-1.login.json'
+
+
+@pytest.mark.parametrize('name', ['../secret', '/etc/passwd', 'a/b', 'a\\b', '..', 'C:x'])
+def test_storage_state_rejects_paths(name):
+    with pytest.raises(ValueError):
+        storage_state_path(name)
+    with pytest.raises(ValueError):
+        resolve_storage_state(name)
+
+
+def test_missing_storage_state_resolves_to_none():
+    assert resolve_storage_state('no-such-state-name') is None
+    assert resolve_storage_state(None) is None
@@ -0,0 +1,44 @@
+"""批量插入：列表变量的各种行形式按列写入，列数不一致时不写入任何行"""
+import asyncio
+
+from app.executors import ExecutionContext, registry
+from app.executors.database import get_db_connections
+from app.services.db_pool import SQLitePool
+
+
+def _bulk_insert(rows, columns, **config):
+    async def main():
+        context = ExecutionContext()
+        pool = SQLitePool()
+        await pool.open()
+        get_db_connections(context)['default'] = pool
+        try:
+            await pool.run(lambda conn: conn.execute('CREATE TABLE t (a TEXT, b TEXT)'))
+            context.set_variable('rows', rows)
+            result = await registry.get('db_bulk_insert').execute(
+                {'source': 'variable', 'sourceVariable': 'rows', 'table': 't', 'columns': columns,
+                 'batchSize': 2, **config}, context)
+            written = await pool.run(lambda conn: conn.execute('SELECT a, b FROM t').fetchall())
+            return result, written
+        finally:
+            await pool.close()
+
+    return asyncio.run(main())
+
+
+def test_rows_of_dicts_and_sequences():
+    result, written = _bulk_insert([{'a': 'x', 'b': 1}, ['y', 2], ('z', [3])], 'a,b')
+    assert result.success and result.data['rowCount'] == 3
+    assert written == [('x', '1'), ('y', '2'), ('z', '[3]')]
+
+
+def test_scalar_rows_fill_single_column():
+    result, written = _bulk_insert(['alice', 'bob'], 'a')
+    assert result.success
+    assert written == [('alice', None), ('bob', None)]
+
+
+def test_width_mismatch_writes_nothing():
+    result, written = _bulk_insert([['x', 1], ['y', 2], ['z']], 'a,b', useTransaction=False)
+    assert not result.success and '第 3 行' in result.error
+    assert written == []
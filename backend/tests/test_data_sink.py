@@ -0,0 +1,145 @@
+"""增量写出：输出文件在运行中和结束后都能完整读取"""
+import csv
+import json
+import threading
+import time
+import zipfile
+
+import polars as pl
+import pytest
+
+from app.services.data_sink import CSV_HEADER_ROWS, PARQUET_MIN_PART_ROWS, open_sink, scan_parquet_parts
+
+
+def test_csv_header_uses_sample(tmp_path):
+    path = tmp_path / 'out.csv'
+    sink = open_sink('csv', str(path), batch_rows=1, flush_interval=60)
+    sink.write([{'a': 1}])
+    sink.write([{'a': 2, 'b': 'x'}])
+    sink.close()
+    with open(path, encoding='utf-8', newline='') as f:
+        assert list(csv.reader(f)) == [['a', 'b'], ['1', ''], ['2', 'x']]
+
+
+def test_csv_row_fsync_writes_immediately(tmp_path):
+    path = tmp_path / 'out.csv'
+    sink = open_sink('csv', str(path), fsync='row', flush_interval=60)
+    sink.write([{'a': 1}])
+    sink.flush()
+    with open(path, encoding='utf-8', newline='') as f:
+        assert list(csv.reader(f)) == [['a'], ['1']]
+    sink.close()
+
+
+def test_csv_interval_fixes_header(tmp_path):
+    path = tmp_path / 'out.csv'
+    sink = open_sink('csv', str(path), flush_interval=0.05)
+    sink.write([{'a': 1}])
+    # 没有新行时写出线程也会按间隔写出
+    deadline = time.monotonic() + 5
+    while path.stat().st_size == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert path.stat().st_size > 0
+    sink.close()
+
+
+def test_write_does_not_block_on_io(tmp_path):
+    sink = open_sink('ndjson', str(tmp_path / 'out.ndjson'), batch_rows=1)
+    entered, release = threading.Event(), threading.Event()
+    write_batch = sink._write_batch
+
+    def slow_write(rows):
+        entered.set()
+        release.wait()
+        write_batch(rows)
+
+    sink._write_batch = slow_write
+    sink.write([{'a': 1}])
+    assert entered.wait(5)
+    sink.write([{'a': 2}])
+    release.set()
+    sink.close()
+    assert sink.rows_written == 2
+
+
+def test_write_error_is_raised_later(tmp_path):
+    sink = open_sink('ndjson', str(tmp_path / 'out.ndjson'), batch_rows=1)
+
+    def broken(rows):
+        raise OSError('disk full')
+
+    sink._write_batch = broken
+    sink.write([{'a': 1}])
+    with pytest.raises(OSError):
+        sink.flush()
+    with pytest.raises(OSError):
+        sink.write([{'a': 2}])
+
+
+def test_csv_reports_dropped_columns(tmp_path):
+    warnings = []
+    sink = open_sink('csv', str(tmp_path / 'out.csv'), batch_rows=1, on_warning=warnings.append)
+    sink.write([{'a': i} for i in range(CSV_HEADER_ROWS)])
+    sink.write([{'a': 0, 'late': 1}])
+    sink.write([{'a': 0, 'late': 2}])
+    sink.close()
+    assert len(warnings) == 1 and 'late' in warnings[0]
+
+
+def test_csv_appends_with_existing_header(tmp_path):
+    path = tmp_path / 'out.csv'
+    path.write_text('b,a\r\n1,2\r\n', encoding='utf-8')
+    sink = open_sink('csv', str(path))
+    sink.write([{'a': 3, 'b': 4}])
+    sink.close()
+    with open(path, encoding='utf-8', newline='') as f:
+        assert list(csv.reader(f)) == [['b', 'a'], ['1', '2'], ['4', '3']]
+
+
+def test_ndjson_keeps_values(tmp_path):
+    path = tmp_path / 'out.ndjson'
+    sink = open_sink('ndjson', str(path), batch_rows=1)
+    sink.write([{'a': 1}, {'b': [1, 'x']}])
+    sink.close()
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line) for line in lines] == [{'a': 1}, {'b': [1, 'x']}]
+
+
+def test_parquet_parts_keep_own_schema(tmp_path):
+    path = tmp_path / 'out.parquet'
+    warnings = []
+    sink = open_sink('parquet', str(path), on_warning=warnings.append)
+    sink.write([{'a': 1, 'b': None, 'c': [1, 2]}])
+    sink.flush()
+    first = (path / 'part-00000.parquet').read_bytes()
+    sink.write([{'a': 'x', 'b': 2.5, 'c': 'text'}])
+    sink.flush()
+    sink.write([{'a': 3, 'c': [3]}])
+    sink.close()
+    # 已写出的部分不会被改写
+    assert (path / 'part-00000.parquet').read_bytes() == first
+    assert pl.read_parquet_schema(path / 'part-00002.parquet') == {'a': pl.String, 'c': pl.String}
+    frame = scan_parquet_parts(str(path)).collect()
+    assert frame.schema == {'a': pl.String, 'b': pl.Float64, 'c': pl.String}
+    assert frame['a'].to_list() == ['1', 'x', '3']
+    assert frame['c'].to_list() == ['[1, 2]', 'text', '[3]']
+    assert len(warnings) == 1
+
+
+def test_parquet_parts_are_not_tiny(tmp_path):
+    sink = open_sink('parquet', str(tmp_path / 'out.parquet'), batch_rows=1, flush_interval=0)
+    assert sink.batch_rows >= PARQUET_MIN_PART_ROWS
+    sink.write([{'a': 1}])
+    sink.write([{'a': 2}])
+    sink.close()
+    assert len(list((tmp_path / 'out.parquet').glob('part-*.parquet'))) == 1
+
+
+def test_parquet_download_is_a_file(tmp_path):
+    path = tmp_path / 'out.parquet'
+    sink = open_sink('parquet', str(path))
+    sink.write([{'a': 1}])
+    sink.close()
+    assert sink.data_file == str(path) + '.zip'
+    with zipfile.ZipFile(sink.data_file) as archive:
+        assert archive.namelist() == ['out.parquet/part-00000.parquet']
@@ -0,0 +1,127 @@
+"""DataTable：冻结、溢出和 pickle 前后数据不变，分段文件按引用删除"""
+import gc
+import os
+import pickle
+from datetime import date
+
+import pytest
+
+from app.services import data_table
+from app.services.data_table import DataTable, SpilledChunk
+
+
+@pytest.fixture(autouse=True)
+def spill_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_table, 'SPILL_DIR', tmp_path)
+    return tmp_path
+
+
+def _rows(n: int) -> list[dict]:
+    rows = []
+    for i in range(n):
+        row = {'i': i, 's': f"s{i}", 'mixed': i if i % 3 else str(i), 'nest': {'k': [i, 'x']}}
+        if i % 7 == 0:
+            row['late'] = date(2024, 1, 1 + i % 28)
+        rows.append(row)
+    return rows
+
+
+def _spill_paths(table: DataTable) -> list[str]:
+    return [chunk.path for chunk in table._chunks if isinstance(chunk, SpilledChunk)]
+
+
+def test_freeze_and_spill_keep_values():
+    rows = _rows(2000)
+    table = DataTable(rows, chunk_rows=300, spill_rows=600)
+    table._freeze()
+    assert table.spilled_rows > 0
+    expected = [{column: row.get(column) for column in table.columns} for row in rows]
+    assert table.rows() == expected
+    assert table.row(1) == expected[1]
+    assert 'mixed' in table.json_columns and 'i' not in table.json_columns
+
+
+def test_mutations_after_freeze():
+    table = DataTable(_rows(1000), chunk_rows=300, spill_rows=300)
+    table._freeze()
+    table.set_cell(5, 'i', 'text')
+    table.add_column('extra', 0)
+    popped = table.pop(10)
+    assert popped['i'] == 10
+    assert table.row(5)['i'] == 'text'
+    assert table.row(6)['i'] == 6
+    assert table.row(0)['extra'] == 0
+    assert len(table) == 999
+
+
+def test_extend_with_table_keeps_encoding():
+    first = DataTable([{'a': 1}, {'a': 'x'}], chunk_rows=1)
+    second = DataTable([{'a': 2}], chunk_rows=1)
+    second.extend(first)
+    assert second.rows() == [{'a': 2}, {'a': 1}, {'a': 'x'}]
+
+
+def test_pickle_round_trip():
+    table = DataTable(_rows(2000), chunk_rows=300, spill_rows=600)
+    restored = pickle.loads(pickle.dumps(table))
+    assert restored.rows() == table.rows()
+    assert restored.columns == table.columns
+
+
+def test_deleting_pickled_copy_keeps_files():
+    table = DataTable(_rows(2000), chunk_rows=300, spill_rows=600)
+    table._freeze()
+    paths = _spill_paths(table)
+    assert paths
+    copy = pickle.loads(pickle.dumps(table))
+    del copy
+    gc.collect()
+    assert all(os.path.exists(path) for path in paths)
+    assert len(table.to_frame()) == 2000
+
+
+def test_lazy_frame_outlives_table():
+    table = DataTable(_rows(2000), chunk_rows=300, spill_rows=600)
+    table._freeze()
+    paths = _spill_paths(table)
+    lazy = table.to_lazy()
+    del table
+    gc.collect()
+    assert lazy.collect().height == 2000
+    del lazy
+    gc.collect()
+    assert not any(os.path.exists(path) for path in paths)
+
+
+def test_disowned_files_belong_to_receiver():
+    table = DataTable(_rows(2000), chunk_rows=300, spill_rows=600)
+    table._freeze()
+    paths = _spill_paths(table)
+    payload = pickle.dumps(table)
+    table.disown_files()
+    del table
+    gc.collect()
+    assert all(os.path.exists(path) for path in paths)
+    received = pickle.loads(payload)
+    assert len(received) == 2000
+    del received
+    gc.collect()
+    assert not any(os.path.exists(path) for path in paths)
+
+
+def test_iter_frames_snapshots_when_called():
+    table = DataTable(chunk_rows=10)
+    for i in range(15):
+        table.append({'a': i})
+    frames = table.iter_frames()
+    for i in range(5):
+        table.append({'a': i})
+    assert sum(frame.height for frame in frames) == 15
+
+
+def test_version_changes_on_mutation():
+    table = DataTable([{'a': 1}])
+    version = table.version
+    table.set_cell(0, 'a', 2)
+    assert table.version > version
+    assert table.copy().version == table.version
@@ -0,0 +1,42 @@
+"""SQLite 连接池：流式查询不会占住唯一的连接，连接耗尽时立即报错"""
+import asyncio
+
+import pytest
+
+from app.services.db_pool import SQLitePool
+
+
+def test_memory_stream_releases_connection():
+    async def main():
+        pool = SQLitePool()
+        await pool.open()
+        try:
+            await pool.run(lambda conn: conn.execute('CREATE TABLE t (id INTEGER)'))
+            await pool.run(lambda conn: conn.executemany('INSERT INTO t VALUES (?)', [(i,) for i in range(5)]))
+            stream = await pool.stream('SELECT id FROM t', 2)
+            seen = []
+            while batch := await stream.next_batch():
+                seen.extend(row['id'] for row in batch)
+                # 遍历结果流时执行其他语句
+                await asyncio.wait_for(pool.run(lambda conn: conn.execute('SELECT 1').fetchone()), 2)
+            return seen
+        finally:
+            await pool.close()
+
+    assert asyncio.run(main()) == [0, 1, 2, 3, 4]
+
+
+def test_exhausted_by_streams_fails_fast(tmp_path):
+    async def main():
+        pool = SQLitePool(str(tmp_path / 'a.db'), max_size=2)
+        await pool.open()
+        try:
+            streams = [await pool.stream('SELECT 1 AS x', 1) for _ in range(2)]
+            with pytest.raises(RuntimeError):
+                await asyncio.wait_for(pool.run(lambda conn: 1), 2)
+            await streams[0].close()
+            assert await pool.run(lambda conn: 1) == 1
+        finally:
+            await pool.close()
+
+    asyncio.run(main())
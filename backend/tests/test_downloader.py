@@ -0,0 +1,151 @@
+"""文件下载：断点续传只在服务器上的文件没有变化时接在已下载的部分之后"""
+import asyncio
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services import downloader
+from app.services.downloader import download
+
+
+class _Server:
+    """支持 Range / If-Range 的本地文件服务器"""
+
+    def __init__(self):
+        self.body = b''
+        self.etag = True
+        self.requests: list[dict] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                body = server.body
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                headers = {k: self.headers.get(k) for k in ('Range', 'If-Range')}
+                server.requests.append(headers)
+                match = re.match(r'bytes=(\d+)-(\d*)', headers['Range'] or '')
+                if match and headers['If-Range'] not in (None, etag):
+                    match = None
+                if match:
+                    start = int(match.group(1))
+                    end = int(match.group(2) or len(body) - 1)
+                    part = body[start:end + 1]
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{len(body)}')
+                else:
+                    part = body
+                    self.send_response(200)
+                if server.etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Accept-Ranges', 'bytes')
+                self.send_header('Content-Length', str(len(part)))
+                self.end_headers()
+                try:
+                    self.wfile.write(part)
+                except ConnectionError:
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/file.bin'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def etag_of(self, body: bytes) -> str:
+        return f'"{hashlib.md5(body).hexdigest()}"'
+
+
+@pytest.fixture
+def server():
+    server = _Server()
+    yield server
+    server.httpd.shutdown()
+
+
+def _download(*args, **kwargs):
+    return asyncio.run(download(*args, **kwargs))
+
+
+def test_resume_appends_when_unchanged(server, tmp_path):
+    server.body = bytes(range(256)) * 400
+    target = tmp_path / 'file.bin'
+    (tmp_path / 'file.bin.part').write_bytes(server.body[:1000])
+    (tmp_path / 'file.bin.part.json').write_text(
+        json.dumps({'url': server.url, 'validator': server.etag_of(server.body)}), encoding='utf-8')
+    result = _download(server.url, target, segments=1)
+    assert result.resumed and result.downloaded == len(server.body) - 1000
+    assert target.read_bytes() == server.body
+    assert server.requests[-1]['If-Range'] == server.etag_of(server.body)
+
+
+def test_resume_restarts_when_file_changed(server, tmp_path):
+    old = b'a' * 5000
+    server.body = b'b' * 8000
+    target = tmp_path / 'file.bin'
+    (tmp_path / 'file.bin.part').write_bytes(old[:3000])
+    (tmp_path / 'file.bin.part.json').write_text(
+        json.dumps({'url': server.url, 'validator': server.etag_of(old)}), encoding='utf-8')
+    result = _download(server.url, target, segments=1)
+    assert not result.resumed
+    assert target.read_bytes() == server.body
+
+
+def test_part_without_validator_is_discarded(server, tmp_path):
+    server.body = b'new' * 1000
+    target = tmp_path / 'file.bin'
+    (tmp_path / 'file.bin.part').write_bytes(b'stale')
+    result = _download(server.url, target, segments=1)
+    assert not result.resumed
+    assert target.read_bytes() == server.body
+    assert server.requests[-1]['Range'] is None
+
+
+def test_validator_is_saved_for_resume(server, tmp_path, monkeypatch):
+    server.body = b'x' * 4000
+    target = tmp_path / 'file.bin'
+    saved = []
+    monkeypatch.setattr(downloader, '_finish', lambda part, final, progress=None: saved.append(
+        json.loads(progress.read_text(encoding='utf-8'))))
+    _download(server.url, target, segments=1)
+    assert saved == [{'url': server.url, 'validator': server.etag_of(server.body)}]
+
+
+def test_segments_restart_when_file_changed(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'SEGMENT_THRESHOLD', 1024)
+    old = b'o' * 8000
+    server.body = bytes(range(256)) * 40
+    target = tmp_path / 'file.bin'
+    (tmp_path / 'file.bin.part').write_bytes(old)
+    ranges = [[0, 3999, 2000], [4000, 7999, 1000]]
+    (tmp_path / 'file.bin.part.json').write_text(json.dumps(
+        {'url': server.url, 'validator': server.etag_of(old), 'size': len(old), 'ranges': ranges}), encoding='utf-8')
+    result = _download(server.url, target, segments=2)
+    assert target.read_bytes() == server.body
+    assert not result.resumed
+    assert not (tmp_path / 'file.bin.part.json').exists()
+
+
+def test_segments_resume_when_unchanged(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'SEGMENT_THRESHOLD', 1024)
+    server.body = bytes(range(256)) * 40
+    size = len(server.body)
+    target = tmp_path / 'file.bin'
+    partial = bytearray(size)
+    partial[0:1000] = server.body[0:1000]
+    partial[5120:5620] = server.body[5120:5620]
+    (tmp_path / 'file.bin.part').write_bytes(bytes(partial))
+    ranges = [[0, 5119, 1000], [5120, size - 1, 500]]
+    (tmp_path / 'file.bin.part.json').write_text(json.dumps(
+        {'url': server.url, 'validator': server.etag_of(server.body), 'size': size, 'ranges': ranges}),
+        encoding='utf-8')
+    result = _download(server.url, target, segments=2)
+    assert result.resumed and result.downloaded == size - 1500
+    assert target.read_bytes() == server.body
+    assert {r['Range'] for r in server.requests} == {'bytes=1000-5119', f'bytes=5620-{size - 1}'}
@@ -0,0 +1,39 @@
+"""Excel 缓存：解析失败不留下加载锁，超过上限的工作簿不缓存"""
+import pytest
+
+from app.services import excel_cache
+from app.services.excel_cache import ExcelCache, SheetData, WorkbookData
+
+
+def _workbook(cells: int) -> WorkbookData:
+    return WorkbookData([SheetData('Sheet1', [['x' * 10] for _ in range(cells)])], 'Sheet1')
+
+
+def test_failed_load_releases_loading_lock(tmp_path, monkeypatch):
+    path = tmp_path / 'broken.xlsx'
+    path.write_bytes(b'not a workbook')
+
+    def broken(path):
+        raise ValueError('bad file')
+
+    monkeypatch.setattr(excel_cache, 'load_workbook', broken)
+    cache = ExcelCache()
+    with pytest.raises(ValueError):
+        cache.get(str(path))
+    assert cache._loading == {}
+
+
+def test_oversized_workbook_is_not_cached(tmp_path, monkeypatch):
+    small, big = tmp_path / 'small.xlsx', tmp_path / 'big.xlsx'
+    small.write_bytes(b'1')
+    big.write_bytes(b'2')
+    workbooks = {str(small): _workbook(1), str(big): _workbook(1000)}
+    monkeypatch.setattr(excel_cache, 'load_workbook', lambda path: workbooks[path])
+    cache = ExcelCache(max_bytes=workbooks[str(small)].nbytes * 2)
+    assert cache.get(str(small)) is workbooks[str(small)]
+    assert cache.get(str(big)) is workbooks[str(big)]
+    stats = cache.stats()
+    assert stats['workbooks'] == 1 and stats['bytes'] <= stats['maxBytes']
+    # 较小的工作簿没有被挤出
+    cache.get(str(small))
+    assert cache.stats()['hits'] == 1
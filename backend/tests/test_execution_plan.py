@@ -0,0 +1,87 @@
+"""执行计划：整数索引、入度、循环体闭包与汇合节点"""
+import asyncio
+
+from app.models.workflow import Position, Workflow, WorkflowEdge, WorkflowNode
+from app.services.workflow_executor import WorkflowExecutor
+from app.services.workflow_parser import WorkflowParser
+
+
+def _node(node_id, node_type, **data):
+    return WorkflowNode(id=node_id, type=node_type, position=Position(x=0, y=0), data=data)
+
+
+def _edge(source, target, handle=None):
+    return WorkflowEdge(id=f'{source}-{target}-{handle}', source=source, target=target, sourceHandle=handle)
+
+
+def _diamond():
+    return Workflow(
+        id='w', name='w',
+        nodes=[
+            _node('a', 'print_log', logMessage='a'),
+            _node('b', 'print_log', logMessage='b'),
+            _node('c', 'print_log', logMessage='c'),
+            _node('d', 'print_log', logMessage='d'),
+            _node('n', 'note'),
+        ],
+        edges=[
+            _edge('a', 'b'), _edge('a', 'c'), _edge('b', 'd'), _edge('c', 'd'),
+            _edge('c', 'missing'),
+        ],
+    )
+
+
+def test_plan_indices_and_in_degree():
+    plan = WorkflowParser().parse(_diamond()).plan
+    assert plan.node_ids == ['a', 'b', 'c', 'd']
+    a, b, c, d = (plan.index[nid] for nid in 'abcd')
+    assert plan.start_nodes == (a,)
+    assert plan.successors[a] == (b, c)
+    assert plan.successors[c] == (d,)
+    assert plan.predecessors[d] == (b, c)
+    assert plan.in_degree == [0, 1, 1, 2]
+    assert plan.next_nodes(a) == (b, c)
+
+
+def test_plan_loop_closures():
+    workflow = Workflow(
+        id='w', name='w',
+        nodes=[
+            _node('outer', 'loop', loopType='count', count='2'),
+            _node('inner', 'loop', loopType='count', count='2'),
+            _node('cond', 'condition', conditionType='variable'),
+            _node('yes', 'print_log'),
+            _node('no', 'print_log'),
+            _node('end', 'print_log'),
+        ],
+        edges=[
+            _edge('outer', 'inner', 'loop'), _edge('outer', 'end', 'done'),
+            _edge('inner', 'cond', 'loop'),
+            _edge('cond', 'yes', 'true'), _edge('cond', 'no', 'false'),
+        ],
+    )
+    plan = WorkflowParser().parse(workflow).plan
+    idx = plan.index
+    assert plan.loop_body(idx['outer']) == (idx['inner'],)
+    assert plan.loop_done(idx['outer']) == (idx['end'],)
+    assert plan.loop_done(idx['inner']) == ()
+    assert plan.loop_closures[idx['inner']] == frozenset({idx['cond'], idx['yes'], idx['no']})
+    assert plan.loop_closures[idx['outer']] == frozenset(
+        {idx['inner'], idx['cond'], idx['yes'], idx['no']}
+    )
+    assert plan.enclosing_loops[idx['yes']] == (idx['outer'], idx['inner'])
+    assert plan.enclosing_loops[idx['end']] == ()
+
+
+def test_join_node_runs_once_after_all_branches():
+    logs = []
+
+    async def on_log(batch):
+        logs.extend(log['message'] for log in batch)
+
+    executor = WorkflowExecutor(_diamond(), on_log_batch=on_log, headless=True)
+    result = asyncio.run(executor.execute())
+    assert result.executed_nodes == 4 and result.failed_nodes == 0
+    printed = [m for m in logs if m.startswith('[print_log]')]
+    assert printed.count('[print_log] d') == 1
+    assert printed[-1] == '[print_log] d'
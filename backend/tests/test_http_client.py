@@ -0,0 +1,62 @@
+"""HTTP 客户端管理：空闲或超出站点上限的客户端会被关闭，正在使用的不会"""
+import asyncio
+
+from app.services.http_client import HttpClientManager
+
+
+async def _settle():
+    # 被淘汰的客户端在后台任务中关闭
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_least_recently_used_client_is_closed():
+    async def main():
+        manager = HttpClientManager(max_hosts=2)
+        a = manager.client('http://a.test/x')
+        b = manager.client('http://b.test/x')
+        manager.client('http://a.test/y')
+        manager.client('http://c.test/x')
+        await _settle()
+        assert b.is_closed and not a.is_closed
+        assert manager.stats()['hosts'] == ['http://a.test', 'http://c.test']
+        await manager.close()
+        assert a.is_closed
+
+    asyncio.run(main())
+
+
+def test_idle_client_is_closed_unless_in_use():
+    async def main():
+        manager = HttpClientManager(client_idle=0)
+        a = manager.client('http://a.test/')
+        b = manager.client('http://b.test/')
+        manager._acquire('http://b.test')
+        manager.client('http://c.test/')
+        await _settle()
+        assert a.is_closed and not b.is_closed
+        manager._release('http://b.test')
+        manager.client('http://c.test/')
+        await _settle()
+        assert b.is_closed
+        await manager.close()
+
+    asyncio.run(main())
+
+
+def test_clients_are_closed_on_their_own_loop():
+    manager = HttpClientManager()
+
+    async def get_client():
+        return manager.client('http://a.test/')
+
+    old_loop = asyncio.new_event_loop()
+    try:
+        old_client = old_loop.run_until_complete(get_client())
+        new_client = asyncio.run(get_client())
+        assert new_client is not old_client and not old_client.is_closed
+        # 关闭任务提交到原来的事件循环，该循环再次运行时执行
+        old_loop.run_until_complete(asyncio.sleep(0.01))
+        assert old_client.is_closed
+    finally:
+        old_loop.close()
@@ -0,0 +1,84 @@
+"""作业调度器：遵守全局和单个工作流的并发上限，按优先级出队"""
+import asyncio
+
+from app.models.workflow import ExecutionStatus
+from app.services.job_scheduler import JobScheduler
+
+
+def _scheduler(**limits):
+    """运行器记录开始顺序和同时运行数，等待 release 后结束"""
+    state = {'started': [], 'active': 0, 'peak': 0, 'peak_per_workflow': {}}
+    release = asyncio.Event()
+
+    async def runner(run):
+        state['started'].append(run.parameters.get('name'))
+        state['active'] += 1
+        state['peak'] = max(state['peak'], state['active'])
+        running = scheduler.stats()['runningPerWorkflow'].get(run.workflow_id, 0)
+        peaks = state['peak_per_workflow']
+        peaks[run.workflow_id] = max(peaks.get(run.workflow_id, 0), running)
+        await release.wait()
+        state['active'] -= 1
+
+    scheduler = JobScheduler(runner, **limits)
+    return scheduler, state, release
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _drain(scheduler):
+    while scheduler._running:
+        await asyncio.gather(*scheduler._running.values())
+
+
+def test_limits_are_respected():
+    async def main():
+        scheduler, state, release = _scheduler(max_concurrent=3, per_workflow_limit=2)
+        runs = [scheduler.submit(f'w{i % 2}', {'name': i}) for i in range(6)]
+        runs.append(scheduler.submit('w2', {'name': 6}))
+        await _settle()
+        assert scheduler.stats()['running'] == 3
+        assert scheduler.stats()['queued'] == 4
+        release.set()
+        await _drain(scheduler)
+        assert all(run.status == ExecutionStatus.COMPLETED for run in runs)
+        assert state['peak'] == 3
+        assert max(state['peak_per_workflow'].values()) <= 2
+
+    asyncio.run(main())
+
+
+def test_per_workflow_limit_lets_other_workflows_run():
+    async def main():
+        scheduler, state, release = _scheduler(max_concurrent=4, per_workflow_limit=1)
+        scheduler.submit('a', {'name': 'a1'})
+        scheduler.submit('a', {'name': 'a2'})
+        scheduler.submit('b', {'name': 'b1'})
+        await _settle()
+        assert state['started'] == ['a1', 'b1']
+        release.set()
+        await _drain(scheduler)
+        assert state['started'] == ['a1', 'b1', 'a2']
+
+    asyncio.run(main())
+
+
+def test_priority_order_and_cancel():
+    async def main():
+        scheduler, state, release = _scheduler(max_concurrent=1, per_workflow_limit=4)
+        scheduler.submit('w', {'name': 'first'})
+        await _settle()
+        low = scheduler.submit('w', {'name': 'low'}, priority=0)
+        cancelled = scheduler.submit('w', {'name': 'cancelled'}, priority=5)
+        high = scheduler.submit('w', {'name': 'high'}, priority=10)
+        assert scheduler.queue_position(high) == 1 and scheduler.queue_position(low) == 3
+        assert await scheduler.cancel(cancelled.run_id)
+        release.set()
+        await _drain(scheduler)
+        assert state['started'] == ['first', 'high', 'low']
+        assert cancelled.status == ExecutionStatus.STOPPED
+
+    asyncio.run(main())
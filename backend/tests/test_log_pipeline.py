@@ -0,0 +1,68 @@
+"""日志管道：分级过滤、按批发送和缓冲区写满时的丢弃"""
+import asyncio
+
+from app.models.workflow import LogLevel
+from app.services.log_pipeline import LogPipeline, LogVerbosity
+
+
+def _collector():
+    batches = []
+
+    async def on_batch(batch):
+        batches.append(batch)
+
+    return batches, on_batch
+
+
+def test_verbosity_parse():
+    assert LogVerbosity.parse('quiet') == LogVerbosity.QUIET
+    assert LogVerbosity.parse('Debug') == LogVerbosity.DEBUG
+    assert LogVerbosity.parse('bogus') == LogVerbosity.NORMAL
+    assert LogVerbosity.parse('bogus', LogVerbosity.QUIET) == LogVerbosity.QUIET
+
+
+def test_quiet_drops_plain_node_logs():
+    async def main():
+        batches, on_batch = _collector()
+        logs = LogPipeline(on_batch, verbosity=LogVerbosity.QUIET)
+        logs.submit(LogLevel.INFO, 'node info')
+        logs.submit(LogLevel.INFO, 'user', is_user_log=True)
+        logs.submit(LogLevel.WARNING, 'warn')
+        await logs.flush()
+        return [log['message'] for batch in batches for log in batch]
+
+    assert asyncio.run(main()) == ['user', 'warn']
+
+
+def test_batches_keep_submission_order():
+    async def main():
+        batches, on_batch = _collector()
+        logs = LogPipeline(on_batch, batch_size=3, flush_interval=10)
+        logs.start()
+        for i in range(7):
+            level = LogLevel.ERROR if i % 2 else LogLevel.INFO
+            logs.submit(level, f'm{i}', node_id='n')
+        await logs.close()
+        return batches
+
+    batches = asyncio.run(main())
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    flat = [log for batch in batches for log in batch]
+    assert [log['message'] for log in flat] == [f'm{i}' for i in range(7)]
+    assert flat[1]['level'] == LogLevel.ERROR.value and flat[0]['nodeId'] == 'n'
+    assert len({log['id'] for log in flat}) == 7
+
+
+def test_full_buffer_drops_oldest_and_reports():
+    async def main():
+        batches, on_batch = _collector()
+        logs = LogPipeline(on_batch, capacity=2)
+        for i in range(5):
+            logs.submit(LogLevel.INFO, f'm{i}')
+        logs.submit(LogLevel.ERROR, 'error')
+        await logs.flush()
+        return [log['message'] for batch in batches for log in batch]
+
+    messages = asyncio.run(main())
+    assert '已丢弃 3 条日志' in messages[0]
+    assert messages[1:] == ['m3', 'm4', 'error']
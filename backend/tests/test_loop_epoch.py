@@ -0,0 +1,69 @@
+"""循环迭代重置：每轮迭代重新执行循环体（包括嵌套循环和循环体内的汇合节点）"""
+import asyncio
+
+from app.models.workflow import Position, Workflow, WorkflowEdge, WorkflowNode
+from app.services.workflow_executor import WorkflowExecutor
+
+
+def _node(node_id, node_type, **data):
+    return WorkflowNode(id=node_id, type=node_type, position=Position(x=0, y=0), data=data)
+
+
+def _edge(source, target, handle=None):
+    return WorkflowEdge(id=f'{source}-{target}-{handle}', source=source, target=target, sourceHandle=handle)
+
+
+def _run(workflow):
+    logs = []
+
+    async def on_log(batch):
+        logs.extend(log['message'] for log in batch)
+
+    executor = WorkflowExecutor(workflow, on_log_batch=on_log, headless=True)
+    result = asyncio.run(executor.execute())
+    return result, [m for m in logs if m.startswith('[print_log]')]
+
+
+def test_nested_loop_body_reexecutes_each_iteration():
+    workflow = Workflow(
+        id='w', name='w',
+        nodes=[
+            _node('outer', 'loop', loopType='count', count='3', indexVariable='i'),
+            _node('inner', 'loop', loopType='count', count='2', indexVariable='j'),
+            _node('body', 'print_log', logMessage='body {i}-{j}'),
+            _node('after', 'print_log', logMessage='after {i}'),
+            _node('end', 'print_log', logMessage='end'),
+        ],
+        edges=[
+            _edge('outer', 'inner', 'loop'), _edge('outer', 'end', 'done'),
+            _edge('inner', 'body', 'loop'), _edge('inner', 'after', 'done'),
+        ],
+    )
+    result, printed = _run(workflow)
+    assert result.failed_nodes == 0
+    assert [m for m in printed if '] body' in m] == [
+        f'[print_log] body {i}-{j}' for i in range(3) for j in range(2)
+    ]
+    assert [m for m in printed if '] after' in m] == [f'[print_log] after {i}' for i in range(3)]
+    assert printed[-1] == '[print_log] end'
+
+
+def test_join_inside_loop_body_runs_every_iteration():
+    workflow = Workflow(
+        id='w', name='w',
+        nodes=[
+            _node('loop', 'loop', loopType='count', count='3', indexVariable='i'),
+            _node('p', 'print_log', logMessage='start {i}'),
+            _node('x', 'print_log', logMessage='x {i}'),
+            _node('y', 'print_log', logMessage='y {i}'),
+            _node('z', 'print_log', logMessage='join {i}'),
+        ],
+        edges=[
+            _edge('loop', 'p', 'loop'),
+            _edge('p', 'x'), _edge('p', 'y'), _edge('x', 'z'), _edge('y', 'z'),
+        ],
+    )
+    result, printed = _run(workflow)
+    assert result.failed_nodes == 0
+    assert [m for m in printed if '] join' in m] == [f'[print_log] join {i}' for i in range(3)]
+    assert result.executed_nodes == 1 + 4 * 3
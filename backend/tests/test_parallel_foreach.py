@@ -0,0 +1,53 @@
+"""并行遍历：循环体不操作页面时不启动浏览器"""
+import asyncio
+
+from app.models.workflow import Position, Variable, Workflow, WorkflowEdge, WorkflowNode
+from app.services import workflow_executor
+from app.services.workflow_executor import WorkflowExecutor, _node_needs_page
+
+
+def _node(node_id, node_type, **data):
+    return WorkflowNode(id=node_id, type=node_type, position=Position(x=0, y=0), data=data)
+
+
+def _edge(source, target, handle=None):
+    return WorkflowEdge(id=f'{source}-{target}-{handle}', source=source, target=target, sourceHandle=handle)
+
+
+def test_node_needs_page():
+    assert _node_needs_page(_node('a', 'click_element'))
+    assert _node_needs_page(_node('a', 'condition', conditionType='element_exists'))
+    assert not _node_needs_page(_node('a', 'condition', conditionType='variable'))
+    assert _node_needs_page(_node('a', 'wait', waitType='selector'))
+    assert not _node_needs_page(_node('a', 'wait'))
+    assert not _node_needs_page(_node('a', 'api_request'))
+
+
+def test_parallel_foreach_without_pages_skips_browser(monkeypatch):
+    launches = []
+
+    async def fake_launch(context, headless=False):
+        launches.append(context)
+
+    monkeypatch.setattr(workflow_executor, 'launch_browser_context', fake_launch)
+    workflow = Workflow(
+        id='w', name='w',
+        nodes=[
+            _node('fe', 'foreach', dataSource='items', itemVariable='item', indexVariable='i',
+                  parallelWorkers=2),
+            _node('p', 'print_log', logMessage='item {item}'),
+            _node('end', 'print_log', logMessage='end'),
+        ],
+        edges=[_edge('fe', 'p', 'loop'), _edge('fe', 'end', 'done')],
+        variables=[Variable(name='items', value=[1, 2, 3], type='array')],
+    )
+    logs = []
+
+    async def on_log(batch):
+        logs.extend(log['message'] for log in batch)
+
+    executor = WorkflowExecutor(workflow, on_log_batch=on_log, headless=True)
+    result = asyncio.run(executor.execute())
+    assert result.executed_nodes == 5 and result.failed_nodes == 0
+    assert launches == []
+    assert sorted(m for m in logs if '] item' in m) == ['[print_log] item 1', '[print_log] item 2', '[print_log] item 3']
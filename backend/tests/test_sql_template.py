@@ -0,0 +1,60 @@
+"""SQL 变量绑定：只有值位置的变量引用绑定为参数"""
+import pytest
+
+from app.executors.sql_template import bind_sql
+
+VARIABLES = {'name': "o'x", 'id': 5, 'path': 'data/a.parquet', 'table': 'users'}
+
+
+@pytest.mark.parametrize('dialect', ['mysql', 'standard'])
+def test_values_are_bound(dialect):
+    bound = bind_sql("SELECT * FROM t WHERE name = '{name}' AND id = {id}", VARIABLES, dialect)
+    assert bound.text('?') == 'SELECT * FROM t WHERE name = ? AND id = ?'
+    assert bound.params == ["o'x", 5]
+
+
+def test_literal_with_reference_is_one_parameter():
+    bound = bind_sql("SELECT * FROM t WHERE name LIKE '%{name}%'", VARIABLES, 'standard')
+    assert bound.text('?') == 'SELECT * FROM t WHERE name LIKE ?'
+    assert bound.params == ["%o'x%"]
+
+
+def test_names_are_spliced():
+    bound = bind_sql('SELECT * FROM {table} WHERE id IN ({id}) LIMIT {id}', VARIABLES, 'standard')
+    assert bound.text('?') == 'SELECT * FROM users WHERE id IN (5) LIMIT 5'
+    assert bound.params == []
+
+
+@pytest.mark.parametrize('sql, expected', [
+    ("SELECT * FROM '{path}' WHERE id = {id}", "SELECT * FROM 'data/a.parquet' WHERE id = ?"),
+    ("SELECT * FROM read_parquet('{path}')", "SELECT * FROM read_parquet('data/a.parquet')"),
+    ("SELECT * FROM t JOIN '{path}' p ON t.id = p.id", "SELECT * FROM t JOIN 'data/a.parquet' p ON t.id = p.id"),
+])
+def test_file_literals_are_spliced(sql, expected):
+    assert bind_sql(sql, VARIABLES, 'standard').text('?') == expected
+
+
+@pytest.mark.parametrize('sql', [
+    "COPY (SELECT * FROM t WHERE id = {id}) TO '{path}'",
+    "CREATE TABLE t2 AS SELECT * FROM t WHERE name = '{name}'",
+    "/* 设置 */ PRAGMA user_version = {id}",
+])
+def test_statements_without_parameters_are_spliced(sql):
+    assert bind_sql(sql, VARIABLES, 'standard').params == []
+
+
+def test_binding_is_decided_per_statement():
+    bound = bind_sql("DROP TABLE IF EXISTS {table}; SELECT * FROM t WHERE id = {id}", VARIABLES, 'standard')
+    assert bound.text('?') == 'DROP TABLE IF EXISTS users; SELECT * FROM t WHERE id = ?'
+    assert bound.params == [5]
+
+
+def test_missing_variable_keeps_source():
+    bound = bind_sql("SELECT * FROM t WHERE id = {missing}", VARIABLES, 'standard')
+    assert bound.text('?') == 'SELECT * FROM t WHERE id = {missing}'
+    assert bound.params == []
+
+
+def test_pymysql_placeholder_escapes_percent():
+    bound = bind_sql("SELECT '100%' AS p FROM t WHERE id = {id}", VARIABLES, 'mysql')
+    assert bound.text('%s') == "SELECT '100%%' AS p FROM t WHERE id = %s"
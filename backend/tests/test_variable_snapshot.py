@@ -0,0 +1,42 @@
+"""变量快照：写入后只拷贝改动的变量，快照不受之后的修改影响"""
+from app.executors.base import ExecutionContext
+
+
+def test_snapshot_copies_only_written_variables():
+    context = ExecutionContext()
+    context.set_variable('big', list(range(1000)))
+    context.set_variable('n', 1)
+    first = context.snapshot_variables()
+    assert context.snapshot_variables() is first
+    context.set_variable('n', 2)
+    second = context.snapshot_variables()
+    assert second.variables['big'] is first.variables['big']
+    assert (first.variables['n'], second.variables['n']) == (1, 2)
+
+
+def test_snapshot_is_isolated_from_in_place_changes():
+    context = ExecutionContext()
+    context.set_variable('items', [1])
+    first = context.snapshot_variables()
+    context.get_mutable_variable('items').append(2)
+    context.set_variable('items', context.get_variable('items'))
+    second = context.snapshot_variables()
+    assert first.variables['items'] == [1]
+    assert second.variables['items'] == [1, 2]
+
+
+def test_snapshot_drops_removed_variables():
+    context = ExecutionContext()
+    context.set_variable('a', 1)
+    context.snapshot_variables()
+    context.merge_variables({'b': 2}, removed={'a'})
+    assert dict(context.snapshot_variables().variables) == {'b': 2}
+
+
+def test_forked_scope_reuses_parent_snapshot():
+    parent = ExecutionContext()
+    parent.set_variable('items', [1, 2])
+    child = parent.fork()
+    child.set_variable('n', 1)
+    snapshot = child.snapshot_variables()
+    assert snapshot.variables['items'] is parent.snapshot_variables().variables['items']
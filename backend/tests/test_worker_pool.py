@@ -0,0 +1,27 @@
+"""工作进程管道：发送线程按顺序发送，发送失败时回调，事件中的变量转换为可发送的值"""
+import multiprocessing
+import threading
+
+from app.services.worker_pool import _portable, _Sender
+
+
+def test_sender_keeps_order_and_reports_errors():
+    parent, child = multiprocessing.Pipe()
+    errors = []
+    sent = threading.Event()
+    sender = _Sender(child, lambda message, error: errors.append(message[0]))
+    sender.send(('a', 1))
+    sender.send(('bad', threading.Lock()))
+    sender.send(('b', 2), on_sent=sent.set)
+    sender.close(timeout=5)
+    assert parent.recv() == ('a', 1)
+    assert parent.recv() == ('b', 2)
+    assert errors == ['bad'] and sent.is_set()
+
+
+def test_portable_copies_and_stringifies():
+    lock = threading.Lock()
+    value = {'items': [1, 2], 'lock': lock}
+    portable = _portable(value)
+    value['items'].append(3)
+    assert portable == {'items': [1, 2], 'lock': str(lock)}
@@ -19,6 +19,7 @@ import {
   HoverElementConfig,
   InputTextConfig,
   GetElementInfoConfig,
+  ExtractListConfig,
   WaitConfig,
   WaitElementConfig,
   SetVariableConfig,
@@ -95,6 +96,7 @@ import {
   DbQueryConfig,
   DbExecuteConfig,
   DbInsertConfig,
+  DbBulkInsertConfig,
   DbUpdateConfig,
   DbDeleteConfig,
   DbCloseConfig,
@@ -355,6 +357,8 @@ export function ConfigPanel({ selectedNodeId: propSelectedNodeId }: ConfigPanelP
         return <InputTextConfig {...props} />
       case 'get_element_info':
         return <GetElementInfoConfig {...props} />
+      case 'extract_list':
+        return <ExtractListConfig {...props} />
       case 'wait':
         return <WaitConfig {...props} />
       case 'wait_element':
@@ -487,6 +491,8 @@ export function ConfigPanel({ selectedNodeId: propSelectedNodeId }: ConfigPanelP
         return <DbExecuteConfig data={nodeData} onChange={handleChange} />
       case 'db_insert':
         return <DbInsertConfig data={nodeData} onChange={handleChange} />
+      case 'db_bulk_insert':
+        return <DbBulkInsertConfig data={nodeData} onChange={handleChange} />
       case 'db_update':
         return <DbUpdateConfig data={nodeData} onChange={handleChange} />
       case 'db_delete':
@@ -71,6 +71,7 @@ const moduleIcons: Record<ModuleType, React.ElementType> = {
   hover_element: MousePointer,
   input_text: Type,
   get_element_info: Search,
+  extract_list: TableProperties,
   wait: Clock,
   wait_element: Hourglass,
   close_page: X,
@@ -152,6 +153,7 @@ const moduleColors: Record<string, string> = {
   hover_element: 'border-blue-500 bg-blue-100 dark:bg-blue-900 text-blue-900 dark:text-blue-100',
   input_text: 'border-blue-500 bg-blue-100 dark:bg-blue-900 text-blue-900 dark:text-blue-100',
   get_element_info: 'border-blue-500 bg-blue-100 dark:bg-blue-900 text-blue-900 dark:text-blue-100',
+  extract_list: 'border-blue-500 bg-blue-100 dark:bg-blue-900 text-blue-900 dark:text-blue-100',
   wait: 'border-blue-500 bg-blue-100 dark:bg-blue-900 text-blue-900 dark:text-blue-100',
   wait_element: 'border-blue-500 bg-blue-100 dark:bg-blue-900 text-blue-900 dark:text-blue-100',
   close_page: 'border-blue-500 bg-blue-100 dark:bg-blue-900 text-blue-900 dark:text-blue-100',
@@ -77,6 +77,7 @@ import {
   DatabaseZap,
   TableCellsSplit,
   CirclePlus,
+  Rows3,
   Pencil,
   CircleMinus,
   Unplug,
@@ -101,6 +102,7 @@ const moduleIcons: Record<ModuleType, React.ElementType> = {
   handle_dialog: MessageCircleWarning,
   // 数据提取
   get_element_info: Search,
+  extract_list: TableProperties,
   screenshot: Camera,
   save_image: ImageDown,
   download_file: Download,
@@ -147,6 +149,7 @@ const moduleIcons: Record<ModuleType, React.ElementType> = {
   db_query: DatabaseZap,
   db_execute: TableCellsSplit,
   db_insert: CirclePlus,
+  db_bulk_insert: Rows3,
   db_update: Pencil,
   db_delete: CircleMinus,
   db_close: Unplug,
@@ -193,6 +196,7 @@ const moduleKeywords: Record<ModuleType, string[]> = {
   hover_element: ['悬停', '鼠标', '移动', 'hover', 'mouse', '移入', '经过', '停留'],
   input_text: ['输入', '文本', '填写', 'input', 'text', '表单'],
   get_element_info: ['提取', '数据', '获取', '元素', '信息', 'get', 'element', '采集'],
+  extract_list: ['批量', '提取', '列表', '表格', '多行', 'extract', 'list', '采集'],
   wait: ['等待', '延迟', '暂停', 'wait', 'delay', '时间', '固定'],
   wait_element: ['等待', '元素', '出现', '消失', 'wait', 'element', '存在', '隐藏'],
   close_page: ['关闭', '网页', 'close', 'page'],
@@ -269,6 +273,7 @@ const moduleKeywords: Record<ModuleType, string[]> = {
   db_query: ['数据库', '查询', 'select', 'query', '搜索', '读取', '获取'],
   db_execute: ['数据库', '执行', 'sql', 'execute', '语句', '命令'],
   db_insert: ['数据库', '插入', 'insert', '添加', '新增', '写入'],
+  db_bulk_insert: ['数据库', '批量', '插入', 'bulk', 'insert', 'upsert', '导入', '写入', '数据表'],
   db_update: ['数据库', '更新', 'update', '修改', '编辑'],
   db_delete: ['数据库', '删除', 'delete', '移除', '清除'],
   db_close: ['数据库', '关闭', '断开', 'close', 'disconnect', '连接'],
@@ -290,7 +295,7 @@ const moduleCategories = [
   {
     name: '📥 数据采集',
     color: 'bg-emerald-500',
-    modules: ['get_element_info', 'screenshot', 'save_image', 'download_file', 'upload_file'] as ModuleType[],
+    modules: ['get_element_info', 'extract_list', 'screenshot', 'save_image', 'download_file', 'upload_file'] as ModuleType[],
   },
   {
     name: '⏱️ 等待控制',
@@ -321,7 +326,7 @@ const moduleCategories = [
   {
     name: '🗄️ 数据库',
     color: 'bg-sky-600',
-    modules: ['db_connect', 'db_query', 'db_execute', 'db_insert', 'db_update', 'db_delete', 'db_close'] as ModuleType[],
+    modules: ['db_connect', 'db_query', 'db_execute', 'db_insert', 'db_bulk_insert', 'db_update', 'db_delete', 'db_close'] as ModuleType[],
   },
   // ===== 流程控制 =====
   {
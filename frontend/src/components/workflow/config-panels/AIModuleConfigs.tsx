@@ -297,6 +297,31 @@ export function ApiRequestConfig({ data, onChange }: { data: NodeData; onChange:
           min={1}
         />
       </div>
+      <div className="grid grid-cols-2 gap-2">
+        <div className="space-y-2">
+          <Label htmlFor="retryCount">失败重试次数</Label>
+          <NumberInput
+            id="retryCount"
+            value={(data.retryCount as number) ?? 0}
+            onChange={(v) => onChange('retryCount', v)}
+            defaultValue={0}
+            min={0}
+          />
+        </div>
+        <div className="space-y-2">
+          <Label htmlFor="retryDelay">重试间隔 (秒)</Label>
+          <NumberInput
+            id="retryDelay"
+            value={(data.retryDelay as number) ?? 1}
+            onChange={(v) => onChange('retryDelay', v)}
+            defaultValue={1}
+            min={0}
+          />
+        </div>
+      </div>
+      <p className="text-xs text-muted-foreground">
+        连接失败、超时或返回 429/5xx 时重试（仅 GET、PUT、DELETE 等幂等请求），每次重试间隔翻倍
+      </p>
       <p className="text-xs text-muted-foreground">
         发送HTTP请求并将响应存储到变量，可配合JSON解析模块提取数据
       </p>
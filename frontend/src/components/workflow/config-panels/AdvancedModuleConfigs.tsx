@@ -4,8 +4,10 @@ import { Label } from '@/components/ui/label'
 import { Input } from '@/components/ui/input'
 import { NumberInput } from '@/components/ui/number-input'
 import { Select } from '@/components/ui/select'
+import { Checkbox } from '@/components/ui/checkbox'
 import { VariableInput } from '@/components/ui/variable-input'
 import { VariableNameInput } from '@/components/ui/variable-name-input'
+import { VariableRefInput } from '@/components/ui/variable-ref-input'
 import { PathInput } from '@/components/ui/path-input'
 
 type RenderSelectorInput = (id: string, label: string, placeholder: string) => React.ReactNode
@@ -190,6 +192,7 @@ export function DownloadFileConfig({
         >
           <option value="click">点击元素触发下载</option>
           <option value="url">URL直接下载</option>
+          <option value="batch">批量下载URL列表</option>
         </Select>
       </div>
       {(data.downloadMode as string) === 'url' ? (
@@ -201,9 +204,56 @@ export function DownloadFileConfig({
             placeholder="https://example.com/file.pdf，支持 {变量名}"
           />
         </div>
+      ) : (data.downloadMode as string) === 'batch' ? (
+        <>
+          <div className="space-y-2">
+            <Label htmlFor="urlListVariable">URL列表变量</Label>
+            <VariableRefInput
+              id="urlListVariable"
+              value={(data.urlListVariable as string) || ''}
+              onChange={(v) => onChange('urlListVariable', v)}
+              placeholder="列表变量名，元素为URL或 {url, fileName}"
+            />
+          </div>
+          <div className="space-y-2">
+            <Label htmlFor="concurrency">同时下载数</Label>
+            <NumberInput
+              id="concurrency"
+              value={(data.concurrency as number) ?? 4}
+              onChange={(v) => onChange('concurrency', v)}
+              defaultValue={4}
+              min={1}
+            />
+          </div>
+        </>
       ) : (
         renderSelectorInput('triggerSelector', '触发下载的元素', 'a.download-btn')
       )}
+      {['url', 'batch'].includes(data.downloadMode as string) && (
+        <>
+          <div className="space-y-2">
+            <Label htmlFor="segmentCount">大文件分段数</Label>
+            <NumberInput
+              id="segmentCount"
+              value={(data.segmentCount as number) ?? 4}
+              onChange={(v) => onChange('segmentCount', v)}
+              defaultValue={4}
+              min={1}
+            />
+            <p className="text-xs text-muted-foreground">
+              16MB 以上且服务器支持断点续传的文件拆成多段并行下载，1 表示不分段
+            </p>
+          </div>
+          <div className="flex items-center gap-2">
+            <Checkbox
+              id="resumeDownload"
+              checked={(data.resumeDownload as boolean) ?? true}
+              onCheckedChange={(checked) => onChange('resumeDownload', checked)}
+            />
+            <Label htmlFor="resumeDownload" className="cursor-pointer">断点续传（保留未完成的 .part 文件）</Label>
+          </div>
+        </>
+      )}
       <div className="space-y-2">
         <Label htmlFor="savePath">保存目录 (可选)</Label>
         <PathInput
@@ -1,6 +1,9 @@
 import type React from 'react'
+import { Plus, Trash2 } from 'lucide-react'
 import type { NodeData } from '@/store/workflowStore'
 import { Label } from '@/components/ui/label'
+import { Button } from '@/components/ui/button'
+import { Checkbox } from '@/components/ui/checkbox'
 import { Input } from '@/components/ui/input'
 import { NumberInput } from '@/components/ui/number-input'
 import { Select } from '@/components/ui/select'
@@ -168,6 +171,119 @@ export function GetElementInfoConfig({
   )
 }
 
+// 批量提取配置
+interface ExtractColumn {
+  name: string
+  selector: string
+  attribute: string
+}
+
+export function ExtractListConfig({
+  data,
+  onChange,
+  renderSelectorInput,
+}: {
+  data: NodeData
+  onChange: (key: string, value: unknown) => void
+  renderSelectorInput: RenderSelectorInput
+}) {
+  const columns = (data.columns as ExtractColumn[]) || []
+  const updateColumn = (index: number, key: keyof ExtractColumn, value: string) => {
+    onChange('columns', columns.map((column, i) => (i === index ? { ...column, [key]: value } : column)))
+  }
+
+  return (
+    <>
+      {renderSelectorInput('rowSelector', '行选择器', 'table tbody tr 或 .list-item')}
+      <div className="space-y-2">
+        <Label>列</Label>
+        {columns.map((column, index) => (
+          <div key={index} className="space-y-1 rounded-md border p-2">
+            <div className="flex gap-2">
+              <Input
+                value={column.name || ''}
+                onChange={(e) => updateColumn(index, 'name', e.target.value)}
+                placeholder="列名"
+                className="flex-1"
+              />
+              <Button
+                type="button"
+                variant="ghost"
+                size="sm"
+                onClick={() => onChange('columns', columns.filter((_, i) => i !== index))}
+                title="删除列"
+              >
+                <Trash2 className="w-4 h-4 text-destructive" />
+              </Button>
+            </div>
+            <Input
+              value={column.selector || ''}
+              onChange={(e) => updateColumn(index, 'selector', e.target.value)}
+              placeholder="行内CSS选择器，留空表示行元素本身"
+            />
+            <Input
+              value={column.attribute || 'text'}
+              onChange={(e) => updateColumn(index, 'attribute', e.target.value)}
+              placeholder="text / innerHTML / value / href / src / 其他属性名"
+            />
+          </div>
+        ))}
+        <Button
+          type="button"
+          variant="outline"
+          size="sm"
+          className="w-full"
+          onClick={() => onChange('columns', [...columns, { name: '', selector: '', attribute: 'text' }])}
+        >
+          <Plus className="w-4 h-4 mr-1" />添加列
+        </Button>
+      </div>
+      <div className="space-y-2">
+        <Label htmlFor="variableName">存储到变量</Label>
+        <Input
+          id="variableName"
+          value={(data.variableName as string) || ''}
+          onChange={(e) => onChange('variableName', e.target.value)}
+          placeholder="变量名（结果为字典列表）"
+        />
+      </div>
+      <div className="flex items-center gap-2">
+        <Checkbox
+          id="appendToTable"
+          checked={(data.appendToTable as boolean) ?? false}
+          onCheckedChange={(checked) => onChange('appendToTable', checked)}
+        />
+        <Label htmlFor="appendToTable" className="cursor-pointer">直接追加到数据表格</Label>
+      </div>
+      <div className="grid grid-cols-2 gap-2">
+        <div className="space-y-2">
+          <Label htmlFor="maxRows">最多行数</Label>
+          <NumberInput
+            id="maxRows"
+            value={(data.maxRows as number) ?? 0}
+            onChange={(v) => onChange('maxRows', v)}
+            defaultValue={0}
+            min={0}
+          />
+        </div>
+        <div className="space-y-2">
+          <Label htmlFor="waitTimeout">等待行出现 (毫秒)</Label>
+          <NumberInput
+            id="waitTimeout"
+            value={(data.waitTimeout as number) ?? 5000}
+            onChange={(v) => onChange('waitTimeout', v)}
+            defaultValue={5000}
+            min={0}
+          />
+        </div>
+      </div>
+      <p className="text-xs text-muted-foreground">
+        一次读取所有匹配行的各列数据，比在循环中逐个提取快得多；最多行数为 0 表示不限
+      </p>
+    </>
+  )
+}
+
 // 等待配置
 export function WaitConfig({ 
   data, 
@@ -236,6 +236,32 @@ export function ForeachConfig({ data, onChange }: { data: NodeData; onChange: (k
           placeholder="如: index"
         />
       </div>
+      <div className="space-y-2">
+        <Label htmlFor="parallelWorkers">并行页面数</Label>
+        <NumberInput
+          id="parallelWorkers"
+          value={(data.parallelWorkers as number) ?? 1}
+          onChange={(v) => onChange('parallelWorkers', v)}
+          defaultValue={1}
+          min={1}
+        />
+        <p className="text-xs text-muted-foreground">
+          大于1时同时打开多个页面并行处理各项，每项使用独立的变量，收集的数据按列表顺序合并
+        </p>
+      </div>
+      {((data.parallelWorkers as number) ?? 1) > 1 && (
+        <div className="space-y-2">
+          <Label htmlFor="parallelIsolation">页面隔离方式</Label>
+          <Select
+            id="parallelIsolation"
+            value={(data.parallelIsolation as string) || 'page'}
+            onChange={(e) => onChange('parallelIsolation', e.target.value)}
+          >
+            <option value="page">共享登录状态（同一浏览器上下文中的多个标签页）</option>
+            <option value="context">完全隔离（每个页面使用独立的浏览器上下文）</option>
+          </Select>
+        </div>
+      )}
     </>
   )
 }
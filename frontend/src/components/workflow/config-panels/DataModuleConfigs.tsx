@@ -1085,7 +1085,15 @@ export function TableExportConfig({ data, onChange }: { data: NodeData; onChange
         >
           <option value="excel">Excel (.xlsx)</option>
           <option value="csv">CSV (.csv)</option>
+          <option value="parquet">Parquet (.parquet, zstd 压缩)</option>
+          <option value="arrow">Arrow IPC / Feather (.arrow)</option>
+          <option value="ndjson">NDJSON (.ndjson)</option>
+          <option value="ndjson_gzip">NDJSON + gzip (.ndjson.gz)</option>
+          <option value="ndjson_zstd">NDJSON + zstd (.ndjson.zst)</option>
         </Select>
+        <p className="text-xs text-muted-foreground">
+          Excel 最多 1,048,576 行，超出时自动改为 CSV；大数据量建议使用 Parquet 或 Arrow
+        </p>
       </div>
       <div className="space-y-2">
         <Label htmlFor="savePath">保存路径 (可选)</Label>
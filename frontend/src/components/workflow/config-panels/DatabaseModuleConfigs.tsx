@@ -1,5 +1,6 @@
 import { Label } from '@/components/ui/label'
 import { Input } from '@/components/ui/input'
+import { Select } from '@/components/ui/select'
 import { NumberInput } from '@/components/ui/number-input'
 import { VariableInput } from '@/components/ui/variable-input'
 import { useGlobalConfigStore } from '@/store/globalConfigStore'
@@ -37,75 +38,210 @@ export function DbConnectConfig({ data, onChange }: ConfigProps) {
     }
   }, [])
 
+  const dbType = (data.dbType as string) || 'mysql'
+
   return (
     <div className="space-y-4">
-      <div className="grid grid-cols-2 gap-4">
+      <div className="space-y-2">
+        <Label>数据库类型</Label>
+        <Select
+          value={dbType}
+          onChange={(e) => onChange('dbType', e.target.value)}
+        >
+          <option value="mysql">MySQL</option>
+          <option value="sqlite">SQLite（本地文件）</option>
+          <option value="duckdb">DuckDB（本地分析）</option>
+        </Select>
+      </div>
+      
+      {dbType === 'mysql' ? (
+        <>
+          <div className="grid grid-cols-2 gap-4">
+            <div className="space-y-2">
+              <Label>主机地址</Label>
+              <VariableInput
+                value={(data.host as string) || 'localhost'}
+                onChange={(v) => onChange('host', v)}
+                placeholder="localhost"
+              />
+            </div>
+            <div className="space-y-2">
+              <Label>端口</Label>
+              <NumberInput
+                value={(data.port as number) || 3306}
+                onChange={(v) => onChange('port', v)}
+                defaultValue={3306}
+                min={1}
+                max={65535}
+              />
+            </div>
+          </div>
+          
+          <div className="space-y-2">
+            <Label>用户名</Label>
+            <VariableInput
+              value={(data.user as string) || ''}
+              onChange={(v) => onChange('user', v)}
+              placeholder="root"
+            />
+          </div>
+          
+          <div className="space-y-2">
+            <Label>密码</Label>
+            <VariableInput
+              value={(data.password as string) || ''}
+              onChange={(v) => onChange('password', v)}
+              placeholder="数据库密码"
+            />
+          </div>
+          
+          <div className="space-y-2">
+            <Label>数据库名</Label>
+            <VariableInput
+              value={(data.database as string) || ''}
+              onChange={(v) => onChange('database', v)}
+              placeholder="要连接的数据库名"
+            />
+          </div>
+          
+          <div className="space-y-2">
+            <Label>字符集</Label>
+            <Input
+              value={(data.charset as string) || 'utf8mb4'}
+              onChange={(e) => onChange('charset', e.target.value)}
+              placeholder="utf8mb4"
+            />
+          </div>
+        </>
+      ) : (
         <div className="space-y-2">
-          <Label>主机地址</Label>
+          <Label>数据库文件</Label>
           <VariableInput
-            value={(data.host as string) || 'localhost'}
-            onChange={(v) => onChange('host', v)}
-            placeholder="localhost"
-          />
-        </div>
-        <div className="space-y-2">
-          <Label>端口</Label>
-          <NumberInput
-            value={(data.port as number) || 3306}
-            onChange={(v) => onChange('port', v)}
-            defaultValue={3306}
-            min={1}
-            max={65535}
+            value={(data.filePath as string) || ''}
+            onChange={(v) => onChange('filePath', v)}
+            placeholder={dbType === 'sqlite' ? 'data/local.db' : 'data/analytics.duckdb'}
           />
+          <p className="text-xs text-muted-foreground">
+            {dbType === 'sqlite'
+              ? '文件不存在时自动创建，使用 WAL 模式；留空使用内存数据库（只有一个连接）'
+              : '留空使用内存数据库。SQL 中的 data_table 表示当前运行的数据表，Parquet 文件可用 read_parquet(\'路径\') 直接查询；需要安装 duckdb'}
+          </p>
         </div>
-      </div>
-      
-      <div className="space-y-2">
-        <Label>用户名</Label>
-        <VariableInput
-          value={(data.user as string) || ''}
-          onChange={(v) => onChange('user', v)}
-          placeholder="root"
-        />
-      </div>
+      )}
       
       <div className="space-y-2">
-        <Label>密码</Label>
-        <VariableInput
-          value={(data.password as string) || ''}
-          onChange={(v) => onChange('password', v)}
-          placeholder="数据库密码"
-        />
-      </div>
-      
-      <div className="space-y-2">
-        <Label>数据库名</Label>
-        <VariableInput
-          value={(data.database as string) || ''}
-          onChange={(v) => onChange('database', v)}
-          placeholder="要连接的数据库名"
+        <Label>连接名称</Label>
+        <Input
+          value={(data.connectionName as string) || 'default'}
+          onChange={(e) => onChange('connectionName', e.target.value)}
+          placeholder="default"
         />
+        <p className="text-xs text-muted-foreground">用于区分多个数据库连接</p>
       </div>
       
       <div className="grid grid-cols-2 gap-4">
         <div className="space-y-2">
-          <Label>字符集</Label>
-          <Input
-            value={(data.charset as string) || 'utf8mb4'}
-            onChange={(e) => onChange('charset', e.target.value)}
-            placeholder="utf8mb4"
+          <Label>最小连接数</Label>
+          <NumberInput
+            value={(data.poolMinSize as number) ?? 1}
+            onChange={(v) => onChange('poolMinSize', v)}
+            defaultValue={1}
+            min={0}
+            max={50}
           />
         </div>
         <div className="space-y-2">
-          <Label>连接名称</Label>
-          <Input
-            value={(data.connectionName as string) || 'default'}
-            onChange={(e) => onChange('connectionName', e.target.value)}
-            placeholder="default"
+          <Label>最大连接数</Label>
+          <NumberInput
+            value={(data.poolMaxSize as number) || 5}
+            onChange={(v) => onChange('poolMaxSize', v)}
+            defaultValue={5}
+            min={1}
+            max={50}
           />
-          <p className="text-xs text-muted-foreground">用于区分多个数据库连接</p>
         </div>
       </div>
+      <p className="text-xs text-muted-foreground">并行分支同时访问数据库时最多使用的连接数，超出时排队等待</p>
+      
+      <div className="grid grid-cols-2 gap-4">
+        {dbType === 'mysql' && (
+          <div className="space-y-2">
+            <Label>连接超时(秒)</Label>
+            <NumberInput
+              value={(data.connectTimeout as number) || 10}
+              onChange={(v) => onChange('connectTimeout', v)}
+              defaultValue={10}
+              min={1}
+              max={300}
+            />
+          </div>
+        )}
+        <div className="space-y-2">
+          <Label>查询超时(秒)</Label>
+          <NumberInput
+            value={(data.queryTimeout as number) || 0}
+            onChange={(v) => onChange('queryTimeout', v)}
+            defaultValue={0}
+            min={0}
+          />
+          <p className="text-xs text-muted-foreground">0 表示不限制，超时的语句会被终止</p>
+        </div>
+      </div>
+      
+      {dbType === 'mysql' && (
+        <>
+          <div className="flex items-center gap-2">
+            <input
+              type="checkbox"
+              id="preparedStatements"
+              checked={(data.preparedStatements as boolean) || false}
+              onChange={(e) => onChange('preparedStatements', e.target.checked)}
+              className="rounded"
+            />
+            <Label htmlFor="preparedStatements" className="cursor-pointer">使用预处理语句</Label>
+          </div>
+          <p className="text-xs text-muted-foreground">
+            带参数的语句在每个连接上只预处理一次，适合循环中反复执行同一条复杂查询（每次执行多一次往返）
+          </p>
+        </>
+      )}
+    </div>
+  )
+}
+
+// SQL 变量参数化配置
+function ParamBindingCheckbox({ data, onChange }: ConfigProps) {
+  return (
+    <div className="space-y-1">
+      <div className="flex items-center gap-2">
+        <input
+          type="checkbox"
+          id="paramBinding"
+          checked={(data.paramBinding as boolean) ?? true}
+          onChange={(e) => onChange('paramBinding', e.target.checked)}
+          className="rounded"
+        />
+        <Label htmlFor="paramBinding" className="cursor-pointer">变量作为参数传递</Label>
+      </div>
+      <p className="text-xs text-muted-foreground">
+        引号内的变量（如 '{'{关键词}'}'）和比较运算符后的变量（如 id = {'{编号}'}）由数据库驱动转义，文本中的引号不会破坏语句；表名等其他位置仍直接拼接
+      </p>
+    </div>
+  )
+}
+
+// 单个节点的查询超时配置
+function QueryTimeoutInput({ data, onChange }: ConfigProps) {
+  return (
+    <div className="space-y-2">
+      <Label>查询超时(秒)</Label>
+      <NumberInput
+        value={(data.queryTimeout as number) || 0}
+        onChange={(v) => onChange('queryTimeout', v)}
+        defaultValue={0}
+        min={0}
+      />
+      <p className="text-xs text-muted-foreground">0 表示使用连接的默认超时</p>
     </div>
   )
 }
@@ -153,6 +289,39 @@ export function DbQueryConfig({ data, onChange }: ConfigProps) {
         />
         <Label htmlFor="singleRow" className="cursor-pointer">只返回第一行</Label>
       </div>
+      
+      <ParamBindingCheckbox data={data} onChange={onChange} />
+      
+      {!data.singleRow && (
+        <div className="space-y-2">
+          <div className="flex items-center gap-2">
+            <input
+              type="checkbox"
+              id="streaming"
+              checked={(data.streaming as boolean) || false}
+              onChange={(e) => onChange('streaming', e.target.checked)}
+              className="rounded"
+            />
+            <Label htmlFor="streaming" className="cursor-pointer">流式读取（大结果集）</Label>
+          </div>
+          {!!data.streaming && (
+            <>
+              <NumberInput
+                value={(data.fetchSize as number) || 1000}
+                onChange={(v) => onChange('fetchSize', v)}
+                defaultValue={1000}
+                min={1}
+                max={100000}
+              />
+              <p className="text-xs text-muted-foreground">
+                结果保留在数据库端，每批读取上面设置的行数。变量只能交给「遍历列表」模块遍历一次，遍历期间占用一个连接
+              </p>
+            </>
+          )}
+        </div>
+      )}
+      
+      <QueryTimeoutInput data={data} onChange={onChange} />
     </div>
   )
 }
@@ -181,6 +350,8 @@ export function DbExecuteConfig({ data, onChange }: ConfigProps) {
         <p className="text-xs text-muted-foreground">可执行任意SQL语句，支持 {'{变量名}'}</p>
       </div>
       
+      <ParamBindingCheckbox data={data} onChange={onChange} />
+      
       <div className="space-y-2">
         <Label>影响行数保存到变量</Label>
         <Input
@@ -189,6 +360,8 @@ export function DbExecuteConfig({ data, onChange }: ConfigProps) {
           placeholder="affectedRows"
         />
       </div>
+      
+      <QueryTimeoutInput data={data} onChange={onChange} />
     </div>
   )
 }
@@ -245,6 +418,122 @@ export function DbInsertConfig({ data, onChange }: ConfigProps) {
   )
 }
 
+// 批量插入配置
+export function DbBulkInsertConfig({ data, onChange }: ConfigProps) {
+  const source = (data.source as string) || 'table'
+  const onDuplicate = (data.onDuplicate as string) || 'error'
+
+  return (
+    <div className="space-y-4">
+      <div className="space-y-2">
+        <Label>连接名称</Label>
+        <Input
+          value={(data.connectionName as string) || 'default'}
+          onChange={(e) => onChange('connectionName', e.target.value)}
+          placeholder="default"
+        />
+      </div>
+      
+      <div className="space-y-2">
+        <Label>表名</Label>
+        <VariableInput
+          value={(data.table as string) || ''}
+          onChange={(v) => onChange('table', v)}
+          placeholder="products"
+        />
+      </div>
+      
+      <div className="space-y-2">
+        <Label>数据来源</Label>
+        <Select
+          value={source}
+          onChange={(e) => onChange('source', e.target.value)}
+        >
+          <option value="table">数据表（采集的数据行）</option>
+          <option value="variable">列表变量</option>
+        </Select>
+      </div>
+      
+      {source === 'variable' && (
+        <div className="space-y-2">
+          <Label>列表变量名</Label>
+          <Input
+            value={(data.sourceVariable as string) || ''}
+            onChange={(e) => onChange('sourceVariable', e.target.value)}
+            placeholder="queryResult"
+          />
+          <p className="text-xs text-muted-foreground">列表元素为字典时按键名写入对应列</p>
+        </div>
+      )}
+      
+      <div className="space-y-2">
+        <Label>列名</Label>
+        <VariableInput
+          value={(data.columns as string) || ''}
+          onChange={(v) => onChange('columns', v)}
+          placeholder="留空写入所有列，多个用逗号分隔"
+        />
+      </div>
+      
+      <div className="space-y-2">
+        <Label>每批行数</Label>
+        <NumberInput
+          value={(data.batchSize as number) || 1000}
+          onChange={(v) => onChange('batchSize', v)}
+          defaultValue={1000}
+          min={1}
+          max={100000}
+        />
+      </div>
+      
+      <div className="space-y-2">
+        <Label>遇到重复键</Label>
+        <Select
+          value={onDuplicate}
+          onChange={(e) => onChange('onDuplicate', e.target.value)}
+        >
+          <option value="error">报错</option>
+          <option value="ignore">跳过该行 (INSERT IGNORE / OR IGNORE)</option>
+          <option value="update">更新已有行 (ON DUPLICATE KEY UPDATE / ON CONFLICT)</option>
+        </Select>
+      </div>
+      
+      {onDuplicate === 'update' && (
+        <div className="space-y-2">
+          <Label>更新的列</Label>
+          <VariableInput
+            value={(data.updateColumns as string) || ''}
+            onChange={(v) => onChange('updateColumns', v)}
+            placeholder="留空更新所有写入的列"
+          />
+        </div>
+      )}
+      
+      <div className="flex items-center gap-2">
+        <input
+          type="checkbox"
+          id="useTransaction"
+          checked={(data.useTransaction as boolean) ?? true}
+          onChange={(e) => onChange('useTransaction', e.target.checked)}
+          className="rounded"
+        />
+        <Label htmlFor="useTransaction" className="cursor-pointer">在一个事务中写入（失败时全部回滚）</Label>
+      </div>
+      
+      <div className="space-y-2">
+        <Label>写入行数保存到变量</Label>
+        <Input
+          value={(data.variableName as string) || ''}
+          onChange={(e) => onChange('variableName', e.target.value)}
+          placeholder="insertedRows"
+        />
+      </div>
+      
+      <QueryTimeoutInput data={data} onChange={onChange} />
+    </div>
+  )
+}
+
 // 更新数据配置
 export function DbUpdateConfig({ data, onChange }: ConfigProps) {
   return (
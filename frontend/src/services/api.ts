@@ -77,7 +77,16 @@ export const workflowApi = {
   }),
 
   // 执行工作流
-  execute: (id: string, options?: { headless?: boolean }) => request(`/workflows/${id}/execute`, {
+  execute: (id: string, options?: {
+    headless?: boolean
+    logLevel?: 'quiet' | 'normal' | 'debug'
+    branchIsolation?: 'shared' | 'variables' | 'page'
+    exportFormat?: 'excel' | 'csv' | 'parquet' | 'arrow' | 'ndjson' | 'ndjson_gzip' | 'ndjson_zstd'
+    sinkFormat?: 'csv' | 'ndjson' | 'parquet'
+    sinkPath?: string
+    sinkFsync?: 'none' | 'batch' | 'row'
+    sinkBatchRows?: number
+  }) => request(`/workflows/${id}/execute`, {
     method: 'POST',
     body: JSON.stringify(options || {}),
   }),
@@ -166,6 +175,7 @@ export const dataAssetApi = {
     size: number
     uploadedAt: string
     sheetNames: string[]
+    columnar?: 'pending' | 'ready' | 'failed'
   }>> => {
     try {
       const formData = new FormData()
@@ -196,6 +206,7 @@ export const dataAssetApi = {
     size: number
     uploadedAt: string
     sheetNames: string[]
+    columnar?: 'pending' | 'ready' | 'failed'
   }>>('/data-assets'),
 
   // 删除Excel文件资源
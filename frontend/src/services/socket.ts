@@ -25,6 +25,35 @@ const DATA_ROW_FLUSH_INTERVAL = 100 // 100ms 批量刷新间隔
 // 是否正在执行中（用于控制是否接收实时数据行）
 let isExecuting = false
 
+// 执行日志（后端日志管道批量发送）
+interface ExecutionLog {
+  id: string
+  timestamp: string
+  level: LogLevel
+  nodeId?: string
+  message: string
+  duration?: number
+  isUserLog?: boolean  // 是否是用户打印的日志（打印日志模块）
+  isSystemLog?: boolean  // 是否是系统日志（流程开始/结束等）
+}
+
+// 添加一条执行日志
+function addExecutionLog(log: ExecutionLog) {
+  const verboseLog = useWorkflowStore.getState().verboseLog
+  
+  // 简洁日志模式下，显示：用户日志、系统日志、错误日志
+  if (!verboseLog && !log.isUserLog && !log.isSystemLog && log.level !== 'error') {
+    return
+  }
+  
+  useWorkflowStore.getState().addLog({
+    level: log.level,
+    message: log.message,
+    nodeId: log.nodeId,
+    duration: log.duration,
+  })
+}
+
 // 刷新数据行缓冲区
 function flushDataRowBuffer() {
   if (dataRowBuffer.length > 0 && isExecuting) {
@@ -248,33 +277,15 @@ class SocketService {
     })
 
     // 日志消息
-    this.socket.on('execution:log', (data: {
-      workflowId: string
-      log: {
-        id: string
-        timestamp: string
-        level: LogLevel
-        nodeId?: string
-        message: string
-        duration?: number
-        isUserLog?: boolean  // 是否是用户打印的日志（打印日志模块）
-        isSystemLog?: boolean  // 是否是系统日志（流程开始/结束等）
-      }
-    }) => {
-      const verboseLog = useWorkflowStore.getState().verboseLog
-      const log = data.log
-      
-      // 简洁日志模式下，显示：用户日志、系统日志、错误日志
-      if (!verboseLog && !log.isUserLog && !log.isSystemLog && log.level !== 'error') {
-        return
+    this.socket.on('execution:log', (data: { workflowId: string; log: ExecutionLog }) => {
+      addExecutionLog(data.log)
+    })
+
+    // 批量日志消息
+    this.socket.on('execution:logs', (data: { workflowId: string; logs: ExecutionLog[] }) => {
+      for (const log of data.logs) {
+        addExecutionLog(log)
       }
-      
-      useWorkflowStore.getState().addLog({
-        level: log.level,
-        message: log.message,
-        nodeId: log.nodeId,
-        duration: log.duration,
-      })
     })
 
     // 变量更新
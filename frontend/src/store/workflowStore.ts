@@ -150,6 +150,7 @@ export const moduleTypeLabels: Record<ModuleType, string> = {
   hover_element: '悬停元素',
   input_text: '输入文本',
   get_element_info: '提取数据',
+  extract_list: '批量提取',
   wait: '固定等待',
   wait_element: '等待元素',
   close_page: '关闭网页',
@@ -203,6 +204,7 @@ export const moduleTypeLabels: Record<ModuleType, string> = {
   db_query: '查询数据',
   db_execute: '执行SQL',
   db_insert: '插入数据',
+  db_bulk_insert: '批量插入',
   db_update: '更新数据',
   db_delete: '删除数据',
   db_close: '关闭连接',
@@ -33,6 +33,22 @@ export interface GetElementInfoConfig extends ModuleConfig {
   columnName?: string
 }
 
+export interface ExtractListColumn {
+  name: string
+  selector?: string
+  attribute?: ElementAttribute | 'innerText' | 'outerHTML'
+  customAttribute?: string
+}
+
+export interface ExtractListConfig extends ModuleConfig {
+  rowSelector: string
+  columns: ExtractListColumn[]
+  variableName?: string
+  appendToTable?: boolean
+  maxRows?: number
+  waitTimeout?: number
+}
+
 export type WaitType = 'time' | 'selector' | 'navigation'
 
 export interface WaitConfig extends ModuleConfig {
@@ -145,6 +161,7 @@ export type AnyModuleConfig =
   | ClickElementConfig
   | InputTextConfig
   | GetElementInfoConfig
+  | ExtractListConfig
   | WaitConfig
   | ClosePageConfig
   | SelectDropdownConfig
@@ -12,6 +12,7 @@ export type ModuleType =
   | 'hover_element'
   | 'input_text'
   | 'get_element_info'
+  | 'extract_list'
   | 'wait'
   | 'wait_element'
   | 'close_page'
@@ -65,6 +66,7 @@ export type ModuleType =
   | 'db_query'
   | 'db_execute'
   | 'db_insert'
+  | 'db_bulk_insert'
   | 'db_update'
   | 'db_delete'
   | 'db_close'
@@ -108,6 +110,7 @@ export interface DataAsset {
   size: number
   uploadedAt: string
   sheetNames: string[]
+  columnar?: 'pending' | 'ready' | 'failed'  // 后台列式转换状态
 }
 
 // 工作流节点